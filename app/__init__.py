@@ -22,18 +22,38 @@ def create_app(test_config=None):
 
     with app.app_context():
         # Import models
-        from app.models import shipping
-        from app.models.model_setup import setup_models
+        from app.models import shipping, sequences
+        from app.models.model_setup import setup_models, create_schema_command
         
-        # Setup models and create tables
-        setup_models()
+        # Create the tables, unless the database already has this schema's fingerprint
+        setup_models(app.config.get('SCHEMA_AUTO_CREATE', True))
+        app.cli.add_command(create_schema_command)
 
         # Register blueprints
         from app.routes import main
         app.register_blueprint(main.bp)
 
-        from app.routes.crud import bp as crud_bp
+        if app.config.get('CRUD_ENGINE') == 'runtime':
+            # Serve the CRUD views from the JSON schema instead of the generated route modules
+            from app.utils.crud_engine import create_crud_engine
+            crud_bp, crud_routes = create_crud_engine(app.config['CRUD_SCHEMA'], app.config.get('CRUD_PAGINATION', 'offset'))
+        else:
+            from app.routes.crud import bp as crud_bp, routes as crud_routes
         app.register_blueprint(crud_bp, url_prefix='/crud')
+        app.extensions['crud_routes'] = crud_routes
+        # The JSON batch API writes through the CRUD routes' batch writers
+        from app.routes import api
+        app.register_blueprint(api.bp, url_prefix='/api')
+        # Load the views of the hot tables now; the others wait for their first request
+        crud_routes.preload(app.config.get('CRUD_PRELOAD', ()))
+
+        # Find which loaded list searches can use their full-text index, reading the schema only
+        from app.utils.search import probe_search
+        probe_search(db.engine)
+
+        # Cache the reference tables, which the forms and list views read instead of querying
+        from app.utils.reference import load_reference_tables
+        load_reference_tables()
 
         # Configure context processors
         @app.context_processor
@@ -1,10 +1,154 @@
+import hashlib
+from typing import List
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import UniqueConstraint, inspect, select
+from sqlalchemy.exc import DatabaseError, OperationalError, ProgrammingError
+
 from app import db
+from config import Config
 from app.models.shipping import *
+from app.models import shipping
+
+# Where create_all records the fingerprint of the schema it created
+schema_info = db.Table(
+    'schema_info',
+    db.Column('name', db.String(255), primary_key=True),
+    db.Column('value', db.String(255), nullable=False),
+)
+
+def schema_fingerprint() -> str:
+    """
+    Fingerprint of the tables the models define: the fingerprint the DSL
+    pipeline embedded in the generated models, and the columns and indexes of
+    every table, which covers the models written by hand. Computed from the
+    model classes alone, without touching the database.
+    """
+    digest = hashlib.sha256(shipping.SCHEMA_FINGERPRINT.encode())
+    for table in sorted(db.metadata.tables.values(), key=lambda table: table.name):
+        columns = ','.join(f'{column.name}:{column.type!r}' for column in table.columns)
+        indexes = ','.join(sorted(index.name for index in table.indexes))
+        digest.update(f'\n{table.name}({columns})[{indexes}]'.encode())
+    return digest.hexdigest()
+
+def stored_fingerprint():
+    """Return the fingerprint recorded in the database, or None before the tables are first created."""
+    try:
+        with db.engine.connect() as connection:
+            return connection.execute(
+                select(schema_info.c.value).where(schema_info.c.name == 'fingerprint')
+            ).scalar()
+    except (OperationalError, ProgrammingError):
+        return None
+
+def create_search_indexes(rebuild: bool = False):
+    """
+    Create the indexes, FTS tables and triggers of every model's list search,
+    planned from CRUD_SCHEMA without importing any route module. rebuild
+    recreates the FTS tables, for rows loaded without their triggers.
+    """
+    from app.utils.crud_engine import schema_search_engines
+    from app.utils.search import setup_search
+
+    setup_search(db.engine, rebuild, schema_search_engines(current_app.config.get('CRUD_SCHEMA', Config.CRUD_SCHEMA)))
 
-def setup_models():
+def create_missing_indexes() -> List[str]:
     """
-    Set up model relationships after all models are defined.
-    This is now simplified since relationships are generated from DSL.
+    Create the indexes of the models that tables created before them lack,
+    as create_all only creates the indexes of the tables it creates. Each is
+    created in its own transaction. Returns a description of each index that
+    could not be created, such as a unique index over duplicate rows.
+    """
+    failures = []
+    inspector = inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            if index.name in existing:
+                continue
+            try:
+                with db.engine.begin() as connection:
+                    index.create(connection)
+            except DatabaseError as e:
+                failures.append(f'{table.name}: index {index.name} could not be created: {e.orig}')
+    return failures
+
+def unapplied_changes() -> List[str]:
+    """
+    Describe the columns and unique constraints of the models that the
+    database's tables lack. create_all does not alter existing tables, so
+    these need a migration.
+    """
+    changes = []
+    inspector = inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        columns = {column['name'] for column in inspector.get_columns(table.name)}
+        changes.extend(
+            f'{table.name}: column {column.name} is missing'
+            for column in table.columns if column.name not in columns
+        )
+        unique = {tuple(constraint['column_names']) for constraint in inspector.get_unique_constraints(table.name)}
+        unique.update(tuple(index['column_names']) for index in inspector.get_indexes(table.name) if index['unique'])
+        wanted = [(column.name,) for column in table.columns if column.unique] + [
+            tuple(column.name for column in constraint.columns)
+            for constraint in table.constraints if isinstance(constraint, UniqueConstraint)
+        ]
+        changes.extend(
+            f'{table.name}: unique constraint on ({", ".join(names)}) is missing'
+            for names in wanted if names not in unique
+        )
+    return changes
+
+def create_schema() -> List[str]:
+    """
+    Create the tables that do not exist yet, the indexes missing from the
+    tables that do, and the indexes of every model's list search, then record
+    the fingerprint of the schema. When the existing tables lack columns or
+    unique constraints, or an index cannot be created, the fingerprint is
+    not recorded and those changes are returned, as they need a migration.
     """
-    # Create tables
     db.create_all()
+    changes = create_missing_indexes() + unapplied_changes()
+    create_search_indexes()
+    if changes:
+        return changes
+    with db.engine.begin() as connection:
+        connection.execute(schema_info.delete().where(schema_info.c.name == 'fingerprint'))
+        connection.execute(schema_info.insert().values(name='fingerprint', value=schema_fingerprint()))
+    return []
+
+def describe_changes(changes: List[str]) -> str:
+    """Describe the schema changes create_schema could not apply."""
+    return 'The database schema needs a migration; these changes were not applied:\n' + ''.join(
+        f'  {change}\n' for change in changes
+    )
+
+def setup_models(create: bool = True) -> bool:
+    """
+    Make sure the database has the tables of the models. When the fingerprint
+    stored in the database matches the models this is a single query and no
+    DDL; otherwise the tables and search indexes are created, unless create is False, in which
+    case they are left for the create-schema command. Returns whether the
+    schema is current, which it is not while changes need a migration.
+    """
+    if stored_fingerprint() == schema_fingerprint():
+        return True
+    if not create:
+        click.echo('The database schema is out of date; run "flask create-schema" to update it', err=True)
+        return False
+    changes = create_schema()
+    if changes:
+        click.echo(describe_changes(changes), err=True, nl=False)
+        return False
+    return True
+
+@click.command('create-schema')
+@with_appcontext
+def create_schema_command():
+    """Create the tables and indexes missing from the database and record the schema fingerprint."""
+    changes = create_schema()
+    if changes:
+        raise click.ClickException(describe_changes(changes).rstrip())
+    click.echo(f'Schema {schema_fingerprint()[:12]} is current')
@@ -0,0 +1,11 @@
+from app import db
+
+class SequenceCounter(db.Model):
+    """
+    The next unreserved value of each named sequence, such as the bill of
+    lading numbers of one voyage, rotation and port pair. Not part of the DSL
+    schema; app.utils.sequences reserves blocks of values from it.
+    """
+    __tablename__ = 'sequence_counter'
+    name = db.Column(db.String(255), primary_key=True)
+    next_value = db.Column(db.Integer, nullable=False)
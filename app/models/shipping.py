@@ -47,6 +47,7 @@ class S002_LineItem(db.Model):
 
 class S003_Commodity(db.Model):
     __tablename__ = 's003_commodity'
+    __reference__ = True
     id = db.Column(db.Integer, primary_key=True, autoincrement=True, nullable=False)
     name = db.Column(db.String(255))
     description = db.Column(db.String(255))
@@ -57,6 +58,7 @@ class S003_Commodity(db.Model):
 
 class S004_PackType(db.Model):
     __tablename__ = 's004_packtype'
+    __reference__ = True
     id = db.Column(db.Integer, primary_key=True, autoincrement=True, nullable=False)
     name = db.Column(db.String(255))
     description = db.Column(db.String(255))
@@ -87,6 +89,10 @@ class S006_ContainerHistory(db.Model):
     damage = db.Column(db.String(255))
     updated = db.Column(db.DateTime)
 
+    __table_args__ = (
+        db.Index('ix_s006_containerhistory_container_id_updated', 'container_id', db.text('updated DESC')),
+    )
+
     container = db.relationship('S005_Container', foreign_keys=[container_id], back_populates='container_histories')
     port = db.relationship('S012_Port', foreign_keys=[port_id])
     client = db.relationship('S015_Client', foreign_keys=[client_id])
@@ -95,6 +101,7 @@ class S006_ContainerHistory(db.Model):
 
 class S007_ContainerStatus(db.Model):
     __tablename__ = 's007_containerstatus'
+    __reference__ = True
     id = db.Column(db.Integer, primary_key=True, autoincrement=True, nullable=False)
     name = db.Column(db.String(255))
     description = db.Column(db.String(255))
@@ -104,6 +111,7 @@ class S007_ContainerStatus(db.Model):
 
 class S008_ShippingCompany(db.Model):
     __tablename__ = 's008_shippingcompany'
+    __reference__ = True
     id = db.Column(db.Integer, primary_key=True, autoincrement=True, nullable=False)
     name = db.Column(db.String(255))
 
@@ -142,6 +150,10 @@ class S011_Leg(db.Model):
     eta = db.Column(db.DateTime)
     etd = db.Column(db.DateTime)
 
+    __table_args__ = (
+        db.Index('ix_s011_leg_voyage_id_leg_number', 'voyage_id', 'leg_number', unique=True),
+    )
+
     voyage = db.relationship('S010_Voyage', foreign_keys=[voyage_id], back_populates='legs')
     port = db.relationship('S012_Port', foreign_keys=[port_id], back_populates='legs')
 
@@ -184,6 +196,7 @@ class S013_PortPair(db.Model):
 
 class S014_Country(db.Model):
     __tablename__ = 's014_country'
+    __reference__ = True
     id = db.Column(db.Integer, primary_key=True, autoincrement=True, nullable=False)
     name = db.Column(db.String(255))
 
@@ -229,3 +242,7 @@ class S017_Rate(db.Model):
     commodity = db.relationship('S003_Commodity', foreign_keys=[commodity_id], back_populates='rates')
     pack_type = db.relationship('S004_PackType', foreign_keys=[pack_type_id], back_populates='rates')
     client = db.relationship('S015_Client', foreign_keys=[client_id], back_populates='rates')
+
+
+# Schema fingerprint of the models above, stored in the database when their tables are created
+SCHEMA_FINGERPRINT = '9830782dfa6adcf238346ad5ac5b14f75b6f7725022d14e88041f23dd8838b45'
@@ -0,0 +1,101 @@
+import sys
+
+import pytest
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import Engine
+
+from app import create_app, db
+from app.models import model_setup
+from app.utils.reference import reference_cache
+
+@pytest.fixture
+def database(tmp_path):
+    return f"sqlite:///{tmp_path / 'shipping.db'}"
+
+def start(database, **config):
+    reference_cache.clear()
+    return create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": database, **config})
+
+def test_tables_are_only_created_when_the_fingerprint_changes(database, monkeypatch):
+    """Test that a second start on the same database runs no DDL, and a changed schema does"""
+    app = start(database)
+    with app.app_context():
+        assert model_setup.stored_fingerprint() == model_setup.schema_fingerprint()
+        assert "s001_manifest" in inspect(db.engine).get_table_names()
+
+    calls = []
+    monkeypatch.setattr(db, "create_all", lambda *args, **kwargs: calls.append(args))
+    start(database)
+    assert calls == []
+
+    monkeypatch.setattr(model_setup.shipping, "SCHEMA_FINGERPRINT", "changed")
+    start(database)
+    assert len(calls) == 1
+
+def test_schema_changes_wait_for_the_command_without_auto_create(database):
+    """Test that SCHEMA_AUTO_CREATE=False leaves a new database empty until create-schema runs"""
+    app = start(database, SCHEMA_AUTO_CREATE=False)
+    with app.app_context():
+        assert "s001_manifest" not in inspect(db.engine).get_table_names()
+        assert model_setup.stored_fingerprint() is None
+
+    result = app.test_cli_runner().invoke(args=["create-schema"])
+    assert result.exit_code == 0, result.output
+    with app.app_context():
+        assert "s001_manifest" in inspect(db.engine).get_table_names()
+        assert model_setup.setup_models(create=False)
+        assert db.session.execute(text("SELECT count(*) FROM schema_info")).scalar() == 1
+
+def test_startup_and_first_requests_only_read_the_search_schema(database):
+    """Test that search indexes are created with the schema, and later starts and loads run no DDL"""
+    start(database)
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(Engine, "before_cursor_execute", listener)
+    try:
+        app = start(database)
+        client = app.test_client()
+        assert client.get("/crud/s015_client/", query_string={"search": "acme"}).status_code == 200
+    finally:
+        event.remove(Engine, "before_cursor_execute", listener)
+    assert statements
+    assert not [statement for statement in statements if statement.split()[0] in ("CREATE", "DROP", "INSERT")]
+    with app.app_context():
+        assert "s015_client_fts" in inspect(db.engine).get_table_names()
+        assert "s015_client" in app.extensions["crud_routes"].loaded()
+        assert sys.modules["app.routes.crud.s015_client"].search_engine.indexed
+
+def test_indexes_missing_from_existing_tables_are_created(database):
+    """Test that an index added to a model is created on a table made before it, then the schema recorded"""
+    app = start(database)
+    with app.app_context():
+        with db.engine.begin() as connection:
+            connection.execute(text("DROP INDEX ix_s011_leg_voyage_id_leg_number"))
+            connection.execute(text("DELETE FROM schema_info"))
+
+    app = start(database)
+    with app.app_context():
+        indexes = {index["name"]: index for index in inspect(db.engine).get_indexes("s011_leg")}
+        assert indexes["ix_s011_leg_voyage_id_leg_number"]["unique"]
+        assert model_setup.stored_fingerprint() == model_setup.schema_fingerprint()
+
+def test_changes_create_all_cannot_apply_are_listed_and_not_recorded(database):
+    """Test that a missing column or an index over duplicate rows leaves the schema out of date"""
+    app = start(database)
+    with app.app_context():
+        with db.engine.begin() as connection:
+            connection.execute(text("DROP INDEX ix_s011_leg_voyage_id_leg_number"))
+            connection.execute(text("INSERT INTO s011_leg (voyage_id, leg_number) VALUES (1, 1), (1, 1)"))
+            connection.execute(text("ALTER TABLE s017_rate DROP COLUMN effective"))
+            connection.execute(text("DELETE FROM schema_info"))
+
+    app = start(database)
+    with app.app_context():
+        assert model_setup.stored_fingerprint() is None
+        assert not model_setup.setup_models(create=False)
+
+    result = app.test_cli_runner().invoke(args=["create-schema"])
+    assert result.exit_code == 1
+    assert "s017_rate: column effective is missing" in result.output
+    assert "s011_leg: index ix_s011_leg_voyage_id_leg_number could not be created" in result.output
@@ -0,0 +1,30 @@
+from flask import Blueprint, current_app, request, jsonify
+from sqlalchemy.exc import IntegrityError
+
+from app.utils.batch import DEFAULT_MAX_BATCH_SIZE, BatchError, BatchTooLarge
+
+bp = Blueprint('api', __name__)
+
+@bp.route('/<table>/batch', methods=['POST'])
+def batch(table):
+    """
+    Write a JSON batch of creates, updates by id and deletes by id of a
+    table's rows in one transaction, through the batch writer of its CRUD
+    routes. The batch is written whole, or not at all with the errors of
+    each failed item.
+    """
+    crud_routes = current_app.extensions['crud_routes']
+    if table not in crud_routes.routes:
+        return jsonify(error=f'No table {table}'), 404
+    writer = crud_routes.batch_writer(table)
+    try:
+        result = writer.write(request.get_json(silent=True),
+                              current_app.config.get('API_MAX_BATCH_SIZE', DEFAULT_MAX_BATCH_SIZE))
+    except BatchTooLarge as e:
+        return jsonify(error=str(e)), 413
+    except BatchError as e:
+        return jsonify(error=str(e), errors=e.errors), 400
+    except IntegrityError as e:
+        # Raised by the statements, which cannot say which of their rows failed
+        return jsonify(error=str(e.orig)), 409
+    return jsonify(result)
@@ -1,38 +1,49 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, Response
-from app.models.shipping import S001_Manifest, S015_Client, S009_Vessel
+from app.models.shipping import S001_Manifest, S009_Vessel, S010_Voyage, S012_Port, S015_Client, S016_User
 from app import db
-from sqlalchemy import or_, func
-from app.utils.relationships import get_related_data, create_s001_manifest, update_s001_manifest, delete_s001_manifest
+from app.utils.search import SearchEngine
+from app.utils.reference import LOOKUP_LIMIT, lookup_options
+from app.utils.query import many_to_one_options
+from app.utils.relationships import s001_manifest_helpers
+from app.utils.relationships.s001_manifest_helpers import get_related_data
+from app.utils.batch import BatchWriter
 
 bp = Blueprint('s001_manifest', __name__)
 
+# Many-to-one relationships shown in the list view, loaded with each page
+LIST_FOREIGN_KEYS = ['shipper_id', 'consignee_id', 'vessel_id', 'voyage_id']
+
+# Foreign keys the form looks up as the user types: {field: (related model, display column)}
+LOOKUPS = {
+    'shipper_id': (S015_Client, 'name'),
+    'consignee_id': (S015_Client, 'name'),
+    'vessel_id': (S009_Vessel, 'name'),
+    'voyage_id': (S010_Voyage, 'name'),
+    'port_of_loading_id': (S012_Port, 'name'),
+    'port_of_discharge_id': (S012_Port, 'name'),
+    'user_id': (S016_User, 'name'),
+}
+
+# Writes the creates, updates and deletes posted to /api/s001_manifest/batch as bulk statements
+batch_writer = BatchWriter(S001_Manifest, s001_manifest_helpers.form_binder)
+
+# Search plan from the schema's column types, so each search term becomes predicates an index can serve
+search_engine = SearchEngine(
+    S001_Manifest,
+    text_fields=['bill_of_lading'],
+    prefix_fields=['bill_of_lading'],
+    numeric_fields=['id'],
+    date_fields=[],
+    related_fields={
+        'shipper_id': (S015_Client, 'name'),
+        'consignee_id': (S015_Client, 'name'),
+        'vessel_id': (S009_Vessel, 'name'),
+    },
+)
+
 def get_search_filter(model, search_term):
     '''Return case-insensitive search filter for the model.'''
-    if not search_term:
-        return None
-    
-    # Convert search term to lowercase for case-insensitive search
-    search_term = search_term.lower()
-    
-    conditions = []
-    
-    # Search in text fields
-    text_fields = ['id', 'bill_of_lading', 'shipper_id', 'consignee_id', 'vessel_id']
-    for field in text_fields:
-        if hasattr(model, field):
-            if field.endswith('_id'):
-                # Handle relationship fields
-                if field == 'shipper_id':
-                    conditions.append(model.shipper.has(func.lower(S015_Client.name).like(f'%{{search_term}}%')))
-                elif field == 'consignee_id':
-                    conditions.append(model.consignee.has(func.lower(S015_Client.name).like(f'%{{search_term}}%')))
-                elif field == 'vessel_id':
-                    conditions.append(model.vessel.has(func.lower(S009_Vessel.name).like(f'%{{search_term}}%')))
-            else:
-                # Handle regular fields
-                conditions.append(func.lower(getattr(model, field)).like(f'%{{search_term}}%'))
-    
-    return or_(*conditions) if conditions else None
+    return search_engine.filter(search_term)
 
 @bp.route('/')
 def list_s001_manifest():
@@ -44,14 +55,8 @@ def list_s001_manifest():
     # Build query with eager loading of relationships
     query = S001_Manifest.query
     
-    query = query.options(
-        db.joinedload(S001_Manifest.shipper),
-        db.joinedload(S001_Manifest.consignee),
-        db.joinedload(S001_Manifest.vessel),
-        db.joinedload(S001_Manifest.voyage),
-        db.joinedload(S001_Manifest.port_of_loading),
-        db.joinedload(S001_Manifest.port_of_discharge)
-    )
+    # Join the related rows into the page query so rendering them costs no extra queries
+    query = query.options(*many_to_one_options(S001_Manifest, LIST_FOREIGN_KEYS))
     
     # Apply search filter if provided
     search_filter = get_search_filter(S001_Manifest, search)
@@ -80,7 +85,7 @@ def list_s001_manifest():
 def create_s001_manifest():
     if request.method == 'POST':
         try:
-            success, item = create_s001_manifest(request.form)
+            success, item = s001_manifest_helpers.create_s001_manifest(request.form)
             if success:
                 return redirect(url_for("crud.s001_manifest.list_s001_manifest")) 
         except Exception as e:
@@ -102,7 +107,7 @@ def edit_s001_manifest(id):
     
     if request.method == 'POST':
         try:
-            if update_s001_manifest(item, request.form):
+            if s001_manifest_helpers.update_s001_manifest(item, request.form):
                 return redirect(url_for("crud.s001_manifest.list_s001_manifest"))
         except Exception as e:
             db.session.rollback()
@@ -111,20 +116,30 @@ def edit_s001_manifest(id):
                                 edit=True, 
                                 item=item,
                                 form_action=url_for('crud.s001_manifest.edit_s001_manifest', id=id)
-                                , **get_related_data())
+                                , **get_related_data(item))
     
     return render_template('crud/s001_manifest/form.html', 
                          edit=True, 
                          item=item,
                          form_action=url_for('crud.s001_manifest.edit_s001_manifest', id=id)
-                         , **get_related_data())
+                         , **get_related_data(item))
 
 @bp.route('/<int:id>/delete', methods=['DELETE'])
 def delete_s001_manifest(id):
     try:
         item = S001_Manifest.query.get_or_404(id)
-        success = delete_s001_manifest(item)
+        success = s001_manifest_helpers.delete_s001_manifest(item)
         return '', 204 if success else 500
     except Exception as e:
         db.session.rollback()
         return str(e), 500
+
+@bp.route('/lookup/<field>')
+def lookup_s001_manifest(field):
+    '''Return the rows a foreign key field can reference whose display column starts with q, as JSON.'''
+    if field not in LOOKUPS:
+        return jsonify(error=f'No lookup for {field}'), 404
+    related_model, label = LOOKUPS[field]
+    options = lookup_options(related_model, label, request.args.get('q', ''),
+                             request.args.get('limit', LOOKUP_LIMIT, type=int))
+    return jsonify([option._asdict() for option in options])
@@ -1,38 +1,45 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, Response
-from app.models.shipping import S002_LineItem, S015_Client, S009_Vessel
+from app.models.shipping import S002_LineItem, S001_Manifest, S003_Commodity, S004_PackType, S005_Container, S016_User
 from app import db
-from sqlalchemy import or_, func
-from app.utils.relationships import get_related_data, create_s002_lineitem, update_s002_lineitem, delete_s002_lineitem
+from app.utils.search import SearchEngine
+from app.utils.reference import LOOKUP_LIMIT, lookup_options
+from app.utils.query import many_to_one_options
+from app.utils.relationships import s002_lineitem_helpers
+from app.utils.relationships.s002_lineitem_helpers import get_related_data
+from app.utils.batch import BatchWriter
 
 bp = Blueprint('s002_lineitem', __name__)
 
+# Many-to-one relationships shown in the list view, loaded with each page
+LIST_FOREIGN_KEYS = ['manifest_id']
+
+# Foreign keys the form looks up as the user types: {field: (related model, display column)}
+LOOKUPS = {
+    'manifest_id': (S001_Manifest, 'bill_of_lading'),
+    'pack_type_id': (S004_PackType, 'name'),
+    'commodity_id': (S003_Commodity, 'name'),
+    'container_id': (S005_Container, 'number'),
+    'user_id': (S016_User, 'name'),
+}
+
+# Writes the creates, updates and deletes posted to /api/s002_lineitem/batch as bulk statements
+batch_writer = BatchWriter(S002_LineItem, s002_lineitem_helpers.form_binder)
+
+# Search plan from the schema's column types, so each search term becomes predicates an index can serve
+search_engine = SearchEngine(
+    S002_LineItem,
+    text_fields=['description'],
+    prefix_fields=[],
+    numeric_fields=['id', 'quantity', 'weight'],
+    date_fields=[],
+    related_fields={
+        'manifest_id': (S001_Manifest, 'bill_of_lading'),
+    },
+)
+
 def get_search_filter(model, search_term):
     '''Return case-insensitive search filter for the model.'''
-    if not search_term:
-        return None
-    
-    # Convert search term to lowercase for case-insensitive search
-    search_term = search_term.lower()
-    
-    conditions = []
-    
-    # Search in text fields
-    text_fields = ['id', 'manifest_id', 'description', 'quantity', 'weight']
-    for field in text_fields:
-        if hasattr(model, field):
-            if field.endswith('_id'):
-                # Handle relationship fields
-                if field == 'shipper_id':
-                    conditions.append(model.shipper.has(func.lower(S015_Client.name).like(f'%{{search_term}}%')))
-                elif field == 'consignee_id':
-                    conditions.append(model.consignee.has(func.lower(S015_Client.name).like(f'%{{search_term}}%')))
-                elif field == 'vessel_id':
-                    conditions.append(model.vessel.has(func.lower(S009_Vessel.name).like(f'%{{search_term}}%')))
-            else:
-                # Handle regular fields
-                conditions.append(func.lower(getattr(model, field)).like(f'%{{search_term}}%'))
-    
-    return or_(*conditions) if conditions else None
+    return search_engine.filter(search_term)
 
 @bp.route('/')
 def list_s002_lineitem():
@@ -44,14 +51,8 @@ def list_s002_lineitem():
     # Build query with eager loading of relationships
     query = S002_LineItem.query
     
-    query = query.options(
-        db.joinedload(S002_LineItem.shipper),
-        db.joinedload(S002_LineItem.consignee),
-        db.joinedload(S002_LineItem.vessel),
-        db.joinedload(S002_LineItem.voyage),
-        db.joinedload(S002_LineItem.port_of_loading),
-        db.joinedload(S002_LineItem.port_of_discharge)
-    )
+    # Join the related rows into the page query so rendering them costs no extra queries
+    query = query.options(*many_to_one_options(S002_LineItem, LIST_FOREIGN_KEYS))
     
     # Apply search filter if provided
     search_filter = get_search_filter(S002_LineItem, search)
@@ -80,7 +81,7 @@ def list_s002_lineitem():
 def create_s002_lineitem():
     if request.method == 'POST':
         try:
-            success, item = create_s002_lineitem(request.form)
+            success, item = s002_lineitem_helpers.create_s002_lineitem(request.form)
             if success:
                 return redirect(url_for("crud.s002_lineitem.list_s002_lineitem")) 
         except Exception as e:
@@ -102,7 +103,7 @@ def edit_s002_lineitem(id):
     
     if request.method == 'POST':
         try:
-            if update_s002_lineitem(item, request.form):
+            if s002_lineitem_helpers.update_s002_lineitem(item, request.form):
                 return redirect(url_for("crud.s002_lineitem.list_s002_lineitem"))
         except Exception as e:
             db.session.rollback()
@@ -111,20 +112,30 @@ def edit_s002_lineitem(id):
                                 edit=True, 
                                 item=item,
                                 form_action=url_for('crud.s002_lineitem.edit_s002_lineitem', id=id)
-                                , **get_related_data())
+                                , **get_related_data(item))
     
     return render_template('crud/s002_lineitem/form.html', 
                          edit=True, 
                          item=item,
                          form_action=url_for('crud.s002_lineitem.edit_s002_lineitem', id=id)
-                         , **get_related_data())
+                         , **get_related_data(item))
 
 @bp.route('/<int:id>/delete', methods=['DELETE'])
 def delete_s002_lineitem(id):
     try:
         item = S002_LineItem.query.get_or_404(id)
-        success = delete_s002_lineitem(item)
+        success = s002_lineitem_helpers.delete_s002_lineitem(item)
         return '', 204 if success else 500
     except Exception as e:
         db.session.rollback()
         return str(e), 500
+
+@bp.route('/lookup/<field>')
+def lookup_s002_lineitem(field):
+    '''Return the rows a foreign key field can reference whose display column starts with q, as JSON.'''
+    if field not in LOOKUPS:
+        return jsonify(error=f'No lookup for {field}'), 404
+    related_model, label = LOOKUPS[field]
+    options = lookup_options(related_model, label, request.args.get('q', ''),
+                             request.args.get('limit', LOOKUP_LIMIT, type=int))
+    return jsonify([option._asdict() for option in options])
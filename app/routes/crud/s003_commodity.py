@@ -1,37 +1,34 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, Response
-from app.models.shipping import S003_Commodity, S015_Client, S009_Vessel
+from app.models.shipping import S003_Commodity
 from app import db
-from sqlalchemy import or_, func
+from app.utils.search import SearchEngine
+from app.utils.forms import FormBinder, coerce_string
+from app.utils.batch import BatchWriter
 
 bp = Blueprint('s003_commodity', __name__)
 
+# Coerces each posted field by its schema type, in one pass, before any is set
+form_binder = FormBinder({
+    'name': coerce_string,
+    'description': coerce_string,
+})
+
+# Writes the creates, updates and deletes posted to /api/s003_commodity/batch as bulk statements
+batch_writer = BatchWriter(S003_Commodity, form_binder)
+
+# Search plan from the schema's column types, so each search term becomes predicates an index can serve
+search_engine = SearchEngine(
+    S003_Commodity,
+    text_fields=['name', 'description'],
+    prefix_fields=['name'],
+    numeric_fields=['id'],
+    date_fields=[],
+    related_fields={},
+)
+
 def get_search_filter(model, search_term):
     '''Return case-insensitive search filter for the model.'''
-    if not search_term:
-        return None
-    
-    # Convert search term to lowercase for case-insensitive search
-    search_term = search_term.lower()
-    
-    conditions = []
-    
-    # Search in text fields
-    text_fields = ['id', 'name', 'description']
-    for field in text_fields:
-        if hasattr(model, field):
-            if field.endswith('_id'):
-                # Handle relationship fields
-                if field == 'shipper_id':
-                    conditions.append(model.shipper.has(func.lower(S015_Client.name).like(f'%{{search_term}}%')))
-                elif field == 'consignee_id':
-                    conditions.append(model.consignee.has(func.lower(S015_Client.name).like(f'%{{search_term}}%')))
-                elif field == 'vessel_id':
-                    conditions.append(model.vessel.has(func.lower(S009_Vessel.name).like(f'%{{search_term}}%')))
-            else:
-                # Handle regular fields
-                conditions.append(func.lower(getattr(model, field)).like(f'%{{search_term}}%'))
-    
-    return or_(*conditions) if conditions else None
+    return search_engine.filter(search_term)
 
 @bp.route('/')
 def list_s003_commodity():
@@ -71,12 +68,7 @@ def list_s003_commodity():
 def create_s003_commodity():
     if request.method == 'POST':
         try:
-            item = S003_Commodity()
-            
-            if 'name' in request.form:
-                item.name = request.form['name']
-            if 'description' in request.form:
-                item.description = request.form['description']
+            item = form_binder.bind(S003_Commodity(), request.form, create=True)
             db.session.add(item)
             db.session.commit()
             flash('Created successfully', 'success')
@@ -100,11 +92,7 @@ def edit_s003_commodity(id):
     
     if request.method == 'POST':
         try:
-            
-            if 'name' in request.form:
-                item.name = request.form['name']
-            if 'description' in request.form:
-                item.description = request.form['description']
+            form_binder.bind(item, request.form)
             db.session.commit()
             flash('Updated successfully', 'success')
             return redirect(url_for("crud.s003_commodity.list_s003_commodity"))
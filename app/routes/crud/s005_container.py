@@ -1,37 +1,47 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, Response
-from app.models.shipping import S005_Container, S015_Client, S009_Vessel
+from app.models.shipping import S005_Container, S012_Port
 from app import db
-from sqlalchemy import or_, func
+from app.utils.search import SearchEngine
+from app.utils.reference import LOOKUP_LIMIT, lookup_options
+from app.utils.query import many_to_one_options
+from app.utils.forms import FormBinder, coerce_datetime, coerce_integer, coerce_string
+from app.utils.batch import BatchWriter
 
 bp = Blueprint('s005_container', __name__)
 
+# Many-to-one relationships shown in the list view, loaded with each page
+LIST_FOREIGN_KEYS = ['port_id']
+
+# Foreign keys the form looks up as the user types: {field: (related model, display column)}
+LOOKUPS = {
+    'port_id': (S012_Port, 'name'),
+}
+
+# Coerces each posted field by its schema type, in one pass, before any is set
+form_binder = FormBinder({
+    'number': coerce_string,
+    'port_id': coerce_integer,
+    'updated': coerce_datetime,
+}, defaults=['updated'])
+
+# Writes the creates, updates and deletes posted to /api/s005_container/batch as bulk statements
+batch_writer = BatchWriter(S005_Container, form_binder)
+
+# Search plan from the schema's column types, so each search term becomes predicates an index can serve
+search_engine = SearchEngine(
+    S005_Container,
+    text_fields=['number'],
+    prefix_fields=['number'],
+    numeric_fields=['id'],
+    date_fields=['updated'],
+    related_fields={
+        'port_id': (S012_Port, 'name'),
+    },
+)
+
 def get_search_filter(model, search_term):
     '''Return case-insensitive search filter for the model.'''
-    if not search_term:
-        return None
-    
-    # Convert search term to lowercase for case-insensitive search
-    search_term = search_term.lower()
-    
-    conditions = []
-    
-    # Search in text fields
-    text_fields = ['id', 'number', 'port_id', 'updated']
-    for field in text_fields:
-        if hasattr(model, field):
-            if field.endswith('_id'):
-                # Handle relationship fields
-                if field == 'shipper_id':
-                    conditions.append(model.shipper.has(func.lower(S015_Client.name).like(f'%{{search_term}}%')))
-                elif field == 'consignee_id':
-                    conditions.append(model.consignee.has(func.lower(S015_Client.name).like(f'%{{search_term}}%')))
-                elif field == 'vessel_id':
-                    conditions.append(model.vessel.has(func.lower(S009_Vessel.name).like(f'%{{search_term}}%')))
-            else:
-                # Handle regular fields
-                conditions.append(func.lower(getattr(model, field)).like(f'%{{search_term}}%'))
-    
-    return or_(*conditions) if conditions else None
+    return search_engine.filter(search_term)
 
 @bp.route('/')
 def list_s005_container():
@@ -43,6 +53,8 @@ def list_s005_container():
     # Build query with eager loading of relationships
     query = S005_Container.query
     
+    # Join the related rows into the page query so rendering them costs no extra queries
+    query = query.options(*many_to_one_options(S005_Container, LIST_FOREIGN_KEYS))
     
     # Apply search filter if provided
     search_filter = get_search_filter(S005_Container, search)
@@ -71,14 +83,7 @@ def list_s005_container():
 def create_s005_container():
     if request.method == 'POST':
         try:
-            item = S005_Container()
-            
-            if 'number' in request.form:
-                item.number = request.form['number']
-            if 'port_id' in request.form:
-                item.port_id = request.form['port_id']
-            if 'updated' in request.form:
-                item.updated = request.form['updated']
+            item = form_binder.bind(S005_Container(), request.form, create=True)
             db.session.add(item)
             db.session.commit()
             flash('Created successfully', 'success')
@@ -102,13 +107,7 @@ def edit_s005_container(id):
     
     if request.method == 'POST':
         try:
-            
-            if 'number' in request.form:
-                item.number = request.form['number']
-            if 'port_id' in request.form:
-                item.port_id = request.form['port_id']
-            if 'updated' in request.form:
-                item.updated = request.form['updated']
+            form_binder.bind(item, request.form)
             db.session.commit()
             flash('Updated successfully', 'success')
             return redirect(url_for("crud.s005_container.list_s005_container"))
@@ -138,3 +137,13 @@ def delete_s005_container(id):
     except Exception as e:
         db.session.rollback()
         return str(e), 500
+
+@bp.route('/lookup/<field>')
+def lookup_s005_container(field):
+    '''Return the rows a foreign key field can reference whose display column starts with q, as JSON.'''
+    if field not in LOOKUPS:
+        return jsonify(error=f'No lookup for {field}'), 404
+    related_model, label = LOOKUPS[field]
+    options = lookup_options(related_model, label, request.args.get('q', ''),
+                             request.args.get('limit', LOOKUP_LIMIT, type=int))
+    return jsonify([option._asdict() for option in options])
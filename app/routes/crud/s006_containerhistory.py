@@ -1,37 +1,61 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, Response
-from app.models.shipping import S006_ContainerHistory, S015_Client, S009_Vessel
+from app.models.shipping import S006_ContainerHistory, S005_Container, S007_ContainerStatus, S012_Port, S015_Client
 from app import db
-from sqlalchemy import or_, func
+from app.utils.search import SearchEngine
+from app.utils.reference import LOOKUP_LIMIT, lookup_options, reference_labels
+from app.utils.query import many_to_one_options
+from app.utils.forms import FormBinder, coerce_datetime, coerce_integer, coerce_string
+from app.utils.batch import BatchWriter
 
 bp = Blueprint('s006_containerhistory', __name__)
 
+# Many-to-one relationships shown in the list view, loaded with each page
+LIST_FOREIGN_KEYS = ['container_id', 'port_id', 'client_id']
+
+# Foreign keys to reference tables shown in the list view, labelled from the in-memory cache
+REFERENCE_FOREIGN_KEYS = {
+    'container_status_id': (S007_ContainerStatus, 'name'),
+}
+
+# Foreign keys the form looks up as the user types: {field: (related model, display column)}
+LOOKUPS = {
+    'container_id': (S005_Container, 'number'),
+    'port_id': (S012_Port, 'name'),
+    'client_id': (S015_Client, 'name'),
+    'container_status_id': (S007_ContainerStatus, 'name'),
+}
+
+# Coerces each posted field by its schema type, in one pass, before any is set
+form_binder = FormBinder({
+    'container_id': coerce_integer,
+    'port_id': coerce_integer,
+    'client_id': coerce_integer,
+    'container_status_id': coerce_integer,
+    'damage': coerce_string,
+    'updated': coerce_datetime,
+}, defaults=['updated'])
+
+# Writes the creates, updates and deletes posted to /api/s006_containerhistory/batch as bulk statements
+batch_writer = BatchWriter(S006_ContainerHistory, form_binder)
+
+# Search plan from the schema's column types, so each search term becomes predicates an index can serve
+search_engine = SearchEngine(
+    S006_ContainerHistory,
+    text_fields=[],
+    prefix_fields=[],
+    numeric_fields=['id'],
+    date_fields=[],
+    related_fields={
+        'container_id': (S005_Container, 'number'),
+        'port_id': (S012_Port, 'name'),
+        'client_id': (S015_Client, 'name'),
+        'container_status_id': (S007_ContainerStatus, 'name'),
+    },
+)
+
 def get_search_filter(model, search_term):
     '''Return case-insensitive search filter for the model.'''
-    if not search_term:
-        return None
-    
-    # Convert search term to lowercase for case-insensitive search
-    search_term = search_term.lower()
-    
-    conditions = []
-    
-    # Search in text fields
-    text_fields = ['id', 'container_id', 'port_id', 'client_id', 'container_status_id']
-    for field in text_fields:
-        if hasattr(model, field):
-            if field.endswith('_id'):
-                # Handle relationship fields
-                if field == 'shipper_id':
-                    conditions.append(model.shipper.has(func.lower(S015_Client.name).like(f'%{{search_term}}%')))
-                elif field == 'consignee_id':
-                    conditions.append(model.consignee.has(func.lower(S015_Client.name).like(f'%{{search_term}}%')))
-                elif field == 'vessel_id':
-                    conditions.append(model.vessel.has(func.lower(S009_Vessel.name).like(f'%{{search_term}}%')))
-            else:
-                # Handle regular fields
-                conditions.append(func.lower(getattr(model, field)).like(f'%{{search_term}}%'))
-    
-    return or_(*conditions) if conditions else None
+    return search_engine.filter(search_term)
 
 @bp.route('/')
 def list_s006_containerhistory():
@@ -43,6 +67,8 @@ def list_s006_containerhistory():
     # Build query with eager loading of relationships
     query = S006_ContainerHistory.query
     
+    # Join the related rows into the page query so rendering them costs no extra queries
+    query = query.options(*many_to_one_options(S006_ContainerHistory, LIST_FOREIGN_KEYS))
     
     # Apply search filter if provided
     search_filter = get_search_filter(S006_ContainerHistory, search)
@@ -58,33 +84,22 @@ def list_s006_containerhistory():
         return render_template('crud/s006_containerhistory/_rows.html', 
                             items=items,
                             has_more=pagination.has_next,
-                            page=page)
+                            page=page,
+                            reference_labels=reference_labels(REFERENCE_FOREIGN_KEYS))
     
     # For full page request, return complete template
     return render_template('crud/s006_containerhistory/list.html', 
                          items=items,
                          has_more=pagination.has_next,
                          page=page,
+                         reference_labels=reference_labels(REFERENCE_FOREIGN_KEYS),
                          per_page=per_page)
 
 @bp.route('/create', methods=['GET', 'POST'])
 def create_s006_containerhistory():
     if request.method == 'POST':
         try:
-            item = S006_ContainerHistory()
-            
-            if 'container_id' in request.form:
-                item.container_id = request.form['container_id']
-            if 'port_id' in request.form:
-                item.port_id = request.form['port_id']
-            if 'client_id' in request.form:
-                item.client_id = request.form['client_id']
-            if 'container_status_id' in request.form:
-                item.container_status_id = request.form['container_status_id']
-            if 'damage' in request.form:
-                item.damage = request.form['damage']
-            if 'updated' in request.form:
-                item.updated = request.form['updated']
+            item = form_binder.bind(S006_ContainerHistory(), request.form, create=True)
             db.session.add(item)
             db.session.commit()
             flash('Created successfully', 'success')
@@ -108,19 +123,7 @@ def edit_s006_containerhistory(id):
     
     if request.method == 'POST':
         try:
-            
-            if 'container_id' in request.form:
-                item.container_id = request.form['container_id']
-            if 'port_id' in request.form:
-                item.port_id = request.form['port_id']
-            if 'client_id' in request.form:
-                item.client_id = request.form['client_id']
-            if 'container_status_id' in request.form:
-                item.container_status_id = request.form['container_status_id']
-            if 'damage' in request.form:
-                item.damage = request.form['damage']
-            if 'updated' in request.form:
-                item.updated = request.form['updated']
+            form_binder.bind(item, request.form)
             db.session.commit()
             flash('Updated successfully', 'success')
             return redirect(url_for("crud.s006_containerhistory.list_s006_containerhistory"))
@@ -150,3 +153,13 @@ def delete_s006_containerhistory(id):
     except Exception as e:
         db.session.rollback()
         return str(e), 500
+
+@bp.route('/lookup/<field>')
+def lookup_s006_containerhistory(field):
+    '''Return the rows a foreign key field can reference whose display column starts with q, as JSON.'''
+    if field not in LOOKUPS:
+        return jsonify(error=f'No lookup for {field}'), 404
+    related_model, label = LOOKUPS[field]
+    options = lookup_options(related_model, label, request.args.get('q', ''),
+                             request.args.get('limit', LOOKUP_LIMIT, type=int))
+    return jsonify([option._asdict() for option in options])
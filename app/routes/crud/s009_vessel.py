@@ -1,37 +1,47 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, Response
-from app.models.shipping import S009_Vessel, S015_Client, S009_Vessel
+from app.models.shipping import S009_Vessel, S008_ShippingCompany
 from app import db
-from sqlalchemy import or_, func
+from app.utils.search import SearchEngine
+from app.utils.reference import LOOKUP_LIMIT, lookup_options, reference_labels
+from app.utils.forms import FormBinder, coerce_integer, coerce_string
+from app.utils.batch import BatchWriter
 
 bp = Blueprint('s009_vessel', __name__)
 
+# Foreign keys to reference tables shown in the list view, labelled from the in-memory cache
+REFERENCE_FOREIGN_KEYS = {
+    'shipping_company_id': (S008_ShippingCompany, 'name'),
+}
+
+# Foreign keys the form looks up as the user types: {field: (related model, display column)}
+LOOKUPS = {
+    'shipping_company_id': (S008_ShippingCompany, 'name'),
+}
+
+# Coerces each posted field by its schema type, in one pass, before any is set
+form_binder = FormBinder({
+    'name': coerce_string,
+    'shipping_company_id': coerce_integer,
+})
+
+# Writes the creates, updates and deletes posted to /api/s009_vessel/batch as bulk statements
+batch_writer = BatchWriter(S009_Vessel, form_binder)
+
+# Search plan from the schema's column types, so each search term becomes predicates an index can serve
+search_engine = SearchEngine(
+    S009_Vessel,
+    text_fields=['name'],
+    prefix_fields=[],
+    numeric_fields=['id'],
+    date_fields=[],
+    related_fields={
+        'shipping_company_id': (S008_ShippingCompany, 'name'),
+    },
+)
+
 def get_search_filter(model, search_term):
     '''Return case-insensitive search filter for the model.'''
-    if not search_term:
-        return None
-    
-    # Convert search term to lowercase for case-insensitive search
-    search_term = search_term.lower()
-    
-    conditions = []
-    
-    # Search in text fields
-    text_fields = ['id', 'name', 'shipping_company_id']
-    for field in text_fields:
-        if hasattr(model, field):
-            if field.endswith('_id'):
-                # Handle relationship fields
-                if field == 'shipper_id':
-                    conditions.append(model.shipper.has(func.lower(S015_Client.name).like(f'%{{search_term}}%')))
-                elif field == 'consignee_id':
-                    conditions.append(model.consignee.has(func.lower(S015_Client.name).like(f'%{{search_term}}%')))
-                elif field == 'vessel_id':
-                    conditions.append(model.vessel.has(func.lower(S009_Vessel.name).like(f'%{{search_term}}%')))
-            else:
-                # Handle regular fields
-                conditions.append(func.lower(getattr(model, field)).like(f'%{{search_term}}%'))
-    
-    return or_(*conditions) if conditions else None
+    return search_engine.filter(search_term)
 
 @bp.route('/')
 def list_s009_vessel():
@@ -58,25 +68,22 @@ def list_s009_vessel():
         return render_template('crud/s009_vessel/_rows.html', 
                             items=items,
                             has_more=pagination.has_next,
-                            page=page)
+                            page=page,
+                            reference_labels=reference_labels(REFERENCE_FOREIGN_KEYS))
     
     # For full page request, return complete template
     return render_template('crud/s009_vessel/list.html', 
                          items=items,
                          has_more=pagination.has_next,
                          page=page,
+                         reference_labels=reference_labels(REFERENCE_FOREIGN_KEYS),
                          per_page=per_page)
 
 @bp.route('/create', methods=['GET', 'POST'])
 def create_s009_vessel():
     if request.method == 'POST':
         try:
-            item = S009_Vessel()
-            
-            if 'name' in request.form:
-                item.name = request.form['name']
-            if 'shipping_company_id' in request.form:
-                item.shipping_company_id = request.form['shipping_company_id']
+            item = form_binder.bind(S009_Vessel(), request.form, create=True)
             db.session.add(item)
             db.session.commit()
             flash('Created successfully', 'success')
@@ -100,11 +107,7 @@ def edit_s009_vessel(id):
     
     if request.method == 'POST':
         try:
-            
-            if 'name' in request.form:
-                item.name = request.form['name']
-            if 'shipping_company_id' in request.form:
-                item.shipping_company_id = request.form['shipping_company_id']
+            form_binder.bind(item, request.form)
             db.session.commit()
             flash('Updated successfully', 'success')
             return redirect(url_for("crud.s009_vessel.list_s009_vessel"))
@@ -134,3 +137,13 @@ def delete_s009_vessel(id):
     except Exception as e:
         db.session.rollback()
         return str(e), 500
+
+@bp.route('/lookup/<field>')
+def lookup_s009_vessel(field):
+    '''Return the rows a foreign key field can reference whose display column starts with q, as JSON.'''
+    if field not in LOOKUPS:
+        return jsonify(error=f'No lookup for {field}'), 404
+    related_model, label = LOOKUPS[field]
+    options = lookup_options(related_model, label, request.args.get('q', ''),
+                             request.args.get('limit', LOOKUP_LIMIT, type=int))
+    return jsonify([option._asdict() for option in options])
@@ -1,37 +1,47 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, Response
-from app.models.shipping import S010_Voyage, S015_Client, S009_Vessel
+from app.models.shipping import S010_Voyage, S009_Vessel
 from app import db
-from sqlalchemy import or_, func
+from app.utils.search import SearchEngine
+from app.utils.reference import LOOKUP_LIMIT, lookup_options
+from app.utils.query import many_to_one_options
+from app.utils.forms import FormBinder, coerce_integer, coerce_string
+from app.utils.batch import BatchWriter
 
 bp = Blueprint('s010_voyage', __name__)
 
+# Many-to-one relationships shown in the list view, loaded with each page
+LIST_FOREIGN_KEYS = ['vessel_id']
+
+# Foreign keys the form looks up as the user types: {field: (related model, display column)}
+LOOKUPS = {
+    'vessel_id': (S009_Vessel, 'name'),
+}
+
+# Coerces each posted field by its schema type, in one pass, before any is set
+form_binder = FormBinder({
+    'name': coerce_string,
+    'vessel_id': coerce_integer,
+    'rotation_number': coerce_integer,
+})
+
+# Writes the creates, updates and deletes posted to /api/s010_voyage/batch as bulk statements
+batch_writer = BatchWriter(S010_Voyage, form_binder)
+
+# Search plan from the schema's column types, so each search term becomes predicates an index can serve
+search_engine = SearchEngine(
+    S010_Voyage,
+    text_fields=['name'],
+    prefix_fields=['name'],
+    numeric_fields=['id', 'rotation_number'],
+    date_fields=[],
+    related_fields={
+        'vessel_id': (S009_Vessel, 'name'),
+    },
+)
+
 def get_search_filter(model, search_term):
     '''Return case-insensitive search filter for the model.'''
-    if not search_term:
-        return None
-    
-    # Convert search term to lowercase for case-insensitive search
-    search_term = search_term.lower()
-    
-    conditions = []
-    
-    # Search in text fields
-    text_fields = ['id', 'name', 'vessel_id', 'rotation_number']
-    for field in text_fields:
-        if hasattr(model, field):
-            if field.endswith('_id'):
-                # Handle relationship fields
-                if field == 'shipper_id':
-                    conditions.append(model.shipper.has(func.lower(S015_Client.name).like(f'%{{search_term}}%')))
-                elif field == 'consignee_id':
-                    conditions.append(model.consignee.has(func.lower(S015_Client.name).like(f'%{{search_term}}%')))
-                elif field == 'vessel_id':
-                    conditions.append(model.vessel.has(func.lower(S009_Vessel.name).like(f'%{{search_term}}%')))
-            else:
-                # Handle regular fields
-                conditions.append(func.lower(getattr(model, field)).like(f'%{{search_term}}%'))
-    
-    return or_(*conditions) if conditions else None
+    return search_engine.filter(search_term)
 
 @bp.route('/')
 def list_s010_voyage():
@@ -43,6 +53,8 @@ def list_s010_voyage():
     # Build query with eager loading of relationships
     query = S010_Voyage.query
     
+    # Join the related rows into the page query so rendering them costs no extra queries
+    query = query.options(*many_to_one_options(S010_Voyage, LIST_FOREIGN_KEYS))
     
     # Apply search filter if provided
     search_filter = get_search_filter(S010_Voyage, search)
@@ -71,14 +83,7 @@ def list_s010_voyage():
 def create_s010_voyage():
     if request.method == 'POST':
         try:
-            item = S010_Voyage()
-            
-            if 'name' in request.form:
-                item.name = request.form['name']
-            if 'vessel_id' in request.form:
-                item.vessel_id = request.form['vessel_id']
-            if 'rotation_number' in request.form:
-                item.rotation_number = request.form['rotation_number']
+            item = form_binder.bind(S010_Voyage(), request.form, create=True)
             db.session.add(item)
             db.session.commit()
             flash('Created successfully', 'success')
@@ -102,13 +107,7 @@ def edit_s010_voyage(id):
     
     if request.method == 'POST':
         try:
-            
-            if 'name' in request.form:
-                item.name = request.form['name']
-            if 'vessel_id' in request.form:
-                item.vessel_id = request.form['vessel_id']
-            if 'rotation_number' in request.form:
-                item.rotation_number = request.form['rotation_number']
+            form_binder.bind(item, request.form)
             db.session.commit()
             flash('Updated successfully', 'success')
             return redirect(url_for("crud.s010_voyage.list_s010_voyage"))
@@ -138,3 +137,13 @@ def delete_s010_voyage(id):
     except Exception as e:
         db.session.rollback()
         return str(e), 500
+
+@bp.route('/lookup/<field>')
+def lookup_s010_voyage(field):
+    '''Return the rows a foreign key field can reference whose display column starts with q, as JSON.'''
+    if field not in LOOKUPS:
+        return jsonify(error=f'No lookup for {field}'), 404
+    related_model, label = LOOKUPS[field]
+    options = lookup_options(related_model, label, request.args.get('q', ''),
+                             request.args.get('limit', LOOKUP_LIMIT, type=int))
+    return jsonify([option._asdict() for option in options])
@@ -1,37 +1,51 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, Response
-from app.models.shipping import S011_Leg, S015_Client, S009_Vessel
+from app.models.shipping import S011_Leg, S010_Voyage, S012_Port
 from app import db
-from sqlalchemy import or_, func
+from app.utils.search import SearchEngine
+from app.utils.reference import LOOKUP_LIMIT, lookup_options
+from app.utils.query import many_to_one_options
+from app.utils.forms import FormBinder, coerce_datetime, coerce_integer
+from app.utils.batch import BatchWriter
 
 bp = Blueprint('s011_leg', __name__)
 
+# Many-to-one relationships shown in the list view, loaded with each page
+LIST_FOREIGN_KEYS = ['voyage_id', 'port_id']
+
+# Foreign keys the form looks up as the user types: {field: (related model, display column)}
+LOOKUPS = {
+    'voyage_id': (S010_Voyage, 'name'),
+    'port_id': (S012_Port, 'name'),
+}
+
+# Coerces each posted field by its schema type, in one pass, before any is set
+form_binder = FormBinder({
+    'voyage_id': coerce_integer,
+    'port_id': coerce_integer,
+    'leg_number': coerce_integer,
+    'eta': coerce_datetime,
+    'etd': coerce_datetime,
+}, defaults=['eta', 'etd'])
+
+# Writes the creates, updates and deletes posted to /api/s011_leg/batch as bulk statements
+batch_writer = BatchWriter(S011_Leg, form_binder)
+
+# Search plan from the schema's column types, so each search term becomes predicates an index can serve
+search_engine = SearchEngine(
+    S011_Leg,
+    text_fields=[],
+    prefix_fields=[],
+    numeric_fields=['id', 'leg_number'],
+    date_fields=['eta'],
+    related_fields={
+        'voyage_id': (S010_Voyage, 'name'),
+        'port_id': (S012_Port, 'name'),
+    },
+)
+
 def get_search_filter(model, search_term):
     '''Return case-insensitive search filter for the model.'''
-    if not search_term:
-        return None
-    
-    # Convert search term to lowercase for case-insensitive search
-    search_term = search_term.lower()
-    
-    conditions = []
-    
-    # Search in text fields
-    text_fields = ['id', 'voyage_id', 'port_id', 'leg_number', 'eta']
-    for field in text_fields:
-        if hasattr(model, field):
-            if field.endswith('_id'):
-                # Handle relationship fields
-                if field == 'shipper_id':
-                    conditions.append(model.shipper.has(func.lower(S015_Client.name).like(f'%{{search_term}}%')))
-                elif field == 'consignee_id':
-                    conditions.append(model.consignee.has(func.lower(S015_Client.name).like(f'%{{search_term}}%')))
-                elif field == 'vessel_id':
-                    conditions.append(model.vessel.has(func.lower(S009_Vessel.name).like(f'%{{search_term}}%')))
-            else:
-                # Handle regular fields
-                conditions.append(func.lower(getattr(model, field)).like(f'%{{search_term}}%'))
-    
-    return or_(*conditions) if conditions else None
+    return search_engine.filter(search_term)
 
 @bp.route('/')
 def list_s011_leg():
@@ -43,6 +57,8 @@ def list_s011_leg():
     # Build query with eager loading of relationships
     query = S011_Leg.query
     
+    # Join the related rows into the page query so rendering them costs no extra queries
+    query = query.options(*many_to_one_options(S011_Leg, LIST_FOREIGN_KEYS))
     
     # Apply search filter if provided
     search_filter = get_search_filter(S011_Leg, search)
@@ -71,18 +87,7 @@ def list_s011_leg():
 def create_s011_leg():
     if request.method == 'POST':
         try:
-            item = S011_Leg()
-            
-            if 'voyage_id' in request.form:
-                item.voyage_id = request.form['voyage_id']
-            if 'port_id' in request.form:
-                item.port_id = request.form['port_id']
-            if 'leg_number' in request.form:
-                item.leg_number = request.form['leg_number']
-            if 'eta' in request.form:
-                item.eta = request.form['eta']
-            if 'etd' in request.form:
-                item.etd = request.form['etd']
+            item = form_binder.bind(S011_Leg(), request.form, create=True)
             db.session.add(item)
             db.session.commit()
             flash('Created successfully', 'success')
@@ -106,17 +111,7 @@ def edit_s011_leg(id):
     
     if request.method == 'POST':
         try:
-            
-            if 'voyage_id' in request.form:
-                item.voyage_id = request.form['voyage_id']
-            if 'port_id' in request.form:
-                item.port_id = request.form['port_id']
-            if 'leg_number' in request.form:
-                item.leg_number = request.form['leg_number']
-            if 'eta' in request.form:
-                item.eta = request.form['eta']
-            if 'etd' in request.form:
-                item.etd = request.form['etd']
+            form_binder.bind(item, request.form)
             db.session.commit()
             flash('Updated successfully', 'success')
             return redirect(url_for("crud.s011_leg.list_s011_leg"))
@@ -146,3 +141,13 @@ def delete_s011_leg(id):
     except Exception as e:
         db.session.rollback()
         return str(e), 500
+
+@bp.route('/lookup/<field>')
+def lookup_s011_leg(field):
+    '''Return the rows a foreign key field can reference whose display column starts with q, as JSON.'''
+    if field not in LOOKUPS:
+        return jsonify(error=f'No lookup for {field}'), 404
+    related_model, label = LOOKUPS[field]
+    options = lookup_options(related_model, label, request.args.get('q', ''),
+                             request.args.get('limit', LOOKUP_LIMIT, type=int))
+    return jsonify([option._asdict() for option in options])
@@ -1,37 +1,50 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, Response
-from app.models.shipping import S013_PortPair, S015_Client, S009_Vessel
+from app.models.shipping import S013_PortPair, S012_Port
 from app import db
-from sqlalchemy import or_, func
+from app.utils.search import SearchEngine
+from app.utils.reference import LOOKUP_LIMIT, lookup_options
+from app.utils.query import many_to_one_options
+from app.utils.forms import FormBinder, coerce_integer
+from app.utils.batch import BatchWriter
 
 bp = Blueprint('s013_portpair', __name__)
 
+# Many-to-one relationships shown in the list view, loaded with each page
+LIST_FOREIGN_KEYS = ['pol_id', 'pod_id']
+
+# Foreign keys the form looks up as the user types: {field: (related model, display column)}
+LOOKUPS = {
+    'pol_id': (S012_Port, 'name'),
+    'pod_id': (S012_Port, 'name'),
+}
+
+# Coerces each posted field by its schema type, in one pass, before any is set
+form_binder = FormBinder({
+    'pol_id': coerce_integer,
+    'pod_id': coerce_integer,
+    'distance': coerce_integer,
+    'distance_rate_code': coerce_integer,
+})
+
+# Writes the creates, updates and deletes posted to /api/s013_portpair/batch as bulk statements
+batch_writer = BatchWriter(S013_PortPair, form_binder)
+
+# Search plan from the schema's column types, so each search term becomes predicates an index can serve
+search_engine = SearchEngine(
+    S013_PortPair,
+    text_fields=[],
+    prefix_fields=[],
+    numeric_fields=['id', 'distance', 'distance_rate_code'],
+    date_fields=[],
+    related_fields={
+        'pol_id': (S012_Port, 'name'),
+        'pod_id': (S012_Port, 'name'),
+    },
+)
+
 def get_search_filter(model, search_term):
     '''Return case-insensitive search filter for the model.'''
-    if not search_term:
-        return None
-    
-    # Convert search term to lowercase for case-insensitive search
-    search_term = search_term.lower()
-    
-    conditions = []
-    
-    # Search in text fields
-    text_fields = ['id', 'pol_id', 'pod_id', 'distance', 'distance_rate_code']
-    for field in text_fields:
-        if hasattr(model, field):
-            if field.endswith('_id'):
-                # Handle relationship fields
-                if field == 'shipper_id':
-                    conditions.append(model.shipper.has(func.lower(S015_Client.name).like(f'%{{search_term}}%')))
-                elif field == 'consignee_id':
-                    conditions.append(model.consignee.has(func.lower(S015_Client.name).like(f'%{{search_term}}%')))
-                elif field == 'vessel_id':
-                    conditions.append(model.vessel.has(func.lower(S009_Vessel.name).like(f'%{{search_term}}%')))
-            else:
-                # Handle regular fields
-                conditions.append(func.lower(getattr(model, field)).like(f'%{{search_term}}%'))
-    
-    return or_(*conditions) if conditions else None
+    return search_engine.filter(search_term)
 
 @bp.route('/')
 def list_s013_portpair():
@@ -43,6 +56,8 @@ def list_s013_portpair():
     # Build query with eager loading of relationships
     query = S013_PortPair.query
     
+    # Join the related rows into the page query so rendering them costs no extra queries
+    query = query.options(*many_to_one_options(S013_PortPair, LIST_FOREIGN_KEYS))
     
     # Apply search filter if provided
     search_filter = get_search_filter(S013_PortPair, search)
@@ -71,16 +86,7 @@ def list_s013_portpair():
 def create_s013_portpair():
     if request.method == 'POST':
         try:
-            item = S013_PortPair()
-            
-            if 'pol_id' in request.form:
-                item.pol_id = request.form['pol_id']
-            if 'pod_id' in request.form:
-                item.pod_id = request.form['pod_id']
-            if 'distance' in request.form:
-                item.distance = request.form['distance']
-            if 'distance_rate_code' in request.form:
-                item.distance_rate_code = request.form['distance_rate_code']
+            item = form_binder.bind(S013_PortPair(), request.form, create=True)
             db.session.add(item)
             db.session.commit()
             flash('Created successfully', 'success')
@@ -104,15 +110,7 @@ def edit_s013_portpair(id):
     
     if request.method == 'POST':
         try:
-            
-            if 'pol_id' in request.form:
-                item.pol_id = request.form['pol_id']
-            if 'pod_id' in request.form:
-                item.pod_id = request.form['pod_id']
-            if 'distance' in request.form:
-                item.distance = request.form['distance']
-            if 'distance_rate_code' in request.form:
-                item.distance_rate_code = request.form['distance_rate_code']
+            form_binder.bind(item, request.form)
             db.session.commit()
             flash('Updated successfully', 'success')
             return redirect(url_for("crud.s013_portpair.list_s013_portpair"))
@@ -142,3 +140,13 @@ def delete_s013_portpair(id):
     except Exception as e:
         db.session.rollback()
         return str(e), 500
+
+@bp.route('/lookup/<field>')
+def lookup_s013_portpair(field):
+    '''Return the rows a foreign key field can reference whose display column starts with q, as JSON.'''
+    if field not in LOOKUPS:
+        return jsonify(error=f'No lookup for {field}'), 404
+    related_model, label = LOOKUPS[field]
+    options = lookup_options(related_model, label, request.args.get('q', ''),
+                             request.args.get('limit', LOOKUP_LIMIT, type=int))
+    return jsonify([option._asdict() for option in options])
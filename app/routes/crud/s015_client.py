@@ -1,37 +1,52 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, Response
-from app.models.shipping import S015_Client, S015_Client, S009_Vessel
+from app.models.shipping import S015_Client, S014_Country
 from app import db
-from sqlalchemy import or_, func
+from app.utils.search import SearchEngine
+from app.utils.reference import LOOKUP_LIMIT, lookup_options, reference_labels
+from app.utils.forms import FormBinder, coerce_integer, coerce_string
+from app.utils.batch import BatchWriter
 
 bp = Blueprint('s015_client', __name__)
 
+# Foreign keys to reference tables shown in the list view, labelled from the in-memory cache
+REFERENCE_FOREIGN_KEYS = {
+    'country_id': (S014_Country, 'name'),
+}
+
+# Foreign keys the form looks up as the user types: {field: (related model, display column)}
+LOOKUPS = {
+    'country_id': (S014_Country, 'name'),
+}
+
+# Coerces each posted field by its schema type, in one pass, before any is set
+form_binder = FormBinder({
+    'name': coerce_string,
+    'address': coerce_string,
+    'town': coerce_string,
+    'country_id': coerce_integer,
+    'contact_person': coerce_string,
+    'email': coerce_string,
+    'phone': coerce_string,
+})
+
+# Writes the creates, updates and deletes posted to /api/s015_client/batch as bulk statements
+batch_writer = BatchWriter(S015_Client, form_binder)
+
+# Search plan from the schema's column types, so each search term becomes predicates an index can serve
+search_engine = SearchEngine(
+    S015_Client,
+    text_fields=['name', 'address', 'town'],
+    prefix_fields=['name'],
+    numeric_fields=['id'],
+    date_fields=[],
+    related_fields={
+        'country_id': (S014_Country, 'name'),
+    },
+)
+
 def get_search_filter(model, search_term):
     '''Return case-insensitive search filter for the model.'''
-    if not search_term:
-        return None
-    
-    # Convert search term to lowercase for case-insensitive search
-    search_term = search_term.lower()
-    
-    conditions = []
-    
-    # Search in text fields
-    text_fields = ['id', 'name', 'address', 'town', 'country_id']
-    for field in text_fields:
-        if hasattr(model, field):
-            if field.endswith('_id'):
-                # Handle relationship fields
-                if field == 'shipper_id':
-                    conditions.append(model.shipper.has(func.lower(S015_Client.name).like(f'%{{search_term}}%')))
-                elif field == 'consignee_id':
-                    conditions.append(model.consignee.has(func.lower(S015_Client.name).like(f'%{{search_term}}%')))
-                elif field == 'vessel_id':
-                    conditions.append(model.vessel.has(func.lower(S009_Vessel.name).like(f'%{{search_term}}%')))
-            else:
-                # Handle regular fields
-                conditions.append(func.lower(getattr(model, field)).like(f'%{{search_term}}%'))
-    
-    return or_(*conditions) if conditions else None
+    return search_engine.filter(search_term)
 
 @bp.route('/')
 def list_s015_client():
@@ -58,35 +73,22 @@ def list_s015_client():
         return render_template('crud/s015_client/_rows.html', 
                             items=items,
                             has_more=pagination.has_next,
-                            page=page)
+                            page=page,
+                            reference_labels=reference_labels(REFERENCE_FOREIGN_KEYS))
     
     # For full page request, return complete template
     return render_template('crud/s015_client/list.html', 
                          items=items,
                          has_more=pagination.has_next,
                          page=page,
+                         reference_labels=reference_labels(REFERENCE_FOREIGN_KEYS),
                          per_page=per_page)
 
 @bp.route('/create', methods=['GET', 'POST'])
 def create_s015_client():
     if request.method == 'POST':
         try:
-            item = S015_Client()
-            
-            if 'name' in request.form:
-                item.name = request.form['name']
-            if 'address' in request.form:
-                item.address = request.form['address']
-            if 'town' in request.form:
-                item.town = request.form['town']
-            if 'country_id' in request.form:
-                item.country_id = request.form['country_id']
-            if 'contact_person' in request.form:
-                item.contact_person = request.form['contact_person']
-            if 'email' in request.form:
-                item.email = request.form['email']
-            if 'phone' in request.form:
-                item.phone = request.form['phone']
+            item = form_binder.bind(S015_Client(), request.form, create=True)
             db.session.add(item)
             db.session.commit()
             flash('Created successfully', 'success')
@@ -110,21 +112,7 @@ def edit_s015_client(id):
     
     if request.method == 'POST':
         try:
-            
-            if 'name' in request.form:
-                item.name = request.form['name']
-            if 'address' in request.form:
-                item.address = request.form['address']
-            if 'town' in request.form:
-                item.town = request.form['town']
-            if 'country_id' in request.form:
-                item.country_id = request.form['country_id']
-            if 'contact_person' in request.form:
-                item.contact_person = request.form['contact_person']
-            if 'email' in request.form:
-                item.email = request.form['email']
-            if 'phone' in request.form:
-                item.phone = request.form['phone']
+            form_binder.bind(item, request.form)
             db.session.commit()
             flash('Updated successfully', 'success')
             return redirect(url_for("crud.s015_client.list_s015_client"))
@@ -154,3 +142,13 @@ def delete_s015_client(id):
     except Exception as e:
         db.session.rollback()
         return str(e), 500
+
+@bp.route('/lookup/<field>')
+def lookup_s015_client(field):
+    '''Return the rows a foreign key field can reference whose display column starts with q, as JSON.'''
+    if field not in LOOKUPS:
+        return jsonify(error=f'No lookup for {field}'), 404
+    related_model, label = LOOKUPS[field]
+    options = lookup_options(related_model, label, request.args.get('q', ''),
+                             request.args.get('limit', LOOKUP_LIMIT, type=int))
+    return jsonify([option._asdict() for option in options])
@@ -1,37 +1,35 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, Response
-from app.models.shipping import S016_User, S015_Client, S009_Vessel
+from app.models.shipping import S016_User
 from app import db
-from sqlalchemy import or_, func
+from app.utils.search import SearchEngine
+from app.utils.forms import FormBinder, coerce_string
+from app.utils.batch import BatchWriter
 
 bp = Blueprint('s016_user', __name__)
 
+# Coerces each posted field by its schema type, in one pass, before any is set
+form_binder = FormBinder({
+    'name': coerce_string,
+    'email': coerce_string,
+    'password_hash': coerce_string,
+})
+
+# Writes the creates, updates and deletes posted to /api/s016_user/batch as bulk statements
+batch_writer = BatchWriter(S016_User, form_binder)
+
+# Search plan from the schema's column types, so each search term becomes predicates an index can serve
+search_engine = SearchEngine(
+    S016_User,
+    text_fields=['name', 'email'],
+    prefix_fields=['name'],
+    numeric_fields=['id'],
+    date_fields=[],
+    related_fields={},
+)
+
 def get_search_filter(model, search_term):
     '''Return case-insensitive search filter for the model.'''
-    if not search_term:
-        return None
-    
-    # Convert search term to lowercase for case-insensitive search
-    search_term = search_term.lower()
-    
-    conditions = []
-    
-    # Search in text fields
-    text_fields = ['id', 'name', 'email', 'password_hash']
-    for field in text_fields:
-        if hasattr(model, field):
-            if field.endswith('_id'):
-                # Handle relationship fields
-                if field == 'shipper_id':
-                    conditions.append(model.shipper.has(func.lower(S015_Client.name).like(f'%{{search_term}}%')))
-                elif field == 'consignee_id':
-                    conditions.append(model.consignee.has(func.lower(S015_Client.name).like(f'%{{search_term}}%')))
-                elif field == 'vessel_id':
-                    conditions.append(model.vessel.has(func.lower(S009_Vessel.name).like(f'%{{search_term}}%')))
-            else:
-                # Handle regular fields
-                conditions.append(func.lower(getattr(model, field)).like(f'%{{search_term}}%'))
-    
-    return or_(*conditions) if conditions else None
+    return search_engine.filter(search_term)
 
 @bp.route('/')
 def list_s016_user():
@@ -71,14 +69,7 @@ def list_s016_user():
 def create_s016_user():
     if request.method == 'POST':
         try:
-            item = S016_User()
-            
-            if 'name' in request.form:
-                item.name = request.form['name']
-            if 'email' in request.form:
-                item.email = request.form['email']
-            if 'password_hash' in request.form:
-                item.password_hash = request.form['password_hash']
+            item = form_binder.bind(S016_User(), request.form, create=True)
             db.session.add(item)
             db.session.commit()
             flash('Created successfully', 'success')
@@ -102,13 +93,7 @@ def edit_s016_user(id):
     
     if request.method == 'POST':
         try:
-            
-            if 'name' in request.form:
-                item.name = request.form['name']
-            if 'email' in request.form:
-                item.email = request.form['email']
-            if 'password_hash' in request.form:
-                item.password_hash = request.form['password_hash']
+            form_binder.bind(item, request.form)
             db.session.commit()
             flash('Updated successfully', 'success')
             return redirect(url_for("crud.s016_user.list_s016_user"))
@@ -1,37 +1,60 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, Response
-from app.models.shipping import S017_Rate, S015_Client, S009_Vessel
+from app.models.shipping import S017_Rate, S003_Commodity, S004_PackType, S015_Client
 from app import db
-from sqlalchemy import or_, func
+from app.utils.search import SearchEngine
+from app.utils.reference import LOOKUP_LIMIT, lookup_options, reference_labels
+from app.utils.query import many_to_one_options
+from app.utils.forms import FormBinder, coerce_datetime, coerce_float, coerce_integer
+from app.utils.batch import BatchWriter
 
 bp = Blueprint('s017_rate', __name__)
 
+# Many-to-one relationships shown in the list view, loaded with each page
+LIST_FOREIGN_KEYS = ['client_id']
+
+# Foreign keys to reference tables shown in the list view, labelled from the in-memory cache
+REFERENCE_FOREIGN_KEYS = {
+    'commodity_id': (S003_Commodity, 'name'),
+    'pack_type_id': (S004_PackType, 'name'),
+}
+
+# Foreign keys the form looks up as the user types: {field: (related model, display column)}
+LOOKUPS = {
+    'commodity_id': (S003_Commodity, 'name'),
+    'pack_type_id': (S004_PackType, 'name'),
+    'client_id': (S015_Client, 'name'),
+}
+
+# Coerces each posted field by its schema type, in one pass, before any is set
+form_binder = FormBinder({
+    'distance_rate_code': coerce_integer,
+    'commodity_id': coerce_integer,
+    'pack_type_id': coerce_integer,
+    'client_id': coerce_integer,
+    'rate': coerce_float,
+    'effective': coerce_datetime,
+}, defaults=['effective'])
+
+# Writes the creates, updates and deletes posted to /api/s017_rate/batch as bulk statements
+batch_writer = BatchWriter(S017_Rate, form_binder)
+
+# Search plan from the schema's column types, so each search term becomes predicates an index can serve
+search_engine = SearchEngine(
+    S017_Rate,
+    text_fields=[],
+    prefix_fields=[],
+    numeric_fields=['id', 'distance_rate_code'],
+    date_fields=[],
+    related_fields={
+        'commodity_id': (S003_Commodity, 'name'),
+        'pack_type_id': (S004_PackType, 'name'),
+        'client_id': (S015_Client, 'name'),
+    },
+)
+
 def get_search_filter(model, search_term):
     '''Return case-insensitive search filter for the model.'''
-    if not search_term:
-        return None
-    
-    # Convert search term to lowercase for case-insensitive search
-    search_term = search_term.lower()
-    
-    conditions = []
-    
-    # Search in text fields
-    text_fields = ['id', 'distance_rate_code', 'commodity_id', 'pack_type_id', 'client_id']
-    for field in text_fields:
-        if hasattr(model, field):
-            if field.endswith('_id'):
-                # Handle relationship fields
-                if field == 'shipper_id':
-                    conditions.append(model.shipper.has(func.lower(S015_Client.name).like(f'%{{search_term}}%')))
-                elif field == 'consignee_id':
-                    conditions.append(model.consignee.has(func.lower(S015_Client.name).like(f'%{{search_term}}%')))
-                elif field == 'vessel_id':
-                    conditions.append(model.vessel.has(func.lower(S009_Vessel.name).like(f'%{{search_term}}%')))
-            else:
-                # Handle regular fields
-                conditions.append(func.lower(getattr(model, field)).like(f'%{{search_term}}%'))
-    
-    return or_(*conditions) if conditions else None
+    return search_engine.filter(search_term)
 
 @bp.route('/')
 def list_s017_rate():
@@ -43,6 +66,8 @@ def list_s017_rate():
     # Build query with eager loading of relationships
     query = S017_Rate.query
     
+    # Join the related rows into the page query so rendering them costs no extra queries
+    query = query.options(*many_to_one_options(S017_Rate, LIST_FOREIGN_KEYS))
     
     # Apply search filter if provided
     search_filter = get_search_filter(S017_Rate, search)
@@ -58,33 +83,22 @@ def list_s017_rate():
         return render_template('crud/s017_rate/_rows.html', 
                             items=items,
                             has_more=pagination.has_next,
-                            page=page)
+                            page=page,
+                            reference_labels=reference_labels(REFERENCE_FOREIGN_KEYS))
     
     # For full page request, return complete template
     return render_template('crud/s017_rate/list.html', 
                          items=items,
                          has_more=pagination.has_next,
                          page=page,
+                         reference_labels=reference_labels(REFERENCE_FOREIGN_KEYS),
                          per_page=per_page)
 
 @bp.route('/create', methods=['GET', 'POST'])
 def create_s017_rate():
     if request.method == 'POST':
         try:
-            item = S017_Rate()
-            
-            if 'distance_rate_code' in request.form:
-                item.distance_rate_code = request.form['distance_rate_code']
-            if 'commodity_id' in request.form:
-                item.commodity_id = request.form['commodity_id']
-            if 'pack_type_id' in request.form:
-                item.pack_type_id = request.form['pack_type_id']
-            if 'client_id' in request.form:
-                item.client_id = request.form['client_id']
-            if 'rate' in request.form:
-                item.rate = request.form['rate']
-            if 'effective' in request.form:
-                item.effective = request.form['effective']
+            item = form_binder.bind(S017_Rate(), request.form, create=True)
             db.session.add(item)
             db.session.commit()
             flash('Created successfully', 'success')
@@ -108,19 +122,7 @@ def edit_s017_rate(id):
     
     if request.method == 'POST':
         try:
-            
-            if 'distance_rate_code' in request.form:
-                item.distance_rate_code = request.form['distance_rate_code']
-            if 'commodity_id' in request.form:
-                item.commodity_id = request.form['commodity_id']
-            if 'pack_type_id' in request.form:
-                item.pack_type_id = request.form['pack_type_id']
-            if 'client_id' in request.form:
-                item.client_id = request.form['client_id']
-            if 'rate' in request.form:
-                item.rate = request.form['rate']
-            if 'effective' in request.form:
-                item.effective = request.form['effective']
+            form_binder.bind(item, request.form)
             db.session.commit()
             flash('Updated successfully', 'success')
             return redirect(url_for("crud.s017_rate.list_s017_rate"))
@@ -150,3 +152,13 @@ def delete_s017_rate(id):
     except Exception as e:
         db.session.rollback()
         return str(e), 500
+
+@bp.route('/lookup/<field>')
+def lookup_s017_rate(field):
+    '''Return the rows a foreign key field can reference whose display column starts with q, as JSON.'''
+    if field not in LOOKUPS:
+        return jsonify(error=f'No lookup for {field}'), 404
+    related_model, label = LOOKUPS[field]
+    options = lookup_options(related_model, label, request.args.get('q', ''),
+                             request.args.get('limit', LOOKUP_LIMIT, type=int))
+    return jsonify([option._asdict() for option in options])
@@ -0,0 +1,174 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, delete, insert, select, update
+
+from app import db
+from app.utils.forms import FormBinder, FormError, coerce_integer
+
+# Items a batch may hold across its creates, updates and deletes, unless
+# API_MAX_BATCH_SIZE says otherwise
+DEFAULT_MAX_BATCH_SIZE = 1000
+
+# The operations of a batch, in the order they are written
+BATCH_OPERATIONS = ('create', 'update', 'delete')
+
+class BatchError(ValueError):
+    """
+    A batch that was not written, with the errors of each failed item as
+    {"op": operation, "index": position in its array, "errors": {field: message}}.
+    """
+
+    def __init__(self, message: str, errors: Optional[List[Dict[str, Any]]] = None):
+        self.errors = errors or []
+        super().__init__(message)
+
+class BatchTooLarge(BatchError):
+    """A batch of more items than the maximum batch size."""
+
+class BatchWriter:
+    """
+    Writes a batch of creates, updates by id and deletes by id of one model's
+    rows as Core bulk statements in one transaction: one INSERT per set of
+    fields the creates give, one UPDATE per set of fields the updates give,
+    each run with every row's parameters, and one DELETE.
+
+    Every item is coerced by the model's form binder, and the ids of the
+    updates and deletes looked up, before anything is written, so a batch is
+    written whole or not at all and reports the errors of all its items.
+    The statements skip the ORM's unit of work and its events; the reference
+    cache and the search triggers still see their writes.
+    """
+
+    def __init__(self, model, form_binder: FormBinder):
+        self.model = model
+        self.table = model.__table__
+        self.form_binder = form_binder
+
+    def parse(self, batch: Any, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE):
+        """
+        Return the coerced values of the creates, the (id, values) of the
+        updates and the ids of the deletes of a decoded JSON batch, raising
+        BatchError with the errors of every item that fails.
+        """
+        if not isinstance(batch, dict) or not set(batch) <= set(BATCH_OPERATIONS) or not all(
+                isinstance(batch[operation], list) for operation in batch):
+            raise BatchError('Expected an object of create, update and delete arrays')
+        size = sum(len(items) for items in batch.values())
+        if size > max_batch_size:
+            raise BatchTooLarge(f'Batch of {size} items exceeds the limit of {max_batch_size}')
+
+        errors = []
+        creates = []
+        for index, item in enumerate(batch.get('create', [])):
+            try:
+                creates.append(self.item_values(item, create=True))
+            except FormError as e:
+                errors.append({'op': 'create', 'index': index, 'errors': e.errors})
+        updates = []
+        # The index and id of each update and delete, to look their rows up
+        item_ids = []
+        for index, item in enumerate(batch.get('update', [])):
+            try:
+                id, values = self.item_values(item)
+            except FormError as e:
+                errors.append({'op': 'update', 'index': index, 'errors': e.errors})
+                continue
+            updates.append((id, values))
+            item_ids.append(('update', index, id))
+        deletes = []
+        for index, value in enumerate(batch.get('delete', [])):
+            try:
+                id = item_id(value)
+            except FormError as e:
+                errors.append({'op': 'delete', 'index': index, 'errors': e.errors})
+                continue
+            deletes.append(id)
+            item_ids.append(('delete', index, id))
+
+        # Updates and deletes of rows that do not exist fail as their items, not as the batch
+        if item_ids:
+            ids = {id for _, _, id in item_ids}
+            found = set(db.session.scalars(select(self.table.c.id).where(self.table.c.id.in_(ids))))
+            errors.extend(
+                {'op': operation, 'index': index, 'errors': {'id': 'not found'}}
+                for operation, index, id in item_ids if id not in found
+            )
+        if errors:
+            errors.sort(key=lambda error: (BATCH_OPERATIONS.index(error['op']), error['index']))
+            raise BatchError(f'{len(errors)} of {size} items failed', errors)
+        return creates, updates, deletes
+
+    def item_values(self, item: Any, create: bool = False):
+        """
+        Return the coerced values of a create, or the id and the coerced values
+        of an update, raising FormError for its fields that fail.
+        """
+        if not isinstance(item, dict):
+            raise FormError({'item': 'must be an object'})
+        errors = {field: 'is not a field' for field in item if field not in self.form_binder.coercers and field != 'id'}
+        id = None
+        if create:
+            if 'id' in item:
+                errors['id'] = 'is assigned on create'
+        else:
+            try:
+                id = item_id(item.get('id'))
+            except FormError as e:
+                errors.update(e.errors)
+        try:
+            values = self.form_binder.values(item, create)
+        except FormError as e:
+            errors.update(e.errors)
+        if errors:
+            raise FormError(errors)
+        return values if create else (id, values)
+
+    def write(self, batch: Any, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE) -> Dict[str, Any]:
+        """
+        Write a decoded JSON batch and commit it, returning the ids of the
+        created rows, in the order of the creates, and the numbers of rows
+        updated and deleted. Raises BatchError, having written nothing, if any
+        item fails.
+        """
+        creates, updates, deletes = self.parse(batch, max_batch_size)
+        try:
+            created = [None] * len(creates)
+            # SQLite gives the rows of an INSERT increasing ids in the order of its VALUES, so the
+            # sorted ids are in the order of the creates; SQLAlchemy only orders RETURNING there
+            # by inserting one row per statement
+            sqlite = db.session.get_bind().dialect.name == 'sqlite'
+            for indexes in group_by_fields(creates).values():
+                statement = insert(self.table).returning(self.table.c.id, sort_by_parameter_order=not sqlite)
+                ids = db.session.scalars(statement, [creates[index] for index in indexes]).all()
+                for index, id in zip(indexes, sorted(ids) if sqlite else ids):
+                    created[index] = id
+            for fields, indexes in group_by_fields([values for _, values in updates]).items():
+                # An update giving no fields has nothing to set
+                if fields:
+                    statement = update(self.table).where(self.table.c.id == bindparam('_id'))
+                    db.session.execute(statement, [{'_id': updates[index][0], **updates[index][1]} for index in indexes])
+            if deletes:
+                db.session.execute(delete(self.table).where(self.table.c.id.in_(set(deletes))))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return {'created': created, 'updated': len(updates), 'deleted': len(deletes)}
+
+def item_id(value: Any) -> int:
+    """Return the id of an update or delete, raising FormError unless it is a whole number."""
+    if value is None or value == '':
+        raise FormError({'id': 'is required'})
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise FormError({'id': 'must be a whole number'})
+    try:
+        return coerce_integer(str(value))
+    except ValueError as e:
+        raise FormError({'id': str(e)}) from None
+
+def group_by_fields(rows: List[Dict[str, Any]]) -> Dict[Tuple[str, ...], List[int]]:
+    """Group the indexes of rows by the fields they give, as one statement runs with one set of parameters."""
+    groups: Dict[Tuple[str, ...], List[int]] = {}
+    for index, row in enumerate(rows):
+        groups.setdefault(tuple(sorted(row)), []).append(index)
+    return groups
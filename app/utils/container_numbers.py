@@ -0,0 +1,209 @@
+"""
+ISO 6346 container numbers: generating their check digits and validating
+them, a row at a time or in batches.
+
+A container number is the owner code, the equipment type, the six digit
+serial number and a check digit. Every character before the check digit
+has a value, digits their own and letters 10 to 38 skipping the multiples
+of 11, and is weighted by 2 ** position; the check digit is the weighted
+sum modulo 11, with 10 written as 0. Numbers without an equipment type,
+as on EDI messages, are checked the same way.
+
+The batch functions use NumPy when it is installed and fall back to the
+per-row functions, which give the same results, when it is not.
+"""
+import string
+from collections import namedtuple
+from itertools import islice
+from typing import Iterable, List, Sequence
+
+from sqlalchemy import insert
+
+from app import db
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
+
+# Numbers imported per executemany call
+IMPORT_CHUNK_SIZE = 10000
+
+MAX_SERIAL = 999999
+
+# Owner code, equipment type and serial number
+BASE_LENGTH = 13
+# Container numbers with and without the equipment type
+NUMBER_LENGTHS = (11, 14)
+
+def _letter_values():
+    values = {}
+    value = 10
+    for letter in string.ascii_uppercase:
+        if value % 11 == 0:
+            value += 1
+        values[letter] = value
+        value += 1
+    return values
+
+CHARACTER_VALUES = {**{digit: int(digit) for digit in string.digits}, **_letter_values()}
+
+# Rows rejected by import_containers, by their position in the input
+Rejected = namedtuple("Rejected", "position number")
+ImportResult = namedtuple("ImportResult", "inserted rejected")
+
+def container_base(owner_code: str, equipment_type: str, serial_number: int) -> str:
+    """Return the characters a check digit is computed from, raising ValueError if they are malformed."""
+    if not (len(owner_code) == 4 and owner_code.isalpha() and owner_code.isupper()):
+        raise ValueError(f"Owner code must be four capital letters, got {owner_code!r}")
+    if not (len(equipment_type) == 3 and all(char in CHARACTER_VALUES for char in equipment_type)):
+        raise ValueError(f"Equipment type must be three capital letters or digits, got {equipment_type!r}")
+    if not 0 <= serial_number <= MAX_SERIAL:
+        raise ValueError(f"Serial number must be between 0 and {MAX_SERIAL}, got {serial_number!r}")
+    return f"{owner_code}{equipment_type}{serial_number:06d}"
+
+def check_digit(base: str) -> int:
+    """Return the check digit of base, the characters of a container number before it."""
+    return sum(CHARACTER_VALUES[char] << position for position, char in enumerate(base)) % 11 % 10
+
+def generate_container_number(owner_code: str, equipment_type: str, serial_number: int) -> str:
+    """
+    Generate an ISO 6346-compliant container number.
+    Args:
+        owner_code (str): The 4-letter owner code (e.g., MAEU, CSQU).
+        equipment_type (str): The 3-character equipment identifier (e.g., 22G, 45R).
+        serial_number (int): The 6-digit unique serial number.
+    Returns:
+        str: A valid container number with a check digit.
+    """
+    base = container_base(owner_code, equipment_type, serial_number)
+    return f"{base}{check_digit(base)}"
+
+def sequential_owner_code(block: int) -> str:
+    """
+    Return the owner code of the block'th run of MAX_SERIAL + 1 serial
+    numbers, AAAU, AABU and so on, so numbers made from a running count of
+    containers never repeat. Raises ValueError past ZZZU.
+    """
+    if not 0 <= block < 26 ** 3:
+        raise ValueError(f"Owner code block must be between 0 and {26 ** 3 - 1}, got {block!r}")
+    letters = ""
+    for _ in range(3):
+        block, value = divmod(block, 26)
+        letters = string.ascii_uppercase[value] + letters
+    # U is the category identifier of freight containers
+    return f"{letters}U"
+
+def validate_container_number(number) -> bool:
+    """
+    Return whether number is a container number whose check digit is right:
+    a four letter owner code, optionally the equipment type, then the six
+    digit serial number and the check digit.
+    """
+    if not isinstance(number, str) or len(number) not in NUMBER_LENGTHS:
+        return False
+    if not all(char in CHARACTER_VALUES for char in number):
+        return False
+    if not (number[:4].isalpha() and number[-7:].isdigit()):
+        return False
+    return check_digit(number[:-1]) == int(number[-1])
+
+if np is not None:
+    # Value of each byte, -1 for the bytes no container number contains
+    _BYTE_VALUES = np.full(256, -1, dtype=np.int64)
+    for _char, _value in CHARACTER_VALUES.items():
+        _BYTE_VALUES[ord(_char)] = _value
+
+    def _character_values(strings: List[str], width: int):
+        """The values of the characters of ASCII strings width long, one row per string."""
+        data = np.frombuffer("".join(strings).encode("ascii"), dtype=np.uint8)
+        return _BYTE_VALUES[data].reshape(len(strings), width)
+
+    def _check_digits(values):
+        weights = np.left_shift(1, np.arange(values.shape[1], dtype=np.int64))
+        return values @ weights % 11 % 10
+
+def generate_container_numbers(owner_codes: Sequence[str], equipment_types: Sequence[str],
+                               serial_numbers: Sequence[int]) -> List[str]:
+    """
+    Generate the container numbers of parallel sequences of owner codes,
+    equipment types and serial numbers, as generate_container_number does
+    for each, raising ValueError for the first that is malformed.
+    """
+    if not len(owner_codes) == len(equipment_types) == len(serial_numbers):
+        raise ValueError("Owner codes, equipment types and serial numbers must have the same length")
+    if np is None:
+        return [generate_container_number(*parts) for parts in zip(owner_codes, equipment_types, serial_numbers)]
+    if not len(owner_codes):
+        return []
+
+    serials = np.asarray(serial_numbers, dtype=np.int64)
+    bases = [
+        f"{owner_code}{equipment_type}{serial:06d}"
+        for owner_code, equipment_type, serial in zip(owner_codes, equipment_types, serials.tolist())
+    ]
+    malformed = (serials < 0) | (serials > MAX_SERIAL) | np.fromiter(
+        (len(owner_code) != 4 or len(equipment_type) != 3 or not base.isascii()
+         for owner_code, equipment_type, base in zip(owner_codes, equipment_types, bases)),
+        dtype=bool, count=len(bases)
+    )
+    if not malformed.any():
+        values = _character_values(bases, BASE_LENGTH)
+        malformed = (values < 0).any(axis=1) | (values[:, :4] < 10).any(axis=1)
+    if malformed.any():
+        # Let the per-row function say what is wrong with the first one
+        bad = int(np.argmax(malformed))
+        container_base(owner_codes[bad], equipment_types[bad], serial_numbers[bad])
+    return [f"{base}{digit}" for base, digit in zip(bases, _check_digits(values).tolist())]
+
+def validate_container_numbers(numbers: Sequence) -> List[bool]:
+    """Return whether each of numbers is valid, as validate_container_number does for each."""
+    if np is None:
+        return [validate_container_number(number) for number in numbers]
+
+    results = [False] * len(numbers)
+    by_length = {length: [] for length in NUMBER_LENGTHS}
+    for position, number in enumerate(numbers):
+        if isinstance(number, str) and len(number) in by_length and number.isascii():
+            by_length[len(number)].append(position)
+    for length, positions in by_length.items():
+        if not positions:
+            continue
+        values = _character_values([numbers[position] for position in positions], length)
+        valid = (
+            (values >= 0).all(axis=1) & (values[:, :4] >= 10).all(axis=1) & (values[:, -7:] < 10).all(axis=1)
+            & (_check_digits(values[:, :-1]) == values[:, -1])
+        )
+        for position, is_valid in zip(positions, valid.tolist()):
+            results[position] = is_valid
+    return results
+
+def import_containers(rows: Iterable[dict], chunk_size: int = IMPORT_CHUNK_SIZE) -> ImportResult:
+    """
+    Insert rows, an iterable of S005_Container column dicts, with Core
+    executemany, chunk_size rows per call. The container numbers of each
+    chunk are validated together and rows with a wrong check digit are
+    skipped. Commits once at the end and returns how many rows were
+    inserted and the rejected ones.
+    """
+    from app.models.shipping import S005_Container
+
+    statement = insert(S005_Container.__table__)
+    rows = iter(rows)
+    inserted = 0
+    rejected = []
+    position = 0
+    while chunk := list(islice(rows, chunk_size)):
+        valid = validate_container_numbers([row.get("number") for row in chunk])
+        accepted = []
+        for row, is_valid in zip(chunk, valid):
+            if is_valid:
+                accepted.append(row)
+            else:
+                rejected.append(Rejected(position, row.get("number")))
+            position += 1
+        if accepted:
+            db.session.execute(statement, accepted)
+            inserted += len(accepted)
+    db.session.commit()
+    return ImportResult(inserted, rejected)
@@ -0,0 +1,278 @@
+import json
+import threading
+from functools import cached_property
+from importlib import import_module
+from importlib.util import find_spec
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
+
+from app import db
+from app.models import shipping
+from app.utils import forms
+from app.utils.batch import BatchWriter
+from app.utils.generator import routes as route_plans
+from app.utils.lazy_routes import TableRoutes
+from app.utils.query import keyset_page, many_to_one_options
+from app.utils.reference import LOOKUP_LIMIT, lookup_options, reference_labels
+from app.utils.search import SearchEngine, probe_search
+
+class ModelViews:
+    """
+    The CRUD views of one model, served from its schema definition instead of
+    a generated route module.
+
+    Everything the generated module declares is planned once, with the
+    planning functions of the route generator, so both serve the same
+    fields, searches and lookups: the form binder and the batch writer of
+    the JSON API, the search engine, the many-to-one relationships the list
+    view loads with each page, its reference labels and sort columns. The
+    views then only read the request.
+    """
+
+    def __init__(self, model_name: str, model_data: Dict[str, Any], pagination: str = "offset",
+                 display_columns: Optional[Dict[str, Optional[str]]] = None,
+                 reference_models: Iterable[str] = ()):
+        self.model = model_class(model_name)
+        self.table_name = model_name.lower()
+        self.pagination = pagination
+        fields = model_data["Fields"]
+
+        coercers, required, defaults = route_plans.schema.get_form_binder(fields)
+        self.form_binder = forms.FormBinder(
+            {field: getattr(forms, coercer) for field, coercer in coercers.items()}, required, defaults
+        )
+        self.batch_writer = BatchWriter(self.model, self.form_binder)
+        self.list_foreign_keys = route_plans.get_list_foreign_keys(fields, reference_models=reference_models)
+        self.reference_foreign_keys = {
+            field: (model_class(target), label)
+            for field, (target, label) in route_plans.get_list_reference_fields(
+                fields, display_columns, reference_models).items()
+        }
+        self.lookups = {
+            field: (model_class(target), label)
+            for field, (target, label) in route_plans.get_lookup_fields(fields, display_columns).items()
+        }
+        self.sort_fields = route_plans.get_sort_fields(fields)
+
+        self.search_engine = plan_search_engine(model_name, model_data, display_columns)
+
+        # Models with relationship helpers create, update and delete their rows through them
+        helpers = f'app.utils.relationships.{self.table_name}_helpers'
+        self.helpers = import_module(helpers) if find_spec(helpers) else None
+
+        self.templates = {name: f'crud/{self.table_name}/{name}.html' for name in ('list', '_rows', 'form')}
+
+    @cached_property
+    def list_options(self) -> List:
+        """
+        The loader options of the list view's many-to-one relationships,
+        resolved on the first list request, as resolving them configures
+        every mapper.
+        """
+        return many_to_one_options(self.model, self.list_foreign_keys)
+
+    def related_data(self, item=None) -> Dict[str, Any]:
+        return self.helpers.get_related_data(item) if self.helpers else {}
+
+    def list_view(self):
+        per_page = request.args.get('per_page', 10, type=int)
+        search_filter = self.search_engine.filter(request.args.get('search', ''))
+        query = self.model.query.options(*self.list_options)
+        if search_filter is not None:
+            query = query.filter(search_filter)
+
+        if self.pagination == "keyset":
+            sort = request.args.get('sort', 'id')
+            if sort.lstrip('-') not in self.sort_fields:
+                sort = 'id'
+            try:
+                items, next_cursor = keyset_page(
+                    query, sort, getattr(self.model, sort.lstrip('-')), self.model.id,
+                    request.args.get('cursor'), per_page, descending=sort.startswith('-')
+                )
+            except ValueError as e:
+                return str(e), 400
+            page_args = {"has_more": next_cursor is not None, "next_cursor": next_cursor, "sort": sort}
+        else:
+            page = request.args.get('page', 1, type=int)
+            pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+            items = pagination.items
+            page_args = {"has_more": pagination.has_next, "page": page}
+        if self.reference_foreign_keys:
+            page_args["reference_labels"] = reference_labels(self.reference_foreign_keys)
+
+        if request.headers.get('HX-Request'):
+            return render_template(self.templates['_rows'], items=items, **page_args)
+        return render_template(self.templates['list'], items=items, per_page=per_page, **page_args)
+
+    def create_view(self):
+        form_action = url_for('crud.create', table=self.table_name)
+        if request.method == 'POST':
+            try:
+                if self.helpers:
+                    success, item = getattr(self.helpers, f'create_{self.table_name}')(request.form)
+                    if success:
+                        return redirect(url_for('crud.list', table=self.table_name))
+                else:
+                    item = self.form_binder.bind(self.model(), request.form, create=True)
+                    db.session.add(item)
+                    db.session.commit()
+                    flash('Created successfully', 'success')
+                    return redirect(url_for('crud.list', table=self.table_name))
+            except Exception as e:
+                db.session.rollback()
+                flash(f'Error: {str(e)}', 'error')
+        return render_template(self.templates['form'], edit=False, form_action=form_action, **self.related_data())
+
+    def edit_view(self, id):
+        item = self.model.query.get_or_404(id)
+        form_action = url_for('crud.edit', table=self.table_name, id=id)
+        if request.method == 'POST':
+            try:
+                if self.helpers:
+                    if getattr(self.helpers, f'update_{self.table_name}')(item, request.form):
+                        return redirect(url_for('crud.list', table=self.table_name))
+                else:
+                    self.form_binder.bind(item, request.form)
+                    db.session.commit()
+                    flash('Updated successfully', 'success')
+                    return redirect(url_for('crud.list', table=self.table_name))
+            except Exception as e:
+                db.session.rollback()
+                flash(f'Error: {str(e)}', 'error')
+        return render_template(self.templates['form'], edit=True, item=item, form_action=form_action,
+                               **self.related_data(item))
+
+    def delete_view(self, id):
+        try:
+            item = self.model.query.get_or_404(id)
+            if self.helpers:
+                success = getattr(self.helpers, f'delete_{self.table_name}')(item)
+            else:
+                db.session.delete(item)
+                db.session.commit()
+                success = True
+            return '', 204 if success else 500
+        except Exception as e:
+            db.session.rollback()
+            return str(e), 500
+
+    def lookup_view(self, field):
+        '''Return the rows a foreign key field can reference whose display column starts with q, as JSON.'''
+        if field not in self.lookups:
+            return jsonify(error=f'No lookup for {field}'), 404
+        related_model, label = self.lookups[field]
+        options = lookup_options(related_model, label, request.args.get('q', ''),
+                                 request.args.get('limit', LOOKUP_LIMIT, type=int))
+        return jsonify([option._asdict() for option in options])
+
+def model_class(model_name: str):
+    """Return the model class of a schema model, raising ValueError if app.models.shipping lacks it."""
+    model = getattr(shipping, model_name, None)
+    if model is None:
+        raise ValueError(f"No model class for {model_name} in app.models.shipping")
+    return model
+
+class CrudEngine(TableRoutes):
+    """
+    The CRUD routes of every model in a JSON schema, served at runtime by
+    ModelViews instead of the generated route modules, with the same URLs,
+    endpoints and templates, so a schema change needs no route generation,
+    only a restart.
+
+    The templates and the relationship helpers in app/utils/relationships
+    are still generated, and must be regenerated with the schema: a model's
+    views create, update and delete through its helper module whenever one
+    exists, and which models get one is fixed by the generator's
+    COMPLEX_MODELS.
+
+    The registry of views is read from the schema at startup. A model's views
+    are planned, and its full-text index probed for, on its first request or
+    by preload, as LazyRoutes imports a route module.
+    """
+
+    def __init__(self, bp: Blueprint, models: Dict[str, Any], pagination: str = "offset"):
+        if pagination not in route_plans.PAGINATION_MODES:
+            raise ValueError(f"Unknown pagination mode: {pagination}")
+        self.schema_models = models
+        self.pagination = pagination
+        self.display_columns = route_plans.schema.get_display_columns(models)
+        self.reference_models = route_plans.schema.get_reference_models(models)
+        self.model_names = {model_name.lower(): model_name for model_name in models}
+        # The planned views of each model, by table name
+        self.models: Dict[str, ModelViews] = {}
+        self._lock = threading.Lock()
+        super().__init__(bp, {
+            model_name.lower(): tuple(route_plans.get_route_views(model_data["Fields"], self.display_columns))
+            for model_name, model_data in models.items()
+        })
+
+    def model_views(self, table_name: str) -> ModelViews:
+        """Return the views of a table's model, planning them on first use."""
+        views = self.models.get(table_name)
+        if views is not None:
+            return views
+        with self._lock:
+            if table_name not in self.models:
+                model_name = self.model_names[table_name]
+                views = ModelViews(model_name, self.schema_models[model_name], self.pagination,
+                                   self.display_columns, self.reference_models)
+                probe_search(db.engine, search_engines=[views.search_engine])
+                self.models[table_name] = views
+            return self.models[table_name]
+
+    def view_function(self, table_name: str, view: str):
+        return getattr(self.model_views(table_name), f'{view}_view')
+
+    def batch_writer(self, table_name: str):
+        return self.model_views(table_name).batch_writer
+
+    def preload(self, table_names: Iterable[str]) -> List[str]:
+        """Plan the views of table_names, or of every table for '*'; returns the tables loaded."""
+        table_names = self.table_names(table_names)
+        for table_name in table_names:
+            self.model_views(table_name)
+        return table_names
+
+    def loaded(self) -> List[str]:
+        """Return the tables whose views have been planned."""
+        return [table_name for table_name in self.routes if table_name in self.models]
+
+def plan_search_engine(model_name: str, model_data: Dict[str, Any],
+                       display_columns: Optional[Dict[str, Optional[str]]] = None,
+                       register: bool = True) -> SearchEngine:
+    """Return the SearchEngine of a schema model, planned as its generated route module declares it."""
+    search_fields = route_plans.get_search_fields(model_data, display_columns)
+    return SearchEngine(
+        model_class(model_name),
+        text_fields=search_fields["text"],
+        prefix_fields=search_fields["prefix"],
+        numeric_fields=search_fields["numeric"],
+        date_fields=search_fields["date"],
+        related_fields={
+            field: (model_class(target), label) for field, (target, label) in search_fields["related"].items()
+        },
+        register=register,
+    )
+
+def schema_search_engines(json_file: str | Path) -> List[SearchEngine]:
+    """
+    Plan the search of every model in a JSON schema without registering it,
+    so create_schema creates their indexes without importing any route module.
+    """
+    with open(json_file, "r") as f:
+        models = json.load(f)["Models"]
+    display_columns = route_plans.schema.get_display_columns(models)
+    return [
+        plan_search_engine(model_name, model_data, display_columns, register=False)
+        for model_name, model_data in models.items()
+    ]
+
+def create_crud_engine(json_file: str | Path, pagination: str = "offset"):
+    """Return a crud blueprint and the CrudEngine serving it for the models of a JSON schema file."""
+    with open(json_file, "r") as f:
+        models = json.load(f)["Models"]
+    bp = Blueprint('crud', __name__)
+    return bp, CrudEngine(bp, models, pagination)
@@ -0,0 +1,124 @@
+import math
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, Callable, Dict, Iterable, Optional
+
+# Posted values a boolean field reads as true or false, lowercased
+TRUE_VALUES = frozenset({'1', 'true', 'on', 'yes'})
+FALSE_VALUES = frozenset({'0', 'false', 'off', 'no'})
+
+class FormError(ValueError):
+    """The posted fields that failed to coerce, with the reason for each, by field."""
+
+    def __init__(self, errors: Dict[str, str]):
+        self.errors = errors
+        super().__init__('; '.join(f'{field}: {message}' for field, message in errors.items()))
+
+def coerce_string(value: str) -> str:
+    return value
+
+def coerce_integer(value: str) -> int:
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError('must be a whole number') from None
+
+def coerce_float(value: str) -> float:
+    try:
+        number = float(value)
+    except ValueError:
+        raise ValueError('must be a number') from None
+    # float() also accepts "nan" and "inf", which no column should store
+    if not math.isfinite(number):
+        raise ValueError('must be a number')
+    return number
+
+def coerce_decimal(value: str) -> Decimal:
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        raise ValueError('must be a number') from None
+    if not number.is_finite():
+        raise ValueError('must be a number')
+    return number
+
+def coerce_datetime(value: str) -> datetime:
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError('must be a date and time, such as 2024-01-31 14:30') from None
+
+def coerce_date(value: str) -> date:
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValueError('must be a date, such as 2024-01-31') from None
+
+def coerce_boolean(value: str) -> bool:
+    value = value.lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise ValueError('must be true or false')
+
+class FormBinder:
+    """
+    Sets a model's columns from a posted form, each value converted by the
+    coercer of the column's schema type, which the route generator picks.
+
+    Only the fields in coercers are read, so a form cannot set the id,
+    relationships or other attributes of the model. A blank value is None,
+    which required fields reject, as they reject being left out on create;
+    on create, a blank field with a schema default is left unset so the
+    default applies. Every field is coerced
+    before any is set, and all failures are raised together as a FormError.
+    """
+
+    def __init__(self, coercers: Dict[str, Callable[[str], Any]], required: Iterable[str] = (),
+                 defaults: Iterable[str] = ()):
+        self.coercers = coercers
+        self.required = frozenset(required)
+        self.defaults = frozenset(defaults)
+
+    def values(self, form, create: bool = False) -> Dict[str, Any]:
+        """
+        Return the coerced values of the fields in form, raising FormError for
+        any that fail. form is a posted form or a decoded JSON object, whose
+        numbers and booleans are coerced from their text and nulls are blank.
+        """
+        values = {}
+        errors = {}
+        for field, coerce in self.coercers.items():
+            if field not in form:
+                # A new item has no value to keep for a required field left out
+                if create and field in self.required:
+                    errors[field] = 'is required'
+                continue
+            value = form[field]
+            if value is None:
+                value = ''
+            elif isinstance(value, (int, float)):
+                value = str(value)
+            elif not isinstance(value, str):
+                errors[field] = 'must be a single value'
+                continue
+            value = value.strip()
+            if value:
+                try:
+                    values[field] = coerce(value)
+                except ValueError as e:
+                    errors[field] = str(e)
+            elif field in self.required:
+                errors[field] = 'is required'
+            elif not (create and field in self.defaults):
+                values[field] = None
+        if errors:
+            raise FormError(errors)
+        return values
+
+    def bind(self, item, form, create: bool = False):
+        """Set the columns of item from form; pass create for a new item. Returns item."""
+        for field, value in self.values(form, create).items():
+            setattr(item, field, value)
+        return item
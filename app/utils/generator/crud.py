@@ -1,6 +1,16 @@
 from pathlib import Path
 import json
-from typing import Dict, Any, List
+from importlib.util import spec_from_file_location, module_from_spec
+from typing import Dict, Any, Iterable, List, Optional
+
+# Load the shared writer by path; the generators run without importing the app package
+_writer_spec = spec_from_file_location("writer", Path(__file__).parent / "writer.py")
+writer = module_from_spec(_writer_spec)
+_writer_spec.loader.exec_module(writer)
+
+_schema_spec = spec_from_file_location("schema", Path(__file__).parent / "schema.py")
+schema = module_from_spec(_schema_spec)
+_schema_spec.loader.exec_module(schema)
 
 def get_display_fields(fields: Dict[str, Any], max_fields: int = 5) -> List[str]:
     """Get the first N fields excluding id for display in list view."""
@@ -10,27 +20,39 @@ def get_display_fields(fields: Dict[str, Any], max_fields: int = 5) -> List[str]
         all_fields.remove('id')
     return all_fields[:max_fields]
 
-def generate_crud_templates(json_file: str | Path, output_dir: str | Path) -> None:
-    """Generate CRUD templates from a JSON schema file."""
-    json_path = Path(json_file)
-    output_path = Path(output_dir)
-    
-    with open(json_path, "r") as f:
-        data = json.load(f)
-    
-    models = data["Models"]
-    for model_name, model_data in models.items():
-        table_name = model_name.lower()
-        fields = model_data["Fields"]
-        display_fields = get_display_fields(fields)
+def render_crud_templates(model_name: str, model_data: Dict[str, Any], pagination: str = "offset",
+                          display_columns: Optional[Dict[str, Optional[str]]] = None,
+                          reference_models: Iterable[str] = ()) -> Dict[str, str]:
+    """
+    Render the CRUD templates for one model as {path relative to the output dir: content}.
 
-        # Create output directory for the model
-        model_dir = output_path / "crud" / table_name
-        model_dir.mkdir(parents=True, exist_ok=True)
+    pagination must match the route module: with "keyset" the Load More
+    button passes the route's next cursor instead of a page number. Foreign
+    keys to reference_models are shown with the reference_labels the route
+    passes in, and other foreign keys by the display column of the row the
+    route loads with the page.
+    """
+    files = {}
+    table_name = model_name.lower()
+    fields = schema.get_field_definitions(model_data["Fields"])
+    display_fields = get_display_fields(fields)
+    reference_fields = schema.get_reference_fields(fields, display_columns, reference_models)
+    # Other foreign keys in the list are shown by the display column of the row the route loads with the page
+    related_labels = {
+        field: (fields[field]["relationship"]["field_name"], (display_columns or {}).get(target))
+        for field in display_fields
+        if field not in reference_fields and "relationship" in fields[field]
+        for target in [fields[field]["relationship"]["target_model"]]
+    }
+    if pagination == "keyset":
+        next_page_args = "cursor=next_cursor, sort=sort, per_page=per_page"
+    else:
+        next_page_args = "page=page+1"
 
-        # Generate List Template
-        list_template = model_dir / "list.html"
-        list_template.write_text(f"""\
+    model_dir = f"crud/{table_name}"
+
+    # Generate List Template
+    files[f"{model_dir}/list.html"] = f"""\
 {{% extends "base.html" %}}
 
 {{% block content %}}
@@ -88,7 +110,7 @@ def generate_crud_templates(json_file: str | Path, output_dir: str | Path) -> No
                 </select>
             </div>
             {{% if has_more %}}
-            <button hx-get="{{{{ url_for('crud.{table_name}.list_{table_name}', page=page+1) }}}}"
+            <button hx-get="{{{{ url_for('crud.{table_name}.list_{table_name}', {next_page_args}) }}}}"
                     hx-target="#{table_name}-list"
                     hx-swap="beforeend"
                     class="bg-gray-100 hover:bg-gray-200 text-gray-800 font-semibold py-2 px-4 rounded">
@@ -98,20 +120,22 @@ def generate_crud_templates(json_file: str | Path, output_dir: str | Path) -> No
         </div>
     </div>
 </div>
-{{% endblock %}}""")
+{{% endblock %}}"""
 
-        # Generate Rows Template
-        rows_template = model_dir / "_rows.html"
-        rows_template.write_text(f"""\
+    # Generate Rows Template
+    files[f"{model_dir}/_rows.html"] = f"""\
 {{% for item in items %}}
 {{% include 'crud/{table_name}/_row.html' %}}
-{{% endfor %}}""")
+{{% endfor %}}"""
 
-        # Generate Row Template
-        row_template = model_dir / "_row.html"
-        row_template.write_text(f"""\
+    # Generate Row Template
+    files[f"{model_dir}/_row.html"] = f"""\
 <tr class="hover:bg-gray-50 group">
     {''.join(f'''<td class="px-4 py-1 whitespace-nowrap border-b text-sm">
+        {{{{ reference_labels['{field}'].get(item.{field}, item.{field}) }}}}
+    </td>''' if field in reference_fields else f'''<td class="px-4 py-1 whitespace-nowrap border-b text-sm">
+        {{{{ item.{related_labels[field][0]}.{related_labels[field][1]} if item.{related_labels[field][0]} else item.{field} }}}}
+    </td>''' if related_labels.get(field, (None, None))[1] else f'''<td class="px-4 py-1 whitespace-nowrap border-b text-sm">
         {{{{ item.{field}_name if '{field}' in item.__dict__ and '{field}'.endswith('_id') else item.{field} }}}}
     </td>''' for field in display_fields)}
     <td class="px-4 py-1 whitespace-nowrap border-b text-sm">
@@ -128,35 +152,37 @@ def generate_crud_templates(json_file: str | Path, output_dir: str | Path) -> No
             </button>
         </div>
     </td>
-</tr>""")
-
-        # Generate Form Template
-        # Check if this is a complex model that needs relationship helpers
-        is_complex = model_name in ['S001_Manifest', 'S002_LineItem']
-        
-        # Get relationship fields
-        relationship_fields = []
-        if is_complex:
-            if model_name == 'S001_Manifest':
-                relationship_fields = [
-                    ('shipper_id', 'shippers', 'S015_Client'),
-                    ('consignee_id', 'consignees', 'S015_Client'),
-                    ('vessel_id', 'vessels', 'S009_Vessel'),
-                    ('voyage_id', 'voyages', 'S010_Voyage'),
-                    ('port_of_loading_id', 'ports', 'S012_Port'),
-                    ('port_of_discharge_id', 'ports', 'S012_Port')
-                ]
-            elif model_name == 'S002_LineItem':
-                relationship_fields = [
-                    ('pack_type_id', 'pack_types', 'S004_PackType'),
-                    ('commodity_id', 'commodities', 'S003_Commodity'),
-                    ('container_id', 'containers', 'S005_Container'),
-                    ('manifest_id', 'manifests', 'S001_Manifest')
-                ]
-        
-        form_template = model_dir / "form.html"
-        form_template.write_text(f"""\
-{{% extends "base.html" %}}
+</tr>"""
+
+    # Generate Form Template
+    # Check if this is a complex model that needs relationship helpers
+    is_complex = model_name in ['S001_Manifest', 'S002_LineItem']
+    
+    # Get relationship fields
+    relationship_fields = []
+    if is_complex:
+        if model_name == 'S001_Manifest':
+            relationship_fields = [
+                ('shipper_id', 'shippers', 'S015_Client'),
+                ('consignee_id', 'consignees', 'S015_Client'),
+                ('vessel_id', 'vessels', 'S009_Vessel'),
+                ('voyage_id', 'voyages', 'S010_Voyage'),
+                ('port_of_loading_id', 'port_of_loadings', 'S012_Port'),
+                ('port_of_discharge_id', 'port_of_discharges', 'S012_Port')
+            ]
+        elif model_name == 'S002_LineItem':
+            relationship_fields = [
+                ('pack_type_id', 'pack_types', 'S004_PackType'),
+                ('commodity_id', 'commoditys', 'S003_Commodity'),
+                ('container_id', 'containers', 'S005_Container'),
+                ('manifest_id', 'manifests', 'S001_Manifest')
+            ]
+    
+    # Foreign keys are rendered with the shared macro, from the options get_related_data returns
+    related_data = {field: key for field, key, _ in relationship_fields}
+    files[f"{model_dir}/form.html"] = f"""\
+{{% extends "base.html" %}}{"""
+{% from "crud/_reference_select.html" import reference_select %}""" if related_data else ""}
 
 {{% block content %}}
 <div class="container mx-auto px-4 py-8">
@@ -168,20 +194,16 @@ def generate_crud_templates(json_file: str | Path, output_dir: str | Path) -> No
               hx-swap="outerHTML"
               class="space-y-6">
             {''.join(f"""
+            {{{{ reference_select('{field}', '{field.title().replace('_', ' ')}', {related_data[field]},
+                                url_for('crud.{table_name}.lookup_{table_name}', field='{field}'),
+                                item.{field} if edit else None) }}}}""" if field in related_data else f"""
             <div class="flex flex-col">
                 <label for="{field}" class="text-sm font-semibold text-gray-600 mb-1">{field.title().replace('_', ' ')}</label>
-                {'<select' if any(field == rel[0] for rel in relationship_fields) else '<input type="text"'} 
+                <input type="text" 
                        id="{field}" 
                        name="{field}"
                        class="px-3 py-2 border rounded-lg focus:outline-none focus:ring-2 focus:ring-blue-500"
-                       {'>' if any(field == rel[0] for rel in relationship_fields) else f'value="{{{{ item.{field} if edit else \'\' }}}}">'}{'''
-                    <option value="">Select...</option>
-                    {{% for related in ''' + next(rel[1] for rel in relationship_fields if rel[0] == field) + ''' %}}
-                    <option value="{{{{ related.id }}}}" {{{{ 'selected' if edit and item.''' + field + ''' == related.id else '' }}}}>
-                        {{{{ related.name if hasattr(related, 'name') else related.id }}}}
-                    </option>
-                    {{% endfor %}}
-                </select>''' if any(field == rel[0] for rel in relationship_fields) else '</input>'}
+                       value="{{{{ item.{field} if edit and item.{field} is not none else '' }}}}"></input>
             </div>""" for field in fields.keys())}
             
             <div class="flex justify-end space-x-4 mt-8">
@@ -197,9 +219,28 @@ def generate_crud_templates(json_file: str | Path, output_dir: str | Path) -> No
         </form>
     </div>
 </div>
-{{% endblock %}}""")
+{{% endblock %}}"""
+
+    return files
+
+def generate_crud_templates(json_file: str | Path, output_dir: str | Path, pagination: str = "offset") -> Dict[str, List[str]]:
+    """Generate CRUD templates from a JSON schema file, writing only files whose content changed."""
+    json_path = Path(json_file)
+    output_path = Path(output_dir)
+    
+    with open(json_path, "r") as f:
+        data = json.load(f)
+    
+    models = data["Models"]
+    display_columns = schema.get_display_columns(models)
+    reference_models = schema.get_reference_models(models)
+    files = {}
+    for model_name, model_data in models.items():
+        files.update(render_crud_templates(model_name, model_data, pagination, display_columns, reference_models))
+    summary = writer.write_files(output_path, files)
 
-    print(f"CRUD templates generated in {output_dir}")
+    print(f"CRUD templates generated in {output_dir} ({writer.format_summary(summary)})")
+    return summary
 
 if __name__ == "__main__":
     # Example usage
@@ -1,42 +1,130 @@
 #!/usr/bin/env python
+import os
+import sys
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
 from importlib.util import spec_from_file_location, module_from_spec
 
+GENERATOR_DIR = Path(__file__).parent
+
+# Below this many models, starting worker processes costs more than it saves
+PARALLEL_THRESHOLD = 50
+
+_generators = {}
+
 def import_module(path: Path, name: str):
     spec = spec_from_file_location(name, path)
     module = module_from_spec(spec)
+    sys.modules[name] = module
     spec.loader.exec_module(module)
     return module
 
+def load_generators():
+    """Import the generator modules once per process."""
+    if not _generators:
+        for name in ("schema", "crud", "routes", "relationships", "writer"):
+            _generators[name] = import_module(GENERATOR_DIR / f"{name}.py", name)
+    return _generators
+
+def render_model(model_name, model_data, pagination="offset", display_columns=None, reference_models=()):
+    """Render the templates and the route module for one model."""
+    generators = load_generators()
+    return (
+        generators["crud"].render_crud_templates(model_name, model_data, pagination, display_columns, reference_models),
+        generators["routes"].render_crud_route(model_name, model_data, pagination, display_columns, reference_models),
+    )
+
+def render_models(models, workers=None, pagination="offset"):
+    """
+    Render templates and routes for every model, spread over a process pool
+    for large schemas. Returns (template_files, route_files).
+    """
+    workers = workers or os.cpu_count() or 1
+    schema = load_generators()["schema"]
+    display_columns = schema.get_display_columns(models)
+    reference_models = schema.get_reference_models(models)
+    if workers > 1 and len(models) >= PARALLEL_THRESHOLD:
+        chunksize = max(1, len(models) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(
+                render_model, models.keys(), models.values(), repeat(pagination), repeat(display_columns),
+                repeat(reference_models), chunksize=chunksize
+            ))
+    else:
+        results = [render_model(model_name, model_data, pagination, display_columns, reference_models)
+                   for model_name, model_data in models.items()]
+
+    template_files = {}
+    route_files = {}
+    for templates, routes in results:
+        template_files.update(templates)
+        route_files.update(routes)
+    return template_files, route_files
+
+def generate_all(json_file, templates_dir, routes_dir, relationships_dir, workers=None, pagination="offset"):
+    """
+    Parse the schema once and generate templates, routes and relationship helpers.
+
+    Every file is rendered before anything is written, so a failure leaves
+    the previous output in place. Only files whose content changed are
+    replaced, each atomically, and files that are no longer generated are
+    removed. Returns the write summary for each output directory.
+
+    pagination is "offset" or "keyset"; see routes.render_crud_route.
+    """
+    generators = load_generators()
+    relationships = generators["relationships"]
+    writer = generators["writer"]
+
+    with open(json_file, "r") as f:
+        models = json.load(f)["Models"]
+
+    template_files, route_files = render_models(models, workers, pagination)
+
+    display_columns = generators["schema"].get_display_columns(models)
+    relationship_files = {}
+    complex_models = relationships.get_complex_models(models)
+    for model_name, config in complex_models.items():
+        relationship_files.update(relationships.render_relationship_helper(
+            model_name, config, models[model_name]["Fields"], display_columns
+        ))
+    relationship_files.update(relationships.render_relationship_helpers_init(complex_models.keys()))
+
+    # Write the route registry only once every route module is in place
+    route_files.update(generators["routes"].render_crud_routes_init(models, display_columns))
+
+    return {
+        "templates": writer.write_files(templates_dir, template_files),
+        "relationship helpers": writer.write_files(relationships_dir, relationship_files),
+        "routes": writer.write_files(routes_dir, route_files),
+    }
+
 def main():
-    # Get module paths
-    generator_dir = Path(__file__).parent
-    crud_path = generator_dir / "crud.py"
-    routes_path = generator_dir / "routes.py"
-    relationships_path = generator_dir / "relationships.py"
-    
-    # Import modules directly
-    crud_module = import_module(crud_path, "crud")
-    routes_module = import_module(routes_path, "routes")
-    relationships_module = import_module(relationships_path, "relationships")
-    
+    parser = argparse.ArgumentParser(description="Generate CRUD templates, routes and relationship helpers")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument(
+        "--pagination", choices=("offset", "keyset"), default="offset",
+        help="list view paging: offset pages with a count, keyset follows a cursor (default: offset)"
+    )
+    args = parser.parse_args()
+
     # Get paths relative to project root
     project_root = Path(__file__).parent.parent.parent.parent
     json_file = project_root / "dsl" / "output" / "json" / "shipping.json"
-    templates_dir = project_root / "app" / "templates" / "crud"
+    templates_dir = project_root / "app" / "templates"
     routes_dir = project_root / "app" / "routes" / "crud"
     relationships_dir = project_root / "app" / "utils" / "relationships"
-    
-    # Generate templates and routes
-    print("Generating CRUD templates...")
-    crud_module.generate_crud_templates(json_file, templates_dir)
-    
-    print("Generating CRUD routes...")
-    routes_module.generate_crud_routes(json_file, routes_dir)
-    
-    print("Generating relationship helpers...")
-    relationships_module.generate_relationship_helpers(json_file, relationships_dir)
-    
+
+    print("Generating CRUD templates, routes and relationship helpers...")
+    summaries = generate_all(
+        json_file, templates_dir, routes_dir, relationships_dir, args.workers, args.pagination
+    )
+    for name, summary in summaries.items():
+        print(f"  {name}: {load_generators()['writer'].format_summary(summary)}")
+
     print("\nGeneration complete!")
     print(f"Templates generated in: {templates_dir}")
     print(f"Routes generated in: {routes_dir}")
@@ -1,69 +1,88 @@
 from pathlib import Path
+from importlib.util import spec_from_file_location, module_from_spec
 import json
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, List, Optional
 
-def generate_relationship_helpers(json_file: str | Path, output_dir: str | Path) -> None:
-    """Generate helper functions for handling complex model relationships.
-    
-    Args:
-        json_file: Path to the JSON schema file
-        output_dir: Directory where helper files will be generated
-    """
-    json_path = Path(json_file)
-    output_path = Path(output_dir)
-    output_path.mkdir(parents=True, exist_ok=True)
-    
-    with open(json_path, "r") as f:
-        data = json.load(f)
-    
-    # Generate helpers for complex models
-    complex_models = {
-        'S001_Manifest': {
-            'relationships': [
-                ('shipper', 'S015_Client'),
-                ('consignee', 'S015_Client'),
-                ('vessel', 'S009_Vessel'),
-                ('voyage', 'S010_Voyage'),
-                ('port_of_loading', 'S012_Port'),
-                ('port_of_discharge', 'S012_Port')
-            ]
-        },
-        'S002_LineItem': {
-            'relationships': [
-                ('pack_type', 'S004_PackType'),
-                ('commodity', 'S003_Commodity'),
-                ('container', 'S005_Container'),
-                ('manifest', 'S001_Manifest')
-            ]
-        }
+# Load the shared writer by path; the generators run without importing the app package
+_writer_spec = spec_from_file_location("writer", Path(__file__).parent / "writer.py")
+writer = module_from_spec(_writer_spec)
+_writer_spec.loader.exec_module(writer)
+
+_schema_spec = spec_from_file_location("schema", Path(__file__).parent / "schema.py")
+schema = module_from_spec(_schema_spec)
+_schema_spec.loader.exec_module(schema)
+
+# Models whose forms need relationship helpers
+COMPLEX_MODELS = {
+    'S001_Manifest': {
+        'relationships': [
+            ('shipper', 'S015_Client'),
+            ('consignee', 'S015_Client'),
+            ('vessel', 'S009_Vessel'),
+            ('voyage', 'S010_Voyage'),
+            ('port_of_loading', 'S012_Port'),
+            ('port_of_discharge', 'S012_Port')
+        ],
+        # A field left blank on create, numbered by the app.utils.sequences function
+        'numbered': ('bill_of_lading', 'next_bill_of_lading'),
+    },
+    'S002_LineItem': {
+        'relationships': [
+            ('pack_type', 'S004_PackType'),
+            ('commodity', 'S003_Commodity'),
+            ('container', 'S005_Container'),
+            ('manifest', 'S001_Manifest')
+        ]
     }
-    
-    for model_name, config in complex_models.items():
-        helper_file = output_path / f"{model_name.lower()}_helpers.py"
-        helper_content = f"""from flask import flash
+}
+
+def get_complex_models(models: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Get the COMPLEX_MODELS the schema defines; other schemas have none of the shipping models."""
+    return {model_name: config for model_name, config in COMPLEX_MODELS.items() if model_name in models}
+
+def render_relationship_helper(model_name: str, config: Dict[str, Any], fields: Dict[str, Any],
+                               display_columns: Optional[Dict[str, Optional[str]]] = None) -> Dict[str, str]:
+    """
+    Render the relationship helper module for one complex model, whose forms
+    set the model's fields through a binder planned from their schema types.
+
+    display_columns, from schema.get_display_columns, names the column each
+    dropdown shows; rows are shown by id when it is not given.
+    """
+    display_columns = display_columns or {}
+    binder_import, binder = schema.render_form_binder(fields)
+    numbered_import = numbering = ""
+    if config.get('numbered'):
+        field, number = config['numbered']
+        numbered_import = f"\nfrom app.utils.sequences import {number}"
+        numbering = f"""
+        # Number a blank {field} from its sequence, reserved in the session's transaction
+        if not item.{field}:
+            item.{field} = {number}(item, db.session.connection())"""
+    helper_content = f"""from flask import flash
 from app.models.shipping import {model_name}, {', '.join(rel[1] for rel in config['relationships'])}
 from app import db
+from app.utils.reference import reference_data
+{binder_import}{numbered_import}
+
+# Coerces each posted field by its schema type, in one pass, before any is set
+{binder}
 
-def get_related_data():
-    \"\"\"Get all related data needed for {model_name} forms.\"\"\"
+def get_related_data(item=None):
+    \"\"\"
+    Get the dropdown options needed for {model_name} forms: every row of a
+    small lookup table, from the shared cache, or just the row item refers
+    to, the rest being looked up as the user types.
+    \"\"\"
     return {{
         {''.join(f"""
-        '{rel[0]}s': {rel[1]}.query.all(),""" for rel in config['relationships'])}
+        '{rel[0]}s': reference_data({rel[1]}, {display_columns.get(rel[1])!r}, item.{rel[0]}_id if item else None),""" for rel in config['relationships'])}
     }}
 
 def create_{model_name.lower()}(form_data):
     \"\"\"Create a new {model_name} with related data.\"\"\"
     try:
-        item = {model_name}()
-        {''.join(f"""
-        if '{rel[0]}_id' in form_data:
-            item.{rel[0]}_id = form_data['{rel[0]}_id']""" for rel in config['relationships'])}
-        
-        # Set other fields
-        for field, value in form_data.items():
-            if not field.endswith('_id') and hasattr(item, field):
-                setattr(item, field, value)
-        
+        item = form_binder.bind({model_name}(), form_data, create=True){numbering}
         db.session.add(item)
         db.session.commit()
         flash('Created successfully', 'success')
@@ -76,15 +95,7 @@ def create_{model_name.lower()}(form_data):
 def update_{model_name.lower()}(item, form_data):
     \"\"\"Update an existing {model_name} with related data.\"\"\"
     try:
-        {''.join(f"""
-        if '{rel[0]}_id' in form_data:
-            item.{rel[0]}_id = form_data['{rel[0]}_id']""" for rel in config['relationships'])}
-        
-        # Update other fields
-        for field, value in form_data.items():
-            if not field.endswith('_id') and hasattr(item, field):
-                setattr(item, field, value)
-        
+        form_binder.bind(item, form_data)
         db.session.commit()
         flash('Updated successfully', 'success')
         return True
@@ -104,18 +115,44 @@ def delete_{model_name.lower()}(item):
         flash(f'Error: {{str(e)}}', 'error')
         return False
 """
-        helper_file.write_text(helper_content)
-    
-    # Generate __init__.py to make the package importable
-    init_file = output_path / "__init__.py"
+    return {f"{model_name.lower()}_helpers.py": helper_content}
+
+def render_relationship_helpers_init(model_names: Iterable[str]) -> Dict[str, str]:
+    """Render the package __init__ that re-exports every helper module."""
     init_content = ""
-    for model_name in complex_models.keys():
+    for model_name in model_names:
         module_name = f"{model_name.lower()}_helpers"
         init_content += f"from .{module_name} import *\n"
     
-    init_file.write_text(init_content)
+    return {"__init__.py": init_content}
+
+def generate_relationship_helpers(json_file: str | Path, output_dir: str | Path) -> Dict[str, List[str]]:
+    """Generate helper functions for handling complex model relationships.
+    
+    Only files whose content changed are written.
+    
+    Args:
+        json_file: Path to the JSON schema file
+        output_dir: Directory where helper files will be generated
+    """
+    output_path = Path(output_dir)
+    
+    with open(json_file, "r") as f:
+        models = json.load(f)["Models"]
+    display_columns = schema.get_display_columns(models)
+    
+    # Generate helpers for complex models
+    files = {}
+    complex_models = get_complex_models(models)
+    for model_name, config in complex_models.items():
+        files.update(render_relationship_helper(model_name, config, models[model_name]["Fields"], display_columns))
+    
+    # Generate __init__.py to make the package importable
+    files.update(render_relationship_helpers_init(complex_models.keys()))
+    summary = writer.write_files(output_path, files)
     
-    print(f"Relationship helpers generated in {output_dir}")
+    print(f"Relationship helpers generated in {output_dir} ({writer.format_summary(summary)})")
+    return summary
 
 if __name__ == "__main__":
     # Example usage
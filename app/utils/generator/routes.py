@@ -1,124 +1,277 @@
 from pathlib import Path
 import json
-from typing import Dict, Any
-from sqlalchemy import or_, func
+from importlib.util import spec_from_file_location, module_from_spec
+from typing import Dict, Any, Iterable, List, Optional
 
-def generate_crud_routes(json_file: str | Path, output_dir: str | Path) -> None:
-    """Generate CRUD routes from a JSON schema file."""
-    json_path = Path(json_file)
-    output_path = Path(output_dir)
-    output_path.mkdir(parents=True, exist_ok=True)
+# Load the shared writer by path; the generators run without importing the app package
+_writer_spec = spec_from_file_location("writer", Path(__file__).parent / "writer.py")
+writer = module_from_spec(_writer_spec)
+_writer_spec.loader.exec_module(writer)
+
+_schema_spec = spec_from_file_location("schema", Path(__file__).parent / "schema.py")
+schema = module_from_spec(_schema_spec)
+_schema_spec.loader.exec_module(schema)
+
+PAGINATION_MODES = ("offset", "keyset")
+
+def get_list_foreign_keys(fields: Dict[str, Any], max_fields: int = 5,
+                          reference_models: Iterable[str] = ()) -> List[str]:
+    """
+    Get the many-to-one foreign key fields among the fields shown in the list
+    view, but those to reference models, whose labels come from the cache.
+    """
+    list_fields = [field for field in fields if field != 'id'][:max_fields]
+    return [
+        field for field in list_fields
+        if "relationship" in fields[field] and fields[field]["relationship"]["target_model"] not in reference_models
+    ]
+
+def get_list_reference_fields(fields: Dict[str, Any], display_columns: Optional[Dict[str, Optional[str]]],
+                              reference_models: Iterable[str], max_fields: int = 5) -> Dict[str, Any]:
+    """Get the foreign key fields to reference models among the fields shown in the list view."""
+    list_fields = [field for field in fields if field != 'id'][:max_fields]
+    reference_fields = schema.get_reference_fields(fields, display_columns, reference_models)
+    return {field: reference_fields[field] for field in list_fields if field in reference_fields}
+
+def get_indexed_fields(model_data: Dict[str, Any]) -> List[str]:
+    """Get the fields that lead an index in the schema, unique fields included. Partial indexes are skipped."""
+    indexed = [field for field, definition in model_data["Fields"].items() if definition.get("unique")]
+    for definition in model_data.get("Indices", {}).values():
+        if isinstance(definition, dict):
+            if definition.get("where"):
+                continue
+            definition = definition["columns"]
+        leading = definition[0] if definition else None
+        if isinstance(leading, dict):
+            leading = leading.get("column")
+        if leading:
+            indexed.append(leading)
+    return indexed
+
+def get_search_fields(model_data: Dict[str, Any], display_columns: Optional[Dict[str, Optional[str]]] = None,
+                      max_fields: int = 5) -> Dict[str, Any]:
+    """
+    Plan the search over the first N fields, id included, from their schema
+    types: text (prefix matched when indexed), numeric, date, and foreign
+    keys searched through the display column of the model they reference.
+    Foreign keys are left out when display_columns is not given.
+    """
+    fields = model_data["Fields"]
+    indexed_fields = get_indexed_fields(model_data)
+    search_fields = {"text": [], "prefix": [], "numeric": [], "date": [], "related": {}}
+    for field in list(fields)[:max_fields]:
+        definition = fields[field]
+        if "password" in field:
+            continue
+        if "relationship" in definition or "foreign_key" in definition:
+            target = schema.get_related_target(definition, display_columns or {})
+            if target and (display_columns or {}).get(target):
+                search_fields["related"][field] = (target, display_columns[target])
+        elif definition.get("type") in schema.TEXT_TYPES:
+            search_fields["text"].append(field)
+            if field in indexed_fields:
+                search_fields["prefix"].append(field)
+        elif definition.get("type") in schema.NUMERIC_TYPES:
+            search_fields["numeric"].append(field)
+        elif definition.get("type") in schema.DATE_TYPES:
+            search_fields["date"].append(field)
+    return search_fields
+
+def get_lookup_fields(fields: Dict[str, Any],
+                      display_columns: Optional[Dict[str, Optional[str]]] = None) -> Dict[str, Any]:
+    """
+    Get the foreign key fields the form looks up as the user types, as
+    {field: (model it references, that model's display column)}.
+    Left empty when display_columns is not given.
+    """
+    lookups = {}
+    for field, definition in fields.items():
+        if "relationship" in definition or "foreign_key" in definition:
+            target = schema.get_related_target(definition, display_columns or {})
+            if target in (display_columns or {}):
+                lookups[field] = (target, display_columns[target])
+    return lookups
+
+def render_search_engine(model_name: str, search_fields: Dict[str, Any]) -> str:
+    """Render the SearchEngine declaration for the planned search fields."""
+    related = "".join(
+        f"\n        {field!r}: ({target}, {display_column!r}),"
+        for field, (target, display_column) in search_fields["related"].items()
+    )
+    return f"""search_engine = SearchEngine(
+    {model_name},
+    text_fields={search_fields["text"]!r},
+    prefix_fields={search_fields["prefix"]!r},
+    numeric_fields={search_fields["numeric"]!r},
+    date_fields={search_fields["date"]!r},
+    related_fields={{{related}{chr(10) + "    " if related else ""}}},
+)"""
+
+def get_sort_fields(fields: Dict[str, Any], max_fields: int = 5) -> List[str]:
+    """Get the fields the list view can be sorted by: id and the plain columns shown in the list."""
+    list_fields = [field for field in fields if field != 'id'][:max_fields]
+    return ['id'] + [field for field in list_fields if "relationship" not in fields[field]]
+
+def render_crud_route(model_name: str, model_data: Dict[str, Any], pagination: str = "offset",
+                      display_columns: Optional[Dict[str, Optional[str]]] = None,
+                      reference_models: Iterable[str] = ()) -> Dict[str, str]:
+    """
+    Render the CRUD route module for one model as {path relative to the output dir: content}.
+
+    pagination selects how the list route pages: "offset" pages with
+    query.paginate, "keyset" seeks past an opaque cursor over (sort column, id).
+    display_columns, from schema.get_display_columns, lets the search match foreign
+    keys through the rows they reference. The list view shows foreign keys to
+    reference_models, from schema.get_reference_models, with the labels of
+    the cached rows instead of joining them.
+    """
+    if pagination not in PAGINATION_MODES:
+        raise ValueError(f"Unknown pagination mode: {pagination}")
+    table_name = model_name.lower()
+    fields = model_data["Fields"]
+    search_fields = get_search_fields(model_data, display_columns)
+    lookup_fields = get_lookup_fields(fields, display_columns)
+    reference_fields = get_list_reference_fields(fields, display_columns, reference_models)
+    related_models = sorted((
+        {target for target, _ in search_fields["related"].values()}
+        | {target for target, _ in lookup_fields.values()}
+        | {target for target, _ in reference_fields.values()}
+    ) - {model_name})
+    list_foreign_keys = get_list_foreign_keys(fields, reference_models=reference_models)
+    keyset = pagination == "keyset"
     
-    with open(json_path, "r") as f:
-        data = json.load(f)
+    # Check if this is a complex model that needs relationship helpers
+    is_complex = model_name in ['S001_Manifest', 'S002_LineItem']
     
-    # Generate routes for each model
-    models = data["Models"]
-    for model_name, model_data in models.items():
-        table_name = model_name.lower()
-        fields = model_data["Fields"]
-        display_fields = list(fields.keys())[:5]  # First 5 fields for list view
-        
-        route_file = output_path / f"{table_name}.py"
-        
-        # Check if this is a complex model that needs relationship helpers
-        is_complex = model_name in ['S001_Manifest', 'S002_LineItem']
-        
-        # Import statements
-        imports = f"""from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, Response
-from app.models.shipping import {model_name}, S015_Client, S009_Vessel
+    # Import statements
+    imports = f"""from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, Response
+from app.models.shipping import {", ".join([model_name] + related_models)}
 from app import db
-from sqlalchemy import or_, func"""
-        
-        if is_complex:
-            imports += f"""
-from app.utils.relationships import get_related_data, create_{table_name}, update_{table_name}, delete_{table_name}"""
-        
-        # Route content
-        route_content = f"""{imports}
+from app.utils.search import SearchEngine"""
+    reference_helpers = (["LOOKUP_LIMIT", "lookup_options"] if lookup_fields else []) + (
+        ["reference_labels"] if reference_fields else [])
+    if reference_helpers:
+        imports += f"""
+from app.utils.reference import {', '.join(reference_helpers)}"""
+
+    query_helpers = (["many_to_one_options"] if list_foreign_keys else []) + (["keyset_page"] if keyset else [])
+    if query_helpers:
+        imports += f"""
+from app.utils.query import {', '.join(query_helpers)}"""
+    
+    if keyset:
+        pagination_params = """    per_page = request.args.get('per_page', 10, type=int)
+    cursor = request.args.get('cursor')
+    sort = request.args.get('sort', 'id')
+    if sort.lstrip('-') not in SORT_FIELDS:
+        sort = 'id'"""
+        page_query = f"""    # Seek past the cursor instead of skipping rows, and fetch one extra row instead of counting
+    try:
+        items, next_cursor = keyset_page(query, sort, getattr({model_name}, sort.lstrip('-')), {model_name}.id,
+                                         cursor, per_page, descending=sort.startswith('-'))
+    except ValueError as e:
+        return str(e), 400"""
+        page_args = {
+            "has_more": "next_cursor is not None",
+            "next_cursor": "next_cursor",
+            "sort": "sort",
+        }
+    else:
+        pagination_params = """    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 10, type=int)"""
+        page_query = """    # Get paginated results
+    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+    items = pagination.items"""
+        page_args = {
+            "has_more": "pagination.has_next",
+            "page": "page",
+        }
+    if reference_fields:
+        page_args["reference_labels"] = "reference_labels(REFERENCE_FOREIGN_KEYS)"
+    rows_args = "".join(f",\n                            {name}={value}" for name, value in page_args.items())
+    list_args = "".join(f",\n                         {name}={value}" for name, value in page_args.items())
+    
+    if is_complex:
+        imports += f"""
+from app.utils.relationships import {table_name}_helpers
+from app.utils.relationships.{table_name}_helpers import get_related_data"""
+        binder_name = f"{table_name}_helpers.form_binder"
+    else:
+        binder_import, binder = schema.render_form_binder(fields)
+        imports += f"""
+{binder_import}"""
+        binder_name = "form_binder"
+    imports += """
+from app.utils.batch import BatchWriter"""
+    
+    # Route content
+    route_content = f"""{imports}
 
 bp = Blueprint('{table_name}', __name__)
+{f"""
+# Many-to-one relationships shown in the list view, loaded with each page
+LIST_FOREIGN_KEYS = {list_foreign_keys!r}
+""" if list_foreign_keys else ""}{f"""
+# Foreign keys to reference tables shown in the list view, labelled from the in-memory cache
+REFERENCE_FOREIGN_KEYS = {{{"".join(f"{chr(10)}    {field!r}: ({target}, {label!r})," for field, (target, label) in reference_fields.items())}
+}}
+""" if reference_fields else ""}{f"""
+# Columns the list view can be sorted by; prefix with - for descending order
+SORT_FIELDS = {get_sort_fields(fields)!r}
+""" if keyset else ""}{f"""
+# Foreign keys the form looks up as the user types: {{field: (related model, display column)}}
+LOOKUPS = {{{"".join(f"{chr(10)}    {field!r}: ({target}, {label!r})," for field, (target, label) in lookup_fields.items())}
+}}
+""" if lookup_fields else ""}{"" if is_complex else f"""
+# Coerces each posted field by its schema type, in one pass, before any is set
+{binder}
+"""}
+# Writes the creates, updates and deletes posted to /api/{table_name}/batch as bulk statements
+batch_writer = BatchWriter({model_name}, {binder_name})
+
+# Search plan from the schema's column types, so each search term becomes predicates an index can serve
+{render_search_engine(model_name, search_fields)}
 
 def get_search_filter(model, search_term):
     '''Return case-insensitive search filter for the model.'''
-    if not search_term:
-        return None
-    
-    # Convert search term to lowercase for case-insensitive search
-    search_term = search_term.lower()
-    
-    conditions = []
-    
-    # Search in text fields
-    text_fields = {repr(display_fields)}
-    for field in text_fields:
-        if hasattr(model, field):
-            if field.endswith('_id'):
-                # Handle relationship fields
-                if field == 'shipper_id':
-                    conditions.append(model.shipper.has(func.lower(S015_Client.name).like(f'%{{{{search_term}}}}%')))
-                elif field == 'consignee_id':
-                    conditions.append(model.consignee.has(func.lower(S015_Client.name).like(f'%{{{{search_term}}}}%')))
-                elif field == 'vessel_id':
-                    conditions.append(model.vessel.has(func.lower(S009_Vessel.name).like(f'%{{{{search_term}}}}%')))
-            else:
-                # Handle regular fields
-                conditions.append(func.lower(getattr(model, field)).like(f'%{{{{search_term}}}}%'))
-    
-    return or_(*conditions) if conditions else None
+    return search_engine.filter(search_term)
 
 @bp.route('/')
 def list_{table_name}():
     # Get pagination parameters
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
+{pagination_params}
     search = request.args.get('search', '')
     
     # Build query with eager loading of relationships
     query = {model_name}.query
-    {''.join(f"""
-    query = query.options(
-        db.joinedload({model_name}.shipper),
-        db.joinedload({model_name}.consignee),
-        db.joinedload({model_name}.vessel),
-        db.joinedload({model_name}.voyage),
-        db.joinedload({model_name}.port_of_loading),
-        db.joinedload({model_name}.port_of_discharge)
-    )""" if is_complex else "")}
+    {f"""
+    # Join the related rows into the page query so rendering them costs no extra queries
+    query = query.options(*many_to_one_options({model_name}, LIST_FOREIGN_KEYS))""" if list_foreign_keys else ""}
     
     # Apply search filter if provided
     search_filter = get_search_filter({model_name}, search)
     if search_filter is not None:
         query = query.filter(search_filter)
     
-    # Get paginated results
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
-    items = pagination.items
+{page_query}
     
     # If this is an HTMX request, return only the rows
     if request.headers.get('HX-Request'):
         return render_template('crud/{table_name}/_rows.html', 
-                            items=items,
-                            has_more=pagination.has_next,
-                            page=page)
+                            items=items{rows_args})
     
     # For full page request, return complete template
     return render_template('crud/{table_name}/list.html', 
-                         items=items,
-                         has_more=pagination.has_next,
-                         page=page,
+                         items=items{list_args},
                          per_page=per_page)
 
 @bp.route('/create', methods=['GET', 'POST'])
 def create_{table_name}():
     if request.method == 'POST':
         try:
-            {f'''success, item = create_{table_name}(request.form)
+            {f'''success, item = {table_name}_helpers.create_{table_name}(request.form)
             if success:
-                return redirect(url_for("crud.{table_name}.list_{table_name}"))''' if is_complex else f'''item = {model_name}()
-            {"".join(f"""
-            if '{field}' in request.form:
-                item.{field} = request.form['{field}']""" for field in fields.keys() if field != 'id')}
+                return redirect(url_for("crud.{table_name}.list_{table_name}"))''' if is_complex else f'''item = form_binder.bind({model_name}(), request.form, create=True)
             db.session.add(item)
             db.session.commit()
             flash('Created successfully', 'success')
@@ -142,10 +295,8 @@ def edit_{table_name}(id):
     
     if request.method == 'POST':
         try:
-            {f'''if update_{table_name}(item, request.form):
-                return redirect(url_for("crud.{table_name}.list_{table_name}"))''' if is_complex else f'''{"".join(f"""
-            if '{field}' in request.form:
-                item.{field} = request.form['{field}']""" for field in fields.keys() if field != 'id')}
+            {f'''if {table_name}_helpers.update_{table_name}(item, request.form):
+                return redirect(url_for("crud.{table_name}.list_{table_name}"))''' if is_complex else f'''form_binder.bind(item, request.form)
             db.session.commit()
             flash('Updated successfully', 'success')
             return redirect(url_for("crud.{table_name}.list_{table_name}"))'''}
@@ -156,45 +307,89 @@ def edit_{table_name}(id):
                                 edit=True, 
                                 item=item,
                                 form_action=url_for('crud.{table_name}.edit_{table_name}', id=id)
-                                {', **get_related_data()' if is_complex else ''})
+                                {', **get_related_data(item)' if is_complex else ''})
     
     return render_template('crud/{table_name}/form.html', 
                          edit=True, 
                          item=item,
                          form_action=url_for('crud.{table_name}.edit_{table_name}', id=id)
-                         {', **get_related_data()' if is_complex else ''})
+                         {', **get_related_data(item)' if is_complex else ''})
 
 @bp.route('/<int:id>/delete', methods=['DELETE'])
 def delete_{table_name}(id):
     try:
         item = {model_name}.query.get_or_404(id)
-        {f'success = delete_{table_name}(item)' if is_complex else 'db.session.delete(item)\n        db.session.commit()\n        success = True'}
+        {f'success = {table_name}_helpers.delete_{table_name}(item)' if is_complex else 'db.session.delete(item)\n        db.session.commit()\n        success = True'}
         return '', 204 if success else 500
     except Exception as e:
         db.session.rollback()
         return str(e), 500
-"""
-        route_file.write_text(route_content)
-    
-    # Generate routes/__init__.py to register all blueprints
-    init_file = output_path / "__init__.py"
-    init_content = """from flask import Blueprint
+{f"""
+@bp.route('/lookup/<field>')
+def lookup_{table_name}(field):
+    '''Return the rows a foreign key field can reference whose display column starts with q, as JSON.'''
+    if field not in LOOKUPS:
+        return jsonify(error=f'No lookup for {{field}}'), 404
+    related_model, label = LOOKUPS[field]
+    options = lookup_options(related_model, label, request.args.get('q', ''),
+                             request.args.get('limit', LOOKUP_LIMIT, type=int))
+    return jsonify([option._asdict() for option in options])
+""" if lookup_fields else ""}"""
+    return {f"{table_name}.py": route_content}
+
+def get_route_views(fields: Dict[str, Any],
+                    display_columns: Optional[Dict[str, Optional[str]]] = None) -> List[str]:
+    """Get the views render_crud_route defines for a model, by name, as app.utils.lazy_routes.CRUD_VIEWS lists them."""
+    views = ["list", "create", "edit", "delete"]
+    if get_lookup_fields(fields, display_columns):
+        views.append("lookup")
+    return views
+
+def render_crud_routes_init(models: Dict[str, Any],
+                            display_columns: Optional[Dict[str, Optional[str]]] = None) -> Dict[str, str]:
+    """
+    Render the crud package __init__: the registry of every model's views,
+    registered without importing the route modules, which are imported on
+    their first request or preloaded at startup.
+    """
+    registry = "".join(
+        f"\n    {model_name.lower()!r}: ({', '.join(repr(view) for view in get_route_views(model_data['Fields'], display_columns))}),"
+        for model_name, model_data in models.items()
+    )
+    init_content = f"""from flask import Blueprint
+from app.utils.lazy_routes import LazyRoutes
 
 bp = Blueprint('crud', __name__)
 
+# The views of each table's route module: the module is imported on the first
+# request to one of them, or at startup for the tables in CRUD_PRELOAD
+routes = LazyRoutes(bp, __name__, {{{registry}
+}})
 """
-    
-    # Import and register each model's blueprint
-    for model_name in models.keys():
-        table_name = model_name.lower()
-        init_content += f"""from app.routes.crud import {table_name}
-bp.register_blueprint({table_name}.bp, url_prefix='/{table_name}')
+    return {"__init__.py": init_content}
 
-"""
+def generate_crud_routes(json_file: str | Path, output_dir: str | Path, pagination: str = "offset") -> Dict[str, List[str]]:
+    """Generate CRUD routes from a JSON schema file, writing only files whose content changed."""
+    json_path = Path(json_file)
+    output_path = Path(output_dir)
+    
+    with open(json_path, "r") as f:
+        data = json.load(f)
+    
+    # Generate routes for each model
+    models = data["Models"]
+    display_columns = schema.get_display_columns(models)
+    reference_models = schema.get_reference_models(models)
+    files = {}
+    for model_name, model_data in models.items():
+        files.update(render_crud_route(model_name, model_data, pagination, display_columns, reference_models))
     
-    init_file.write_text(init_content)
+    # Write the package __init__ last so it never lists a missing route module
+    files.update(render_crud_routes_init(models, display_columns))
+    summary = writer.write_files(output_path, files)
     
-    print(f"CRUD routes generated in {output_dir}")
+    print(f"CRUD routes generated in {output_dir} ({writer.format_summary(summary)})")
+    return summary
 
 if __name__ == "__main__":
     # Example usage
@@ -0,0 +1,95 @@
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
+
+# Schema field types, grouped by how the generated code treats them
+TEXT_TYPES = ("String", "Text")
+NUMERIC_TYPES = ("Integer", "Float", "Numeric", "Decimal")
+DATE_TYPES = ("DateTime", "Date")
+
+# The app.utils.forms coercer of each field type; fields of other types are set as posted
+FORM_COERCERS = {
+    "String": "coerce_string",
+    "Text": "coerce_string",
+    "Integer": "coerce_integer",
+    "Float": "coerce_float",
+    "Numeric": "coerce_decimal",
+    "Decimal": "coerce_decimal",
+    "DateTime": "coerce_datetime",
+    "Date": "coerce_date",
+    "Boolean": "coerce_boolean",
+}
+
+def get_field_definitions(fields: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Get the definition of every field, reading a field given as a bare type name, such as "string", as its type."""
+    return {
+        field: {"type": definition} if isinstance(definition, str) else definition
+        for field, definition in fields.items()
+    }
+
+def get_display_column(fields: Dict[str, Any]) -> Optional[str]:
+    """Get the text column that names a row of the model: name, else its first unique, else its first text column."""
+    fields = get_field_definitions(fields)
+    text_fields = [
+        field for field, definition in fields.items()
+        if definition.get("type") in TEXT_TYPES and "foreign_key" not in definition and "password" not in field
+    ]
+    if "name" in text_fields:
+        return "name"
+    unique_fields = [field for field in text_fields if fields[field].get("unique")]
+    return (unique_fields or text_fields or [None])[0]
+
+def get_display_columns(models: Dict[str, Any]) -> Dict[str, Optional[str]]:
+    """Get the display column of every model, for showing and searching the rows that reference it."""
+    return {model_name: get_display_column(model_data["Fields"]) for model_name, model_data in models.items()}
+
+def get_related_target(definition: Dict[str, Any], model_names: Iterable[str]) -> Optional[str]:
+    """Get the model a foreign key field references, from its relationship or its foreign_key table."""
+    if "relationship" in definition:
+        return definition["relationship"]["target_model"]
+    target_table = definition["foreign_key"].split(".")[0]
+    return next((model_name for model_name in model_names if model_name.lower() == target_table), None)
+
+def get_reference_models(models: Dict[str, Any]) -> Set[str]:
+    """Get the models marked [reference] in the DSL, whose rows the app caches in memory."""
+    return {model_name for model_name, model_data in models.items() if model_data.get("Reference")}
+
+def get_reference_fields(fields: Dict[str, Any], display_columns: Optional[Dict[str, Optional[str]]],
+                         reference_models: Iterable[str]) -> Dict[str, Tuple[str, Optional[str]]]:
+    """Get the foreign key fields to reference models, as {field: (model it references, its display column)}."""
+    fields = get_field_definitions(fields)
+    reference_models = set(reference_models)
+    reference_fields = {}
+    for field, definition in fields.items():
+        if "relationship" in definition or "foreign_key" in definition:
+            target = get_related_target(definition, reference_models)
+            if target in reference_models:
+                reference_fields[field] = (target, (display_columns or {}).get(target))
+    return reference_fields
+
+def get_form_binder(fields: Dict[str, Any]) -> Tuple[Dict[str, str], List[str], List[str]]:
+    """
+    Plan the form binder of a model from its field types: the name of the
+    coercer of every field but the primary key, the fields that may not be
+    blank, and the fields a blank value leaves to their default on create.
+    """
+    fields = get_field_definitions(fields)
+    coercers = {
+        field: FORM_COERCERS.get(definition.get("type"), "coerce_string")
+        for field, definition in fields.items() if field != "id" and not definition.get("primary_key")
+    }
+    required = [
+        field for field in coercers
+        if fields[field].get("nullable") is False and fields[field].get("default") is None
+    ]
+    defaults = [field for field in coercers if fields[field].get("default") is not None]
+    return coercers, required, defaults
+
+def render_form_binder(fields: Dict[str, Any]) -> Tuple[str, str]:
+    """Render the import and the declaration of a model's FormBinder."""
+    coercers, required, defaults = get_form_binder(fields)
+    names = sorted(set(coercers.values()))
+    options = "".join(f", {name}={value!r}" for name, value in (("required", required), ("defaults", defaults)) if value)
+    entries = "".join(f"\n    {field!r}: {coercer}," for field, coercer in coercers.items())
+    return (
+        f"from app.utils.forms import {', '.join(['FormBinder'] + names)}",
+        f"form_binder = FormBinder({{{entries}\n}}{options})",
+    )
@@ -1,5 +1,6 @@
 import json
 import sys
+import pytest
 from pathlib import Path
 from importlib.util import spec_from_file_location, module_from_spec
 
@@ -10,6 +11,15 @@ crud_module = module_from_spec(spec)
 spec.loader.exec_module(crud_module)
 generate_crud_templates = crud_module.generate_crud_templates
 
+# Import generate.py the same way; worker processes look it up by module name
+GENERATE_PATH = Path(__file__).parent / "generate.py"
+spec = spec_from_file_location("generate", GENERATE_PATH)
+generate_module = module_from_spec(spec)
+sys.modules["generate"] = generate_module
+spec.loader.exec_module(generate_module)
+
+SHIPPING_JSON = Path(__file__).parent.parent.parent.parent / "dsl" / "output" / "json" / "shipping.json"
+
 def test_generate_crud_templates(tmp_path):
     """Test CRUD template generation with a sample schema"""
     # Sample JSON schema
@@ -62,6 +72,122 @@ def test_generate_crud_templates(tmp_path):
     assert 'id="email"' in form_html
     assert 'id="phone"' in form_html
 
+def read_tree(root):
+    """Return {relative path: content} for every file under root."""
+    return {str(path.relative_to(root)): path.read_text() for path in sorted(root.rglob("*")) if path.is_file()}
+
+def test_generate_all_parallel_matches_serial(tmp_path, monkeypatch):
+    """Test that the process pool renders the same files as a serial run, without leftover temp files"""
+    def run(output_dir, workers):
+        generate_module.generate_all(
+            SHIPPING_JSON, output_dir / "templates", output_dir / "routes", output_dir / "relationships", workers
+        )
+        return read_tree(output_dir)
+
+    serial = run(tmp_path / "serial", 1)
+    monkeypatch.setattr(generate_module, "PARALLEL_THRESHOLD", 0)
+    parallel = run(tmp_path / "parallel", 2)
+
+    assert parallel == serial
+    assert "routes/s012_port.py" in serial
+    assert "templates/crud/s012_port/form.html" in serial
+    assert "'s017_rate': ('list', 'create', 'edit', 'delete', 'lookup')," in serial["routes/__init__.py"]
+    assert "relationships/s001_manifest_helpers.py" in serial
+    assert "    'rate': coerce_float,\n    'effective': coerce_datetime,\n}, defaults=['effective'])" in serial["routes/s017_rate.py"]
+    assert "hasattr" not in serial["relationships/s001_manifest_helpers.py"]
+    assert "batch_writer = BatchWriter(S001_Manifest, s001_manifest_helpers.form_binder)" in serial["routes/s001_manifest.py"]
+    assert not any(path.endswith(".tmp") for path in serial)
+
+def test_failed_render_writes_nothing(tmp_path, monkeypatch):
+    """Test that an error while rendering leaves the output directories untouched"""
+    def fail(model_name, model_data, pagination="offset", display_columns=None, reference_models=()):
+        raise ValueError(model_name)
+
+    monkeypatch.setattr(generate_module, "render_model", fail)
+    with pytest.raises(ValueError):
+        generate_module.generate_all(
+            SHIPPING_JSON, tmp_path / "templates", tmp_path / "routes", tmp_path / "relationships", 1
+        )
+
+    assert list(tmp_path.iterdir()) == []
+
+def test_regeneration_only_writes_changed_files(tmp_path):
+    """Test that unchanged files keep their mtimes and dropped models are removed"""
+    data = json.loads(SHIPPING_JSON.read_text())
+    json_file = tmp_path / "shipping.json"
+    output_dir = tmp_path / "out"
+
+    def run():
+        json_file.write_text(json.dumps(data))
+        return generate_module.generate_all(
+            json_file, output_dir / "templates", output_dir / "routes", output_dir / "relationships", 1
+        )
+
+    first = run()
+    assert first["routes"]["unchanged"] == []
+    mtimes = {path: path.stat().st_mtime_ns for path in output_dir.rglob("*") if path.is_file()}
+
+    second = run()
+    assert all(not summary["changed"] and not summary["removed"] for summary in second.values())
+    assert {path: path.stat().st_mtime_ns for path in output_dir.rglob("*") if path.is_file()} == mtimes
+
+    # Edit one model and drop another
+    data["Models"]["S012_Port"]["Fields"]["code"] = {"type": "String"}
+    del data["Models"]["S017_Rate"]
+    third = run()
+
+    assert sorted(third["routes"]["changed"]) == ["__init__.py", "s012_port.py"]
+    assert third["routes"]["removed"] == ["s017_rate.py"]
+    assert "crud/s017_rate/list.html" in third["templates"]["removed"]
+    assert not (output_dir / "routes" / "s017_rate.py").exists()
+    assert not (output_dir / "templates" / "crud" / "s017_rate").exists()
+    assert (output_dir / "routes" / "s011_leg.py").stat().st_mtime_ns == mtimes[output_dir / "routes" / "s011_leg.py"]
+
+def test_schema_without_the_shipping_models(tmp_path):
+    """Test that a schema with none of the models needing relationship helpers still generates"""
+    models = {
+        f"T{i:03d}_Item": {"Fields": {
+            "id": {"type": "Integer", "primary_key": True},
+            "name": {"type": "String"},
+            **({"parent_id": {"type": "Integer", "foreign_key": f"t{i - 1:03d}_item.id"}} if i else {}),
+        }}
+        for i in range(10)
+    }
+    json_file = tmp_path / "schema.json"
+    json_file.write_text(json.dumps({"Models": models}))
+
+    summaries = generate_module.generate_all(
+        json_file, tmp_path / "templates", tmp_path / "routes", tmp_path / "relationships", 1
+    )
+    assert len(summaries["routes"]["changed"]) == 11
+    assert summaries["relationship helpers"]["changed"] == ["__init__.py"]
+    assert (tmp_path / "templates" / "crud" / "t009_item" / "form.html").exists()
+
+def test_fields_given_as_type_names_are_read_as_their_type():
+    """Test that the schema helpers accept a field given as a bare type name, as well as a definition"""
+    schema = crud_module.schema
+    fields = {"id": "Integer", "code": {"type": "String", "unique": True}, "name": "String", "rate": "Float"}
+    assert schema.get_display_column(fields) == "name"
+    assert schema.get_reference_fields(fields, {}, ["Other"]) == {}
+    assert schema.get_form_binder(fields) == (
+        {"code": "coerce_string", "name": "coerce_string", "rate": "coerce_float"}, [], []
+    )
+
+def test_committed_files_match_the_generator(tmp_path):
+    """Test that the templates, routes and helpers the app serves are the generator's output, at the paths it renders"""
+    project_root = SHIPPING_JSON.parent.parent.parent.parent
+    generate_module.generate_all(
+        SHIPPING_JSON, tmp_path / "templates", tmp_path / "routes", tmp_path / "relationships", 1
+    )
+    for name, committed_dir in (("templates", "app/templates"), ("routes", "app/routes/crud"),
+                                ("relationships", "app/utils/relationships")):
+        for path, content in read_tree(tmp_path / name).items():
+            if path == generate_module.load_generators()["writer"].MANIFEST_FILE:
+                continue
+            assert (project_root / committed_dir / path).read_text() == content, path
+
+    assert "reference_labels['country_id']" in (project_root / "app/templates/crud/s012_port/_row.html").read_text()
+
 if __name__ == "__main__":
     import tempfile
     from pathlib import Path
@@ -0,0 +1,400 @@
+import sys
+import json
+import pytest
+from contextlib import contextmanager
+from importlib.util import spec_from_file_location, module_from_spec
+from pathlib import Path
+from types import ModuleType
+from flask import template_rendered
+from sqlalchemy import event, insert, text
+
+from app import create_app, db
+from app.models.shipping import (
+    S001_Manifest, S009_Vessel, S010_Voyage, S012_Port, S013_PortPair, S014_Country, S015_Client
+)
+from app.utils import search
+from app.utils.query import keyset_page, many_to_one_options, many_to_one_relationships
+from app.utils.reference import (
+    REFERENCE_TABLE_LIMIT, load_reference_tables, reference_cache, reference_data
+)
+
+GENERATOR_DIR = Path(__file__).parent
+SHIPPING_JSON = GENERATOR_DIR.parent.parent.parent / "dsl" / "output" / "json" / "shipping.json"
+
+def import_module(path, name):
+    spec = spec_from_file_location(name, path)
+    module = module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+@pytest.fixture
+def app():
+    # Load every route module up front, as the tests inspect them and count each request's queries
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite://", "CRUD_PRELOAD": "*"})
+    with app.app_context():
+        db.create_all()
+        # Each test starts from an empty database, which the process-wide cache must not outlive
+        reference_cache.clear()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@contextmanager
+def count_queries():
+    """Count the SQL statements executed inside the block."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
+def add_manifests(count):
+    """Add manifests that each reference their own shipper, consignee, vessel and voyage."""
+    for i in range(count):
+        vessel = S009_Vessel(name=f"Vessel {i}")
+        db.session.add(S001_Manifest(
+            bill_of_lading=f"BL{i:05d}",
+            shipper=S015_Client(name=f"Shipper {i}"),
+            consignee=S015_Client(name=f"Consignee {i}"),
+            vessel=vessel,
+            voyage=S010_Voyage(name=f"Voyage {i}", vessel=vessel),
+        ))
+    db.session.commit()
+    db.session.expunge_all()
+
+def list_page_queries(client, url, per_page):
+    """Return the statements run to render one HTMX page of a list view."""
+    db.session.expunge_all()
+    with count_queries() as statements:
+        response = client.get(url, query_string={"per_page": per_page}, headers={"HX-Request": "true"})
+    assert response.status_code == 200
+    return statements
+
+def test_manifest_list_query_count_is_constant_per_page(app):
+    """Test that the manifest list loads its related rows without a query per row"""
+    add_manifests(30)
+    client = app.test_client()
+
+    small_page = list_page_queries(client, "/crud/s001_manifest/", 5)
+    large_page = list_page_queries(client, "/crud/s001_manifest/", 25)
+
+    # One count query for the pagination and one query for the page itself
+    assert len(small_page) == len(large_page) == 2
+
+    response = client.get("/crud/s001_manifest/", query_string={"per_page": 25}, headers={"HX-Request": "true"})
+    assert b"Shipper 24" in response.data
+    assert b"Vessel 24" in response.data
+
+def test_list_relationships_resolve_by_foreign_key(app):
+    """Test that relationships named differently from the schema are still eager loaded"""
+    relationships = many_to_one_relationships(S013_PortPair, ("pol_id", "pod_id"))
+    assert [attribute.key for attribute in relationships] == ["pol", "pod"]
+
+    for i in range(10):
+        db.session.add(S013_PortPair(pol=S012_Port(name=f"Loading {i}"), pod=S012_Port(name=f"Discharge {i}")))
+    db.session.commit()
+    db.session.expunge_all()
+
+    port_pairs = S013_PortPair.query.options(*many_to_one_options(S013_PortPair, ["pol_id", "pod_id"])).all()
+    with count_queries() as statements:
+        names = [(port_pair.pol.name, port_pair.pod.name) for port_pair in port_pairs]
+    assert statements == []
+    assert names[9] == ("Loading 9", "Discharge 9")
+
+def test_every_list_route_loads_its_relationships(app):
+    """Test that each generated list route eager loads one relationship per listed foreign key"""
+    models = {mapper.local_table.name: mapper.class_ for mapper in db.Model.registry.mappers}
+    route_modules = [module for name, module in sys.modules.items()
+                     if name.startswith("app.routes.crud.") and hasattr(module, "LIST_FOREIGN_KEYS")]
+    assert route_modules
+
+    for module in route_modules:
+        model = models[module.bp.name]
+        options = many_to_one_options(model, module.LIST_FOREIGN_KEYS)
+        assert len(options) == len(module.LIST_FOREIGN_KEYS), module.bp.name
+        assert model.query.options(*options).limit(1).all() == []
+
+def test_keyset_page_walks_every_row_once(app):
+    """Test that following cursors visits each row once in sort order, NULLs last"""
+    for i in range(23):
+        # Repeated and missing sort values exercise the id tiebreak and the NULL handling
+        db.session.add(S015_Client(name=None if i % 5 == 0 else f"Client {i % 4}"))
+    db.session.commit()
+
+    for sort in ("id", "-id", "name", "-name"):
+        descending = sort.startswith("-")
+        sort_column = getattr(S015_Client, sort.lstrip("-"))
+        expected = sorted(S015_Client.query.all(), key=lambda client: client.id, reverse=descending)
+        if sort_column is not S015_Client.id:
+            expected = sorted(expected, key=lambda client: client.name or "", reverse=descending)
+            expected = sorted(expected, key=lambda client: client.name is None)
+
+        seen = []
+        cursor = None
+        while True:
+            items, cursor = keyset_page(S015_Client.query, sort, sort_column, S015_Client.id, cursor, 4, descending)
+            seen.extend(items)
+            if cursor is None:
+                break
+        assert [client.id for client in seen] == [client.id for client in expected], sort
+
+def test_keyset_page_rejects_foreign_cursors(app):
+    """Test that malformed cursors and cursors for another sort order are rejected"""
+    for i in range(3):
+        db.session.add(S015_Client(name=f"Client {i}"))
+    db.session.commit()
+
+    _, cursor = keyset_page(S015_Client.query, "name", S015_Client.name, S015_Client.id, None, 1)
+    with pytest.raises(ValueError):
+        keyset_page(S015_Client.query, "id", S015_Client.id, S015_Client.id, cursor, 1)
+    with pytest.raises(ValueError):
+        keyset_page(S015_Client.query, "name", S015_Client.name, S015_Client.id, "not a cursor", 1)
+
+def test_keyset_list_route_skips_the_count_query(app, monkeypatch):
+    """Test that a keyset list route runs one query per page and hands back a working cursor"""
+    # The rendered module registers its own search engine; keep the app's registry as it was
+    monkeypatch.setattr(search, "_engines", dict(search._engines))
+    routes = import_module(GENERATOR_DIR / "routes.py", "routes")
+    with open(SHIPPING_JSON) as f:
+        model_data = json.load(f)["Models"]["S001_Manifest"]
+    source = routes.render_crud_route("S001_Manifest", model_data, "keyset")["s001_manifest.py"]
+    module = ModuleType("keyset_s001_manifest")
+    exec(compile(source, "keyset_s001_manifest.py", "exec"), module.__dict__)
+    app.register_blueprint(module.bp, name="keyset_s001_manifest", url_prefix="/keyset")
+
+    add_manifests(12)
+    client = app.test_client()
+    contexts = []
+
+    def record_context(sender, template, context, **extra):
+        contexts.append(context)
+
+    bills = []
+    cursor = None
+    while True:
+        db.session.expunge_all()
+        with count_queries() as statements, template_rendered.connected_to(record_context, app):
+            response = client.get(
+                "/keyset/", query_string={"per_page": 5, "cursor": cursor or ""}, headers={"HX-Request": "true"}
+            )
+        assert response.status_code == 200
+        assert len(statements) == 1
+        bills.extend(item.bill_of_lading for item in contexts[-1]["items"])
+        cursor = contexts[-1]["next_cursor"]
+        if cursor is None:
+            break
+    assert bills == [f"BL{i:05d}" for i in range(12)]
+
+    assert client.get("/keyset/", query_string={"cursor": "garbage"}).status_code == 400
+
+def search_ids(model, search_term):
+    """Return the ids of model matched by its generated list route's search."""
+    module = sys.modules[f"app.routes.crud.{model.__tablename__}"]
+    return sorted(item.id for item in model.query.filter(module.get_search_filter(model, search_term)))
+
+def test_search_index_follows_inserts_updates_and_deletes(app):
+    """Test that the full-text index is kept in sync with the table by its triggers"""
+    acme = S015_Client(name="Acme Shipping", town="Rotterdam")
+    other = S015_Client(name="Globex", town="Hamburg")
+    db.session.add_all([acme, other])
+    db.session.commit()
+
+    assert search_ids(S015_Client, "ACME") == [acme.id]
+    assert search_ids(S015_Client, "burg") == [other.id]
+
+    acme.name = "Initech"
+    db.session.commit()
+    assert search_ids(S015_Client, "acme") == []
+    assert search_ids(S015_Client, "inite") == [acme.id]
+
+    db.session.delete(other)
+    db.session.commit()
+    assert search_ids(S015_Client, "burg") == []
+
+def test_search_matches_numbers_exactly_and_short_terms(app):
+    """Test that numeric columns need an exact match and short terms match the start of indexed text"""
+    clients = [S015_Client(name=f"Client {i}", town="Rotterdam") for i in range(12)]
+    db.session.add_all(clients)
+    db.session.commit()
+
+    # Too short for the full-text index: "11" matches id 11 but not "Client 11"
+    assert search_ids(S015_Client, "11") == [11]
+    assert search_ids(S015_Client, "11.0") == [11]
+    assert search_ids(S015_Client, "11.5") == []
+    # The indexed name matches on its prefix, the unindexed town not at all
+    assert len(search_ids(S015_Client, "cl")) == 12
+    assert search_ids(S015_Client, "ro") == []
+    # Long enough for the full-text index: any substring of any text column
+    assert len(search_ids(S015_Client, "erda")) == 12
+    assert search_ids(S015_Client, "   ") == search_ids(S015_Client, "") == []
+
+def test_search_matches_date_ranges(app):
+    """Test that date terms match the year, month, day or minute they name"""
+    from app.models.shipping import S005_Container
+    from datetime import datetime
+
+    containers = [
+        S005_Container(number="MSCU1234565", updated=datetime(2024, 1, 31, 23, 59)),
+        S005_Container(number="MSCU7654321", updated=datetime(2024, 2, 1, 0, 0)),
+        S005_Container(number="TGHU0000001", updated=datetime(2023, 12, 31, 12, 30)),
+    ]
+    db.session.add_all(containers)
+    db.session.commit()
+    ids = [container.id for container in containers]
+
+    assert search_ids(S005_Container, "2024") == ids[:2]
+    assert search_ids(S005_Container, "2024-01") == ids[:1]
+    assert search_ids(S005_Container, "2024-02-01") == ids[1:2]
+    assert search_ids(S005_Container, "2023-12-31 12:30") == ids[2:]
+    assert search_ids(S005_Container, "2023-12") == ids[2:]
+
+def test_search_matches_related_names(app):
+    """Test that foreign key columns are searched through the related row's text"""
+    add_manifests(3)
+    shipper = S015_Client.query.filter_by(name="Shipper 1").one()
+    expected = [manifest.id for manifest in S001_Manifest.query.filter_by(shipper_id=shipper.id)]
+
+    assert search_ids(S001_Manifest, "shipper 1") == expected
+
+    response = app.test_client().get("/crud/s001_manifest/", query_string={"search": "Vessel 2"},
+                                     headers={"HX-Request": "true"})
+    assert b"BL00002" in response.data
+    assert b"BL00001" not in response.data
+
+def test_search_uses_the_index(app):
+    """Test that a text search reads the full-text index instead of scanning the table"""
+    module = sys.modules["app.routes.crud.s015_client"]
+    query = S015_Client.query.filter(module.get_search_filter(S015_Client, "acme"))
+    statement = query.statement.compile(db.engine, compile_kwargs={"literal_binds": True})
+    plan = [row[-1] for row in db.session.execute(text(f"EXPLAIN QUERY PLAN {statement}"))]
+
+    assert not any(step.startswith("SCAN s015_client") and "VIRTUAL TABLE" not in step for step in plan)
+    assert any(step.startswith("SCAN s015_client_fts") for step in plan)
+
+@pytest.mark.parametrize("model_name, search_term, index", [
+    ("s001_manifest", "BL", "idx_s001_manifest_bill_of_lading_nocase"),
+    ("s001_manifest", "acme", "s001_manifest_fts"),
+    ("s005_container", "2024-01", "idx_s005_container_updated"),
+    ("s013_portpair", "Rotterdam", "idx_s013_portpair_pol_id"),
+])
+def test_search_plans_are_sargable(app, model_name, search_term, index):
+    """Test that each kind of search term is served by an index rather than a table scan"""
+    module = sys.modules[f"app.routes.crud.{model_name}"]
+    model = module.search_engine.model
+    query = model.query.filter(module.get_search_filter(model, search_term))
+    statement = query.statement.compile(db.engine, compile_kwargs={"literal_binds": True})
+    plan = [row[-1] for row in db.session.execute(text(f"EXPLAIN QUERY PLAN {statement}"))]
+
+    assert f"SCAN {model_name}" not in plan
+    assert any(index in step for step in plan), plan
+
+def test_reference_cache_is_invalidated_by_writes(app):
+    """Test that cached lookup tables are read once and dropped when a commit writes to them"""
+    db.session.add_all([S012_Port(name="Rotterdam"), S012_Port(name="Felixstowe")])
+    db.session.commit()
+
+    assert reference_data(S012_Port, "name").complete
+    with count_queries() as statements:
+        reference = reference_data(S012_Port, "name")
+    assert statements == []
+    assert [option.label for option in reference.options] == ["Felixstowe", "Rotterdam"]
+
+    db.session.add(S012_Port(name="Antwerp"))
+    db.session.commit()
+    assert [option.label for option in reference_data(S012_Port, "name").options] == [
+        "Antwerp", "Felixstowe", "Rotterdam"
+    ]
+
+    # Bulk statements write without a flush
+    db.session.execute(insert(S012_Port), [{"name": "Busan"}])
+    db.session.rollback()
+    assert len(reference_data(S012_Port, "name").options) == 3
+    db.session.execute(insert(S012_Port), [{"name": "Busan"}])
+    db.session.commit()
+    assert len(reference_data(S012_Port, "name").options) == 4
+
+def test_lookup_route_matches_prefix_up_to_limit(app):
+    """Test that the typeahead endpoint returns the first rows whose label starts with the typed text"""
+    db.session.add_all([S015_Client(name=f"Client {i:03d}") for i in range(REFERENCE_TABLE_LIMIT + 50)])
+    db.session.add(S015_Client(name="Acme Shipping"))
+    db.session.commit()
+    client = app.test_client()
+
+    response = client.get("/crud/s001_manifest/lookup/shipper_id", query_string={"q": "acme"})
+    assert [option["label"] for option in response.get_json()] == ["Acme Shipping"]
+
+    response = client.get("/crud/s001_manifest/lookup/consignee_id", query_string={"q": "Client 1", "limit": 3})
+    assert [option["label"] for option in response.get_json()] == ["Client 100", "Client 101", "Client 102"]
+
+    assert client.get("/crud/s001_manifest/lookup/bill_of_lading").status_code == 404
+
+def test_form_lists_small_tables_and_only_the_selected_row_of_large_ones(app):
+    """Test that the form holds every port but just the selected client once clients are too many to list"""
+    db.session.add_all([S015_Client(name=f"Client {i:03d}") for i in range(REFERENCE_TABLE_LIMIT + 50)])
+    db.session.add_all([S012_Port(name="Rotterdam"), S012_Port(name="Felixstowe")])
+    manifest = S001_Manifest(bill_of_lading="BL00001", shipper=S015_Client(name="Acme Shipping"))
+    db.session.add(manifest)
+    db.session.commit()
+
+    response = app.test_client().get(f"/crud/s001_manifest/{manifest.id}/edit")
+    assert response.status_code == 200
+    html = response.get_data(as_text=True)
+    assert "Acme Shipping" in html
+    assert "Client 000" not in html
+    assert "/crud/s001_manifest/lookup/shipper_id" in html
+    assert html.count(">\n            Felixstowe\n") == 2
+
+def test_every_create_form_renders_its_lookups(app):
+    """Test that each generated form renders, its foreign keys pointing at the route's lookup endpoint"""
+    client = app.test_client()
+    for name in app.extensions["crud_routes"].routes:
+        response = client.get(f"/crud/{name}/create")
+        assert response.status_code == 200, name
+
+    # Manifests too many to list are searched through the line item route's lookup
+    db.session.execute(insert(S001_Manifest), [{"bill_of_lading": f"BL{i:05d}"} for i in range(REFERENCE_TABLE_LIMIT + 1)])
+    db.session.commit()
+    html = client.get("/crud/s002_lineitem/create").get_data(as_text=True)
+    assert "/crud/s002_lineitem/lookup/manifest_id" in html
+    assert '<select id="container_id"' in html
+
+def test_list_labels_reference_tables_from_the_cache(app, monkeypatch):
+    """Test that the port list labels countries from the reference cache without querying them"""
+    countries = [S014_Country(name=f"Country {i}") for i in range(3)]
+    db.session.add_all(countries)
+    db.session.add_all([S012_Port(name=f"Port {i}", country=countries[i % 3]) for i in range(30)])
+    db.session.commit()
+    assert "s014_country" in load_reference_tables()
+
+    module = sys.modules["app.routes.crud.s012_port"]
+    rendered = {}
+    monkeypatch.setattr(module, "render_template", lambda template, **context: rendered.update(context) or "")
+    client = app.test_client()
+
+    statements = list_page_queries(client, "/crud/s012_port/", 25)
+    assert not any("s014_country" in statement for statement in statements)
+    labels = rendered["reference_labels"]["country_id"]
+    assert [labels[port.country_id] for port in rendered["items"][:3]] == ["Country 0", "Country 1", "Country 2"]
+
+    # A committed write bumps the table's version and the next page reads the new label
+    version = reference_cache.version("s014_country")
+    country_id = rendered["items"][0].country_id
+    db.session.get(S014_Country, country_id).name = "Netherlands"
+    db.session.commit()
+    assert reference_cache.version("s014_country") == version + 1
+    list_page_queries(client, "/crud/s012_port/", 25)
+    assert rendered["reference_labels"]["country_id"][country_id] == "Netherlands"
+
+def test_reference_tables_are_listed_whatever_their_size(app):
+    """Test that a reference table's dropdown lists every row even above the small table limit"""
+    db.session.add_all([S014_Country(name=f"Country {i:03d}") for i in range(REFERENCE_TABLE_LIMIT + 10)])
+    db.session.commit()
+
+    reference = reference_data(S014_Country, "name")
+    assert reference.complete
+    assert len(reference.options) == REFERENCE_TABLE_LIMIT + 10
@@ -0,0 +1,84 @@
+import os
+from pathlib import Path
+from typing import Dict, List
+
+# Lists the files a generator wrote into its output directory, so files it
+# no longer renders can be removed on the next run
+MANIFEST_FILE = ".generated"
+
+def write_atomic(path: str | Path, content: str) -> None:
+    """Write content to path via a temporary file and rename, so readers never see a partial file."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        temp_path.write_text(content)
+        os.replace(temp_path, path)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+def is_unchanged(path: str | Path, content: str) -> bool:
+    """Check whether path already holds exactly content, reading it only when the sizes match."""
+    path = Path(path)
+    try:
+        if path.stat().st_size != len(content.encode()):
+            return False
+        return path.read_text() == content
+    except (OSError, UnicodeDecodeError):
+        return False
+
+def write_if_changed(path: str | Path, content: str) -> bool:
+    """Write content to path unless it is already there; returns True if the file was written."""
+    if is_unchanged(path, content):
+        return False
+    write_atomic(path, content)
+    return True
+
+def read_manifest(output_dir: str | Path) -> List[str]:
+    """Return the relative paths recorded by the last run into output_dir."""
+    try:
+        return (Path(output_dir) / MANIFEST_FILE).read_text().splitlines()
+    except FileNotFoundError:
+        return []
+
+def remove_file(output_path: Path, relative_path: str) -> bool:
+    """Remove a stale generated file and any directories it leaves empty."""
+    path = output_path / relative_path
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        return False
+    parent = path.parent
+    while parent != output_path and not any(parent.iterdir()):
+        parent.rmdir()
+        parent = parent.parent
+    return True
+
+def write_files(output_dir: str | Path, files: Dict[str, str]) -> Dict[str, List[str]]:
+    """
+    Write rendered files, given as {relative path: content}, under output_dir.
+
+    Files whose content is already on disk are left alone, so their mtimes
+    and any caches keyed on them survive. Files written by the previous run
+    that are no longer rendered are removed. Returns the relative paths
+    grouped as {"changed": [...], "unchanged": [...], "removed": [...]}.
+    """
+    output_path = Path(output_dir)
+    summary = {"changed": [], "unchanged": [], "removed": []}
+    for relative_path, content in files.items():
+        if write_if_changed(output_path / relative_path, content):
+            summary["changed"].append(relative_path)
+        else:
+            summary["unchanged"].append(relative_path)
+
+    for relative_path in read_manifest(output_path):
+        if relative_path not in files and remove_file(output_path, relative_path):
+            summary["removed"].append(relative_path)
+
+    write_if_changed(output_path / MANIFEST_FILE, "".join(f"{relative_path}\n" for relative_path in files))
+    return summary
+
+def format_summary(summary: Dict[str, List[str]]) -> str:
+    """Describe a write_files summary in one line."""
+    return ", ".join(f"{len(summary[status])} {status}" for status in ("changed", "unchanged", "removed"))
@@ -0,0 +1,139 @@
+import importlib
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Sequence
+
+from flask import Blueprint, abort, url_for
+
+from app import db
+
+# The rule and methods of each view a CRUD route module can define, by view
+# name; the module's function is the view name followed by the table name
+CRUD_VIEWS = {
+    'list': ('/', ['GET']),
+    'create': ('/create', ['GET', 'POST']),
+    'edit': ('/<int:id>/edit', ['GET', 'POST']),
+    'delete': ('/<int:id>/delete', ['DELETE']),
+    'lookup': ('/lookup/<field>', ['GET']),
+}
+
+# Preload every table's route module
+ALL_TABLES = '*'
+
+# Route modules imported and set up, by module name
+_loaded: Dict[str, object] = {}
+_lock = threading.Lock()
+
+def load_route_module(module_name: str):
+    """
+    Import a route module, and on its first import find whether the search
+    of its list view can use the full-text index, which create_schema made.
+    """
+    module = _loaded.get(module_name)
+    if module is not None:
+        return module
+    with _lock:
+        if module_name not in _loaded:
+            module = importlib.import_module(module_name)
+            search_engine = getattr(module, 'search_engine', None)
+            if search_engine is not None:
+                from app.utils.search import probe_search
+                probe_search(db.engine, search_engines=[search_engine])
+            _loaded[module_name] = module
+        return _loaded[module_name]
+
+class TableRoutes(ABC):
+    """
+    The CRUD views of every table in a registry, served from one rule per
+    view, such as /<table>/<int:id>/edit, whatever the number of tables.
+    Tables or views missing from the registry are not found. Subclasses
+    provide the view function and the batch writer of a table.
+
+    The endpoints of the generated route modules, such as
+    crud.s001_manifest.list_s001_manifest, are resolved by a URL build
+    handler, so url_for in the modules and templates keeps working.
+    """
+
+    def __init__(self, bp: Blueprint, routes: Dict[str, Sequence[str]]):
+        self.bp_name = bp.name
+        self.routes = routes
+        for view, (rule, methods) in CRUD_VIEWS.items():
+            bp.add_url_rule(f'/<table>{rule}', view, self.dispatcher(view), methods=methods)
+        bp.record_once(lambda state: state.app.url_build_error_handlers.append(self.build_url))
+
+    @abstractmethod
+    def view_function(self, table_name: str, view: str):
+        """Return the function serving a view of a table in the registry."""
+
+    def dispatcher(self, view: str):
+        """Return the view function that serves view for every table."""
+        def dispatch(table: str, **kwargs):
+            if view not in self.routes.get(table, ()):
+                abort(404)
+            return self.view_function(table, view)(**kwargs)
+        dispatch.__name__ = view
+        return dispatch
+
+    def build_url(self, error, endpoint: str, values: dict):
+        """Build the URL of a generated module's endpoint; None leaves other endpoints to Flask."""
+        parts = endpoint.split('.')
+        if len(parts) != 3 or parts[0] != self.bp_name:
+            return None
+        table, view_name = parts[1], parts[2]
+        for view in self.routes.get(table, ()):
+            if view_name == f'{view}_{table}':
+                return url_for(f'{self.bp_name}.{view}', table=table, **values)
+        return None
+
+    @abstractmethod
+    def batch_writer(self, table_name: str):
+        """Return the BatchWriter of a table in the registry, which writes its POST /api/<table>/batch."""
+
+    def table_names(self, table_names: Iterable[str]) -> List[str]:
+        """Return table_names as a list, or every table for '*'; raises ValueError for tables not in the registry."""
+        table_names = list(self.routes) if table_names == ALL_TABLES or ALL_TABLES in table_names else list(table_names)
+        unknown = [table_name for table_name in table_names if table_name not in self.routes]
+        if unknown:
+            raise ValueError(f"No CRUD routes for: {', '.join(unknown)}")
+        return table_names
+
+    def preload(self, table_names: Iterable[str]) -> List[str]:
+        """Prepare the views of table_names, or of every table for '*'; returns the tables loaded."""
+        return self.table_names(table_names)
+
+    def loaded(self) -> List[str]:
+        """Return the tables whose views are ready to serve."""
+        return list(self.routes)
+
+class LazyRoutes(TableRoutes):
+    """
+    The CRUD routes of every table, served from the generated registry
+    without importing the route modules. A table's module is imported on
+    the first request to one of its views, or by preload at startup, and its
+    functions serve the views. Rules are compiled once rather than once per
+    table, so startup no longer grows with the schema.
+    """
+
+    def __init__(self, bp: Blueprint, package: str, routes: Dict[str, Sequence[str]]):
+        self.package = package
+        super().__init__(bp, routes)
+
+    def module_name(self, table_name: str) -> str:
+        return f'{self.package}.{table_name}'
+
+    def view_function(self, table_name: str, view: str):
+        return getattr(load_route_module(self.module_name(table_name)), f'{view}_{table_name}')
+
+    def batch_writer(self, table_name: str):
+        return load_route_module(self.module_name(table_name)).batch_writer
+
+    def preload(self, table_names: Iterable[str]) -> List[str]:
+        """Import the route modules of table_names, or of every table for '*'; returns the tables loaded."""
+        table_names = self.table_names(table_names)
+        for table_name in table_names:
+            load_route_module(self.module_name(table_name))
+        return table_names
+
+    def loaded(self) -> List[str]:
+        """Return the tables whose route modules have been imported."""
+        return [table_name for table_name in self.routes if self.module_name(table_name) in _loaded]
@@ -0,0 +1,103 @@
+import json
+import base64
+import binascii
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Iterable, List, Optional, Tuple
+from sqlalchemy import and_, inspect, or_
+from sqlalchemy.orm import MANYTOONE, joinedload
+
+@lru_cache(maxsize=None)
+def many_to_one_relationships(model, foreign_keys: Tuple[str, ...]) -> List:
+    """
+    Return the many-to-one relationship attributes of model set by the given
+    foreign key columns.
+
+    Relationships are matched on their local columns rather than their names,
+    so a model whose relationship was renamed by hand still resolves.
+    """
+    attributes = []
+    for relationship in inspect(model).relationships:
+        if relationship.direction is not MANYTOONE:
+            continue
+        if any(column.key in foreign_keys for column in relationship.local_columns):
+            attributes.append(getattr(model, relationship.key))
+    return attributes
+
+def many_to_one_options(model, foreign_keys: Iterable[str], loader=joinedload) -> List:
+    """Return loader options that load the rows referenced by foreign_keys with the query for model."""
+    return [loader(attribute) for attribute in many_to_one_relationships(model, tuple(foreign_keys))]
+
+def encode_cursor(sort: str, value: Any, id: Any) -> str:
+    """Encode the sort order and the (sort value, id) of the last row on a page as an opaque cursor."""
+    if isinstance(value, (date, datetime)):
+        value = value.isoformat()
+    elif isinstance(value, Decimal):
+        value = str(value)
+    payload = json.dumps([sort, value, id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort: str, sort_column) -> Tuple[Any, Any]:
+    """
+    Decode a cursor made by encode_cursor for the given sort order.
+
+    Raises ValueError if the cursor is malformed or was made for another sort order.
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, value, id = json.loads(payload)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+    if cursor_sort != sort:
+        raise ValueError(f"Cursor was made for sort {cursor_sort!r}, not {sort!r}")
+
+    if value is not None:
+        python_type = sort_column.type.python_type
+        if python_type in (date, datetime):
+            value = python_type.fromisoformat(value)
+        elif python_type is Decimal:
+            value = Decimal(value)
+    return value, id
+
+def keyset_page(query, sort: str, sort_column, id_column, cursor: Optional[str], per_page: int,
+                descending: bool = False) -> Tuple[List, Optional[str]]:
+    """
+    Return one page of query ordered by (sort_column, id_column) and the cursor for the next page.
+
+    Rows are found by seeking past the last row of the previous page instead
+    of skipping an OFFSET, so deep pages cost the same as the first, and one
+    extra row is fetched in place of a COUNT to tell whether more follow.
+    Rows whose sort value is NULL come last. The next cursor is None on the
+    last page.
+    """
+    if sort_column is id_column:
+        order_by = [id_column.desc() if descending else id_column]
+    else:
+        order_by = [
+            sort_column.is_(None),
+            sort_column.desc() if descending else sort_column,
+            id_column.desc() if descending else id_column,
+        ]
+
+    if cursor:
+        value, id = decode_cursor(cursor, sort, sort_column)
+        after_id = id_column < id if descending else id_column > id
+        if sort_column is id_column:
+            query = query.filter(after_id)
+        elif value is None:
+            query = query.filter(and_(sort_column.is_(None), after_id))
+        else:
+            after_value = sort_column < value if descending else sort_column > value
+            query = query.filter(or_(
+                after_value,
+                and_(sort_column == value, after_id),
+                sort_column.is_(None),
+            ))
+
+    items = query.order_by(*order_by).limit(per_page + 1).all()
+    if len(items) <= per_page:
+        return items, None
+    items = items[:per_page]
+    last = items[-1]
+    return items, encode_cursor(sort, getattr(last, sort_column.key), getattr(last, id_column.key))
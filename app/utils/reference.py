@@ -0,0 +1,203 @@
+import threading
+from collections import namedtuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from app import db
+
+# Tables with at most this many rows are small lookup tables: their dropdowns
+# list every row, cached per process. Larger tables are searched as the user types.
+# Tables marked [reference] in the schema are cached whatever their size.
+REFERENCE_TABLE_LIMIT = 200
+
+# Default and largest number of rows a typeahead request returns
+LOOKUP_LIMIT = 20
+MAX_LOOKUP_LIMIT = 100
+
+Option = namedtuple("Option", "id label")
+
+# The options a relationship dropdown starts with; complete is False when the
+# table is too large to list and options only holds the selected row
+Reference = namedtuple("Reference", "options complete")
+
+def label_column(model, label: Optional[str]):
+    """Return the column shown for a row of model, its id when it has no display column."""
+    return getattr(model, label) if label else model.id
+
+def is_reference_model(model) -> bool:
+    """Return whether model is a reference table, marked [reference] in the schema."""
+    return getattr(model, "__reference__", False)
+
+def _sort_key(option: Option):
+    # The order ORDER BY label, id gives on SQLite, where NULLs come first
+    return option.label is not None, option.label, option.id
+
+class ReferenceCache:
+    """
+    Process-local cache of the rows of lookup tables, and of the options and
+    labels derived from them.
+
+    Reference tables are always cached, other tables only while they have at
+    most max_rows rows; tables found to be too large are remembered, so they
+    are not read again until they change. Each table has a version, bumped
+    when a session commits writes to it, which drops everything cached for
+    the table until it is next read.
+    """
+
+    def __init__(self, max_rows: int = REFERENCE_TABLE_LIMIT):
+        self.max_rows = max_rows
+        self._rows: Dict[str, Optional[list]] = {}
+        self._options: Dict[Tuple[str, Optional[str]], List[Option]] = {}
+        self._labels: Dict[Tuple[str, Optional[str]], Dict[Any, Any]] = {}
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def version(self, table_name: str) -> int:
+        """Return the version of a table's cached rows, bumped on every committed write."""
+        with self._lock:
+            return self._versions.get(table_name, 0)
+
+    def rows(self, model) -> Optional[list]:
+        """Return every row of model's table, ordered by id, or None if the table is too large to cache."""
+        table_name = model.__tablename__
+        with self._lock:
+            if table_name in self._rows:
+                return self._rows[table_name]
+            version = self._versions.get(table_name, 0)
+
+        query = select(model.__table__).order_by(model.__table__.c.id)
+        if not is_reference_model(model):
+            query = query.limit(self.max_rows + 1)
+        rows = db.session.execute(query).all()
+        if not is_reference_model(model) and len(rows) > self.max_rows:
+            rows = None
+
+        with self._lock:
+            # A load that raced a write is returned but not stored
+            if self._versions.get(table_name, 0) == version:
+                self._rows[table_name] = rows
+        return rows
+
+    def _derive(self, cache: dict, model, label: Optional[str], build):
+        key = (model.__tablename__, label)
+        with self._lock:
+            if key in cache:
+                return cache[key]
+            version = self._versions.get(model.__tablename__, 0)
+        rows = self.rows(model)
+        if rows is None:
+            return None
+        value = build([Option(row.id, getattr(row, label) if label else row.id) for row in rows])
+        with self._lock:
+            if self._versions.get(model.__tablename__, 0) == version:
+                cache[key] = value
+        return value
+
+    def options(self, model, label: Optional[str]) -> Optional[List[Option]]:
+        """Return every row of model as options ordered by label, or None if the table is too large."""
+        return self._derive(self._options, model, label, lambda options: sorted(options, key=_sort_key))
+
+    def labels(self, model, label: Optional[str]) -> Optional[Dict[Any, Any]]:
+        """Return {id: label} for every row of model, or None if the table is too large."""
+        return self._derive(self._labels, model, label, dict)
+
+    def invalidate(self, table_names: Iterable[str]) -> None:
+        """Drop the cached rows of the given tables."""
+        table_names = set(table_names)
+        with self._lock:
+            for table_name in table_names:
+                self._versions[table_name] = self._versions.get(table_name, 0) + 1
+                self._rows.pop(table_name, None)
+            for cache in (self._options, self._labels):
+                for key in [key for key in cache if key[0] in table_names]:
+                    del cache[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            for table_name in set(self._versions) | set(self._rows):
+                self._versions[table_name] = self._versions.get(table_name, 0) + 1
+            self._rows.clear()
+            self._options.clear()
+            self._labels.clear()
+
+reference_cache = ReferenceCache()
+
+def _written_tables(session) -> set:
+    return session.info.setdefault("reference_cache_tables", set())
+
+@event.listens_for(Session, "after_flush")
+def _record_flushed_tables(session, flush_context):
+    for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+        table = getattr(type(instance), "__table__", None)
+        if table is not None:
+            _written_tables(session).add(table.name)
+
+@event.listens_for(Session, "do_orm_execute")
+def _record_bulk_writes(orm_execute_state):
+    # insert(), update() and delete() statements write without a flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if table is not None:
+            _written_tables(orm_execute_state.session).add(table.name)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_tables(session):
+    tables = session.info.pop("reference_cache_tables", None)
+    if tables:
+        reference_cache.invalidate(tables)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_tables(session):
+    session.info.pop("reference_cache_tables", None)
+
+def reference_data(model, label: Optional[str], selected_id=None) -> Reference:
+    """
+    Return the options a relationship dropdown starts with: every row of a
+    small lookup table, or just the selected row of a larger one.
+    """
+    options = reference_cache.options(model, label)
+    if options is not None:
+        return Reference(options, True)
+    if selected_id in (None, ""):
+        return Reference([], False)
+    row = db.session.query(model.id, label_column(model, label)).filter(model.id == selected_id).first()
+    return Reference([Option(*row)] if row else [], False)
+
+def lookup_options(model, label: Optional[str], search_term: str = "", limit: int = LOOKUP_LIMIT) -> List[Option]:
+    """Return up to limit rows of model whose label starts with search_term, case-insensitively, ordered by label."""
+    limit = max(1, min(limit, MAX_LOOKUP_LIMIT))
+    search_term = search_term.strip()
+
+    options = reference_cache.options(model, label)
+    if options is not None:
+        prefix = search_term.lower()
+        return [option for option in options if str(option.label or "").lower().startswith(prefix)][:limit]
+
+    column = label_column(model, label)
+    query = db.session.query(model.id, column)
+    if search_term:
+        escaped = search_term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        query = query.filter(column.like(f"{escaped}%", escape="\\"))
+    if db.session.get_bind().dialect.name == "sqlite" and label:
+        # Order as the NOCASE index the search setup builds does, so SQLite reads the first rows off it
+        column = column.collate("NOCASE")
+    return [Option(*row) for row in query.order_by(column, model.id).limit(limit)]
+
+def reference_labels(foreign_keys: Dict[str, Tuple[type, Optional[str]]]) -> Dict[str, Dict[Any, Any]]:
+    """
+    Return {foreign key: {id: label}} for foreign keys to cached tables, so
+    list rows show the rows they reference without loading them.
+    """
+    return {field: reference_cache.labels(model, label) or {} for field, (model, label) in foreign_keys.items()}
+
+def load_reference_tables() -> List[str]:
+    """Cache the rows of every reference table that exists; returns their table names."""
+    loaded = []
+    existing = set(inspect(db.engine).get_table_names())
+    for mapper in db.Model.registry.mappers:
+        model = mapper.class_
+        if is_reference_model(model) and model.__tablename__ in existing:
+            reference_cache.rows(model)
+            loaded.append(model.__tablename__)
+    return loaded
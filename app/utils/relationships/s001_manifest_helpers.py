@@ -1,42 +1,49 @@
 from flask import flash
 from app.models.shipping import S001_Manifest, S015_Client, S015_Client, S009_Vessel, S010_Voyage, S012_Port, S012_Port
 from app import db
+from app.utils.reference import reference_data
+from app.utils.forms import FormBinder, coerce_datetime, coerce_integer, coerce_string
+from app.utils.sequences import next_bill_of_lading
 
-def get_related_data():
-    """Get all related data needed for S001_Manifest forms."""
+# Coerces each posted field by its schema type, in one pass, before any is set
+form_binder = FormBinder({
+    'bill_of_lading': coerce_string,
+    'shipper_id': coerce_integer,
+    'consignee_id': coerce_integer,
+    'vessel_id': coerce_integer,
+    'voyage_id': coerce_integer,
+    'port_of_loading_id': coerce_integer,
+    'port_of_discharge_id': coerce_integer,
+    'place_of_delivery': coerce_string,
+    'place_of_receipt': coerce_string,
+    'clauses': coerce_string,
+    'date_of_receipt': coerce_datetime,
+    'user_id': coerce_integer,
+}, defaults=['date_of_receipt'])
+
+def get_related_data(item=None):
+    """
+    Get the dropdown options needed for S001_Manifest forms: every row of a
+    small lookup table, from the shared cache, or just the row item refers
+    to, the rest being looked up as the user types.
+    """
     return {
         
-        'shippers': S015_Client.query.all(),
-        'consignees': S015_Client.query.all(),
-        'vessels': S009_Vessel.query.all(),
-        'voyages': S010_Voyage.query.all(),
-        'port_of_loadings': S012_Port.query.all(),
-        'port_of_discharges': S012_Port.query.all(),
+        'shippers': reference_data(S015_Client, 'name', item.shipper_id if item else None),
+        'consignees': reference_data(S015_Client, 'name', item.consignee_id if item else None),
+        'vessels': reference_data(S009_Vessel, 'name', item.vessel_id if item else None),
+        'voyages': reference_data(S010_Voyage, 'name', item.voyage_id if item else None),
+        'port_of_loadings': reference_data(S012_Port, 'name', item.port_of_loading_id if item else None),
+        'port_of_discharges': reference_data(S012_Port, 'name', item.port_of_discharge_id if item else None),
     }
 
 def create_s001_manifest(form_data):
     """Create a new S001_Manifest with related data."""
     try:
-        item = S001_Manifest()
-        
-        if 'shipper_id' in form_data:
-            item.shipper_id = form_data['shipper_id']
-        if 'consignee_id' in form_data:
-            item.consignee_id = form_data['consignee_id']
-        if 'vessel_id' in form_data:
-            item.vessel_id = form_data['vessel_id']
-        if 'voyage_id' in form_data:
-            item.voyage_id = form_data['voyage_id']
-        if 'port_of_loading_id' in form_data:
-            item.port_of_loading_id = form_data['port_of_loading_id']
-        if 'port_of_discharge_id' in form_data:
-            item.port_of_discharge_id = form_data['port_of_discharge_id']
-        
-        # Set other fields
-        for field, value in form_data.items():
-            if not field.endswith('_id') and hasattr(item, field):
-                setattr(item, field, value)
-        
+        item = form_binder.bind(S001_Manifest(), form_data, create=True)
+        # Number a blank bill_of_lading from its sequence, reserved in the session's transaction
+        if not item.bill_of_lading:
+            item.bill_of_lading = next_bill_of_lading(item, db.session.connection())
         db.session.add(item)
         db.session.commit()
         flash('Created successfully', 'success')
@@ -49,25 +56,7 @@ def create_s001_manifest(form_data):
 def update_s001_manifest(item, form_data):
     """Update an existing S001_Manifest with related data."""
     try:
-        
-        if 'shipper_id' in form_data:
-            item.shipper_id = form_data['shipper_id']
-        if 'consignee_id' in form_data:
-            item.consignee_id = form_data['consignee_id']
-        if 'vessel_id' in form_data:
-            item.vessel_id = form_data['vessel_id']
-        if 'voyage_id' in form_data:
-            item.voyage_id = form_data['voyage_id']
-        if 'port_of_loading_id' in form_data:
-            item.port_of_loading_id = form_data['port_of_loading_id']
-        if 'port_of_discharge_id' in form_data:
-            item.port_of_discharge_id = form_data['port_of_discharge_id']
-        
-        # Update other fields
-        for field, value in form_data.items():
-            if not field.endswith('_id') and hasattr(item, field):
-                setattr(item, field, value)
-        
+        form_binder.bind(item, form_data)
         db.session.commit()
         flash('Updated successfully', 'success')
         return True
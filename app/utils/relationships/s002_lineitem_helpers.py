@@ -1,36 +1,40 @@
 from flask import flash
 from app.models.shipping import S002_LineItem, S004_PackType, S003_Commodity, S005_Container, S001_Manifest
 from app import db
+from app.utils.reference import reference_data
+from app.utils.forms import FormBinder, coerce_integer, coerce_string
 
-def get_related_data():
-    """Get all related data needed for S002_LineItem forms."""
+# Coerces each posted field by its schema type, in one pass, before any is set
+form_binder = FormBinder({
+    'manifest_id': coerce_integer,
+    'description': coerce_string,
+    'quantity': coerce_integer,
+    'weight': coerce_integer,
+    'volume': coerce_integer,
+    'pack_type_id': coerce_integer,
+    'commodity_id': coerce_integer,
+    'container_id': coerce_integer,
+    'user_id': coerce_integer,
+})
+
+def get_related_data(item=None):
+    """
+    Get the dropdown options needed for S002_LineItem forms: every row of a
+    small lookup table, from the shared cache, or just the row item refers
+    to, the rest being looked up as the user types.
+    """
     return {
         
-        'pack_types': S004_PackType.query.all(),
-        'commoditys': S003_Commodity.query.all(),
-        'containers': S005_Container.query.all(),
-        'manifests': S001_Manifest.query.all(),
+        'pack_types': reference_data(S004_PackType, 'name', item.pack_type_id if item else None),
+        'commoditys': reference_data(S003_Commodity, 'name', item.commodity_id if item else None),
+        'containers': reference_data(S005_Container, 'number', item.container_id if item else None),
+        'manifests': reference_data(S001_Manifest, 'bill_of_lading', item.manifest_id if item else None),
     }
 
 def create_s002_lineitem(form_data):
     """Create a new S002_LineItem with related data."""
     try:
-        item = S002_LineItem()
-        
-        if 'pack_type_id' in form_data:
-            item.pack_type_id = form_data['pack_type_id']
-        if 'commodity_id' in form_data:
-            item.commodity_id = form_data['commodity_id']
-        if 'container_id' in form_data:
-            item.container_id = form_data['container_id']
-        if 'manifest_id' in form_data:
-            item.manifest_id = form_data['manifest_id']
-        
-        # Set other fields
-        for field, value in form_data.items():
-            if not field.endswith('_id') and hasattr(item, field):
-                setattr(item, field, value)
-        
+        item = form_binder.bind(S002_LineItem(), form_data, create=True)
         db.session.add(item)
         db.session.commit()
         flash('Created successfully', 'success')
@@ -43,21 +47,7 @@ def create_s002_lineitem(form_data):
 def update_s002_lineitem(item, form_data):
     """Update an existing S002_LineItem with related data."""
     try:
-        
-        if 'pack_type_id' in form_data:
-            item.pack_type_id = form_data['pack_type_id']
-        if 'commodity_id' in form_data:
-            item.commodity_id = form_data['commodity_id']
-        if 'container_id' in form_data:
-            item.container_id = form_data['container_id']
-        if 'manifest_id' in form_data:
-            item.manifest_id = form_data['manifest_id']
-        
-        # Update other fields
-        for field, value in form_data.items():
-            if not field.endswith('_id') and hasattr(item, field):
-                setattr(item, field, value)
-        
+        form_binder.bind(item, form_data)
         db.session.commit()
         flash('Updated successfully', 'success')
         return True
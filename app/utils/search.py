@@ -0,0 +1,282 @@
+import math
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import and_, column, func, inspect, literal_column, or_, select, table, text
+from sqlalchemy.exc import OperationalError
+
+# The trigram tokenizer matches any substring of three or more characters,
+# the same results LIKE '%term%' gives, case-insensitively
+MIN_INDEXED_TERM = 3
+
+# Date terms, from the least to the most precise, and the step to the end of the range each names
+DATE_FORMATS = [
+    ("%Y", "year"),
+    ("%Y-%m", "month"),
+    ("%Y-%m-%d", "day"),
+    ("%Y-%m-%d %H:%M", "minute"),
+    ("%Y-%m-%dT%H:%M", "minute"),
+]
+
+# Search engines by model, registered by the route modules as they are imported
+_engines: Dict[type, "SearchEngine"] = {}
+
+def quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+def fts_phrase(term: str) -> str:
+    """Quote term as an FTS5 phrase so its punctuation is matched literally."""
+    return '"' + term.replace('"', '""') + '"'
+
+def like_escape(term: str) -> str:
+    """Escape the LIKE wildcards in term, for use with escape='\\'."""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+class SearchEngine:
+    """
+    Plans a case-insensitive search over one model's list view columns.
+
+    The route generator reads the column types from the schema, and each
+    search term becomes predicates that an index can serve:
+
+    - text columns are matched through an FTS5 table over the model's table,
+      kept in sync by triggers, when the database is SQLite. Elsewhere, and
+      for terms too short for that index, indexed (prefix) text columns match
+      the start of their value, and the other text columns are searched with
+      LIKE only when there is no full-text index;
+    - numeric columns match numeric terms exactly;
+    - date columns match the year, month, day or minute a date term names;
+    - foreign key columns match rows whose related row matches the term in
+      its display column.
+    """
+
+    def __init__(self, model, text_fields: Iterable[str] = (), prefix_fields: Iterable[str] = (),
+                 numeric_fields: Iterable[str] = (), date_fields: Iterable[str] = (),
+                 related_fields: Optional[Dict[str, Tuple[type, str]]] = None, register: bool = True):
+        self.model = model
+        self.text_fields = list(text_fields)
+        self.prefix_fields = list(prefix_fields)
+        self.numeric_fields = list(numeric_fields)
+        self.date_fields = list(date_fields)
+        self.related_fields = dict(related_fields or {})
+        self.table_name = model.__tablename__
+        self.fts_table = f"{self.table_name}_fts"
+        self.indexed = False
+        # Unregistered engines only create indexes, as create_schema's do
+        if register:
+            _engines[model] = self
+
+    def _triggers(self) -> Dict[str, str]:
+        """Return the statements of the triggers that keep the FTS table in sync, by trigger name."""
+        fts = quote_identifier(self.fts_table)
+        columns = ", ".join(quote_identifier(field) for field in self.text_fields)
+        new_values = ", ".join(f"new.{quote_identifier(field)}" for field in self.text_fields)
+        old_values = ", ".join(f"old.{quote_identifier(field)}" for field in self.text_fields)
+        insert_new = f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new_values});"
+        delete_old = f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_values});"
+        table_name = quote_identifier(self.table_name)
+        return {
+            f"{self.fts_table}_ai": f"AFTER INSERT ON {table_name} BEGIN {insert_new} END",
+            f"{self.fts_table}_ad": f"AFTER DELETE ON {table_name} BEGIN {delete_old} END",
+            f"{self.fts_table}_au": f"AFTER UPDATE ON {table_name} BEGIN {delete_old} {insert_new} END",
+        }
+
+    def _indexes(self) -> Dict[str, str]:
+        """Return the column lists of the indexes the search predicates rely on, by index name."""
+        indexes = {}
+        for field in list(self.related_fields) + self.date_fields:
+            indexes[f"idx_{self.table_name}_{field}"] = quote_identifier(field)
+        # LIKE is case-insensitive, so only a NOCASE index can serve a prefix match
+        for field in self.prefix_fields:
+            indexes[f"idx_{self.table_name}_{field}_nocase"] = f"{quote_identifier(field)} COLLATE NOCASE"
+        return indexes
+
+    def setup(self, connection, rebuild: bool = False) -> bool:
+        """
+        Create the indexes the search predicates rely on and, on SQLite, the
+        FTS table and its triggers unless they already match the text columns,
+        indexing the rows already in the table. rebuild recreates them anyway,
+        for rows written while the triggers were missing.
+
+        Returns whether text searches can use the full-text index.
+        """
+        self.indexed = False
+        for index, columns in self._indexes().items():
+            connection.execute(text(
+                f"CREATE INDEX IF NOT EXISTS {quote_identifier(index)} ON {quote_identifier(self.table_name)} ({columns})"
+            ))
+        if connection.dialect.name != "sqlite" or not self.text_fields:
+            return False
+
+        existing = [row[1] for row in connection.execute(text(f"PRAGMA table_info({quote_identifier(self.fts_table)})"))]
+        if rebuild or existing != self.text_fields:
+            for trigger in self._triggers():
+                connection.execute(text(f"DROP TRIGGER IF EXISTS {quote_identifier(trigger)}"))
+            connection.execute(text(f"DROP TABLE IF EXISTS {quote_identifier(self.fts_table)}"))
+            columns = ", ".join(quote_identifier(field) for field in self.text_fields)
+            try:
+                connection.execute(text(
+                    f"CREATE VIRTUAL TABLE {quote_identifier(self.fts_table)} USING fts5("
+                    f"{columns}, content={quote_identifier(self.table_name)}, content_rowid='id', "
+                    f"tokenize='trigram')"
+                ))
+            except OperationalError:
+                # SQLite built without FTS5 or older than 3.34, which added the trigram tokenizer
+                return False
+            connection.execute(text(
+                f"INSERT INTO {quote_identifier(self.fts_table)}({quote_identifier(self.fts_table)}) VALUES ('rebuild')"
+            ))
+
+        for trigger, body in self._triggers().items():
+            connection.execute(text(f"CREATE TRIGGER IF NOT EXISTS {quote_identifier(trigger)} {body}"))
+        self.indexed = True
+        return True
+
+    def probe(self, connection) -> bool:
+        """
+        Find whether the FTS table and its triggers exist and match the text
+        columns, without creating or changing anything; setup creates them.
+        Returns whether text searches can use the full-text index.
+        """
+        self.indexed = False
+        if connection.dialect.name != "sqlite" or not self.text_fields:
+            return False
+        existing = [row[1] for row in connection.execute(text(f"PRAGMA table_info({quote_identifier(self.fts_table)})"))]
+        triggers = set(connection.execute(
+            text("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = :table"),
+            {"table": self.table_name},
+        ).scalars())
+        self.indexed = existing == self.text_fields and set(self._triggers()) <= triggers
+        return self.indexed
+
+    def text_predicates(self, search_term: str, fields: Optional[List[str]] = None) -> List:
+        """Return the predicates matching search_term in the text columns (or just fields)."""
+        fields = self.text_fields if fields is None else [field for field in fields if field in self.text_fields]
+        if not fields:
+            return []
+        if self.indexed and len(search_term) >= MIN_INDEXED_TERM:
+            fts = table(self.fts_table, column("rowid"))
+            query = fts_phrase(search_term)
+            if fields != self.text_fields:
+                query = "{" + " ".join(quote_identifier(field) for field in fields) + "} : " + query
+            match = literal_column(quote_identifier(self.fts_table)).op("MATCH")(query)
+            return [self.model.id.in_(select(fts.c.rowid).where(match))]
+
+        term = like_escape(search_term)
+        predicates = [
+            getattr(self.model, field).like(f"{term}%", escape="\\")
+            for field in fields if field in self.prefix_fields
+        ]
+        if not self.indexed:
+            predicates.extend(
+                func.lower(getattr(self.model, field)).like(f"%{term.lower()}%", escape="\\")
+                for field in fields if field not in self.prefix_fields
+            )
+        return predicates
+
+    def numeric_predicates(self, search_term: str) -> List:
+        """Return exact matches of a numeric search_term against the numeric columns."""
+        number = parse_number(search_term)
+        if number is None:
+            return []
+        predicates = []
+        for field in self.numeric_fields:
+            attribute = getattr(self.model, field)
+            if isinstance(number, float) and attribute.type.python_type is int:
+                if not number.is_integer():
+                    continue
+                number = int(number)
+            predicates.append(attribute == number)
+        return predicates
+
+    def date_predicates(self, search_term: str) -> List:
+        """Return range matches of a date search_term against the date columns."""
+        date_range = parse_date_range(search_term) if self.date_fields else None
+        if date_range is None:
+            return []
+        start, end = date_range
+        return [and_(getattr(self.model, field) >= start, getattr(self.model, field) < end) for field in self.date_fields]
+
+    def related_predicates(self, search_term: str) -> List:
+        """Return matches of the foreign key columns whose related row's display column matches search_term."""
+        predicates = []
+        for field, (related_model, display_field) in self.related_fields.items():
+            related = _engines.get(related_model)
+            if related is not None and display_field in related.text_fields:
+                conditions = related.text_predicates(search_term, [display_field])
+            else:
+                # The related list view does not search its display column, so it has no index for it
+                pattern = f"%{like_escape(search_term).lower()}%"
+                conditions = [func.lower(getattr(related_model, display_field)).like(pattern, escape="\\")]
+            if conditions:
+                related_ids = select(related_model.id).where(or_(*conditions))
+                # IN rather than a correlated EXISTS, which SQLite runs once per row of this table
+                predicates.append(getattr(self.model, field).in_(related_ids))
+        return predicates
+
+    def filter(self, search_term: str):
+        """Return the filter for rows matching search_term, or None if there is nothing to filter on."""
+        search_term = search_term.strip() if search_term else ""
+        if not search_term:
+            return None
+
+        conditions = (
+            self.text_predicates(search_term)
+            + self.numeric_predicates(search_term)
+            + self.date_predicates(search_term)
+            + self.related_predicates(search_term)
+        )
+        return or_(*conditions) if conditions else None
+
+def parse_number(search_term: str):
+    """Return search_term as an int or float, or None if it is not a number."""
+    for number_type in (int, float):
+        try:
+            number = number_type(search_term)
+        except ValueError:
+            continue
+        # float() also accepts "nan" and "inf", which no column should match
+        return number if math.isfinite(number) else None
+    return None
+
+def parse_date_range(search_term: str) -> Optional[Tuple[datetime, datetime]]:
+    """Return the [start, end) range of the year, month, day or minute search_term names, or None."""
+    for date_format, unit in DATE_FORMATS:
+        try:
+            start = datetime.strptime(search_term, date_format)
+        except ValueError:
+            continue
+        if unit == "year":
+            return start, start.replace(year=start.year + 1)
+        if unit == "month":
+            return start, start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+        step = {"day": timedelta(days=1), "minute": timedelta(minutes=1)}[unit]
+        return start, start + step
+    return None
+
+def setup_search(engine, rebuild: bool = False,
+                 search_engines: Optional[Iterable[SearchEngine]] = None) -> List[str]:
+    """
+    Create or update the search indexes of search_engines, by default of every
+    registered model; returns the full-text indexed table names. Pass rebuild
+    after bulk loading tables with their triggers dropped, e.g. by drop_all
+    and create_all.
+    """
+    indexed = []
+    with engine.begin() as connection:
+        for search_engine in (_engines.values() if search_engines is None else search_engines):
+            if inspect(connection).has_table(search_engine.table_name) and search_engine.setup(connection, rebuild):
+                indexed.append(search_engine.table_name)
+    return indexed
+
+def probe_search(engine, search_engines: Optional[Iterable[SearchEngine]] = None) -> List[str]:
+    """
+    Find which of search_engines, by default every registered model's, can
+    use their full-text index, reading the schema only; returns their table
+    names. The indexes are created with the schema, by create_schema.
+    """
+    with engine.connect() as connection:
+        return [
+            search_engine.table_name
+            for search_engine in (_engines.values() if search_engines is None else search_engines)
+            if search_engine.probe(connection)
+        ]
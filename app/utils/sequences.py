@@ -0,0 +1,162 @@
+import threading
+import weakref
+from typing import Dict, Mapping, Optional, Set
+
+from sqlalchemy import case, event
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app import db
+from app.models.sequences import SequenceCounter
+from app.models.shipping import S010_Voyage, S012_Port
+
+# Values reserved per round trip to the sequence_counter table
+DEFAULT_BLOCK_SIZE = 100
+
+# The INSERT ... ON CONFLICT DO UPDATE of each dialect a block can be reserved on
+UPSERT_INSERTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+class SequenceAllocator:
+    """
+    Hands out the values of named sequences from blocks reserved in the
+    sequence_counter table.
+
+    Each block is reserved with one upsert that moves the sequence's next
+    value on by block_size, so processes sharing a database get disjoint
+    blocks and never hand out the same value, and a sequence costs one round
+    trip per block instead of one per value. The values of a block are then
+    handed out from memory. Values of a block the process does not use are
+    never handed out, leaving gaps.
+
+    A block reserved on the caller's connection is forgotten if that
+    transaction, or a savepoint in it, rolls back, as its reservation is
+    undone and another allocator may reserve the same values.
+    """
+
+    def __init__(self, block_size: int = DEFAULT_BLOCK_SIZE):
+        if block_size < 1:
+            raise ValueError(f"Block size must be at least 1, got {block_size}")
+        self.block_size = block_size
+        # The next value and the end of each sequence's current block
+        self._blocks: Dict[str, list] = {}
+        # The sequences whose blocks were reserved in each caller's uncommitted transaction
+        self._pending: "weakref.WeakKeyDictionary[object, Set[str]]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def reserve(self, name: str, connection) -> range:
+        """Reserve the next block of a sequence on connection, creating the sequence at 1."""
+        upsert = UPSERT_INSERTS.get(connection.dialect.name)
+        if upsert is None:
+            raise ValueError(f"Sequences need SQLite or PostgreSQL, not {connection.dialect.name}")
+        table = SequenceCounter.__table__
+        statement = upsert(table).values(name=name, next_value=1 + self.block_size)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.name], set_={"next_value": table.c.next_value + self.block_size}
+        ).returning(table.c.next_value)
+        stop = connection.execute(statement).scalar_one()
+        return range(stop - self.block_size, stop)
+
+    def next(self, name: str, connection=None) -> int:
+        """
+        Return the next value of a sequence. A new block is reserved in the
+        caller's connection when one is given, so it commits with the caller's
+        writes, else in a short transaction of its own.
+        """
+        with self._lock:
+            block = self._blocks.get(name)
+            if block is None or block[0] >= block[1]:
+                if connection is None:
+                    with db.engine.begin() as own_connection:
+                        reserved = self.reserve(name, own_connection)
+                else:
+                    reserved = self.reserve(name, connection)
+                    self._forget_on_rollback(name, connection)
+                block = self._blocks[name] = [reserved.start, reserved.stop]
+            value = block[0]
+            block[0] += 1
+            return value
+
+    def _forget_on_rollback(self, name: str, connection):
+        """Forget the block of a sequence if the caller's transaction on connection rolls back."""
+        pending = self._pending.get(connection)
+        if pending is None:
+            pending = self._pending[connection] = set()
+
+            def committed(connection):
+                pending.clear()
+
+            def rolled_back(connection, *args):
+                names = list(pending)
+                pending.clear()
+                for name in names:
+                    self.clear(name)
+
+            event.listen(connection, "commit", committed)
+            event.listen(connection, "rollback", rolled_back)
+            event.listen(connection, "rollback_savepoint", rolled_back)
+        pending.add(name)
+
+    def advance(self, last_values: Mapping[str, int], connection):
+        """
+        Move sequences on past values written without the allocator, such as
+        those of a bulk load, so none of them is handed out again. Sequences
+        already past their value are left alone.
+        """
+        if not last_values:
+            return
+        upsert = UPSERT_INSERTS.get(connection.dialect.name)
+        if upsert is None:
+            raise ValueError(f"Sequences need SQLite or PostgreSQL, not {connection.dialect.name}")
+        table = SequenceCounter.__table__
+        statement = upsert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.name],
+            set_={"next_value": case(
+                (table.c.next_value > statement.excluded.next_value, table.c.next_value),
+                else_=statement.excluded.next_value,
+            )},
+        )
+        connection.execute(statement, [{"name": name, "next_value": value + 1} for name, value in last_values.items()])
+        self.clear()
+
+    def clear(self, name: Optional[str] = None):
+        """Forget the reserved blocks of one sequence, or of all; their unused values are skipped."""
+        with self._lock:
+            if name is None:
+                self._blocks.clear()
+            else:
+                self._blocks.pop(name, None)
+
+def bill_of_lading_prefix(voyage, pol, pod) -> str:
+    """The VOYAGE-ROT-POL-POD part of a bill of lading number, which its sequence number counts within."""
+    # Get voyage abbreviation (first letter of each word, max 4 letters)
+    voyage_name = ''.join(word[0].upper() for word in voyage.name.split())[:4]
+
+    # Get port codes
+    pol_code = pol.prefix[-3:]  # Last 3 chars of port prefix
+    pod_code = pod.prefix[-3:]  # Last 3 chars of port prefix
+
+    return f"{voyage_name}-{voyage.rotation_number:03d}-{pol_code}-{pod_code}"
+
+def split_bill_of_lading(bill_of_lading: str):
+    """Return the prefix and sequence number of a bill of lading number, or None if it has no sequence number."""
+    prefix, _, sequence = bill_of_lading.rpartition("-")
+    return (prefix, int(sequence)) if prefix and sequence.isdigit() else None
+
+# The sequences of the bill of lading numbers the app hands out
+bill_of_lading_sequences = SequenceAllocator()
+
+def next_bill_of_lading(manifest, connection) -> str:
+    """
+    Return the next bill of lading number of a manifest's voyage and ports,
+    reserved on connection. Raises ValueError if the manifest lacks them.
+    """
+    voyage = db.session.get(S010_Voyage, manifest.voyage_id) if manifest.voyage_id else None
+    pol = db.session.get(S012_Port, manifest.port_of_loading_id) if manifest.port_of_loading_id else None
+    pod = db.session.get(S012_Port, manifest.port_of_discharge_id) if manifest.port_of_discharge_id else None
+    if voyage is None or pol is None or pod is None or voyage.rotation_number is None or not pol.prefix or not pod.prefix:
+        raise ValueError("A bill of lading number needs the voyage and the ports of loading and discharge")
+    prefix = bill_of_lading_prefix(voyage, pol, pod)
+    return f"{prefix}-{bill_of_lading_sequences.next(prefix, connection):05d}"
@@ -0,0 +1,99 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+
+from app import create_app, db
+from app.models.shipping import S006_ContainerHistory, S015_Client, S017_Rate
+from app.utils.batch import BatchError, BatchWriter
+from app.utils.forms import FormBinder, coerce_float, coerce_integer
+from app.utils.reference import reference_cache
+
+@pytest.fixture
+def app():
+    app = create_app({
+        "TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite://", "API_MAX_BATCH_SIZE": 10,
+    })
+    with app.app_context():
+        reference_cache.clear()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def test_batch_is_written_in_one_statement_per_operation(app):
+    """Test that creates, updates and deletes are written as bulk statements and the created ids returned"""
+    db.session.add_all([S006_ContainerHistory(damage="none"), S006_ContainerHistory(damage="dent")])
+    db.session.commit()
+    client = app.test_client()
+    # Loading the route module probes for its full-text index
+    app.extensions["crud_routes"].preload(["s006_containerhistory"])
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        response = client.post("/api/s006_containerhistory/batch", json={
+            "create": [
+                {"container_id": 3, "damage": "scratch", "updated": "2024-01-31 14:30"},
+                {"container_id": "4", "damage": "hole", "updated": "2024-02-01T08:00"},
+            ],
+            "update": [{"id": 1, "damage": " bent ", "port_id": 9}],
+            "delete": [2],
+        })
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+    assert response.status_code == 200
+    assert response.get_json() == {"created": [3, 4], "updated": 1, "deleted": 1}
+    # The id lookup, then one INSERT, UPDATE and DELETE
+    assert [statement.split()[0] for statement in statements] == ["SELECT", "INSERT", "UPDATE", "DELETE"]
+
+    rows = {row.id: row for row in S006_ContainerHistory.query}
+    assert sorted(rows) == [1, 3, 4]
+    assert (rows[1].damage, rows[1].port_id) == ("bent", 9)
+    assert (rows[3].container_id, rows[3].updated) == (3, datetime(2024, 1, 31, 14, 30))
+    assert (rows[4].container_id, rows[4].updated) == (4, datetime(2024, 2, 1, 8))
+
+def test_failed_items_are_reported_and_nothing_is_written(app):
+    """Test that every failing item is reported by operation and index, and the valid ones are not written"""
+    db.session.add(S015_Client(name="Acme"))
+    db.session.commit()
+    client = app.test_client()
+
+    response = client.post("/api/s015_client/batch", json={
+        "create": [{"name": "Globex"}, {"name": "Hooli", "id": 9, "colour": "red"}],
+        "update": [{"id": 1, "name": None}, {"id": 42, "name": "Initech"}, {"name": "Umbrella"}],
+        "delete": ["x"],
+    })
+    assert response.status_code == 400
+    assert response.get_json()["errors"] == [
+        {"op": "create", "index": 1, "errors": {"colour": "is not a field", "id": "is assigned on create"}},
+        {"op": "update", "index": 1, "errors": {"id": "not found"}},
+        {"op": "update", "index": 2, "errors": {"id": "is required"}},
+        {"op": "delete", "index": 0, "errors": {"id": "must be a whole number"}},
+    ]
+    assert [client.name for client in S015_Client.query] == ["Acme"]
+
+def test_creates_must_give_the_required_fields(app):
+    """Test that a create leaving out a required field fails, while an update may leave it as it is"""
+    db.session.add(S017_Rate(distance_rate_code=1, rate=1.0))
+    db.session.commit()
+    writer = BatchWriter(S017_Rate, FormBinder(
+        {"distance_rate_code": coerce_integer, "rate": coerce_float}, required=["distance_rate_code"]
+    ))
+
+    with pytest.raises(BatchError) as error:
+        writer.write({"create": [{"rate": 2.5}], "update": [{"id": 1, "rate": 3.5}]})
+    assert error.value.errors == [{"op": "create", "index": 0, "errors": {"distance_rate_code": "is required"}}]
+    assert writer.write({"update": [{"id": 1, "rate": 3.5}]}) == {"created": [], "updated": 1, "deleted": 0}
+
+def test_malformed_large_and_unknown_batches_are_rejected(app):
+    """Test the responses to a batch that is not an object of arrays, too large, or for no table"""
+    client = app.test_client()
+    assert client.post("/api/s015_client/batch", json=[{"name": "Acme"}]).status_code == 400
+    assert client.post("/api/s015_client/batch", json={"create": {"name": "Acme"}}).status_code == 400
+    assert client.post("/api/s015_client/batch", data="not json").status_code == 400
+    response = client.post("/api/s015_client/batch", json={"create": [{"name": "Acme"}] * 9, "delete": [1, 2]})
+    assert response.status_code == 413
+    assert response.get_json()["error"] == "Batch of 11 items exceeds the limit of 10"
+    assert client.post("/api/s999_missing/batch", json={}).status_code == 404
+    assert S015_Client.query.count() == 0
@@ -0,0 +1,94 @@
+import random
+import pytest
+from sqlalchemy import func, select
+
+from app import create_app, db
+from app.models.shipping import S005_Container
+from app.utils import container_numbers
+from app.utils.container_numbers import (
+    generate_container_number, generate_container_numbers, import_containers, sequential_owner_code,
+    validate_container_number, validate_container_numbers
+)
+from app.utils.reference import reference_cache
+
+@pytest.fixture(params=["numpy", "fallback"])
+def batch(request, monkeypatch):
+    """Run a test with the NumPy batch functions and again with the per-row fallback."""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(container_numbers, "np", None)
+    return request.param
+
+@pytest.fixture
+def app():
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite://"})
+    with app.app_context():
+        reference_cache.clear()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def test_check_digits_follow_iso_6346():
+    """Test the check digit of a published example, whose letters skip the multiples of 11"""
+    assert validate_container_number("CSQU3054383")
+    assert not validate_container_number("CSQU3054384")
+    assert generate_container_number("CSQU", "22G", 305438) == "CSQU22G3054382"
+    assert validate_container_number("CSQU22G3054382")
+
+def test_sequential_owner_codes_are_distinct():
+    """Test that owner codes count through the letters and stop past the last"""
+    assert [sequential_owner_code(block) for block in (0, 1, 25, 26, 26 ** 3 - 1)] == [
+        "AAAU", "AABU", "AAZU", "ABAU", "ZZZU"
+    ]
+    assert len({sequential_owner_code(block) for block in range(2000)}) == 2000
+    assert all(validate_container_number(generate_container_number(sequential_owner_code(block), "22G", 1))
+               for block in range(0, 26 ** 3, 997))
+    with pytest.raises(ValueError, match="Owner code block"):
+        sequential_owner_code(26 ** 3)
+
+def test_batch_matches_per_row(batch):
+    """Test that the batch functions give what the per-row functions give for every row"""
+    rng = random.Random(0)
+    owner_codes = [rng.choice(["MAEU", "CMAU", "CSQU", "ZIMU"]) for _ in range(2000)]
+    equipment_types = [rng.choice(["22G", "45R", "20T", "L5G"]) for _ in range(2000)]
+    serial_numbers = [rng.randrange(1000000) for _ in range(2000)]
+
+    numbers = generate_container_numbers(owner_codes, equipment_types, serial_numbers)
+    assert numbers == [generate_container_number(*parts) for parts in zip(owner_codes, equipment_types, serial_numbers)]
+
+    candidates = numbers + [number[:4] + number[7:] for number in numbers] + [
+        number[:-1] + str((int(number[-1]) + 1) % 10) for number in numbers[:100]
+    ] + ["", None, 42, "CSQU3054383", "CSQU305438", "1SQU3054383", "CSQU30543A3", "csqu3054383", "CSQÜ3054383"]
+    valid = validate_container_numbers(candidates)
+    assert valid == [validate_container_number(number) for number in candidates]
+    assert all(valid[:2000])
+    assert not any(valid[4000:4100])
+    assert valid[-9:] == [False, False, False, True, False, False, False, False, False]
+
+@pytest.mark.parametrize("owner_code, equipment_type, serial_number, message", [
+    ("MAE", "U22G", 1, "Owner code"),
+    ("maeu", "22G", 1, "Owner code"),
+    ("MAEU", "22g", 1, "Equipment type"),
+    ("MAEU", "22G", 1000000, "Serial number"),
+])
+def test_malformed_parts_are_rejected(batch, owner_code, equipment_type, serial_number, message):
+    """Test that the batch reports the first malformed row the way the per-row function does"""
+    with pytest.raises(ValueError, match=message):
+        generate_container_number(owner_code, equipment_type, serial_number)
+    with pytest.raises(ValueError, match=message):
+        generate_container_numbers(["CSQU", owner_code], ["22G", equipment_type], [1, serial_number])
+
+def test_import_skips_wrong_check_digits(app):
+    """Test that imported chunks keep the valid rows and report the rest by position"""
+    rows = [{"number": generate_container_number("MAEU", "22G", i), "port_id": None, "updated": None} for i in range(10)]
+    rows[3]["number"] = rows[3]["number"][:-1] + str((int(rows[3]["number"][-1]) + 1) % 10)
+    rows[8]["number"] = "MAEU"
+
+    result = import_containers(rows, chunk_size=4)
+
+    assert result.inserted == 8
+    assert [(rejected.position, rejected.number) for rejected in result.rejected] == [
+        (3, rows[3]["number"]), (8, "MAEU")
+    ]
+    assert db.session.scalar(select(func.count()).select_from(S005_Container)) == 8
@@ -0,0 +1,114 @@
+import sys
+from importlib import import_module
+from pathlib import Path
+
+import pytest
+from flask import url_for
+from sqlalchemy import event
+
+from app import create_app, db
+from app.models.shipping import S001_Manifest, S009_Vessel, S010_Voyage, S014_Country, S015_Client
+from app.routes.crud import routes as generated_routes
+from app.utils import search
+from app.utils.reference import reference_cache
+
+SHIPPING_JSON = Path(__file__).parent.parent.parent / "dsl" / "output" / "json" / "shipping.json"
+
+@pytest.fixture
+def app(monkeypatch):
+    # Import the generated route modules first, as the engine's search engines
+    # replace theirs in the process-wide registry until the test ends
+    for table_name in generated_routes.routes:
+        import_module(generated_routes.module_name(table_name))
+    monkeypatch.setattr(search, "_engines", dict(search._engines))
+    app = create_app({
+        "TESTING": True, "SECRET_KEY": "test", "SQLALCHEMY_DATABASE_URI": "sqlite://",
+        "CRUD_ENGINE": "runtime", "CRUD_SCHEMA": SHIPPING_JSON,
+    })
+    with app.app_context():
+        reference_cache.clear()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def test_views_are_planned_as_the_generated_modules_plan_them(app):
+    """Test that each model's views search, look up and load what its generated route module does"""
+    engine = app.extensions["crud_routes"]
+    assert engine.routes == generated_routes.routes
+    assert engine.loaded() == []
+    engine.preload("*")
+
+    for table_name, views in engine.models.items():
+        module = sys.modules[f"app.routes.crud.{table_name}"]
+        for attribute in ("text_fields", "prefix_fields", "numeric_fields", "date_fields", "related_fields"):
+            assert getattr(views.search_engine, attribute) == getattr(module.search_engine, attribute), table_name
+        assert views.lookups == getattr(module, "LOOKUPS", {}), table_name
+        assert views.reference_foreign_keys == getattr(module, "REFERENCE_FOREIGN_KEYS", {}), table_name
+        assert len(views.list_options) == len(getattr(module, "LIST_FOREIGN_KEYS", [])), table_name
+        assert (views.helpers is not None) == hasattr(module, "get_related_data"), table_name
+        form_binder = (views.helpers or module).form_binder
+        assert views.form_binder.coercers == form_binder.coercers, table_name
+        assert views.form_binder.defaults == form_binder.defaults, table_name
+        assert module.batch_writer.form_binder is form_binder, table_name
+
+def test_engine_serves_the_crud_views(app):
+    """Test create, edit, delete, lookup and list through the engine, with the generated endpoints' URLs"""
+    client = app.test_client()
+    with app.test_request_context():
+        assert url_for("crud.s014_country.edit_s014_country", id=1) == "/crud/s014_country/1/edit"
+
+    response = client.post("/crud/s014_country/create", data={"name": "Netherlands"})
+    assert response.status_code == 302
+    assert response.headers["Location"] == "/crud/s014_country/"
+    country = S014_Country.query.one()
+    assert country.name == "Netherlands"
+
+    response = client.post(f"/crud/s014_country/{country.id}/edit", data={"name": "Nederland"})
+    assert response.status_code == 302
+    db.session.expire_all()
+    assert country.name == "Nederland"
+
+    db.session.add_all([S015_Client(name="Acme Shipping"), S015_Client(name="Acme Lines")])
+    db.session.commit()
+    response = client.get("/crud/s001_manifest/lookup/shipper_id", query_string={"q": "acme s"})
+    assert [option["label"] for option in response.get_json()] == ["Acme Shipping"]
+    assert app.extensions["crud_routes"].loaded() == ["s001_manifest", "s014_country"]
+    assert client.get("/crud/s001_manifest/lookup/bill_of_lading").status_code == 404
+    assert client.get("/crud/s014_country/lookup/name").status_code == 404
+
+    assert client.delete(f"/crud/s014_country/{country.id}/delete").status_code == 204
+    assert S014_Country.query.count() == 0
+
+    response = client.post("/api/s014_country/batch", json={"create": [{"name": "Belgium"}, {"name": "France"}]})
+    assert response.get_json() == {"created": [1, 2], "updated": 0, "deleted": 0}
+    assert [country.name for country in S014_Country.query.order_by(S014_Country.id)] == ["Belgium", "France"]
+
+def test_engine_list_loads_related_rows_with_the_page(app):
+    """Test that the manifest list runs the count and page queries only, and searches related names"""
+    for i in range(30):
+        vessel = S009_Vessel(name=f"Vessel {i}")
+        db.session.add(S001_Manifest(
+            bill_of_lading=f"BL{i:05d}", shipper=S015_Client(name=f"Shipper {i}"),
+            consignee=S015_Client(name=f"Consignee {i}"), vessel=vessel,
+            voyage=S010_Voyage(name=f"Voyage {i}", vessel=vessel),
+        ))
+    db.session.commit()
+    db.session.expunge_all()
+    client = app.test_client()
+    # The first request plans the views and creates the search indexes
+    app.extensions["crud_routes"].preload(["s001_manifest"])
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        response = client.get("/crud/s001_manifest/", query_string={"per_page": 25}, headers={"HX-Request": "true"})
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+    assert response.status_code == 200
+    assert len(statements) == 2
+    assert b"Shipper 24" in response.data and b"Vessel 24" in response.data
+
+    response = client.get("/crud/s001_manifest/", query_string={"search": "Shipper 7"}, headers={"HX-Request": "true"})
+    assert b"BL00007" in response.data
+    assert b"BL00008" not in response.data
@@ -0,0 +1,84 @@
+from datetime import datetime
+
+import pytest
+from werkzeug.datastructures import MultiDict
+
+from app import create_app, db
+from app.models.shipping import S001_Manifest, S017_Rate
+from app.utils.reference import reference_cache
+from app.utils.forms import FormBinder, FormError, coerce_datetime, coerce_float, coerce_integer, coerce_string
+
+@pytest.fixture
+def app():
+    app = create_app({"TESTING": True, "SECRET_KEY": "test", "SQLALCHEMY_DATABASE_URI": "sqlite://"})
+    with app.app_context():
+        reference_cache.clear()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def binder():
+    return FormBinder({
+        'distance_rate_code': coerce_integer,
+        'rate': coerce_float,
+        'effective': coerce_datetime,
+    }, required=['distance_rate_code'], defaults=['effective'])
+
+def test_values_are_coerced_by_field_type(binder):
+    """Test that posted strings become the column's Python type and unknown fields are ignored"""
+    form = MultiDict({'id': '7', 'distance_rate_code': ' 12 ', 'rate': '3.5', 'effective': '2024-01-31 14:30',
+                      'client': 'anything'})
+    rate = binder.bind(S017_Rate(), form, create=True)
+    assert (rate.id, rate.distance_rate_code, rate.rate, rate.effective) == (None, 12, 3.5, datetime(2024, 1, 31, 14, 30))
+
+def test_blank_values_are_none_or_left_to_the_default(binder):
+    """Test that blank fields clear the column, but keep the schema default on create"""
+    form = MultiDict({'distance_rate_code': '1', 'rate': '', 'effective': ''})
+    assert binder.values(form, create=True) == {'distance_rate_code': 1, 'rate': None}
+    assert binder.values(form) == {'distance_rate_code': 1, 'rate': None, 'effective': None}
+    assert binder.values(MultiDict({'rate': '2'})) == {'rate': 2.0}
+
+def test_every_failure_is_reported_and_nothing_is_set(binder):
+    """Test that one pass reports all the fields that fail and leaves the item untouched"""
+    rate = S017_Rate(rate=1.0)
+    form = MultiDict({'distance_rate_code': '', 'rate': 'nan', 'effective': '31/01/2024'})
+    with pytest.raises(FormError) as error:
+        binder.bind(rate, form)
+    assert error.value.errors == {
+        'distance_rate_code': 'is required',
+        'rate': 'must be a number',
+        'effective': 'must be a date and time, such as 2024-01-31 14:30',
+    }
+    assert rate.rate == 1.0
+
+def test_required_fields_left_out_fail_on_create_only(binder):
+    """Test that a create must give the required fields, while an edit may leave them as they are"""
+    with pytest.raises(FormError) as error:
+        binder.values(MultiDict({'rate': '2'}), create=True)
+    assert error.value.errors == {'distance_rate_code': 'is required'}
+    assert binder.values({'rate': 2}) == {'rate': 2.0}
+
+def test_strings_are_kept_as_posted_but_trimmed():
+    """Test that text fields keep their value without surrounding whitespace"""
+    assert FormBinder({'name': coerce_string}).values(MultiDict({'name': '  Rotterdam '})) == {'name': 'Rotterdam'}
+
+def test_routes_store_typed_values(app):
+    """Test that the generated create and edit routes and the manifest helpers store coerced values"""
+    client = app.test_client()
+    response = client.post("/crud/s017_rate/create", data={"rate": "12.5", "effective": "", "distance_rate_code": "3"})
+    assert response.status_code == 302
+    rate = S017_Rate.query.one()
+    assert (rate.rate, rate.distance_rate_code, rate.effective) == (12.5, 3, None)
+
+    response = client.post(f"/crud/s017_rate/{rate.id}/edit", data={"rate": "", "effective": "2024-02-01"})
+    assert response.status_code == 302
+    db.session.expire_all()
+    assert (rate.rate, rate.distance_rate_code, rate.effective) == (None, 3, datetime(2024, 2, 1))
+
+    response = client.post("/crud/s001_manifest/create", data={
+        "bill_of_lading": "BL00001", "date_of_receipt": "2024-01-31T09:15", "shipper_id": "", "id": "99",
+    })
+    assert response.status_code == 302
+    manifest = S001_Manifest.query.one()
+    assert (manifest.id, manifest.date_of_receipt, manifest.shipper_id) == (1, datetime(2024, 1, 31, 9, 15), None)
@@ -0,0 +1,71 @@
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+from flask import Blueprint
+
+from app import create_app, db
+from app.routes.crud import routes
+from app.utils.lazy_routes import TableRoutes
+from app.utils.reference import reference_cache
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+
+def test_route_modules_load_on_first_request():
+    """Test that startup imports no route module and a request imports only its own, in a fresh process"""
+    script = textwrap.dedent("""
+        import sys
+        from flask import url_for
+        from sqlalchemy import inspect
+        from app import create_app, db
+
+        def loaded():
+            return sorted(name for name in sys.modules if name.startswith("app.routes.crud."))
+
+        app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite://"})
+        assert loaded() == [], loaded()
+        # One rule per view, whatever the number of tables
+        assert len([rule for rule in app.url_map.iter_rules() if rule.endpoint.startswith("crud.")]) == 5
+
+        client = app.test_client()
+        assert client.get("/").status_code == 200
+        with app.test_request_context():
+            assert url_for("crud.s012_port.edit_s012_port", id=3) == "/crud/s012_port/3/edit"
+        assert loaded() == [], loaded()
+
+        assert client.get("/crud/s012_port/lookup/country_id", query_string={"q": "Ne"}).json == []
+        assert loaded() == ["app.routes.crud.s012_port"], loaded()
+        with app.app_context():
+            assert inspect(db.engine).has_table("s012_port_fts")
+
+        # Tables without lookups have no lookup route to load their module
+        assert client.get("/crud/s014_country/lookup/anything").status_code == 404
+        assert client.get("/crud/s999_missing/").status_code == 404
+        assert loaded() == ["app.routes.crud.s012_port"], loaded()
+    """)
+    result = subprocess.run([sys.executable, "-c", script], cwd=PROJECT_ROOT, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+def test_preload_imports_the_listed_tables():
+    """Test that CRUD_PRELOAD loads its tables at startup and rejects tables without routes"""
+    reference_cache.clear()
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite://", "CRUD_PRELOAD": ["s014_country"]})
+    assert "s014_country" in routes.loaded()
+
+    with app.app_context():
+        assert routes.preload("*") == list(routes.routes)
+        assert routes.loaded() == list(routes.routes)
+        with pytest.raises(ValueError, match="s999_missing"):
+            routes.preload(["s999_missing"])
+        db.drop_all()
+
+def test_table_routes_need_view_functions_and_batch_writers():
+    """Test that a registry of routes cannot be made without a way to serve and batch write its tables"""
+    class ViewsOnly(TableRoutes):
+        def view_function(self, table_name, view):
+            return lambda **kwargs: table_name
+
+    with pytest.raises(TypeError, match="batch_writer"):
+        ViewsOnly(Blueprint("views_only", __name__), {"s014_country": ("list",)})
@@ -0,0 +1,110 @@
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.dialects import mysql, postgresql
+
+from app import create_app, db
+from app.models.sequences import SequenceCounter
+from app.models.shipping import S001_Manifest, S010_Voyage, S012_Port
+from app.utils.reference import reference_cache
+from app.utils.sequences import SequenceAllocator, bill_of_lading_sequences
+
+@pytest.fixture
+def app():
+    app = create_app({"TESTING": True, "SECRET_KEY": "test", "SQLALCHEMY_DATABASE_URI": "sqlite://"})
+    with app.app_context():
+        reference_cache.clear()
+        bill_of_lading_sequences.clear()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def next_value(name):
+    return db.session.scalar(select(SequenceCounter.next_value).where(SequenceCounter.name == name))
+
+def test_values_come_from_blocks_with_one_round_trip_each(app):
+    """Test that a sequence reserves a block when it runs out, with one statement per block"""
+    statements = []
+    event.listen(db.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    sequences = SequenceAllocator(block_size=3)
+
+    assert [sequences.next("GE-003-LAX-RTM") for _ in range(5)] == [1, 2, 3, 4, 5]
+    assert len([statement for statement in statements if "sequence_counter" in statement]) == 2
+    assert next_value("GE-003-LAX-RTM") == 7
+    assert sequences.next("AEL-001-LAX-RTM") == 1
+
+def test_allocators_sharing_a_database_never_collide(app):
+    """Test that allocators in different processes get disjoint blocks of the same sequence"""
+    first, second = SequenceAllocator(block_size=4), SequenceAllocator(block_size=4)
+    values = [allocator.next("GE-003-LAX-RTM") for _ in range(6) for allocator in (first, second)]
+
+    assert sorted(values) == sorted(set(values))
+    assert values[:4] == [1, 5, 2, 6]
+
+def test_reservations_in_the_callers_transaction_roll_back_with_it(app):
+    """Test that a block reserved on the caller's connection is undone with the caller's writes"""
+    sequences = SequenceAllocator(block_size=10)
+    assert sequences.next("GE-003-LAX-RTM", db.session.connection()) == 1
+    db.session.rollback()
+    assert next_value("GE-003-LAX-RTM") is None
+
+    with pytest.raises(ValueError):
+        SequenceAllocator(block_size=0)
+
+def test_blocks_rolled_back_are_not_handed_out(app):
+    """Test that a rolled back block is reserved again, so two allocators never hand out the same value"""
+    first, second = SequenceAllocator(block_size=10), SequenceAllocator(block_size=10)
+    assert first.next("GE-003-LAX-RTM", db.session.connection()) == 1
+    db.session.rollback()
+
+    assert second.next("GE-003-LAX-RTM") == 1
+    assert first.next("GE-003-LAX-RTM", db.session.connection()) == 11
+    db.session.commit()
+    assert first.next("GE-003-LAX-RTM", db.session.connection()) == 12
+    # A committed block outlives later rollbacks
+    db.session.rollback()
+    assert first.next("GE-003-LAX-RTM") == 13
+    assert next_value("GE-003-LAX-RTM") == 21
+
+def test_blocks_are_reserved_with_the_dialects_upsert(app):
+    """Test that PostgreSQL reserves with its own ON CONFLICT upsert, and other databases are refused"""
+    class Connection:
+        def __init__(self, dialect):
+            self.dialect = dialect
+            self.statements = []
+
+        def execute(self, statement):
+            self.statements.append(str(statement.compile(dialect=self.dialect)))
+            raise LookupError
+
+    connection = Connection(postgresql.dialect())
+    with pytest.raises(LookupError):
+        SequenceAllocator().reserve("GE-003-LAX-RTM", connection)
+    assert "ON CONFLICT (name) DO UPDATE" in connection.statements[0]
+    assert "RETURNING sequence_counter.next_value" in connection.statements[0]
+
+    with pytest.raises(ValueError):
+        SequenceAllocator().reserve("GE-003-LAX-RTM", Connection(mysql.dialect()))
+
+def test_manifests_created_blank_are_numbered_past_existing_numbers(app):
+    """Test that the manifest create route numbers a blank bill of lading from its advanced sequence"""
+    db.session.add_all([
+        S010_Voyage(name="Gulf Express", rotation_number=3), S012_Port(name="Los Angeles", prefix="USLAX"),
+        S012_Port(name="Rotterdam", prefix="NLRTM"),
+    ])
+    db.session.commit()
+    SequenceAllocator().advance({"GE-003-LAX-RTM": 41, "AEL-001-LAX-RTM": 2}, db.session.connection())
+    SequenceAllocator().advance({"GE-003-LAX-RTM": 7}, db.session.connection())
+    db.session.commit()
+    client = app.test_client()
+
+    form = {"voyage_id": "1", "port_of_loading_id": "1", "port_of_discharge_id": "2", "bill_of_lading": ""}
+    assert client.post("/crud/s001_manifest/create", data=form).status_code == 302
+    assert client.post("/crud/s001_manifest/create", data={**form, "bill_of_lading": "OWN-1"}).status_code == 302
+    assert client.post("/crud/s001_manifest/create", data=form).status_code == 302
+    assert [manifest.bill_of_lading for manifest in S001_Manifest.query.order_by(S001_Manifest.id)] == [
+        "GE-003-LAX-RTM-00042", "OWN-1", "GE-003-LAX-RTM-00043"
+    ]
+
+    # Without the voyage and ports there is no sequence to number from
+    client.post("/crud/s001_manifest/create", data={**form, "voyage_id": ""})
+    assert S001_Manifest.query.count() == 3
@@ -8,6 +8,21 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         f'sqlite:///{basedir / "instance/shipping.db"}'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Create missing tables at startup when the schema fingerprint changes;
+    # otherwise they are only created by "flask create-schema"
+    SCHEMA_AUTO_CREATE = True
+    # Tables whose CRUD views are loaded at startup, or '*' for all; the others
+    # are loaded on their first request
+    CRUD_PRELOAD = ()
+    # 'generated' serves the CRUD views from the route modules in app/routes/crud;
+    # 'runtime' plans them from the models in CRUD_SCHEMA, with no generated route
+    # modules; the templates and relationship helpers are still generated
+    CRUD_ENGINE = 'generated'
+    CRUD_SCHEMA = basedir / 'dsl/output/json/shipping.json'
+    # Must match the --pagination the templates were generated with
+    CRUD_PAGINATION = 'offset'
+    # Most creates, updates and deletes one POST /api/<table>/batch may hold
+    API_MAX_BATCH_SIZE = 1000
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -19,6 +34,7 @@ class TestingConfig(Config):
 class ProductionConfig(Config):
     DEBUG = False
     TESTING = False
+    SCHEMA_AUTO_CREATE = False
 
 config = {
     'development': DevelopmentConfig,
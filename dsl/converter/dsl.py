@@ -1,252 +1,536 @@
 import json
 import re
-from collections import defaultdict
+from functools import lru_cache
 
 DEFAULT_PARAMS = {
     "nullable": True,
     "default": None,
 }
 
+TYPE_MAPPING = {
+    "Int": "Integer",
+    "String": "String",
+    "Text": "Text",
+    "DateTime": "DateTime",
+    "Date": "Date",
+    "Time": "Time",
+    "Float": "Float",
+    "Decimal": "Decimal",
+    "Boolean": "Boolean"
+}
+
+TABLE_PATTERN = re.compile(r'table\s+(\w+)(?:\s*(\[[^\]]*\]))?')
+FIELD_PATTERN = re.compile(r'(\S+)\s+(\S+)(?:\s+(.*))?')
+TYPE_PATTERN = re.compile(r'(\w+)(\[[^\]]*\])?')
+INDEXES_PATTERN = re.compile(r'indexes\s*\{')
+# One column of an index line: `expression`, or a column optionally followed by asc or desc
+INDEX_COLUMN_PATTERN = re.compile(r'`(?P<expression>[^`]*)`|(?P<column>\w+)(?:\s+(?P<order>asc|desc))?', re.IGNORECASE)
+
+# Attribute grammar for `[pk, increment, ref: > Port.id, default: `now()`]` blocks.
+# Everything after the closing bracket (e.g. a trailing comment) is ignored.
+ATTRIBUTE_PATTERN = re.compile(r'''
+    (?P<key>\w+)
+    (?:\s*:\s*(?:
+        "(?P<string>[^"]*)"
+        | `(?P<expression>[^`]*)`
+        | >\s*(?P<ref_table>\w+)\.(?P<ref_field>\w+)
+        | (?P<integer>-?\d+)(?=\s*(?:,|$))
+        | (?P<bare>[^,]+)
+    ))?
+''', re.VERBOSE)
+EMPTY_ATTRIBUTES = {"flags": frozenset(), "options": {}}
+
+# Loader strategies a relationship or ref can set with `lazy:`; the last two only load collections
+LAZY_STRATEGIES = ("select", "selectin", "joined", "raise", "write_only", "dynamic")
+COLLECTION_LAZY_STRATEGIES = ("write_only", "dynamic")
+
+@lru_cache(maxsize=4096)
+def _parse_attribute_block(attrs):
+    """Parse attribute text once; schemas repeat the same blocks many times."""
+    flags = set()
+    options = {}
+    start = attrs.find("[")
+    end = attrs.find("]", start + 1)
+    if start != -1 and end != -1:
+        for match in ATTRIBUTE_PATTERN.finditer(attrs, start + 1, end):
+            kind = match.lastgroup
+            if kind == "key":
+                flags.add(match.group("key"))
+            elif kind == "ref_field":
+                options[match.group("key")] = (match.group("ref_table"), match.group("ref_field"))
+            elif kind == "integer":
+                options[match.group("key")] = int(match.group("integer"))
+            elif kind == "bare":
+                options[match.group("key")] = match.group("bare").strip()
+            else:
+                options[match.group("key")] = match.group(kind)
+    return {"flags": frozenset(flags), "options": options}
+
+def parse_attributes(attrs):
+    """
+    Parse an attribute block into {"flags": frozenset, "options": dict}.
+
+    Flags are bare words such as pk, increment and unique. Option values are
+    typed: quoted and backtick values become str, digits become int and
+    `ref: > Table.field` becomes a (table, field) tuple. Results are shared
+    between identical blocks, so callers must not modify them.
+    """
+    if not attrs:
+        return EMPTY_ATTRIBUTES
+    return _parse_attribute_block(attrs)
+
 def parse_type(field_type):
     """Parse and map field types."""
-    # Extract any parameters from the type
-    params = {}
-    if '[' in field_type:
-        base_type = field_type.split('[')[0]
-        param_str = field_type[field_type.index('[')+1:field_type.rindex(']')]
-        if param_str:
-            for param in param_str.split(','):
-                if ':' in param:
-                    key, value = param.split(':')
-                    params[key.strip()] = value.strip()
-    else:
-        base_type = field_type
-
-    type_mapping = {
-        "Int": "Integer",
-        "String": "String",
-        "Text": "Text",
-        "DateTime": "DateTime",
-        "Date": "Date",
-        "Time": "Time",
-        "Float": "Float",
-        "Decimal": "Decimal",
-        "Boolean": "Boolean"
-    }
-    
-    mapped_type = type_mapping.get(base_type, "String")
+    # Extract any parameters from the type, e.g. String[length: 100]
+    type_match = TYPE_PATTERN.match(field_type)
+    base_type = type_match.group(1) if type_match else field_type
+    params = parse_attributes(type_match.group(2))["options"] if type_match else {}
+
+    mapped_type = TYPE_MAPPING.get(base_type, "String")
     
     # Add any parameters to the type info
     if params:
         if mapped_type == "Decimal":
             return {
                 "type": mapped_type,
-                "precision": int(params.get("precision", "10")),
-                "scale": int(params.get("scale", "2"))
+                "precision": int(params.get("precision", 10)),
+                "scale": int(params.get("scale", 2))
             }
         elif mapped_type == "String":
             return {
                 "type": mapped_type,
-                "max_length": int(params.get("length", "40"))
+                "max_length": int(params.get("length", 40))
             }
     
     return {"type": mapped_type}
 
-def parse_foreign_key(ref_part, model_map):
-    """Parse foreign key references."""
-    match = re.search(r'ref: > (\w+)\.(\w+)', ref_part)
-    if match:
-        target_model, target_field = match.groups()
+def parse_foreign_key(attrs, model_map):
+    """Parse foreign key references from an attribute string or parsed attributes."""
+    if isinstance(attrs, str):
+        attrs = parse_attributes(attrs)
+    ref = attrs["options"].get("ref")
+    if isinstance(ref, tuple):
+        target_model, target_field = ref
         return model_map.get(target_model, target_model), target_field
     return None, None
 
+def parse_lazy(attrs):
+    """Return the `lazy:` loader strategy of a relationship or ref, or None when it has none."""
+    if isinstance(attrs, str):
+        attrs = parse_attributes(attrs)
+    lazy = attrs["options"].get("lazy")
+    if lazy is not None and lazy not in LAZY_STRATEGIES:
+        raise ValueError(f"Invalid lazy strategy {lazy!r}, expected one of: {', '.join(LAZY_STRATEGIES)}")
+    return lazy
+
 def parse_relationship(field_type, attrs, field_name, model_map):
-    """Parse relationship definitions."""
-    rel_match = re.search(r'relationship: "([^"]+)"', attrs)
-    back_pop_match = re.search(r'back_populates: "([^"]+)"', attrs)
+    """Parse relationship definitions from an attribute string or parsed attributes."""
+    if isinstance(attrs, str):
+        attrs = parse_attributes(attrs)
+    rel_type = attrs["options"].get("relationship")
+    back_populates = attrs["options"].get("back_populates")
     
-    if rel_match and back_pop_match:
+    if rel_type and back_populates:
         target_model = field_type.replace("[]", "")
         prefixed_target = model_map.get(target_model, target_model)
-        return {
-            "type": rel_match.group(1),
-            "back_populates": back_pop_match.group(1),
+        relationship = {
+            "type": rel_type,
+            "back_populates": back_populates,
             "target_model": prefixed_target,
             "field_name": field_name,
-            "relationship_name": back_pop_match.group(1)
+            "relationship_name": back_populates
         }
+        lazy = parse_lazy(attrs)
+        if lazy:
+            relationship["lazy"] = lazy
+        return relationship
     return None
 
+def split_index_line(line):
+    """
+    Split an index line into its column text and its attribute block, e.g.
+    `(voyage_id, leg_number) [unique]`. Brackets, commas and # inside
+    backtick expressions are not separators; a # outside them starts a comment.
+    """
+    in_expression = False
+    for position, char in enumerate(line):
+        if char == "`":
+            in_expression = not in_expression
+        elif not in_expression and char == "[":
+            return line[:position].strip(), line[position:]
+        elif not in_expression and char == "#":
+            return line[:position].strip(), ""
+    return line.strip(), ""
+
+def parse_index_columns(text):
+    """
+    Parse the column text of an index line: a column, an `expression`, or a
+    parenthesised list of them. Columns become their name, or
+    {"column": name, "desc": True} when followed by desc, and expressions
+    {"expression": sql}.
+    """
+    if text.startswith("(") and text.endswith(")"):
+        text = text[1:-1]
+    parts = [""]
+    in_expression = False
+    for char in text:
+        if char == "`":
+            in_expression = not in_expression
+        if char == "," and not in_expression:
+            parts.append("")
+        else:
+            parts[-1] += char
+
+    columns = []
+    for part in parts:
+        match = INDEX_COLUMN_PATTERN.fullmatch(part.strip())
+        if not match:
+            raise ValueError(f"Invalid index column: {part.strip()!r}")
+        if match.group("expression") is not None:
+            columns.append({"expression": match.group("expression")})
+        elif (match.group("order") or "").lower() == "desc":
+            columns.append({"column": match.group("column"), "desc": True})
+        else:
+            columns.append(match.group("column"))
+    return columns
+
+def index_columns(definition):
+    """Return the column entries of an index from the JSON, in its list or its dict form."""
+    return definition["columns"] if isinstance(definition, dict) else definition
+
+def index_column_names(definition):
+    """Return the names of the table columns an index from the JSON covers, leaving out expressions."""
+    return [
+        column if isinstance(column, str) else column["column"]
+        for column in index_columns(definition)
+        if isinstance(column, str) or "column" in column
+    ]
+
+def table_index_name(table_name, index_name):
+    """Return the database name of an index from the JSON, ix_ and its table in place of idx_."""
+    return f"ix_{table_name}_{index_name.removeprefix('idx_')}"
+
+def resolve_relationship(rel_info, model_map):
+    """Resolve the target of a parsed relationship to its prefixed model name."""
+    resolved = dict(rel_info)
+    resolved["target_model"] = model_map.get(rel_info["target_model"], rel_info["target_model"])
+    return resolved
+
+def tokenize_dsl(lines, first_line=1):
+    """Tokenize DSL source lines into (kind, line_number, value) tuples."""
+    in_indexes = False
+    for line_number, line in enumerate(lines, first_line):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+
+        # Lines of an `indexes { ... }` block inside a table
+        if in_indexes:
+            if line.startswith("}"):
+                in_indexes = False
+            else:
+                yield "index", line_number, split_index_line(line)
+            continue
+
+        table_match = TABLE_PATTERN.match(line)
+        if table_match:
+            yield "table", line_number, table_match.group(1)
+            # Table attributes, as in `table Country [reference] {`
+            if table_match.group(2):
+                yield "table_attributes", line_number, table_match.group(2)
+        elif line.startswith("}"):
+            yield "end", line_number, None
+        elif INDEXES_PATTERN.match(line):
+            in_indexes = True
+        else:
+            field_match = FIELD_PATTERN.match(line)
+            if field_match:
+                field_name, field_type, attrs = field_match.groups()
+                yield "field", line_number, (field_name, field_type, attrs or "")
+
+def iter_dsl_tables(lines, first_line=1):
+    """Parse DSL source lines, yielding each table node once its block is complete."""
+    current_table = None
+    for kind, line_number, value in tokenize_dsl(lines, first_line):
+        if kind == "table":
+            if current_table is not None:
+                yield current_table
+            current_table = {
+                "name": value, "line": line_number, "attributes": EMPTY_ATTRIBUTES, "fields": [], "indexes": []
+            }
+        elif kind == "table_attributes":
+            if current_table is not None:
+                current_table["attributes"] = parse_attributes(value)
+        elif kind == "index":
+            if current_table is not None:
+                columns, attrs = value
+                current_table["indexes"].append({
+                    "columns": parse_index_columns(columns),
+                    "attributes": parse_attributes(attrs),
+                    "line": line_number,
+                })
+        elif kind == "end":
+            if current_table is not None:
+                yield current_table
+            current_table = None
+        elif current_table is not None:
+            field_name, field_type, attrs = value
+            attributes = parse_attributes(attrs)
+            has_options = bool(attributes["options"])
+            current_table["fields"].append({
+                "name": field_name,
+                "type": field_type,
+                "attributes": attributes,
+                "line": line_number,
+                "ref": parse_foreign_key(attributes, {}) if has_options else (None, None),
+                "relationship": (
+                    parse_relationship(field_type, attributes, field_name, {}) if has_options else None
+                ),
+            })
+    if current_table is not None:
+        yield current_table
+
+def parse_dsl(lines, first_line=1):
+    """Parse DSL source lines into a list of table nodes in a single pass.
+
+    References to other tables are kept as raw DSL names and only resolved
+    once every table is known, so forward references need no extra scan.
+    """
+    return list(iter_dsl_tables(lines, first_line))
+
+def parse_dsl_file(file_path):
+    """Read and parse a DSL file."""
+    with open(file_path, "r") as file:
+        return parse_dsl(file)
+
+def create_model_map(tables):
+    """Create a mapping of table names to prefixed names."""
+    return {
+        table["name"]: f"S{model_counter:03}_{table['name']}"
+        for model_counter, table in enumerate(tables, 1)
+    }
+
 def first_pass_create_model_map(file_path):
     """First pass: Create a mapping of table names to prefixed names."""
-    model_map = {}
-    model_counter = 1
-    with open(file_path, "r") as file:
-        for line in file:
-            line = line.strip()
-            if line.startswith("table"):
-                table_name = line.split()[1]
-                model_map[table_name] = f"S{model_counter:03}_{table_name}"
-                model_counter += 1
-    return model_map
+    return create_model_map(parse_dsl_file(file_path))
 
-def second_pass_generate_models(file_path, model_map):
-    """Second pass: Process fields, relationships, and indices."""
+def build_index(index):
+    """
+    Resolve one parsed index declaration into its (name, JSON definition).
+
+    Indexes over plain columns keep the list form foreign key indexes use;
+    descending columns, expressions, unique and partial (where) indexes use
+    {"columns": [...], "unique": True, "where": sql}.
+    """
+    columns = index["columns"]
+    flags = index["attributes"]["flags"]
+    options = index["attributes"]["options"]
+    name = options.get("name") or "idx_" + "_".join(
+        column if isinstance(column, str)
+        else column.get("column") or re.sub(r"\W+", "_", column["expression"]).strip("_")
+        for column in columns
+    )
+
+    definition = {"columns": columns}
+    if "unique" in flags:
+        definition["unique"] = True
+    if options.get("where"):
+        definition["where"] = options["where"]
+    if len(definition) == 1 and all(isinstance(column, str) for column in columns):
+        return name, columns
+    return name, definition
+
+def build_model(table, model_map):
+    """Resolve one parsed table into its JSON model definition."""
+    current_model_name = table["name"]
+    current_model = {
+        "Fields": {},
+        "Relationships": [],
+        "Indices": {},
+        "Menus": {"Context": [], "Statistics": []}
+    }
+    # Small, rarely changing tables the app caches in memory instead of querying
+    if "reference" in table.get("attributes", EMPTY_ATTRIBUTES)["flags"]:
+        current_model["Reference"] = True
+
+    for field in table["fields"]:
+        field_name, field_type = field["name"], field["type"]
+        flags = field["attributes"]["flags"]
+        options = field["attributes"]["options"]
+
+        # Handle relationships (type ending with [])
+        if "[]" in field_type:
+            if field["relationship"]:
+                rel_info = resolve_relationship(field["relationship"], model_map)
+                current_model["Relationships"].append(rel_info)
+                # Add context menu entry
+                current_model["Menus"]["Context"].append({
+                    "drill_down": rel_info["target_model"],
+                    "route": f"/view/{rel_info['target_model']}?filter={field_name}"
+                })
+            continue
+
+        # Process regular fields
+        type_info = parse_type(field_type)
+        field_def = type_info if isinstance(type_info, dict) else {"type": type_info}
+
+        # Handle field attributes
+        if flags or options:
+            if "pk" in flags:
+                field_def["primary_key"] = True
+                field_def["nullable"] = False
+            if "increment" in flags:
+                field_def["auto_increment"] = True
+            if "unique" in flags:
+                field_def["unique"] = True
+            if options.get("default") == "now()":
+                field_def["default"] = "now()"
+            target_model, target_field = field["ref"]
+            if target_model and target_field:
+                target_model = model_map.get(target_model, target_model)
+                field_def["foreign_key"] = f"{target_model}.{target_field}".lower()
+                field_def["nullable"] = True
+
+                # back_populates is always the field's own name: the converter has
+                # never matched it against the target's declared relationships, and
+                # the generated models and migrations depend on these names
+                rel_name = field_name.replace("_id", "")
+
+                # Special handling for PortPair relationships
+                if current_model_name == "PortPair":
+                    if field_name == "pol_id":
+                        field_def["relationship"] = {
+                            "field_name": "port_of_loading",
+                            "target_model": target_model,
+                            "back_populates": "port_pairs_as_loading",
+                            "foreign_keys": [field_name]
+                        }
+                    elif field_name == "pod_id":
+                        field_def["relationship"] = {
+                            "field_name": "port_of_discharge",
+                            "target_model": target_model,
+                            "back_populates": "port_pairs_as_discharge",
+                            "foreign_keys": [field_name]
+                        }
+                else:
+                    field_def["relationship"] = {
+                        "field_name": rel_name,
+                        "target_model": target_model,
+                        "back_populates": rel_name,
+                        "foreign_keys": [field_name]
+                    }
+
+                lazy = parse_lazy(field["attributes"])
+                if lazy and "relationship" in field_def:
+                    field_def["relationship"]["lazy"] = lazy
+
+                # Context menu link for related table
+                current_model["Menus"]["Context"].append({
+                    "related_table": target_model,
+                    "route": f"/view/{target_model}?filter={field_name}"
+                })
+
+        # Add default parameters for non-primary, non-foreign fields
+        if "primary_key" not in field_def and "foreign_key" not in field_def:
+            # Only apply DEFAULT_PARAMS if no default was already set
+            if "default" not in field_def:
+                field_def.update(DEFAULT_PARAMS)
+
+        current_model["Fields"][field_name] = field_def
+
+    declared_indices = dict(build_index(index) for index in table.get("indexes", []))
+
+    # Add indices for foreign keys, unless a declared index that is not partial already leads with them
+    covered = {
+        index_columns(definition)[0] for definition in declared_indices.values()
+        if not (isinstance(definition, dict) and definition.get("where"))
+        and isinstance(index_columns(definition)[0], str)
+    }
+    for field, details in current_model["Fields"].items():
+        if "foreign_key" in details and field not in covered:
+            current_model["Indices"][f"idx_{field}"] = [field]
+    current_model["Indices"].update(declared_indices)
+
+    return current_model
+
+def build_models(tables, model_map):
+    """Resolve parsed tables into the JSON model structure."""
     result = {
         "version": "1.0",
         "Models": {},
         "Menus": {"Main": [], "Context": {}, "Statistics": {}}
     }
-    current_model = None
-    current_model_name = None
 
-    # First create all models with empty relationships
-    with open(file_path, "r") as file:
-        for line in file:
-            line = line.strip()
-            if line.startswith("table"):
-                table_name = line.split()[1]
-                prefixed_name = model_map[table_name]
-                result["Models"][prefixed_name] = {
-                    "Fields": {},
-                    "Relationships": [],
-                    "Indices": {},
-                    "Menus": {"Context": [], "Statistics": []}
-                }
-                result["Menus"]["Main"].append({"table": table_name, "route": f"/view/{table_name}"})
-
-    # First collect all relationships to help with back references
-    relationships = defaultdict(list)
-    with open(file_path, "r") as file:
-        for line in file:
-            line = line.strip()
-            if line.startswith("table"):
-                current_model_name = line.split()[1]
-            elif "relationship:" in line and "back_populates:" in line:
-                rel_info = parse_relationship(
-                    line.split()[1],  # field_type
-                    line.split(maxsplit=2)[2],  # attrs
-                    line.split()[0],  # field_name
-                    model_map
-                )
-                if rel_info:
-                    relationships[current_model_name].append(rel_info)
-
-    # Now process everything with relationship context
-    with open(file_path, "r") as file:
-        for line in file:
-            line = line.strip()
-            if not line or line.startswith("#"):
-                continue
-
-            if line.startswith("table"):
-                # Start of a new table
-                table_name = line.split()[1]
-                current_model_name = table_name
-                prefixed_name = model_map[table_name]
-                current_model = result["Models"][prefixed_name]
-
-            elif current_model:
-                parts = line.split(maxsplit=2)
-                if len(parts) < 2:
-                    continue
-
-                field_name, field_type = parts[0], parts[1]
-                attrs = parts[2] if len(parts) > 2 else ""
-
-                # Handle relationships (type ending with [])
-                if "[]" in field_type:
-                    rel_info = parse_relationship(field_type, attrs, field_name, model_map)
-                    if rel_info:
-                        current_model["Relationships"].append(rel_info)
-                        # Add context menu entry
-                        current_model["Menus"]["Context"].append({
-                            "drill_down": rel_info["target_model"],
-                            "route": f"/view/{rel_info['target_model']}?filter={field_name}"
-                        })
-                    continue
-
-                # Process regular fields
-                base_type = field_type.split("[")[0]  # Remove array notation if present
-                type_info = parse_type(field_type)
-                field_def = type_info if isinstance(type_info, dict) else {"type": type_info}
-
-                # Handle field attributes
-                if attrs:
-                    if "[pk" in attrs:
-                        field_def["primary_key"] = True
-                        field_def["nullable"] = False
-                    if "increment" in attrs:
-                        field_def["auto_increment"] = True
-                    if "unique" in attrs:
-                        field_def["unique"] = True
-                    if "default: `now()`" in attrs:
-                        field_def["default"] = "now()"
-                    target_model, target_field = parse_foreign_key(attrs, model_map)
-                    if target_model and target_field:
-                        field_def["foreign_key"] = f"{target_model}.{target_field}".lower()
-                        field_def["nullable"] = True
-                        
-                        # Find matching relationship for back_populates
-                        rel_name = field_name.replace("_id", "")
-                        back_populates = None
-                        
-                        # Look for matching relationship in target model
-                        for rel in relationships.get(target_model, []):
-                            if rel["target_model"] == current_model_name:
-                                back_populates = rel["field_name"]
-                                break
-                        
-                        # Special handling for PortPair relationships
-                        if current_model_name == "PortPair":
-                            if field_name == "pol_id":
-                                field_def["relationship"] = {
-                                    "field_name": "port_of_loading",
-                                    "target_model": target_model,
-                                    "back_populates": "port_pairs_as_loading",
-                                    "foreign_keys": [field_name]
-                                }
-                            elif field_name == "pod_id":
-                                field_def["relationship"] = {
-                                    "field_name": "port_of_discharge",
-                                    "target_model": target_model,
-                                    "back_populates": "port_pairs_as_discharge",
-                                    "foreign_keys": [field_name]
-                                }
-                        else:
-                            field_def["relationship"] = {
-                                "field_name": rel_name,
-                                "target_model": target_model,
-                                "back_populates": back_populates or rel_name,
-                                "foreign_keys": [field_name]
-                            }
-
-                        # Context menu link for related table
-                        current_model["Menus"]["Context"].append({
-                            "related_table": target_model,
-                            "route": f"/view/{target_model}?filter={field_name}"
-                        })
-
-                # Add default parameters for non-primary, non-foreign fields
-                if "primary_key" not in field_def and "foreign_key" not in field_def:
-                    # Only apply DEFAULT_PARAMS if no default was already set
-                    if "default" not in field_def:
-                        field_def.update(DEFAULT_PARAMS)
-                
-                current_model["Fields"][field_name] = field_def
-
-    # Add indices for foreign keys
-    for model, data in result["Models"].items():
-        for field, details in data["Fields"].items():
-            if "foreign_key" in details:
-                data["Indices"][f"idx_{field}"] = [field]
+    for table in tables:
+        result["Models"][model_map[table["name"]]] = build_model(table, model_map)
+        result["Menus"]["Main"].append({"table": table["name"], "route": f"/view/{table['name']}"})
 
     return result
 
+def encode_json_value(value, indent=4, depth=0):
+    """
+    Encode value as it appears depth levels deep in a JSON document.
+    With indent=None the output is compact, without any whitespace.
+    """
+    if indent is None:
+        return json.dumps(value, separators=(",", ":"))
+    return json.dumps(value, indent=indent).replace("\n", "\n" + " " * (indent * depth))
+
+def iter_json_document(model_fragments, menus_fragment, indent=4):
+    """
+    Yield the JSON document in chunks from encoded model fragments.
+
+    model_fragments yields (model_name, fragment) pairs and is consumed
+    lazily; menus_fragment is only called once every model has been
+    written, so menus collected along the way are complete. The chunks
+    join to the same text as json.dump with the given indent.
+    """
+    newline = "" if indent is None else "\n"
+    pad = "" if indent is None else " " * indent
+    key_separator = ":" if indent is None else ": "
+
+    yield f'{{{newline}{pad}"version"{key_separator}"1.0",{newline}{pad}"Models"{key_separator}'
+    first = True
+    for model_name, fragment in model_fragments:
+        yield f'{"{" if first else ","}{newline}{pad * 2}{json.dumps(model_name)}{key_separator}{fragment}'
+        first = False
+    yield "{}" if first else f"{newline}{pad}}}"
+    yield f',{newline}{pad}"Menus"{key_separator}{menus_fragment()}{newline}}}'
+
+def stream_dsl_to_json(input_file, output_file, compact=False):
+    """
+    Convert a DSL file to JSON, writing each model as soon as it is built.
+
+    A first pass keeps only table names, which is all that resolving
+    references needs. The second pass parses, builds and
+    writes one table at a time, and the menus are written last. Set
+    compact to drop indentation. Returns the model map.
+    """
+    with open(input_file, "r") as file:
+        model_map = create_model_map({"name": table["name"]} for table in iter_dsl_tables(file))
+    indent = None if compact else 4
+    menus = {"Main": [], "Context": {}, "Statistics": {}}
+
+    def model_fragments(file):
+        for table in iter_dsl_tables(file):
+            model = build_model(table, model_map)
+            menus["Main"].append({"table": table["name"], "route": f"/view/{table['name']}"})
+            yield model_map[table["name"]], encode_json_value(model, indent, 2)
+
+    with open(input_file, "r") as file, open(output_file, "w") as f:
+        f.writelines(iter_json_document(model_fragments(file), lambda: encode_json_value(menus, indent, 1), indent))
+
+    return model_map
+
+def second_pass_generate_models(file_path, model_map):
+    """Second pass: Process fields, relationships, and indices."""
+    return build_models(parse_dsl_file(file_path), model_map)
+
 def convert_dsl_to_json(input_file, output_file):
     """Convert DSL file to JSON format."""
-    model_map = first_pass_create_model_map(input_file)
-    dsl_json = second_pass_generate_models(input_file, model_map)
+    tables = parse_dsl_file(input_file)
+    model_map = create_model_map(tables)
+    dsl_json = build_models(tables, model_map)
 
     # Write to output JSON
     with open(output_file, "w") as f:
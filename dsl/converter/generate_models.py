@@ -1,5 +1,8 @@
 import json
-from typing import Dict
+from typing import Dict, Optional
+from dsl.converter.dsl import index_columns
+from dsl.converter.relationships import RelationshipIndex
+from dsl.converter.incremental import write_if_changed
 
 # Template for the SQLAlchemy models file
 MODEL_TEMPLATE = """from app import db
@@ -13,22 +16,21 @@ from sqlalchemy import Index
 
 CLASS_TEMPLATE = """class {class_name}(db.Model):
     __tablename__ = '{table_name}'
-{relationships}
+{reference}{relationships}
 {fields}
 """
 
 FIELD_TEMPLATE = "    {field_name} = db.Column(db.{type}{constraints})"
 RELATIONSHIP_TEMPLATE = "    {field_name} = db.relationship('{target_model}', {relationship_args})"
 
-def find_matching_relationship(model_name: str, field_name: str, all_models_data: Dict) -> tuple:
+def find_matching_relationship(model_name: str, field_name: str, all_models_data: Dict,
+                               relationship_index: Optional[RelationshipIndex] = None) -> tuple:
     """Find matching relationship in target model."""
-    for target_name, target_data in all_models_data["Models"].items():
-        for rel in target_data.get("Relationships", []):
-            if rel["target_model"] == model_name and rel["field_name"] == field_name:
-                return target_name, rel
-    return None, None
+    relationship_index = relationship_index or RelationshipIndex(all_models_data["Models"])
+    return relationship_index.find_by_field(model_name, field_name)
 
-def find_relationship_back_populates(model_name: str, field_name: str, target_model: str, all_models_data: Dict) -> str:
+def find_relationship_back_populates(model_name: str, field_name: str, target_model: str, all_models_data: Dict,
+                                     relationship_index: Optional[RelationshipIndex] = None) -> str:
     """Find the correct back_populates value for a relationship."""
     # Special cases for Client's manifests
     if model_name == "S015_Client":
@@ -66,28 +68,30 @@ def find_relationship_back_populates(model_name: str, field_name: str, target_mo
         if field_name == "clients":
             return "country"
     
+    relationship_index = relationship_index or RelationshipIndex(all_models_data["Models"])
+
     # Look for matching relationship in target model
-    target_data = all_models_data["Models"].get(target_model, {})
-    for rel in target_data.get("Relationships", []):
-        if rel["target_model"] == model_name:
-            return rel["field_name"]
+    rel = relationship_index.first(target_model, model_name)
+    if rel:
+        return rel["field_name"]
     
     # Look for relationship in current model
-    current_data = all_models_data["Models"].get(model_name, {})
-    for rel in current_data.get("Relationships", []):
-        if rel["target_model"] == target_model and rel["field_name"] == field_name:
-            return rel["back_populates"]
+    rel = relationship_index.get(model_name, target_model, field_name)
+    if rel:
+        return rel["back_populates"]
     
     # Default to field name
     return field_name
 
-def generate_relationship_args(rel_data: Dict, model_name: str, all_models_data: Dict) -> str:
+def generate_relationship_args(rel_data: Dict, model_name: str, all_models_data: Dict,
+                               relationship_index: Optional[RelationshipIndex] = None) -> str:
     """Generate relationship arguments string."""
     args = []
     
-    # Handle relationship type
-    if rel_data.get("type") == "one-to-many":
-        args.append("lazy='dynamic'")
+    # Use the loader strategy declared with lazy:, else dynamic for collections and the default for the rest
+    lazy = rel_data.get("lazy") or ("dynamic" if rel_data.get("type") == "one-to-many" else None)
+    if lazy:
+        args.append(f"lazy='{lazy}'")
     
     # Handle back_populates
     if "target_model" in rel_data:
@@ -95,7 +99,8 @@ def generate_relationship_args(rel_data: Dict, model_name: str, all_models_data:
             model_name,
             rel_data["field_name"],
             rel_data["target_model"],
-            all_models_data
+            all_models_data,
+            relationship_index
         )
         args.append(f"back_populates='{back_populates}'")
     
@@ -130,53 +135,52 @@ def generate_relationship_args(rel_data: Dict, model_name: str, all_models_data:
     
     return ", ".join(args)
 
-def find_reverse_relationship(model_name: str, field_name: str, all_models_data: Dict) -> dict:
+def find_reverse_relationship(model_name: str, field_name: str, all_models_data: Dict,
+                              relationship_index: Optional[RelationshipIndex] = None) -> dict:
     """Find the reverse relationship definition."""
-    for target_name, target_data in all_models_data["Models"].items():
-        for rel in target_data.get("Relationships", []):
-            if rel["target_model"] == model_name and rel["back_populates"] == field_name:
-                return {
-                    "field_name": field_name,
-                    "target_model": target_name,
-                    "back_populates": rel["field_name"],
-                    "type": "many-to-one"
-                }
+    relationship_index = relationship_index or RelationshipIndex(all_models_data["Models"])
+    target_name, rel = relationship_index.find_by_back_populates(model_name, field_name)
+    if rel:
+        return {
+            "field_name": field_name,
+            "target_model": target_name,
+            "back_populates": rel["field_name"],
+            "type": "many-to-one"
+        }
     return None
 
-def generate_reverse_relationships(model_name: str, fields: Dict, all_models_data: Dict) -> list:
+def generate_reverse_relationships(model_name: str, fields: Dict, all_models_data: Dict,
+                                   relationship_index: Optional[RelationshipIndex] = None) -> list:
     """Generate reverse side of relationships based on foreign keys."""
     reverse_rels = []
+    relationship_index = relationship_index or RelationshipIndex(all_models_data["Models"])
     
     for field_name, field_props in fields.items():
         if "foreign_key" in field_props:
             target_table, target_field = field_props["foreign_key"].split(".")
             rel_name = field_name.replace("_id", "")
+            # Loader strategy declared on the ref with lazy:
+            lazy = field_props.get("relationship", {}).get("lazy")
             
             # Find matching relationship in target model
-            target_model_name = None
-            for name in all_models_data["Models"].keys():
-                if name.lower() == target_table.lower():
-                    target_model_name = name
-                    break
+            target_model_name = relationship_index.model_name(target_table)
             
             if target_model_name:
                 # Find matching forward relationship
-                reverse_rel = find_reverse_relationship(model_name, rel_name, all_models_data)
+                reverse_rel = find_reverse_relationship(model_name, rel_name, all_models_data, relationship_index)
                 if reverse_rel:
                     reverse_rel["foreign_keys"] = [field_name]
+                    if lazy:
+                        reverse_rel["lazy"] = lazy
                     reverse_rels.append(reverse_rel)
                 else:
                     # Find relationship in target model's relationships
-                    target_rel = None
-                    target_data = all_models_data["Models"][target_model_name]
-                    for rel in target_data.get("Relationships", []):
-                        if rel["target_model"] == model_name:
-                            target_rel = rel
-                            break
+                    target_rel = relationship_index.first(target_model_name, model_name)
                     
                     back_populates = target_rel["field_name"] if target_rel else rel_name
                     
                     # Special handling for relationships
+                    field_def = None
                     if model_name == "S013_PortPair":
                         if field_name == "pol_id":
                             field_def = {
@@ -209,7 +213,7 @@ def generate_reverse_relationships(model_name: str, fields: Dict, all_models_dat
                                 "back_populates": "port_of_discharge",
                                 "relationship_name": "port_pairs_as_discharge"
                             }
-                    else:
+                    if field_def is None:
                         field_def = {
                             "field_name": rel_name,
                             "target_model": target_model_name,
@@ -218,19 +222,43 @@ def generate_reverse_relationships(model_name: str, fields: Dict, all_models_dat
                             "foreign_keys": [field_name]
                         }
                     field_def["type"] = "many-to-one"
+                    if lazy:
+                        field_def["lazy"] = lazy
                     reverse_rels.append(field_def)
     
     return reverse_rels
 
+def format_index(index_name: str, definition) -> str:
+    """
+    Format an Index(...) from its JSON definition. Columns are named, so the
+    index can be declared in the class body; descending columns and
+    expressions become db.text() and a where clause a partial index.
+    """
+    elements = []
+    for column in index_columns(definition):
+        if isinstance(column, str):
+            elements.append(repr(column))
+        elif "expression" in column:
+            elements.append(f"db.text({column['expression']!r})")
+        elif column.get("desc"):
+            elements.append(f"db.text({column['column'] + ' DESC'!r})")
+        else:
+            elements.append(repr(column["column"]))
+
+    if isinstance(definition, dict):
+        if definition.get("unique"):
+            elements.append("unique=True")
+        if definition.get("where"):
+            where = f"db.text({definition['where']!r})"
+            elements.append(f"sqlite_where={where}, postgresql_where={where}")
+    return f"Index({index_name!r}, {', '.join(elements)})"
+
 def generate_index_definitions(model_name: str, indices: Dict) -> str:
     """Generate index definitions for a model."""
     if not indices:
         return ""
         
-    index_defs = []
-    for index_name, index_columns in indices.items():
-        columns_str = ", ".join([f"{model_name}.{col}" for col in index_columns])
-        index_defs.append(f"Index('{index_name}', {columns_str})")
+    index_defs = [format_index(index_name, definition) for index_name, definition in indices.items()]
     
     if index_defs:
         return f"    __table_args__ = ({', '.join(index_defs)},)"
@@ -262,16 +290,21 @@ def generate_field_definitions(fields: Dict) -> str:
 
     return "\n".join(field_lines)
 
-def generate_models(json_file: str, output_file: str):
-    """Generate SQLAlchemy models from a JSON file."""
+def generate_models(json_file: str, output_file: str) -> bool:
+    """
+    Generate SQLAlchemy models from a JSON file.
+    The output is only rewritten when its content changes; returns True if it was.
+    """
     with open(json_file, "r") as f:
         data = json.load(f)
 
+    relationship_index = RelationshipIndex(data["Models"])
+
     models = []
     for model_name, model_data in data["Models"].items():
         # Get all relationships including reverse ones from foreign keys
         relationships = model_data.get("Relationships", [])
-        reverse_rels = generate_reverse_relationships(model_name, model_data["Fields"], data)
+        reverse_rels = generate_reverse_relationships(model_name, model_data["Fields"], data, relationship_index)
         
         # Remove duplicate relationships
         seen_rels = set()
@@ -285,7 +318,7 @@ def generate_models(json_file: str, output_file: str):
         # Generate relationships with proper foreign key handling
         relationships_str = ""
         for rel in unique_rels:
-            rel_args = generate_relationship_args(rel, model_name, data)
+            rel_args = generate_relationship_args(rel, model_name, data, relationship_index)
             relationships_str += RELATIONSHIP_TEMPLATE.format(
                 field_name=rel["field_name"],
                 target_model=rel["target_model"],  # Already includes prefix
@@ -300,6 +333,7 @@ def generate_models(json_file: str, output_file: str):
         model_class = CLASS_TEMPLATE.format(
             class_name=model_name,
             table_name=model_name.lower(),
+            reference="    __reference__ = True\n" if model_data.get("Reference") else "",
             relationships=relationships_str,
             fields=f"{fields}\n{indices}" if indices else fields
         )
@@ -308,10 +342,10 @@ def generate_models(json_file: str, output_file: str):
     # Generate complete file
     full_code = MODEL_TEMPLATE.format(models="\n\n".join(models))
 
-    with open(output_file, "w") as f:
-        f.write(full_code)
+    changed = write_if_changed(output_file, full_code)
 
-    print(f"Models written to {output_file}")
+    print(f"Models {'written to' if changed else 'unchanged in'} {output_file}")
+    return changed
 
 if __name__ == "__main__":
     # Example usage
@@ -0,0 +1,204 @@
+import hashlib
+import json
+import os
+import pickle
+from importlib.util import module_from_spec, spec_from_file_location
+from pathlib import Path
+
+from dsl.converter.dsl import (
+    TABLE_PATTERN, INDEXES_PATTERN, parse_dsl, create_model_map, build_model,
+    encode_json_value, iter_json_document
+)
+
+# Load the CRUD generators' writer by path, as they do, so converting does not import the app package
+_writer_spec = spec_from_file_location(
+    "writer", Path(__file__).parent.parent.parent / "app" / "utils" / "generator" / "writer.py"
+)
+writer = module_from_spec(_writer_spec)
+_writer_spec.loader.exec_module(writer)
+write_if_changed = writer.write_if_changed
+
+# Bump whenever the cached parse or model structures change shape
+CACHE_VERSION = 3
+
+def hash_text(text):
+    """Return the sha256 hex digest of a string."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def hash_file(file_path):
+    """Return the sha256 hex digest of a file's bytes."""
+    with open(file_path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def split_table_blocks(lines):
+    """
+    Split DSL source lines into (first_line, block_lines) per table.
+    A block runs from its `table` header to the closing brace; lines outside
+    any block are dropped, as the parser ignores them too.
+    """
+    block = None
+    first_line = 0
+    in_indexes = False
+    for line_number, line in enumerate(lines, 1):
+        stripped = line.strip()
+        if TABLE_PATTERN.match(stripped):
+            if block:
+                yield first_line, block
+            block, first_line = [line], line_number
+            in_indexes = False
+        elif block is not None:
+            block.append(line)
+            if INDEXES_PATTERN.match(stripped):
+                in_indexes = True
+            elif stripped.startswith("}"):
+                # The brace closing an indexes block does not close the table
+                if in_indexes:
+                    in_indexes = False
+                else:
+                    yield first_line, block
+                    block = None
+    if block:
+        yield first_line, block
+
+def _shift_lines(tables, offset):
+    """Return copies of cached table nodes moved down the file by offset lines."""
+    return [
+        dict(table, line=table["line"] + offset, fields=[
+            dict(field, line=field["line"] + offset) for field in table["fields"]
+        ], indexes=[
+            dict(index, line=index["line"] + offset) for index in table.get("indexes", [])
+        ])
+        for table in tables
+    ]
+
+def _referenced_tables(table):
+    """Return the DSL names of the tables a parsed table refers to."""
+    names = set()
+    for field in table["fields"]:
+        if field["ref"][0]:
+            names.add(field["ref"][0])
+        if field["relationship"]:
+            names.add(field["relationship"]["target_model"])
+    return names
+
+def convert_dsl_to_json_incremental(input_file, output_file, cache=None):
+    """
+    Convert a DSL file to JSON, reusing results cached from a previous run.
+
+    Each table block is keyed by the hash of its text, so only changed blocks
+    are parsed again. A model is rebuilt when its own block, its prefixed
+    name, or the name or block of a table it references has changed.
+    Returns (dsl_json, changed_models, cache); pass the cache to the next run.
+    """
+    cache = cache or {}
+    cached_tables = cache.get("tables", {})
+    cached_models = cache.get("models", {})
+
+    with open(input_file, "r") as f:
+        lines = f.readlines()
+
+    tables = []
+    block_hashes = {}
+    parsed_blocks = {}
+    for first_line, block in split_table_blocks(lines):
+        block_hash = hash_text("".join(block))
+        cached_line, nodes = parsed_blocks.get(block_hash) or cached_tables.get(block_hash) or (None, None)
+        if nodes is None:
+            nodes = parse_dsl(block, first_line)
+        elif cached_line != first_line:
+            nodes = _shift_lines(nodes, first_line - cached_line)
+        parsed_blocks.setdefault(block_hash, (first_line, nodes))
+        for table in nodes:
+            tables.append((block_hash, table))
+            block_hashes[table["name"]] = block_hash
+
+    model_map = create_model_map([table for _, table in tables])
+    result = {
+        "version": "1.0",
+        "Models": {},
+        "Menus": {"Main": [], "Context": {}, "Statistics": {}}
+    }
+    models = {}
+    fragments = {}
+    changed_models = set()
+    for block_hash, table in tables:
+        name = table["name"]
+        prefixed_name = model_map[name]
+        dep_key = (block_hash, prefixed_name, tuple(sorted(
+            (target, model_map.get(target), block_hashes.get(target))
+            for target in _referenced_tables(table)
+        )))
+
+        cached = cached_models.get(name)
+        if cached and cached[0] == dep_key:
+            model, fragment = cached[1], cached[2]
+        else:
+            model = build_model(table, model_map)
+            fragment = encode_json_value(model, depth=2)
+            changed_models.add(prefixed_name)
+
+        models[name] = (dep_key, model, fragment)
+        result["Models"][prefixed_name] = model
+        fragments[prefixed_name] = fragment
+        result["Menus"]["Main"].append({"table": name, "route": f"/view/{name}"})
+
+    # The main menu only changes when tables are added, removed or renamed
+    table_names = tuple(table["name"] for _, table in tables)
+    cached_menus = cache.get("menus")
+    if cached_menus and cached_menus[0] == table_names:
+        menus_fragment = cached_menus[1]
+    else:
+        menus_fragment = encode_json_value(result["Menus"], depth=1)
+
+    write_if_changed(output_file, "".join(iter_json_document(fragments.items(), lambda: menus_fragment)))
+
+    cache = dict(cache, tables=parsed_blocks, models=models, menus=(table_names, menus_fragment))
+    return result, changed_models, cache
+
+def output_stats(files):
+    """Return {path: (size, mtime_ns)} for the given output files."""
+    stats = {}
+    for file_path in files:
+        stat = os.stat(file_path)
+        stats[str(file_path)] = (stat.st_size, stat.st_mtime_ns)
+    return stats
+
+def cache_is_current(header, source_hash, config_hash, files):
+    """Check that a cache header matches the source, the config and the untouched outputs."""
+    if not header or header.get("version") != CACHE_VERSION:
+        return False
+    if header.get("source_hash") != source_hash or header.get("config_hash") != config_hash:
+        return False
+    try:
+        return header.get("outputs") == output_stats(files)
+    except OSError:
+        return False
+
+def read_cache_header(cache_file):
+    """Read only the small header of a cache file, or None if it is missing or unreadable."""
+    try:
+        with open(cache_file, "rb") as f:
+            return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return None
+
+def read_cache_body(cache_file):
+    """Read the cached parse and model results, or an empty cache if unavailable."""
+    try:
+        with open(cache_file, "rb") as f:
+            header = pickle.load(f)
+            if header.get("version") != CACHE_VERSION:
+                return {}
+            return pickle.load(f)
+    except (OSError, EOFError, AttributeError, pickle.UnpicklingError):
+        return {}
+
+def write_cache(cache_file, header, body):
+    """Write the header and body to the cache file, replacing it atomically."""
+    cache_file = Path(cache_file)
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    temp_file = cache_file.with_name(cache_file.name + ".tmp")
+    with open(temp_file, "wb") as f:
+        pickle.dump(dict(header, version=CACHE_VERSION), f, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(body, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_file, cache_file)
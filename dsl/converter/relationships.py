@@ -0,0 +1,56 @@
+from typing import Dict, Optional, Tuple
+
+
+class RelationshipIndex:
+    """
+    Constant-time lookups over the declared relationships of every model.
+
+    Built once per conversion and shared by the JSON converter and the model
+    generator, replacing linear scans over each model's Relationships list.
+    Where several relationships match a lookup, the first one declared wins,
+    matching the order the scans used to return.
+    """
+
+    def __init__(self, models: Optional[Dict] = None):
+        self._by_source_target = {}
+        self._by_key = {}
+        self._by_target_field = {}
+        self._by_target_back_populates = {}
+        self._model_names = {}
+
+        for model_name, model_data in (models or {}).items():
+            self.add_model(model_name)
+            for rel in model_data.get("Relationships", []):
+                self.add(model_name, rel)
+
+    def add_model(self, model_name: str) -> None:
+        """Register a model name for case-insensitive lookup."""
+        self._model_names.setdefault(model_name.lower(), model_name)
+
+    def add(self, source: str, rel: Dict) -> None:
+        """Index a relationship declared on the source model."""
+        target = rel["target_model"]
+        self._by_source_target.setdefault((source, target), rel)
+        self._by_key.setdefault((source, target, rel["field_name"]), rel)
+        self._by_target_field.setdefault((target, rel["field_name"]), (source, rel))
+        self._by_target_back_populates.setdefault((target, rel.get("back_populates")), (source, rel))
+
+    def model_name(self, name: str) -> Optional[str]:
+        """Return the model name matching name case-insensitively."""
+        return self._model_names.get(name.lower())
+
+    def first(self, source: str, target: str) -> Optional[Dict]:
+        """Return the first relationship from source to target."""
+        return self._by_source_target.get((source, target))
+
+    def get(self, source: str, target: str, field_name: str) -> Optional[Dict]:
+        """Return the relationship from source to target named field_name."""
+        return self._by_key.get((source, target, field_name))
+
+    def find_by_field(self, target: str, field_name: str) -> Tuple[Optional[str], Optional[Dict]]:
+        """Return (source, relationship) for the first relationship to target named field_name."""
+        return self._by_target_field.get((target, field_name), (None, None))
+
+    def find_by_back_populates(self, target: str, back_populates: str) -> Tuple[Optional[str], Optional[Dict]]:
+        """Return (source, relationship) for the first relationship to target with back_populates."""
+        return self._by_target_back_populates.get((target, back_populates), (None, None))
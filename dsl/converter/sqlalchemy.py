@@ -1,7 +1,10 @@
 import json
+import os
+import pickle
 from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, Float, DateTime, Text, Index
 from sqlalchemy.orm import declarative_base, relationship
 from sqlalchemy.sql import text
+from dsl.converter.dsl import index_columns, table_index_name
 
 # Mapping from JSON field types to SQLAlchemy column types
 TYPE_MAPPING = {
@@ -13,6 +16,29 @@ TYPE_MAPPING = {
     "Text": Text
 }
 
+def create_index(index_name, definition, columns):
+    """
+    Create an Index from its JSON definition: a list of column names, or a
+    dict with columns (names, {"column", "desc"} or {"expression"}), unique
+    and a where clause for a partial index.
+    """
+    elements = []
+    for column in index_columns(definition):
+        if isinstance(column, str):
+            elements.append(columns[column])
+        elif "expression" in column:
+            elements.append(text(column["expression"]))
+        else:
+            elements.append(columns[column["column"]].desc() if column.get("desc") else columns[column["column"]])
+
+    kwargs = {}
+    if isinstance(definition, dict):
+        if definition.get("unique"):
+            kwargs["unique"] = True
+        if definition.get("where"):
+            kwargs["sqlite_where"] = kwargs["postgresql_where"] = text(definition["where"])
+    return Index(index_name, *elements, **kwargs)
+
 def create_model(name, model_data, base_cls=None, deferred_relationships=None):
     """
     Dynamically create a SQLAlchemy model class.
@@ -33,6 +59,8 @@ def create_model(name, model_data, base_cls=None, deferred_relationships=None):
         "__tablename__": name.lower(),
         "__table_args__": {"extend_existing": True}
     }
+    if model_data.get("Reference"):
+        attrs["__reference__"] = True
     
     has_primary_key = False
     columns = {}  # Store columns temporarily to reference in relationships
@@ -94,6 +122,9 @@ def create_model(name, model_data, base_cls=None, deferred_relationships=None):
                     "foreign_keys": [field_name],
                     "back_populates": back_ref_name
                 }
+                # Loader strategy declared on the ref with lazy:
+                if field_def.get("relationship", {}).get("lazy"):
+                    relationships_info[rel_name]["lazy"] = field_def["relationship"]["lazy"]
         
         if relationships_info:
             deferred_relationships[name] = {
@@ -104,80 +135,149 @@ def create_model(name, model_data, base_cls=None, deferred_relationships=None):
     if not has_primary_key:
         raise ValueError(f"Table '{name}' must have at least one primary key.")
 
+    # Declare the indexes with the table, so expressions are bound to it, and
+    # name them after the table like convert.py does
+    indexes = [
+        create_index(table_index_name(name.lower(), index_name), definition, columns)
+        for index_name, definition in model_data.get("Indices", {}).items()
+    ]
+    if indexes:
+        attrs["__table_args__"] = (*indexes, attrs["__table_args__"])
+
     # Create the model class
     model = type(name, (base_cls,), attrs)
 
-    # Add indexes if defined
-    if "Indices" in model_data:
-        for index_name, index_columns in model_data["Indices"].items():
-            Index(
-                index_name,
-                *[getattr(model, col_name) for col_name in index_columns],
-            )
-
     return model
 
-def load_json_to_models(json_file, base_cls=None):
+class ModelRegistry:
     """
-    Load JSON and convert to SQLAlchemy models.
-    
-    Args:
-        json_file: Path to the JSON file
-        base_cls: SQLAlchemy declarative base class to use (optional)
+    Model definitions parsed once from the JSON schema.
+
+    Keeps lookups from lowercase model names and table names to model
+    names, so relationship targets resolve in constant time. The registry
+    holds plain data only; it can be pickled to worker processes or cached
+    on disk with save() and load() to skip parsing the JSON at startup.
     """
-    with open(json_file, "r") as f:
-        data = json.load(f)
 
-    deferred_relationships = {}
-    models = {}
-    
-    # First pass: Create all models without relationships
-    for model_name, model_data in data["Models"].items():
-        model = create_model(model_name, model_data, base_cls, deferred_relationships)
-        models[model_name] = model
-
-    # Second pass: Add relationships now that all models exist
-    for model_name, rel_data in deferred_relationships.items():
-        model = models[model_name]
-        relationships = rel_data["relationships"]
-        columns = rel_data["columns"]
+    CACHE_VERSION = 2
+
+    def __init__(self, data):
+        self.version = data.get("version")
+        self.models = data["Models"]
+        # create_model names each table after the lowercased model name, so
+        # one map resolves both
+        self._by_lower_name = {}
+        for model_name in self.models:
+            self._by_lower_name.setdefault(model_name.lower(), model_name)
+
+    @classmethod
+    def from_json(cls, json_file):
+        """Parse a JSON schema file into a registry."""
+        with open(json_file, "r") as f:
+            return cls(json.load(f))
+
+    @classmethod
+    def load(cls, json_file, cache_file):
+        """
+        Return the registry for json_file, reusing cache_file when it was
+        written for the same version of the JSON file. Otherwise the JSON
+        is parsed and the cache rewritten.
+        """
+        stat = os.stat(json_file)
+        source = (str(json_file), stat.st_size, stat.st_mtime_ns)
+        try:
+            with open(cache_file, "rb") as f:
+                version, cached_source, registry = pickle.load(f)
+            if version == cls.CACHE_VERSION and cached_source == source:
+                return registry
+        except (OSError, EOFError, AttributeError, ValueError, pickle.UnpicklingError):
+            pass
+
+        registry = cls.from_json(json_file)
+        registry.save(cache_file, source)
+        return registry
+
+    def save(self, cache_file, source=None):
+        """Write the registry to cache_file, replacing it atomically."""
+        temp_file = f"{cache_file}.tmp"
+        with open(temp_file, "wb") as f:
+            pickle.dump((self.CACHE_VERSION, source, self), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_file, cache_file)
+
+    def model_name(self, name):
+        """Return the model name for a model or table name, ignoring case."""
+        name = name.lower()
+        return self._by_lower_name.get(name)
+
+    def create_models(self, base_cls=None):
+        """
+        Create SQLAlchemy models for every definition in the registry.
         
-        for rel_name, rel_def in relationships.items():
-            # Find the target model by matching case-insensitive name
-            target_name = None
-            target_table = rel_def["target"]
+        Args:
+            base_cls: SQLAlchemy declarative base class to use (optional)
+        """
+        deferred_relationships = {}
+        models = {}
+        
+        # First pass: Create all models without relationships
+        for model_name, model_data in self.models.items():
+            model = create_model(model_name, model_data, base_cls, deferred_relationships)
+            models[model_name] = model
+
+        # Second pass: Add relationships now that all models exist
+        for model_name, rel_data in deferred_relationships.items():
+            model = models[model_name]
+            relationships = rel_data["relationships"]
+            columns = rel_data["columns"]
             
-            # Try case-insensitive match
-            for name in models.keys():
-                if name.lower() == target_table or name.lower() == target_table.upper():
-                    target_name = name
-                    break
+            for rel_name, rel_def in relationships.items():
+                # Find the target model from its table name
+                target_table = rel_def["target"]
+                target_name = self.model_name(target_table)
+                    
+                if not target_name:
+                    raise KeyError(f"Could not find model {target_table}")
+                    
+                target_model = models[target_name]
                 
-            if not target_name:
-                raise KeyError(f"Could not find model {target_table}")
-                
-            target_model = models[target_name]
-            
-            # Create relationship kwargs
-            rel_kwargs = {
-                "back_populates": rel_def["back_populates"]
-            }
-            
-            # Add foreign keys
-            if "foreign_keys" in rel_def:
-                rel_kwargs["foreign_keys"] = [columns[fk] for fk in rel_def["foreign_keys"]]
-            
-            # Create the relationship
-            setattr(model, rel_name, relationship(target_name, **rel_kwargs))
-            
-            # Create back reference on target model if it doesn't exist
-            back_ref_name = rel_def["back_populates"]
-            if not hasattr(target_model, back_ref_name):
-                back_rel_kwargs = {
-                    "back_populates": rel_name,
-                    "foreign_keys": rel_kwargs.get("foreign_keys")
+                # Create relationship kwargs
+                rel_kwargs = {
+                    "back_populates": rel_def["back_populates"]
                 }
-                setattr(target_model, back_ref_name, 
-                    relationship(model_name, **back_rel_kwargs))
+                
+                # Add foreign keys
+                if "foreign_keys" in rel_def:
+                    rel_kwargs["foreign_keys"] = [columns[fk] for fk in rel_def["foreign_keys"]]
 
-    return models
+                if "lazy" in rel_def:
+                    rel_kwargs["lazy"] = rel_def["lazy"]
+                
+                # Create the relationship
+                setattr(model, rel_name, relationship(target_name, **rel_kwargs))
+                
+                # Create back reference on target model if it doesn't exist
+                back_ref_name = rel_def["back_populates"]
+                if not hasattr(target_model, back_ref_name):
+                    back_rel_kwargs = {
+                        "back_populates": rel_name,
+                        "foreign_keys": rel_kwargs.get("foreign_keys")
+                    }
+                    setattr(target_model, back_ref_name, 
+                        relationship(model_name, **back_rel_kwargs))
+
+        return models
+
+def load_json_to_models(json_file, base_cls=None, cache_file=None):
+    """
+    Load JSON and convert to SQLAlchemy models.
+    
+    Args:
+        json_file: Path to the JSON file
+        base_cls: SQLAlchemy declarative base class to use (optional)
+        cache_file: Path to a ModelRegistry cache to reuse between processes (optional)
+    """
+    if cache_file:
+        registry = ModelRegistry.load(json_file, cache_file)
+    else:
+        registry = ModelRegistry.from_json(json_file)
+    return registry.create_models(base_cls)
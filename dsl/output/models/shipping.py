@@ -27,7 +27,7 @@ class S001_Manifest(db.Model):
         Index('ix_s001_manifest_voyage_id', 'voyage_id'),
         Index('ix_s001_manifest_port_of_loading_id', 'port_of_loading_id'),
         Index('ix_s001_manifest_port_of_discharge_id', 'port_of_discharge_id'),
-        Index('ix_s001_manifest_user_id', 'user_id')
+        Index('ix_s001_manifest_user_id', 'user_id'),
     )
 
     line_items = db.relationship('S002_LineItem', backref='s001_manifest_line_items', lazy='dynamic')
@@ -58,7 +58,7 @@ class S002_LineItem(db.Model):
         Index('ix_s002_lineitem_pack_type_id', 'pack_type_id'),
         Index('ix_s002_lineitem_commodity_id', 'commodity_id'),
         Index('ix_s002_lineitem_container_id', 'container_id'),
-        Index('ix_s002_lineitem_user_id', 'user_id')
+        Index('ix_s002_lineitem_user_id', 'user_id'),
     )
 
     manifest = db.relationship('S001_Manifest', foreign_keys=[manifest_id], backref='s002_lineitem_manifest')
@@ -70,6 +70,7 @@ class S002_LineItem(db.Model):
 
 class S003_Commodity(db.Model):
     __tablename__ = 's003_commodity'
+    __reference__ = True
     id = db.Column(db.Integer, primary_key=True, autoincrement=True, nullable=False)
     name = db.Column(db.String(40), unique=True)
     description = db.Column(db.String(40))
@@ -79,6 +80,7 @@ class S003_Commodity(db.Model):
 
 class S004_PackType(db.Model):
     __tablename__ = 's004_packtype'
+    __reference__ = True
     id = db.Column(db.Integer, primary_key=True, autoincrement=True, nullable=False)
     name = db.Column(db.String(40), unique=True)
     description = db.Column(db.String(40))
@@ -94,7 +96,7 @@ class S005_Container(db.Model):
     updated = db.Column(db.DateTime)
 
     __table_args__ = (
-        Index('ix_s005_container_port_id', 'port_id')
+        Index('ix_s005_container_port_id', 'port_id'),
     )
 
     line_items = db.relationship('S002_LineItem', backref='s005_container_line_items', lazy='dynamic')
@@ -113,10 +115,10 @@ class S006_ContainerHistory(db.Model):
     updated = db.Column(db.DateTime)
 
     __table_args__ = (
-        Index('ix_s006_containerhistory_container_id', 'container_id'),
         Index('ix_s006_containerhistory_port_id', 'port_id'),
         Index('ix_s006_containerhistory_client_id', 'client_id'),
-        Index('ix_s006_containerhistory_container_status_id', 'container_status_id')
+        Index('ix_s006_containerhistory_container_status_id', 'container_status_id'),
+        Index('ix_s006_containerhistory_container_id_updated', 'container_id', db.text('updated DESC')),
     )
 
     container = db.relationship('S005_Container', foreign_keys=[container_id], backref='s006_containerhistory_container')
@@ -127,6 +129,7 @@ class S006_ContainerHistory(db.Model):
 
 class S007_ContainerStatus(db.Model):
     __tablename__ = 's007_containerstatus'
+    __reference__ = True
     id = db.Column(db.Integer, primary_key=True, autoincrement=True, nullable=False)
     name = db.Column(db.String(40))
     description = db.Column(db.String(40))
@@ -136,6 +139,7 @@ class S007_ContainerStatus(db.Model):
 
 class S008_ShippingCompany(db.Model):
     __tablename__ = 's008_shippingcompany'
+    __reference__ = True
     id = db.Column(db.Integer, primary_key=True, autoincrement=True, nullable=False)
     name = db.Column(db.String(40), unique=True)
 
@@ -149,7 +153,7 @@ class S009_Vessel(db.Model):
     shipping_company_id = db.Column(db.Integer, db.ForeignKey("s008_shippingcompany.id"))
 
     __table_args__ = (
-        Index('ix_s009_vessel_shipping_company_id', 'shipping_company_id')
+        Index('ix_s009_vessel_shipping_company_id', 'shipping_company_id'),
     )
 
     manifests = db.relationship('S001_Manifest', backref='s009_vessel_manifests', lazy='dynamic')
@@ -164,7 +168,7 @@ class S010_Voyage(db.Model):
     rotation_number = db.Column(db.Integer)
 
     __table_args__ = (
-        Index('ix_s010_voyage_vessel_id', 'vessel_id')
+        Index('ix_s010_voyage_vessel_id', 'vessel_id'),
     )
 
     legs = db.relationship('S011_Leg', backref='s010_voyage_legs', lazy='dynamic')
@@ -182,8 +186,8 @@ class S011_Leg(db.Model):
     etd = db.Column(db.DateTime)
 
     __table_args__ = (
-        Index('ix_s011_leg_voyage_id', 'voyage_id'),
-        Index('ix_s011_leg_port_id', 'port_id')
+        Index('ix_s011_leg_port_id', 'port_id'),
+        Index('ix_s011_leg_voyage_id_leg_number', 'voyage_id', 'leg_number', unique=True),
     )
 
     voyage = db.relationship('S010_Voyage', foreign_keys=[voyage_id], backref='s011_leg_voyage')
@@ -198,7 +202,7 @@ class S012_Port(db.Model):
     prefix = db.Column(db.String(40))
 
     __table_args__ = (
-        Index('ix_s012_port_country_id', 'country_id')
+        Index('ix_s012_port_country_id', 'country_id'),
     )
 
     containers = db.relationship('S005_Container', backref='s012_port_containers', lazy='dynamic')
@@ -215,7 +219,7 @@ class S013_PortPair(db.Model):
 
     __table_args__ = (
         Index('ix_s013_portpair_pol_id', 'pol_id'),
-        Index('ix_s013_portpair_pod_id', 'pod_id')
+        Index('ix_s013_portpair_pod_id', 'pod_id'),
     )
 
     port_of_loading = db.relationship('S012_Port', foreign_keys=[pol_id], backref='s013_portpair_port_of_loading')
@@ -224,6 +228,7 @@ class S013_PortPair(db.Model):
 
 class S014_Country(db.Model):
     __tablename__ = 's014_country'
+    __reference__ = True
     id = db.Column(db.Integer, primary_key=True, autoincrement=True, nullable=False)
     name = db.Column(db.String(40), unique=True)
 
@@ -242,7 +247,7 @@ class S015_Client(db.Model):
     phone = db.Column(db.String(40))
 
     __table_args__ = (
-        Index('ix_s015_client_country_id', 'country_id')
+        Index('ix_s015_client_country_id', 'country_id'),
     )
 
     manifests = db.relationship('S001_Manifest', backref='s015_client_manifests', lazy='dynamic')
@@ -274,7 +279,7 @@ class S017_Rate(db.Model):
     __table_args__ = (
         Index('ix_s017_rate_commodity_id', 'commodity_id'),
         Index('ix_s017_rate_pack_type_id', 'pack_type_id'),
-        Index('ix_s017_rate_client_id', 'client_id')
+        Index('ix_s017_rate_client_id', 'client_id'),
     )
 
     commodity = db.relationship('S003_Commodity', foreign_keys=[commodity_id], backref='s017_rate_commodity')
@@ -282,3 +287,5 @@ class S017_Rate(db.Model):
     client = db.relationship('S015_Client', foreign_keys=[client_id], backref='s017_rate_client')
 
 
+# Schema fingerprint of the models above, stored in the database when their tables are created
+SCHEMA_FINGERPRINT = 'cc1142bcfe45bc3ae6b20e6074969c1397b3da8507ec4d3fb3d9d6c1772154e9'
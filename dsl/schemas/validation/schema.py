@@ -1,5 +1,14 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Union
+
+
+class RelationshipDef(BaseModel):
+    field_name: str
+    target_model: str
+    type: Optional[str] = None
+    back_populates: Optional[str] = None
+    foreign_keys: Optional[List[str]] = None
+    lazy: Optional[str] = None
 
 
 class FieldDef(BaseModel):
@@ -10,6 +19,7 @@ class FieldDef(BaseModel):
     unique: Optional[bool] = False
     foreign_key: Optional[str] = None
     auto_increment: Optional[bool] = False
+    relationship: Optional[RelationshipDef] = None
 
 
 class MenuContext(BaseModel):
@@ -24,10 +34,19 @@ class Menu(BaseModel):
     Statistics: Optional[Dict[str, List[str]]] = {}
 
 
+class IndexDef(BaseModel):
+    # Column names, {"column": name, "desc": true} or {"expression": sql}
+    columns: List[Union[str, Dict[str, Union[str, bool]]]]
+    unique: Optional[bool] = False
+    where: Optional[str] = None
+
+
 class Model(BaseModel):
     Fields: Dict[str, FieldDef]
-    Indices: Optional[Dict[str, List[str]]] = {}
+    Relationships: Optional[List[RelationshipDef]] = []
+    Indices: Optional[Dict[str, Union[List[str], IndexDef]]] = {}
     Menus: Optional[Dict[str, List[MenuContext]]] = {}
+    Reference: Optional[bool] = False
 
 
 class DSLValidation(BaseModel):
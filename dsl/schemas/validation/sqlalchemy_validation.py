@@ -1,6 +1,7 @@
 from typing import Dict, List, Optional, Set
 from pydantic import BaseModel
-from dsl.schemas.validation.schema import Model, DSLValidation
+from dsl.converter.dsl import LAZY_STRATEGIES, COLLECTION_LAZY_STRATEGIES
+from dsl.schemas.validation.schema import IndexDef, Model, DSLValidation
 
 class ValidationError(Exception):
     def __init__(self, message: str):
@@ -52,8 +53,16 @@ class SQLAlchemyValidator:
         errors = []
         for model_name, model in self.models.items():
             if model.Indices:
-                for index_name, columns in model.Indices.items():
+                for index_name, index in model.Indices.items():
+                    columns = index.columns if isinstance(index, IndexDef) else index
+                    if not columns:
+                        errors.append(f"Invalid index '{index_name}' in {model_name}: No columns")
                     for column in columns:
+                        if isinstance(column, dict):
+                            if "expression" in column:
+                                # SQL expressions are checked by the database when the index is created
+                                continue
+                            column = column.get("column")
                         if column not in model.Fields:
                             errors.append(
                                 f"Invalid index '{index_name}' in {model_name}: "
@@ -61,6 +70,27 @@ class SQLAlchemyValidator:
                             )
         return errors
 
+    def validate_relationships(self) -> List[str]:
+        """Validate relationship loader strategies, and that collection-only ones are set on collections"""
+        errors = []
+        for model_name, model in self.models.items():
+            relationships = [(rel, rel.type == "one-to-many") for rel in model.Relationships or []]
+            relationships += [(field.relationship, False) for field in model.Fields.values() if field.relationship]
+            for rel, collection in relationships:
+                if rel.lazy is None:
+                    continue
+                if rel.lazy not in LAZY_STRATEGIES:
+                    errors.append(
+                        f"Invalid relationship {model_name}.{rel.field_name}: "
+                        f"Unknown lazy strategy '{rel.lazy}'"
+                    )
+                elif rel.lazy in COLLECTION_LAZY_STRATEGIES and not collection:
+                    errors.append(
+                        f"Invalid relationship {model_name}.{rel.field_name}: "
+                        f"Lazy strategy '{rel.lazy}' only applies to one-to-many relationships"
+                    )
+        return errors
+
     def validate_types(self) -> List[str]:
         """Validate field types are supported and compatible with foreign keys"""
         errors = []
@@ -110,6 +140,7 @@ class SQLAlchemyValidator:
         all_errors = []
         all_errors.extend(self.validate_foreign_keys())
         all_errors.extend(self.validate_indices())
+        all_errors.extend(self.validate_relationships())
         all_errors.extend(self.validate_types())
         all_errors.extend(self.validate_primary_keys())
         return all_errors
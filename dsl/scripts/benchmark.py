@@ -0,0 +1,769 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the DSL conversion pipeline on synthetic schemas.
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import resource
+import shutil
+import filecmp
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from importlib.util import spec_from_file_location, module_from_spec
+from multiprocessing import get_context
+from pathlib import Path
+
+# Add project root directory to path so we can import our modules
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from dsl.converter.dsl import (
+    convert_dsl_to_json, stream_dsl_to_json, parse_dsl_file, create_model_map, build_models, parse_attributes,
+    _parse_attribute_block
+)
+from dsl.converter.generate_models import generate_models
+from dsl.converter.sqlalchemy import ModelRegistry
+from sqlalchemy.orm import declarative_base
+from dsl.converter.incremental import (
+    convert_dsl_to_json_incremental, hash_file, cache_is_current, read_cache_header, write_cache, output_stats
+)
+
+SAMPLE_ATTRIBUTES = [
+    "[pk, increment]",
+    "[unique]",
+    "[ref: > Table{i}.id]  # unique per field",
+    "[default: `now()`]",
+    "[relationship: \"one-to-many\", back_populates: \"parent\"]",
+    "",
+]
+
+def generate_synthetic_dsl(num_tables):
+    """
+    Generate a DSL schema with num_tables tables.
+    Each table references the next one, so every reference is a forward reference.
+    """
+    lines = []
+    for i in range(1, num_tables + 1):
+        next_table = f"Table{i % num_tables + 1}"
+        lines.extend([
+            f"table Table{i} {{",
+            "  id Int [pk, increment]",
+            "  name String [unique]",
+            "  description String",
+            "  amount Float",
+            "  updated DateTime [default: `now()`]",
+            f"  next_id Int [ref: > {next_table}.id]",
+            f"  children {next_table}[] [relationship: \"one-to-many\", back_populates: \"parent_{i}\"]",
+            "}",
+            ""
+        ])
+    return "\n".join(lines)
+
+def time_call(func, *args):
+    """Return the wall-clock seconds taken by func(*args)."""
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+def parse_and_build(dsl_file):
+    """Run the single-pass parser and reference resolution without writing JSON."""
+    tables = parse_dsl_file(dsl_file)
+    return build_models(tables, create_model_map(tables))
+
+def bench_convert(sizes):
+    """
+    Time parsing and full conversion for each schema size.
+    Linear scaling shows up as a constant cost per table.
+    """
+    print(f"{'tables':>8} {'parse s':>10} {'us/table':>10} {'total s':>10} {'us/table':>10}")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for num_tables in sizes:
+            dsl_file = Path(temp_dir) / f"schema_{num_tables}.dsl"
+            json_file = Path(temp_dir) / f"schema_{num_tables}.json"
+            dsl_file.write_text(generate_synthetic_dsl(num_tables))
+
+            parse_seconds = time_call(parse_and_build, dsl_file)
+            total_seconds = time_call(convert_dsl_to_json, dsl_file, json_file)
+            print(
+                f"{num_tables:>8} "
+                f"{parse_seconds:>10.3f} {parse_seconds / num_tables * 1e6:>10.1f} "
+                f"{total_seconds:>10.3f} {total_seconds / num_tables * 1e6:>10.1f}"
+            )
+
+def legacy_field_checks(attrs):
+    """The per-field substring tests and uncompiled regexes the grammar replaced."""
+    return (
+        "[pk" in attrs,
+        "increment" in attrs,
+        "unique" in attrs,
+        "default: `now()`" in attrs,
+        re.search(r'ref: > (\w+)\.(\w+)', attrs),
+        re.search(r'relationship: "([^"]+)"', attrs),
+        re.search(r'back_populates: "([^"]+)"', attrs),
+    )
+
+def bench_attributes(num_fields):
+    """
+    Report the per-field cost of the attribute grammar against the legacy checks.
+    Every ref targets a different table, so those blocks never hit the cache.
+    """
+    fields = [SAMPLE_ATTRIBUTES[i % len(SAMPLE_ATTRIBUTES)].format(i=i) for i in range(num_fields)]
+
+    def run(parse):
+        for attrs in fields:
+            parse(attrs)
+
+    parsers = [
+        ("legacy", legacy_field_checks),
+        ("uncached", _parse_attribute_block.__wrapped__),
+        ("grammar", parse_attributes),
+    ]
+    print(f"{'parser':>10} {'fields':>10} {'seconds':>10} {'ns/field':>10}")
+    for name, parse in parsers:
+        _parse_attribute_block.cache_clear()
+        seconds = time_call(run, parse)
+        print(f"{name:>10} {num_fields:>10} {seconds:>10.3f} {seconds / num_fields * 1e9:>10.0f}")
+
+def bench_models(sizes):
+    """Time dsl.converter.generate_models for each schema size."""
+    print(f"{'tables':>8} {'seconds':>10} {'us/table':>10}")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for num_tables in sizes:
+            dsl_file = Path(temp_dir) / f"schema_{num_tables}.dsl"
+            json_file = Path(temp_dir) / f"schema_{num_tables}.json"
+            models_file = Path(temp_dir) / f"models_{num_tables}.py"
+            dsl_file.write_text(generate_synthetic_dsl(num_tables))
+            convert_dsl_to_json(dsl_file, json_file)
+
+            seconds = time_call(generate_models, json_file, models_file)
+            print(f"{num_tables:>8} {seconds:>10.3f} {seconds / num_tables * 1e6:>10.1f}")
+
+def bench_incremental(num_tables):
+    """
+    Compare a full conversion with incremental runs: cold cache, one table
+    edited, and the no-op check that CI hits when nothing changed.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        dsl_file = Path(temp_dir) / "schema.dsl"
+        json_file = Path(temp_dir) / "schema.json"
+        cache_file = Path(temp_dir) / "schema.json.cache"
+        dsl_text = generate_synthetic_dsl(num_tables)
+        dsl_file.write_text(dsl_text)
+
+        full_seconds = time_call(convert_dsl_to_json, dsl_file, json_file)
+
+        start = time.perf_counter()
+        _, _, cache = convert_dsl_to_json_incremental(dsl_file, json_file)
+        cold_seconds = time.perf_counter() - start
+
+        # Edit the middle table; it and the table referencing it are rebuilt
+        middle = num_tables // 2
+        dsl_file.write_text(dsl_text.replace(
+            f"table Table{middle} {{\n  id Int [pk, increment]\n",
+            f"table Table{middle} {{\n  id Int [pk, increment]\n  note Text\n"
+        ))
+        start = time.perf_counter()
+        _, changed_models, cache = convert_dsl_to_json_incremental(dsl_file, json_file, cache)
+        edit_seconds = time.perf_counter() - start
+
+        source_hash = hash_file(dsl_file)
+        write_cache(cache_file, {"source_hash": source_hash, "config_hash": "", "outputs": output_stats([json_file])}, cache)
+
+        def noop():
+            assert cache_is_current(read_cache_header(cache_file), hash_file(dsl_file), "", [json_file])
+
+        noop_seconds = time_call(noop)
+
+    print(f"{'run':>14} {'tables':>8} {'rebuilt':>8} {'seconds':>10}")
+    print(f"{'full':>14} {num_tables:>8} {num_tables:>8} {full_seconds:>10.3f}")
+    print(f"{'cold cache':>14} {num_tables:>8} {num_tables:>8} {cold_seconds:>10.3f}")
+    print(f"{'one table':>14} {num_tables:>8} {len(changed_models):>8} {edit_seconds:>10.3f}")
+    print(f"{'no-op':>14} {num_tables:>8} {0:>8} {noop_seconds:>10.4f}")
+
+def measure_peak_rss(writer, dsl_file, json_file):
+    """Run one JSON writer and return (seconds, peak RSS in MB) for the process."""
+    writers = {
+        "dump": convert_dsl_to_json,
+        "stream": stream_dsl_to_json,
+        "compact": lambda input_file, output_file: stream_dsl_to_json(input_file, output_file, compact=True),
+    }
+    seconds = time_call(writers[writer], dsl_file, json_file)
+    # ru_maxrss is in kilobytes on Linux
+    return seconds, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def bench_stream(sizes):
+    """
+    Compare peak memory of json.dump with the streaming writer.
+    Each run gets a fresh process so peak RSS is not carried over.
+    """
+    print(f"{'tables':>8} {'writer':>8} {'seconds':>10} {'peak MB':>10} {'output MB':>10}")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for num_tables in sizes:
+            dsl_file = Path(temp_dir) / f"schema_{num_tables}.dsl"
+            json_file = Path(temp_dir) / f"schema_{num_tables}.json"
+            dsl_file.write_text(generate_synthetic_dsl(num_tables))
+
+            for writer in ("dump", "stream", "compact"):
+                with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+                    seconds, peak_mb = executor.submit(measure_peak_rss, writer, dsl_file, json_file).result()
+                output_mb = json_file.stat().st_size / 1024 / 1024
+                print(f"{num_tables:>8} {writer:>8} {seconds:>10.3f} {peak_mb:>10.1f} {output_mb:>10.1f}")
+
+def foreign_key_targets(models):
+    """Return the table named by every foreign key in the schema."""
+    return [
+        field["foreign_key"].split(".")[0]
+        for model in models.values()
+        for field in model["Fields"].values()
+        if field.get("foreign_key")
+    ]
+
+def legacy_load(json_file):
+    """Parse the JSON and resolve targets with the linear scan the registry replaced."""
+    with open(json_file, "r") as f:
+        models = json.load(f)["Models"]
+    for target_table in foreign_key_targets(models):
+        next(name for name in models.keys() if name.lower() == target_table)
+
+def registry_load(load, *args):
+    """Build a registry and resolve every foreign key target through it."""
+    registry = load(*args)
+    for target_table in foreign_key_targets(registry.models):
+        registry.model_name(target_table)
+    return registry
+
+def bench_registry(sizes):
+    """
+    Time the cold start of dynamic models: loading the schema and resolving
+    relationship targets, then creating the SQLAlchemy classes.
+    """
+    print(f"{'tables':>8} {'scan s':>10} {'json s':>10} {'cache s':>10} {'create s':>10}")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for num_tables in sizes:
+            dsl_file = Path(temp_dir) / f"schema_{num_tables}.dsl"
+            json_file = Path(temp_dir) / f"schema_{num_tables}.json"
+            cache_file = Path(temp_dir) / f"schema_{num_tables}.registry"
+            dsl_file.write_text(generate_synthetic_dsl(num_tables))
+            convert_dsl_to_json(dsl_file, json_file)
+            ModelRegistry.load(json_file, cache_file)
+
+            scan_seconds = time_call(legacy_load, json_file)
+            json_seconds = time_call(registry_load, ModelRegistry.from_json, json_file)
+            cache_seconds = time_call(registry_load, ModelRegistry.load, json_file, cache_file)
+            registry = ModelRegistry.load(json_file, cache_file)
+            create_seconds = time_call(registry.create_models, declarative_base())
+            print(
+                f"{num_tables:>8} {scan_seconds:>10.3f} {json_seconds:>10.3f} "
+                f"{cache_seconds:>10.3f} {create_seconds:>10.3f}"
+            )
+
+def load_app_generator():
+    """Load app/utils/generator/generate.py by path, as it runs without the app package."""
+    path = Path(__file__).parent.parent.parent / "app" / "utils" / "generator" / "generate.py"
+    spec = spec_from_file_location("generate", path)
+    module = module_from_spec(spec)
+    sys.modules["generate"] = module
+    spec.loader.exec_module(module)
+    return module
+
+def bench_codegen(num_tables, workers):
+    """
+    Time CRUD code generation: the separate generators run one after
+    another against the single-parse pipeline, serial and with a pool.
+    """
+    generate = load_app_generator()
+    generators = generate.load_generators()
+    print(f"{'run':>14} {'tables':>8} {'seconds':>10}")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        dsl_file = Path(temp_dir) / "schema.dsl"
+        json_file = Path(temp_dir) / "schema.json"
+        dsl_file.write_text(generate_synthetic_dsl(num_tables))
+        convert_dsl_to_json(dsl_file, json_file)
+
+        def separate(output_dir):
+            generators["crud"].generate_crud_templates(json_file, output_dir / "templates")
+            generators["routes"].generate_crud_routes(json_file, output_dir / "routes")
+            generators["relationships"].generate_relationship_helpers(json_file, output_dir / "relationships")
+
+        def pipeline(output_dir, pool_size):
+            generate.generate_all(
+                json_file, output_dir / "templates", output_dir / "routes", output_dir / "relationships", pool_size
+            )
+
+        runs = [
+            ("separate", separate),
+            ("pipeline x1", lambda output_dir: pipeline(output_dir, 1)),
+            (f"pipeline x{workers}", lambda output_dir: pipeline(output_dir, workers)),
+        ]
+        for name, run in runs:
+            output_dir = Path(temp_dir) / name.replace(" ", "_")
+            seconds = time_call(run, output_dir)
+            print(f"{name:>14} {num_tables:>8} {seconds:>10.3f}")
+
+        serial_dir = Path(temp_dir) / "pipeline_x1"
+        parallel_dir = Path(temp_dir) / f"pipeline_x{workers}"
+        serial_files = sorted(path.relative_to(serial_dir) for path in serial_dir.rglob("*") if path.is_file())
+        parallel_files = sorted(path.relative_to(parallel_dir) for path in parallel_dir.rglob("*") if path.is_file())
+        assert serial_files == parallel_files
+        assert all(filecmp.cmp(serial_dir / path, parallel_dir / path, shallow=False) for path in serial_files)
+
+# Run in a fresh interpreter inside the copy of the app: start it, then serve
+# one request to a table whose route module only the eager run has loaded,
+# and time the same request once warm
+STARTUP_SCRIPT = """
+import json, resource, sys, time
+started = time.perf_counter()
+from app import create_app
+app = create_app({"SQLALCHEMY_DATABASE_URI": sys.argv[1], "CRUD_PRELOAD": sys.argv[2],
+                  "CRUD_ENGINE": sys.argv[3], "CRUD_SCHEMA": "schema.json"})
+startup_seconds = time.perf_counter() - started
+client = app.test_client()
+started = time.perf_counter()
+client.get("/crud/s012_port/lookup/country_id")
+request_seconds = time.perf_counter() - started
+started = time.perf_counter()
+for _ in range(200):
+    client.get("/crud/s012_port/lookup/country_id")
+warm_seconds = (time.perf_counter() - started) / 200
+print(json.dumps({
+    "startup": startup_seconds, "request": request_seconds, "warm": warm_seconds,
+    "rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "modules": sum(name.startswith("app.routes.crud.") for name in sys.modules),
+}))
+"""
+
+def repeat_schema(models, copies):
+    """
+    Repeat the models of a schema copies times. The first copy keeps its
+    names; the others rename every model and table with a _c<n> suffix.
+    """
+    text = json.dumps(models)
+    repeated = dict(models)
+    for copy in range(1, copies):
+        renamed = text
+        for model_name in models:
+            renamed = re.sub(rf"\b{model_name}\b", f"{model_name}_C{copy}", renamed)
+            renamed = re.sub(rf"\b{model_name.lower()}\b", f"{model_name.lower()}_c{copy}", renamed)
+        repeated.update(json.loads(renamed))
+    return repeated
+
+def build_app_copy(app_dir, models):
+    """Copy the app's code to app_dir with models, routes and helpers generated for models."""
+    project_root = Path(__file__).parent.parent.parent
+    shutil.copytree(project_root / "app", app_dir / "app", ignore=shutil.ignore_patterns("__pycache__", "templates", "test_*"))
+    shutil.copy(project_root / "config.py", app_dir / "config.py")
+    for generated in ("routes/crud", "utils/relationships"):
+        shutil.rmtree(app_dir / "app" / generated)
+
+    json_file = app_dir / "schema.json"
+    json_file.write_text(json.dumps({"Models": models}))
+    from dsl.scripts import convert
+    relationships = convert.generate_relationships({"Models": models})
+    content = "\n".join(convert.get_required_imports()) + "".join(
+        convert.generate_model_class(
+            model_name, model_data, relationships.get(model_name), convert.get_field_type_mapping(), convert.get_config()
+        )
+        for model_name, model_data in models.items()
+    )
+    (app_dir / "app" / "models" / "shipping.py").write_text(convert.add_schema_fingerprint(content))
+    load_app_generator().generate_all(
+        json_file, app_dir / "templates", app_dir / "app" / "routes" / "crud", app_dir / "app" / "utils" / "relationships", 1
+    )
+
+def bench_startup(sizes):
+    """
+    Time app startup, peak RSS and request latency with every CRUD route
+    module imported at startup, lazily on first request, and with the
+    runtime CRUD engine in place of the modules, for the shipping schema
+    repeated to about each size. Each run is a fresh process on a database
+    whose schema fingerprint already matches, so no DDL runs.
+    """
+    with open(Path(__file__).parent.parent / "output" / "json" / "shipping.json", "r") as f:
+        shipping = json.load(f)["Models"]
+    print(
+        f"{'tables':>8} {'mode':>8} {'modules':>8} {'startup s':>10} {'peak MB':>10} "
+        f"{'request ms':>11} {'warm ms':>8}"
+    )
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for size in sizes:
+            models = repeat_schema(shipping, max(1, round(size / len(shipping))))
+            app_dir = Path(temp_dir) / f"app_{len(models)}"
+            build_app_copy(app_dir, models)
+            database = f"sqlite:///{app_dir / 'startup.db'}"
+
+            def start(preload, engine):
+                result = subprocess.run(
+                    [sys.executable, "-c", STARTUP_SCRIPT, database, preload, engine],
+                    cwd=app_dir, capture_output=True, text=True, check=True
+                )
+                return json.loads(result.stdout.splitlines()[-1])
+
+            # Create the tables and search indexes once, outside the measured runs
+            start("*", "generated")
+            for name, preload, engine in (("eager", "*", "generated"), ("lazy", "", "generated"),
+                                          ("runtime", "", "runtime")):
+                run = start(preload, engine)
+                print(
+                    f"{len(models):>8} {name:>8} {run['modules']:>8} {run['startup']:>10.3f} "
+                    f"{run['rss']:>10.1f} {run['request'] * 1000:>11.1f} {run['warm'] * 1000:>8.2f}"
+                )
+
+class LegacyBinder:
+    """Sets the posted strings as they are, as the generated create and edit routes did."""
+
+    def __init__(self, fields):
+        self.fields = fields
+
+    def bind(self, item, form, create=False):
+        for field in self.fields:
+            if field in form:
+                setattr(item, field, form[field])
+        return item
+
+def legacy_manifest_bind(item, form, foreign_keys):
+    """The manifest helpers' binding: the foreign keys by name, then any other field the model has."""
+    for field in foreign_keys:
+        if field in form:
+            setattr(item, field, form[field])
+    for field, value in form.items():
+        if not field.endswith('_id') and hasattr(item, field):
+            setattr(item, field, value)
+    return item
+
+def bench_forms(num_forms, num_posts):
+    """
+    Time binding posted forms onto new rows with the legacy per-field string
+    assignment and with the generated FormBinder, then the throughput of
+    posting rate forms through the create route with each.
+    """
+    from werkzeug.datastructures import MultiDict
+    from app import create_app, db
+    from app.models.shipping import S001_Manifest, S017_Rate
+    from app.utils.relationships import s001_manifest_helpers
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        app = create_app({
+            "SECRET_KEY": "benchmark", "SQLALCHEMY_DATABASE_URI": f"sqlite:///{Path(temp_dir) / 'bench.db'}",
+            "CRUD_PRELOAD": ["s017_rate"],
+        })
+        with app.app_context():
+            rate_routes = sys.modules["app.routes.crud.s017_rate"]
+            rate_fields = list(rate_routes.form_binder.coercers)
+            manifest_binder = s001_manifest_helpers.form_binder
+            manifest_foreign_keys = [field for field in manifest_binder.coercers if field.endswith('_id')]
+            rate_forms = [
+                MultiDict({"distance_rate_code": str(i), "rate": f"{i}.5", "client_id": str(i % 300 + 1),
+                           "effective": "2024-01-31 14:30"})
+                for i in range(num_forms)
+            ]
+            manifest_forms = [
+                MultiDict({"bill_of_lading": f"BL{i:08d}", "shipper_id": str(i % 300 + 1), "vessel_id": "3",
+                           "place_of_receipt": "Rotterdam", "date_of_receipt": "2024-01-31 14:30"})
+                for i in range(num_forms)
+            ]
+            runs = [
+                ("rate legacy", lambda: [LegacyBinder(rate_fields).bind(S017_Rate(), form) for form in rate_forms]),
+                ("rate binder", lambda: [rate_routes.form_binder.bind(S017_Rate(), form, create=True) for form in rate_forms]),
+                ("manifest legacy", lambda: [
+                    legacy_manifest_bind(S001_Manifest(), form, manifest_foreign_keys) for form in manifest_forms
+                ]),
+                ("manifest binder", lambda: [
+                    manifest_binder.bind(S001_Manifest(), form, create=True) for form in manifest_forms
+                ]),
+            ]
+            print(f"{'bind':>16} {'forms':>8} {'seconds':>10} {'us/form':>10}")
+            for name, run in runs:
+                seconds = time_call(run)
+                print(f"{name:>16} {num_forms:>8} {seconds:>10.3f} {seconds / num_forms * 1e6:>10.1f}")
+
+            # The legacy routes stored the date as posted, which SQLite rejects, so the posts leave it out.
+            # Without cookies, as the flashed messages would pile up in the session of unfollowed redirects
+            client = app.test_client(use_cookies=False)
+            posts = [{"distance_rate_code": str(i), "rate": f"{i}.5"} for i in range(num_posts)]
+            print(f"{'post':>16} {'forms':>8} {'seconds':>10} {'forms/s':>10}")
+            for name, binder in (("rate legacy", LegacyBinder(rate_fields)), ("rate binder", rate_routes.form_binder)):
+                generated_binder = rate_routes.form_binder
+                rate_routes.form_binder = binder
+                try:
+                    seconds = time_call(lambda: [client.post("/crud/s017_rate/create", data=form) for form in posts])
+                finally:
+                    rate_routes.form_binder = generated_binder
+                assert S017_Rate.query.count() >= num_posts
+                S017_Rate.query.delete()
+                db.session.commit()
+                print(f"{name:>16} {num_posts:>8} {seconds:>10.3f} {num_posts / seconds:>10.0f}")
+
+def bench_batch(num_rows, batch_sizes):
+    """
+    Time writing container history events through the create form route, one
+    row and commit per request, against the JSON batch API at each batch
+    size, then updating and deleting the same rows through the API.
+    """
+    from app import create_app, db
+    from app.models.shipping import S006_ContainerHistory
+
+    events = [
+        {"container_id": i % 500 + 1, "port_id": i % 40 + 1, "container_status_id": i % 6 + 1,
+         "damage": "none", "updated": f"2024-01-{i % 28 + 1:02d} {i % 24:02d}:30"}
+        for i in range(num_rows)
+    ]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        app = create_app({
+            "SECRET_KEY": "benchmark", "SQLALCHEMY_DATABASE_URI": f"sqlite:///{Path(temp_dir) / 'bench.db'}",
+            "CRUD_PRELOAD": ["s006_containerhistory"], "API_MAX_BATCH_SIZE": max(batch_sizes),
+        })
+        with app.app_context():
+            # Without cookies, as the flashed messages would pile up in the session of unfollowed redirects
+            client = app.test_client(use_cookies=False)
+
+            def post_batches(operation, items, batch_size):
+                for start in range(0, len(items), batch_size):
+                    response = client.post("/api/s006_containerhistory/batch",
+                                           json={operation: items[start:start + batch_size]})
+                    assert response.status_code == 200, response.get_json()
+
+            def clear():
+                S006_ContainerHistory.query.delete()
+                db.session.commit()
+
+            print(f"{'write':>16} {'batch':>8} {'rows':>8} {'seconds':>10} {'rows/s':>10}")
+            forms = [{field: str(value) for field, value in event.items()} for event in events]
+            seconds = time_call(lambda: [client.post("/crud/s006_containerhistory/create", data=form) for form in forms])
+            assert S006_ContainerHistory.query.count() == num_rows
+            clear()
+            print(f"{'form create':>16} {1:>8} {num_rows:>8} {seconds:>10.3f} {num_rows / seconds:>10.0f}")
+
+            for batch_size in batch_sizes:
+                seconds = time_call(post_batches, "create", events, batch_size)
+                print(f"{'batch create':>16} {batch_size:>8} {num_rows:>8} {seconds:>10.3f} {num_rows / seconds:>10.0f}")
+                ids = [id for id, in db.session.query(S006_ContainerHistory.id)]
+                updates = [{"id": id, "damage": "dent"} for id in ids]
+                seconds = time_call(post_batches, "update", updates, batch_size)
+                print(f"{'batch update':>16} {batch_size:>8} {num_rows:>8} {seconds:>10.3f} {num_rows / seconds:>10.0f}")
+                seconds = time_call(post_batches, "delete", ids, batch_size)
+                print(f"{'batch delete':>16} {batch_size:>8} {num_rows:>8} {seconds:>10.3f} {num_rows / seconds:>10.0f}")
+                assert S006_ContainerHistory.query.count() == 0
+
+def bench_pagination(num_rows, pages, per_page, repeat=5):
+    """
+    Time fetching deep pages of the container history list, as the generated
+    list route does, with OFFSET pagination against keyset pagination.
+    """
+    from datetime import datetime, timedelta
+    from sqlalchemy import insert
+    from app import create_app, db
+    from app.models.shipping import S006_ContainerHistory as History
+    from app.utils.query import encode_cursor, keyset_page, many_to_one_options
+
+    list_foreign_keys = ["container_id", "port_id", "client_id", "container_status_id"]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{Path(temp_dir) / 'bench.db'}"})
+        with app.app_context():
+            start = datetime(2024, 1, 1)
+            for batch_start in range(0, num_rows, 10000):
+                db.session.execute(insert(History), [
+                    {"damage": f"Damage {i % 97}", "updated": start + timedelta(minutes=i)}
+                    for i in range(batch_start, min(num_rows, batch_start + 10000))
+                ])
+            db.session.commit()
+
+            def base_query():
+                return History.query.options(*many_to_one_options(History, list_foreign_keys))
+
+            def offset_page(page):
+                return base_query().order_by(History.id).paginate(page=page, per_page=per_page, error_out=False).items
+
+            def keyset(cursor):
+                return keyset_page(base_query(), "id", History.id, History.id, cursor, per_page)[0]
+
+            def best_of(func, *args):
+                return min(time_call(func, *args) for _ in range(repeat))
+
+            print(f"{'rows':>10} {'page':>8} {'offset ms':>10} {'keyset ms':>10}")
+            for page in pages:
+                # The cursor a user scrolling to this page would carry: the id of the row before it
+                before = (page - 1) * per_page
+                previous = History.query.order_by(History.id).offset(before - 1).first() if before else None
+                cursor = encode_cursor("id", previous.id, previous.id) if previous else None
+                assert [item.id for item in offset_page(page)] == [item.id for item in keyset(cursor)]
+                print(
+                    f"{num_rows:>10} {page:>8} {best_of(offset_page, page) * 1000:>10.2f} "
+                    f"{best_of(keyset, cursor) * 1000:>10.2f}"
+                )
+
+def legacy_search_filter(model, search_term, fields):
+    """The filter generated routes built before the search engine: LIKE '%term%' on every searched field."""
+    from sqlalchemy import func, or_
+    pattern = f"%{search_term.lower()}%"
+    return or_(*(func.lower(getattr(model, field)).like(pattern) for field in fields))
+
+def insert_clients(num_rows):
+    """Insert num_rows clients with searchable names, addresses and towns, in the app context's database."""
+    from sqlalchemy import insert
+    from app import db
+    from app.models.shipping import S015_Client as Client
+
+    companies = ["Acme", "Globex", "Initech", "Umbrella", "Hooli", "Vandelay", "Stark", "Wayne", "Wonka", "Tyrell"]
+    kinds = ["Shipping", "Logistics", "Trading", "Freight", "Forwarding"]
+    towns = ["Rotterdam", "Hamburg", "Antwerp", "Singapore", "Shanghai", "Felixstowe", "Valencia", "Busan"]
+    start = time.perf_counter()
+    for batch_start in range(0, num_rows, 10000):
+        db.session.execute(insert(Client), [
+            {
+                "name": f"{companies[i % 10]} {kinds[i % 5]} {i:07d}",
+                "address": f"{i % 997} Harbour Road",
+                "town": towns[i % 8],
+            }
+            for i in range(batch_start, min(num_rows, batch_start + 10000))
+        ])
+    db.session.commit()
+    print(f"Inserted {num_rows} clients, indexed by triggers, in {time.perf_counter() - start:.1f}s")
+
+def bench_search(num_rows, terms, repeat=5):
+    """
+    Time the first page of a client list search, as the generated list route
+    runs it, with the old LIKE filter against the FTS5-backed search engine.
+    """
+    from app import create_app
+    from app.models.shipping import S015_Client as Client
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        app = create_app({
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{Path(temp_dir) / 'bench.db'}", "CRUD_PRELOAD": ["s015_client"],
+        })
+        with app.app_context():
+            routes = sys.modules["app.routes.crud.s015_client"]
+            insert_clients(num_rows)
+
+            def first_page(search_filter):
+                return Client.query.filter(search_filter).order_by(Client.id).paginate(page=1, per_page=20, error_out=False)
+
+            def best_of(search_filter):
+                return min(time_call(first_page, search_filter) for _ in range(repeat))
+
+            print(f"{'term':>16} {'matches':>10} {'LIKE ms':>10} {'FTS5 ms':>10}")
+            for term in terms:
+                like_filter = legacy_search_filter(Client, term, ["id", "name", "address", "town"])
+                search_filter = routes.get_search_filter(Client, term)
+                matches = first_page(search_filter).total
+                print(f"{term:>16} {matches:>10} {best_of(like_filter) * 1000:>10.2f} {best_of(search_filter) * 1000:>10.2f}")
+
+def bench_engine(num_rows, terms, repeat=5):
+    """
+    Time client list pages and searches served by the generated route module
+    against the runtime CRUD engine, on the same database. Both views are
+    loaded before timing, so only the requests themselves are measured.
+    """
+    from app import create_app
+
+    requests = [("page 1", {}), ("page 50", {"page": 50})] + [(term, {"search": term}) for term in terms]
+    timings = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config = {
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{Path(temp_dir) / 'bench.db'}", "SECRET_KEY": "bench",
+            "CRUD_PRELOAD": ["s015_client"], "CRUD_SCHEMA": Path(__file__).parent.parent / "output" / "json" / "shipping.json",
+        }
+        for engine in ("generated", "runtime"):
+            app = create_app({**config, "CRUD_ENGINE": engine})
+            with app.app_context():
+                if engine == "generated":
+                    insert_clients(num_rows)
+                client = app.test_client()
+
+                def get(query):
+                    response = client.get("/crud/s015_client/", query_string=query)
+                    assert response.status_code == 200, response.status
+                    return response.data
+
+                for name, query in requests:
+                    get(query)
+                    timings[engine, name] = min(time_call(get, query) for _ in range(repeat))
+
+    print(f"{'request':>20} {'generated ms':>13} {'runtime ms':>11}")
+    for name, _ in requests:
+        print(f"{name:>20} {timings['generated', name] * 1000:>13.2f} {timings['runtime', name] * 1000:>11.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    convert_parser = subparsers.add_parser("convert", help="DSL to JSON conversion scaling")
+    convert_parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 2500, 5000, 10000])
+
+    attributes_parser = subparsers.add_parser("attributes", help="per-field attribute parsing cost")
+    attributes_parser.add_argument("--fields", type=int, default=120000)
+
+    models_parser = subparsers.add_parser("models", help="SQLAlchemy model generation scaling")
+    models_parser.add_argument("--sizes", type=int, nargs="+", default=[500, 1000, 2000])
+
+    incremental_parser = subparsers.add_parser("incremental", help="incremental conversion with a warm cache")
+    incremental_parser.add_argument("--tables", type=int, default=10000)
+
+    stream_parser = subparsers.add_parser("stream", help="peak memory of json.dump against the streaming writer")
+    stream_parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000])
+
+    registry_parser = subparsers.add_parser("registry", help="dynamic model cold start")
+    registry_parser.add_argument("--sizes", type=int, nargs="+", default=[250, 500, 1000])
+
+    codegen_parser = subparsers.add_parser("codegen", help="CRUD template and route generation")
+    codegen_parser.add_argument("--tables", type=int, default=800)
+    codegen_parser.add_argument("--workers", type=int, default=max(2, os.cpu_count() or 1))
+
+    startup_parser = subparsers.add_parser("startup", help="app startup with eager against lazy CRUD routes")
+    startup_parser.add_argument("--sizes", type=int, nargs="+", default=[17, 800])
+
+    forms_parser = subparsers.add_parser("forms", help="form binding and create posts, raw strings against FormBinder")
+    forms_parser.add_argument("--forms", type=int, default=100000)
+    forms_parser.add_argument("--posts", type=int, default=2000)
+
+    batch_parser = subparsers.add_parser("batch", help="container history writes, form posts against the JSON batch API")
+    batch_parser.add_argument("--rows", type=int, default=5000)
+    batch_parser.add_argument("--batch-sizes", type=int, nargs="+", default=[10, 100, 1000])
+
+    pagination_parser = subparsers.add_parser("pagination", help="deep list pages with OFFSET against keyset paging")
+    pagination_parser.add_argument("--rows", type=int, default=200000)
+    pagination_parser.add_argument("--pages", type=int, nargs="+", default=[1, 100, 1000, 5000])
+    pagination_parser.add_argument("--per-page", type=int, default=20)
+
+    search_parser = subparsers.add_parser("search", help="client list search with LIKE against FTS5")
+    search_parser.add_argument("--rows", type=int, default=1000000)
+    search_parser.add_argument("--terms", nargs="+", default=["0424242", "wonka", "hooli forwarding", "felixstowe"])
+
+    engine_parser = subparsers.add_parser("engine", help="client list and search requests, generated routes against the runtime engine")
+    engine_parser.add_argument("--rows", type=int, default=100000)
+    engine_parser.add_argument("--terms", nargs="+", default=["wonka", "hooli forwarding", "felixstowe"])
+
+    args = parser.parse_args()
+    if args.benchmark == "convert":
+        bench_convert(args.sizes)
+    elif args.benchmark == "attributes":
+        bench_attributes(args.fields)
+    elif args.benchmark == "models":
+        bench_models(args.sizes)
+    elif args.benchmark == "incremental":
+        bench_incremental(args.tables)
+    elif args.benchmark == "stream":
+        bench_stream(args.sizes)
+    elif args.benchmark == "registry":
+        bench_registry(args.sizes)
+    elif args.benchmark == "codegen":
+        bench_codegen(args.tables, args.workers)
+    elif args.benchmark == "startup":
+        bench_startup(args.sizes)
+    elif args.benchmark == "forms":
+        bench_forms(args.forms, args.posts)
+    elif args.benchmark == "batch":
+        bench_batch(args.rows, args.batch_sizes)
+    elif args.benchmark == "pagination":
+        bench_pagination(args.rows, args.pages, args.per_page)
+    elif args.benchmark == "search":
+        bench_search(args.rows, args.terms)
+    elif args.benchmark == "engine":
+        bench_engine(args.rows, args.terms)
+
+if __name__ == '__main__':
+    main()
@@ -11,9 +11,12 @@ from pathlib import Path
 # Add parent directory to path so we can import our modules
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
-from dsl.converter.validation import validate_dsl
-from dsl.converter.dsl import convert_dsl_to_json
-from dsl.converter.sqlalchemy import load_json_to_models
+from dsl.converter.dsl import convert_dsl_to_json, table_index_name
+from dsl.converter.generate_models import format_index
+from dsl.converter.incremental import (
+    convert_dsl_to_json_incremental, hash_file, hash_text, cache_is_current,
+    read_cache_header, read_cache_body, write_cache, output_stats, write_if_changed
+)
 
 def get_config():
     """
@@ -31,6 +34,10 @@ def get_config():
             'flask_models_dir': '../app/models',
             'flask_models_file': 'shipping.py'
         },
+        'incremental': {
+            'enabled': True,                              # Reuse unchanged tables between runs
+            'cache_file': 'output/json/shipping.json.cache'
+        },
         'table_naming': {
             'format': 'lower',  # Options: lower, upper, original
             'prefix': '',       # Optional prefix for all table names
@@ -77,6 +84,23 @@ def get_required_imports():
         ''
     ]
 
+# Closes the generated models; the fingerprint after it is the hash of everything before it
+FINGERPRINT_COMMENT = '# Schema fingerprint of the models above, stored in the database when their tables are created'
+
+def add_schema_fingerprint(content):
+    """
+    Append SCHEMA_FINGERPRINT to generated models. The app compares it with
+    the fingerprint stored in the database and skips creating tables when
+    they match.
+    """
+    return f"{content}{FINGERPRINT_COMMENT}\nSCHEMA_FINGERPRINT = '{hash_text(content)}'\n"
+
+def read_schema_fingerprint(models_source):
+    """Return the fingerprint a models file declares and the one its contents hash to."""
+    content, _, fingerprint_lines = models_source.partition(FINGERPRINT_COMMENT)
+    declared = fingerprint_lines.split("'")[1] if "SCHEMA_FINGERPRINT = '" in fingerprint_lines else None
+    return declared, hash_text(content)
+
 def get_table_name(model_name, config):
     """
     Generate table name based on configuration.
@@ -141,9 +165,10 @@ def generate_relationships(json_data):
             backref_name = f"{model_name.lower()}_{rel['field_name']}"
             relationship_str += f", backref='{backref_name}'"
             
-            # Add lazy loading for collections
-            if rel['type'] == 'one-to-many':
-                relationship_str += ", lazy='dynamic'"
+            # Use the loader strategy declared with lazy:, else dynamic loading for collections
+            lazy = rel.get('lazy') or ('dynamic' if rel['type'] == 'one-to-many' else None)
+            if lazy:
+                relationship_str += f", lazy='{lazy}'"
                 
             relationship_str += ")"
             model_relationships.append(relationship_str)
@@ -160,6 +185,10 @@ def generate_relationships(json_data):
                 if 'foreign_key' in field_info:
                     relationship_str += f", foreign_keys=[{field_name}]"
                 
+                # Add the loader strategy declared on the ref
+                if rel.get('lazy'):
+                    relationship_str += f", lazy='{rel['lazy']}'"
+                
                 # Add backref
                 relationship_str += f", backref='{backref_name}')"
                 model_relationships.append(relationship_str)
@@ -169,7 +198,84 @@ def generate_relationships(json_data):
             
     return relationships
 
-def main():
+def generate_model_class(model_name, model_data, relationships, type_mapping, config):
+    """
+    Generate the Flask-SQLAlchemy class definition for a single model.
+    """
+    table_name = get_table_name(model_name, config)
+    class_lines = [f"class {model_name}(db.Model):", f"    __tablename__ = '{table_name}'"]
+    if model_data.get('Reference'):
+        # Reference tables are cached in memory by the app, see app/utils/reference.py
+        class_lines.append("    __reference__ = True")
+    
+    # Add columns first
+    for field_name, field_info in model_data['Fields'].items():
+        field_args = []
+        
+        # Map field type using the type mapping
+        field_type = field_info['type']
+        if field_type in type_mapping:
+            # Get field type specific parameters
+            if field_type == 'String':
+                max_length = field_info.get('max_length', 40)
+                field_args.append(type_mapping[field_type](max_length))
+            elif field_type == 'Decimal':
+                precision = field_info.get('precision', 10)
+                scale = field_info.get('scale', 2)
+                field_args.append(type_mapping[field_type](precision, scale))
+            else:
+                field_args.append(type_mapping[field_type]())
+        else:
+            # Default to String if type not found
+            field_args.append('db.String(40)')
+        
+        # Add constraints from config
+        for constraint in ['primary_key', 'auto_increment', 'unique']:
+            if field_info.get(constraint):
+                constraint_str = get_constraint_str(constraint, config)
+                if constraint_str:
+                    field_args.append(constraint_str)
+        
+        # Special handling for nullable since it's inverted
+        if not field_info.get('nullable', True):
+            constraint_str = get_constraint_str('nullable', config)
+            if constraint_str:
+                field_args.append(constraint_str)
+        
+        # Add foreign key if present
+        if 'foreign_key' in field_info:
+            field_args.append(f'db.ForeignKey("{field_info["foreign_key"]}")')
+        
+        field_def = f"    {field_name} = db.Column({', '.join(field_args)})"
+        class_lines.append(field_def)
+    
+    # Add indices if present
+    if 'Indices' in model_data:
+        index_defs = []
+        for index_name, definition in model_data['Indices'].items():
+            # Make index name unique by using table name and index name
+            unique_index_name = table_index_name(table_name, index_name)
+            
+            # Composite, unique, descending, expression and partial indexes are all formatted alike
+            index_defs.append(format_index(unique_index_name, definition))
+        
+        if index_defs:
+            class_lines.append("")
+            class_lines.append("    __table_args__ = (")
+            # Every entry keeps its comma, so a single index is still a tuple
+            for index_def in index_defs:
+                class_lines.append(f"        {index_def},")
+            class_lines.append("    )")
+
+    # Add relationships after columns and indices
+    if relationships:
+        class_lines.append("")  # Add spacing between columns and relationships
+        class_lines.extend(relationships)
+    
+    class_lines.extend(["", "", ""])  # Add spacing between classes
+    return "\n".join(class_lines)
+
+def main(force_full=False):
     # Load configuration
     config = get_config()
     
@@ -179,6 +285,11 @@ def main():
     json_file = base_dir / config['paths']['output_json_dir'] / config['paths']['output_json_file']
     models_file = base_dir / config['paths']['output_models_dir'] / config['paths']['output_models_file']
     flask_models_file = base_dir.parent / config['paths']['flask_models_dir'] / config['paths']['flask_models_file']
+    output_files = [json_file, models_file, flask_models_file]
+    
+    # Incremental mode keeps a sidecar cache of per-table results between runs
+    incremental = config.get('incremental', {})
+    cache_file = base_dir / incremental['cache_file'] if incremental.get('enabled') else None
     
     print("Starting DSL to SQLAlchemy model conversion process...")
     
@@ -190,16 +301,32 @@ def main():
     validate_dsl_file(schema_file)
     print("✓ DSL validation passed")
     
+    if cache_file:
+        source_hash = hash_file(schema_file)
+        config_hash = hash_text(json.dumps(config, sort_keys=True))
+        if not force_full and cache_is_current(read_cache_header(cache_file), source_hash, config_hash, output_files):
+            print("\n✓ Schema unchanged since the last run, nothing to regenerate")
+            return
+        cache = {} if force_full else read_cache_body(cache_file)
+        if cache.get('config_hash') != config_hash:
+            cache['classes'] = {}
+    
     # Step 2: Convert DSL to JSON
     print("\n2. Converting DSL to JSON...")
-    convert_dsl_to_json(schema_file, json_file)
-    print("✓ DSL converted to JSON")
-    
-    # Step 3: Load JSON data
-    print("\n3. Loading JSON data...")
-    with open(json_file, 'r') as f:
-        json_data = json.load(f)
-    print("✓ JSON data loaded")
+    if cache_file:
+        json_file.parent.mkdir(parents=True, exist_ok=True)
+        json_data, changed_models, cache = convert_dsl_to_json_incremental(schema_file, json_file, cache)
+        print(f"✓ DSL converted to JSON ({len(changed_models)} of {len(json_data['Models'])} models rebuilt)")
+    else:
+        convert_dsl_to_json(schema_file, json_file)
+        print("✓ DSL converted to JSON")
+        
+        # Step 3: Load JSON data
+        print("\n3. Loading JSON data...")
+        with open(json_file, 'r') as f:
+            json_data = json.load(f)
+        print("✓ JSON data loaded")
+        changed_models = set(json_data['Models'])
     
     # Step 4: Generate Flask-SQLAlchemy models
     print("\n4. Generating Flask-SQLAlchemy models...")
@@ -208,102 +335,51 @@ def main():
     # Get type mapping
     type_mapping = get_field_type_mapping()
     
+    # Only models whose JSON changed need their classes generated again
+    class_cache = cache['classes'] if cache_file else {}
+    stale_models = {
+        model_name: json_data['Models'][model_name]
+        for model_name in json_data['Models']
+        if model_name in changed_models or model_name not in class_cache
+    }
+    
     # Generate relationships from JSON data
-    model_relationships = generate_relationships(json_data)
+    model_relationships = generate_relationships({'Models': stale_models})
     
     # Generate Flask-SQLAlchemy models
+    classes = {}
     for model_name, model_data in json_data['Models'].items():
-        table_name = get_table_name(model_name, config)
-        class_lines = [f"class {model_name}(db.Model):", f"    __tablename__ = '{table_name}'"]
-        
-        # Add columns first
-        for field_name, field_info in model_data['Fields'].items():
-            field_args = []
-            
-            # Map field type using the type mapping
-            field_type = field_info['type']
-            if field_type in type_mapping:
-                # Get field type specific parameters
-                if field_type == 'String':
-                    max_length = field_info.get('max_length', 40)
-                    field_args.append(type_mapping[field_type](max_length))
-                elif field_type == 'Decimal':
-                    precision = field_info.get('precision', 10)
-                    scale = field_info.get('scale', 2)
-                    field_args.append(type_mapping[field_type](precision, scale))
-                else:
-                    field_args.append(type_mapping[field_type]())
-            else:
-                # Default to String if type not found
-                field_args.append('db.String(40)')
-            
-            # Add constraints from config
-            for constraint in ['primary_key', 'auto_increment', 'unique']:
-                if field_info.get(constraint):
-                    constraint_str = get_constraint_str(constraint, config)
-                    if constraint_str:
-                        field_args.append(constraint_str)
-            
-            # Special handling for nullable since it's inverted
-            if not field_info.get('nullable', True):
-                constraint_str = get_constraint_str('nullable', config)
-                if constraint_str:
-                    field_args.append(constraint_str)
-            
-            # Add foreign key if present
-            if 'foreign_key' in field_info:
-                field_args.append(f'db.ForeignKey("{field_info["foreign_key"]}")')
-            
-            field_def = f"    {field_name} = db.Column({', '.join(field_args)})"
-            class_lines.append(field_def)
-        
-        # Add indices if present
-        if 'Indices' in model_data:
-            index_defs = []
-            for index_name, index_columns in model_data['Indices'].items():
-                # Make index name unique by using table name and index name
-                unique_index_name = f"ix_{table_name}_{index_name[4:]}"  # Remove 'idx_' prefix
-                
-                # Create index definition with proper column references
-                # Make index name unique by using table name and index name
-                unique_index_name = f"ix_{table_name}_{index_name[4:]}"  # Remove 'idx_' prefix
-                
-                # Create index definition with column references
-                columns_str = ", ".join([f"'{col}'" for col in index_columns])
-                index_defs.append((unique_index_name, columns_str))
-            
-            if index_defs:
-                class_lines.append("")
-                class_lines.append("    __table_args__ = (")
-                for i, (idx_name, cols) in enumerate(index_defs):
-                    if i < len(index_defs) - 1:
-                        class_lines.append(f"        Index('{idx_name}', {cols}),")
-                    else:
-                        class_lines.append(f"        Index('{idx_name}', {cols})")
-                class_lines.append("    )")
-
-        # Add relationships after columns and indices
-        if model_name in model_relationships:
-            class_lines.append("")  # Add spacing between columns and relationships
-            class_lines.extend(model_relationships[model_name])
-        
-        class_lines.extend(["", "", ""])  # Add spacing between classes
-        content += "\n".join(class_lines)
+        if model_name in stale_models:
+            classes[model_name] = generate_model_class(
+                model_name, model_data, model_relationships.get(model_name), type_mapping, config
+            )
+        else:
+            classes[model_name] = class_cache[model_name]
+        content += classes[model_name]
+    content = add_schema_fingerprint(content)
     
     # Ensure output directories exist
     flask_models_file.parent.mkdir(parents=True, exist_ok=True)
     models_file.parent.mkdir(parents=True, exist_ok=True)
     json_file.parent.mkdir(parents=True, exist_ok=True)
 
-    # Write to Flask app
-    with open(flask_models_file, 'w') as f:
-        f.write(content)
+    # Write to Flask app and the models directory, leaving unchanged files untouched
+    # so Flask's reloader and __pycache__ are not invalidated
+    changed_files = [
+        path for path in (flask_models_file, models_file)
+        if write_if_changed(path, content)
+    ]
     
-    # Also write to models directory
-    with open(models_file, 'w') as f:
-        f.write(content)
+    if cache_file:
+        cache.update(classes=classes, config_hash=config_hash)
+        header = {
+            'source_hash': source_hash,
+            'config_hash': config_hash,
+            'outputs': output_stats(output_files)
+        }
+        write_cache(cache_file, header, cache)
     
-    print("✓ Models copied to Flask app")
+    print(f"✓ Models copied to Flask app ({len(changed_files)} changed, {2 - len(changed_files)} unchanged)")
     print("\nConversion process completed successfully!")
     print(f"\nGenerated files:")
     print(f"- JSON schema: {json_file}")
@@ -311,4 +387,5 @@ def main():
     print(f"- Flask-SQLAlchemy models: {flask_models_file}")
 
 if __name__ == '__main__':
-    main()
+    # --full ignores the incremental cache and regenerates everything
+    main(force_full='--full' in sys.argv[1:])
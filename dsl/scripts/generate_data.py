@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+Generate a reproducible synthetic dataset for any DSL schema, straight from
+its JSON, into a SQLite database.
+
+Tables are filled in foreign key order. Each table is split into chunks that
+a process pool generates, each chunk from its own RNG seeded with the seed,
+the table and the chunk number, so the same seed and chunk size give the
+same rows whatever the number of workers. The main process writes the chunks
+with executemany as they come back.
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the project root directory to Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import declarative_base
+
+from app.models.sequences import SequenceCounter
+from app.utils.container_numbers import MAX_SERIAL, generate_container_numbers, sequential_owner_code
+from app.utils.sequences import SequenceAllocator, bill_of_lading_prefix, split_bill_of_lading
+from dsl.converter.dsl import index_columns
+from dsl.converter.sqlalchemy import ModelRegistry
+
+JSON_FILE = Path(__file__).parent.parent / "output" / "json" / "shipping.json"
+
+# Rows per table unless given with --rows; --scale multiplies them, except for reference tables
+DEFAULT_ROWS = 1000
+REFERENCE_ROWS = 10
+DEFAULT_CHUNK_SIZE = 10000
+
+# Generated dates fall in the year before this, fixed so the output is reproducible
+BASE_DATE = datetime(2024, 1, 1)
+
+def generate_bill_of_lading(voyage, pol, pod, sequence_counters, first_sequence=1):
+    """
+    Generate a bill of lading number in the format: VOYAGE-ROT-POL-POD-SEQ
+
+    Sequences count up from first_sequence per printed prefix, so voyages
+    sharing a name and rotation number never hand out the same number twice.
+    Generators that share no counters can still never collide by starting
+    from disjoint ranges; the sequence_counter table is moved past them once
+    they are loaded, so the app's numbers carry on from theirs.
+    """
+    combo_key = bill_of_lading_prefix(voyage, pol, pod)
+
+    # Get and increment sequence number
+    sequence_counters[combo_key] = sequence_counters.get(combo_key, first_sequence - 1) + 1
+
+    return f"{combo_key}-{sequence_counters[combo_key]:05d}"
+
+# Value providers: provider(rng, row_id, row, chunk) returns the value of one column.
+# They run after the other columns, so row holds the row's foreign keys.
+
+def bill_of_lading(rng, row_id, row, chunk):
+    """Bill of lading numbers from the manifest's voyage and ports; each chunk numbers from its first row id."""
+    voyages = chunk.lookup("s010_voyage", ("name", "rotation_number"))
+    ports = chunk.lookup("s012_port", ("prefix",))
+    return generate_bill_of_lading(
+        voyages[row["voyage_id"]], ports[row["port_of_loading_id"]], ports[row["port_of_discharge_id"]],
+        chunk.sequence_counters, first_sequence=chunk.start
+    )
+
+def port_prefix(rng, row_id, row, chunk):
+    """Five-letter port codes, like UN/LOCODEs."""
+    return "".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ") for _ in range(5))
+
+def email(rng, row_id, row, chunk):
+    return f"user{row_id}@example.com"
+
+def phone(rng, row_id, row, chunk):
+    return f"+{rng.randint(1, 99)} {rng.randint(100, 999)} {rng.randint(1000000, 9999999)}"
+
+# Batch providers: provider(rng, row_ids, rows, chunk) returns the values of one
+# column for every row of a chunk. They run last, once the rows are complete.
+
+def container_numbers(rng, row_ids, rows, chunk):
+    """
+    Container numbers with valid check digits, computed for the whole chunk at
+    once. The row id gives the serial and, every MAX_SERIAL + 1 rows, the next
+    owner code, so no two rows share a number.
+    """
+    return generate_container_numbers(
+        [sequential_owner_code(row_id // (MAX_SERIAL + 1)) for row_id in row_ids],
+        [rng.choice(["22G", "45R", "20T", "40H"]) for _ in row_ids],
+        [row_id % (MAX_SERIAL + 1) for row_id in row_ids]
+    )
+
+BATCH_PROVIDERS = {
+    "s005_container.number": container_numbers,
+}
+
+# Providers for particular columns, by table.column, then by column name in any table
+FIELD_PROVIDERS = {
+    "s001_manifest.bill_of_lading": bill_of_lading,
+    "s012_port.prefix": port_prefix,
+}
+NAME_PROVIDERS = {
+    "email": email,
+    "phone": phone,
+}
+
+def type_generator(field_name, definition):
+    """
+    A generate(rng, row_id) for the values of a column, from its schema type.
+    Text includes the row id, so it is unique. Numbers are drawn from
+    rng.random(), which costs a fraction of randint in these hot loops.
+    """
+    field_type = definition["type"]
+    if field_type == "Integer":
+        if definition.get("unique"):
+            return lambda rng, row_id: row_id
+        return lambda rng, row_id: int(rng.random() * 1000) + 1
+    if field_type in ("Float", "Decimal", "Numeric"):
+        return lambda rng, row_id: round(rng.uniform(1, 1000), 2)
+    if field_type == "Boolean":
+        return lambda rng, row_id: rng.random() < 0.5
+    if field_type == "DateTime":
+        return lambda rng, row_id: (BASE_DATE - timedelta(seconds=int(rng.random() * 365 * 86400))).isoformat(" ", "microseconds")
+    if field_type == "Date":
+        return lambda rng, row_id: (BASE_DATE - timedelta(days=int(rng.random() * 365))).date().isoformat()
+    label = field_name.replace("_", " ").title()
+    return lambda rng, row_id: f"{label} {row_id}"
+
+def table_name(model_name):
+    """The table create_model makes for a model."""
+    return model_name.lower()
+
+def foreign_table(definition):
+    """The table a foreign key field references, or None."""
+    return definition["foreign_key"].split(".")[0] if definition.get("foreign_key") else None
+
+def table_order(models):
+    """
+    Return the table names in an order where every table comes after the
+    tables its foreign keys reference, keeping schema order where it can.
+    Self-references are ignored; other cycles raise ValueError.
+    """
+    dependencies = {
+        table_name(model_name): {
+            foreign_table(definition) for definition in model_data["Fields"].values()
+            if foreign_table(definition) and foreign_table(definition) != table_name(model_name)
+        }
+        for model_name, model_data in models.items()
+    }
+    order = []
+    done = set()
+    while len(order) < len(dependencies):
+        ready = [
+            table for table, parents in dependencies.items()
+            if table not in done and parents <= done | (parents - dependencies.keys())
+        ]
+        if not ready:
+            raise ValueError(f"Foreign keys form a cycle between: {', '.join(sorted(dependencies.keys() - done))}")
+        order.extend(ready)
+        done.update(ready)
+    return order
+
+def row_counts(models, scale=1, rows=None):
+    """Rows to generate per table: rows overrides, else the defaults times scale."""
+    counts = {
+        table_name(model_name): REFERENCE_ROWS if model_data.get("Reference") else DEFAULT_ROWS * scale
+        for model_name, model_data in models.items()
+    }
+    counts.update(rows or {})
+    return counts
+
+class TablePlan:
+    """How to generate the rows of one table, built once per worker."""
+
+    def __init__(self, model_data, table, counts):
+        self.table = table
+        self.fields = model_data["Fields"]
+        self.columns = list(self.fields)
+        self.providers = {
+            field: FIELD_PROVIDERS.get(f"{table}.{field}") or NAME_PROVIDERS.get(field)
+            for field in self.columns
+            if f"{table}.{field}" in FIELD_PROVIDERS or field in NAME_PROVIDERS
+        }
+        self.foreign_keys = {
+            field: counts.get(foreign_table(definition), 0)
+            for field, definition in self.fields.items() if foreign_table(definition)
+        }
+
+        # Composite unique indexes: the leading foreign key cycles through its
+        # parents and the other columns count how many times it has, e.g.
+        # (voyage_id, leg_number) becomes (1, 1), (2, 1), ... (1, 2), ...
+        self.cycled = {}
+        self.rounds = {}
+        for definition in model_data.get("Indices", {}).values():
+            if not (isinstance(definition, dict) and definition.get("unique")):
+                continue
+            columns = [column for column in index_columns(definition) if isinstance(column, str)]
+            if len(columns) > 1 and self.foreign_keys.get(columns[0]):
+                self.cycled[columns[0]] = self.foreign_keys[columns[0]]
+                self.rounds.update(
+                    (column, self.foreign_keys[columns[0]]) for column in columns[1:]
+                    if self.fields[column]["type"] == "Integer"
+                )
+
+        self.batch_providers = {
+            field: BATCH_PROVIDERS[f"{table}.{field}"] for field in self.columns if f"{table}.{field}" in BATCH_PROVIDERS
+        }
+        self.generators = [
+            (field, self.column_generator(field, definition))
+            for field, definition in self.fields.items()
+            if field not in self.providers and field not in self.batch_providers
+        ]
+
+    def column_generator(self, field, definition):
+        """The generate(rng, row_id) for a column that has no provider."""
+        if definition.get("primary_key"):
+            return lambda rng, row_id: row_id
+        if field in self.cycled:
+            parents = self.cycled[field]
+            return lambda rng, row_id: (row_id - 1) % parents + 1
+        if field in self.rounds:
+            parents = self.rounds[field]
+            return lambda rng, row_id: (row_id - 1) // parents + 1
+        if field in self.foreign_keys:
+            parents = self.foreign_keys[field]
+            return (lambda rng, row_id: int(rng.random() * parents) + 1) if parents else (lambda rng, row_id: None)
+        return type_generator(field, definition)
+
+    def row(self, rng, row_id, chunk):
+        """Generate one row as a dict, without the columns of batch providers."""
+        row = {field: generate(rng, row_id) for field, generate in self.generators}
+        for field, provider in self.providers.items():
+            row[field] = provider(rng, row_id, row, chunk)
+        return row
+
+    def rows(self, rng, chunk):
+        """Generate the rows of a chunk as tuples in column order."""
+        row_ids = range(chunk.start, chunk.stop)
+        rows = [self.row(rng, row_id, chunk) for row_id in row_ids]
+        for field, provider in self.batch_providers.items():
+            for row, value in zip(rows, provider(rng, row_ids, rows, chunk)):
+                row[field] = value
+        return [tuple(row[column] for column in self.columns) for row in rows]
+
+class Chunk:
+    """The rows start..stop of a table, and what providers need to generate them."""
+
+    def __init__(self, start, stop):
+        self.start = start
+        self.stop = stop
+        self.sequence_counters = {}
+
+    @staticmethod
+    def lookup(table, columns):
+        """Columns of a table already written, as {id: namedtuple}, read once per worker."""
+        key = (table, columns)
+        if key not in _worker["lookups"]:
+            row_type = namedtuple(f"{table}_row", ("id",) + columns)
+            with sqlite3.connect(f"file:{_worker['database']}?mode=ro", uri=True) as connection:
+                _worker["lookups"][key] = {
+                    row[0]: row_type(*row)
+                    for row in connection.execute(f'SELECT id, {", ".join(columns)} FROM "{table}"')
+                }
+        return _worker["lookups"][key]
+
+# Per-process state set up by init_worker
+_worker = {}
+
+def init_worker(models, database, counts, seed):
+    """Set up a worker process, or the main process when running without one."""
+    _worker.update(
+        database=str(database), seed=seed, lookups={},
+        plans={table_name(model_name): TablePlan(model_data, table_name(model_name), counts)
+               for model_name, model_data in models.items()}
+    )
+
+def generate_chunk(table, chunk_index, start, stop):
+    """Generate rows start..stop-1 of a table from the chunk's own seeded RNG."""
+    rng = random.Random(f"{_worker['seed']}:{table}:{chunk_index}")
+    return _worker["plans"][table].rows(rng, Chunk(start, stop))
+
+def create_schema(models, database):
+    """
+    Recreate the schema's tables in database. Returns the non-unique indexes,
+    which are dropped until the tables are loaded; unique ones stay to catch
+    duplicates as they are written.
+    """
+    base = declarative_base()
+    ModelRegistry({"Models": models}).create_models(base)
+    engine = create_engine(f"sqlite:///{database}")
+    base.metadata.drop_all(engine)
+    base.metadata.create_all(engine)
+    # Counters left from an earlier load would not match the new rows
+    SequenceCounter.__table__.drop(engine, checkfirst=True)
+    SequenceCounter.__table__.create(engine)
+
+    deferred = sorted(
+        (index for table in base.metadata.sorted_tables for index in table.indexes if not index.unique),
+        key=lambda index: index.name
+    )
+    with engine.begin() as connection:
+        for index in deferred:
+            index.drop(connection)
+        # The app builds its full-text indexes again when they are missing, but not when they are stale
+        for table in base.metadata.tables:
+            connection.exec_driver_sql(f'DROP TABLE IF EXISTS "{table}_fts"')
+    return engine, deferred
+
+def advance_bill_of_lading_sequences(engine):
+    """
+    Move the app's bill of lading sequences past the generated numbers, so
+    the manifests it creates never reuse one. Returns the sequences moved.
+    """
+    last_values = {}
+    with engine.begin() as connection:
+        for (bill_of_lading,) in connection.exec_driver_sql(
+                "SELECT bill_of_lading FROM s001_manifest WHERE bill_of_lading IS NOT NULL"):
+            numbered = split_bill_of_lading(bill_of_lading)
+            if numbered:
+                prefix, sequence = numbered
+                last_values[prefix] = max(sequence, last_values.get(prefix, 0))
+        SequenceAllocator().advance(last_values, connection)
+    return len(last_values)
+
+def iter_chunks(executor, tasks, window):
+    """Yield the results of tasks in order, keeping at most window of them in flight."""
+    pending = deque()
+    for task in tasks:
+        pending.append(executor.submit(generate_chunk, *task))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def generate_data(json_file, database, scale=1, rows=None, seed=0, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Recreate the tables of the schema in json_file in the SQLite database and
+    fill them with generated rows. Returns [(table, rows, seconds)].
+    """
+    with open(json_file, "r") as f:
+        models = json.load(f)["Models"]
+    counts = row_counts(models, scale, rows)
+    columns = {table_name(model_name): list(model_data["Fields"]) for model_name, model_data in models.items()}
+    workers = workers or os.cpu_count() or 1
+
+    engine, deferred = create_schema(models, database)
+    init_worker(models, database, counts, seed)
+    executor = ProcessPoolExecutor(
+        max_workers=workers, initializer=init_worker, initargs=(models, database, counts, seed)
+    ) if workers > 1 else None
+
+    stats = []
+    connection = sqlite3.connect(database)
+    # The file is rebuilt from scratch on failure, so skip waiting for the disk
+    connection.execute("PRAGMA synchronous = OFF")
+    connection.execute("PRAGMA journal_mode = MEMORY")
+    try:
+        for table in table_order(models):
+            started = time.perf_counter()
+            tasks = [
+                (table, chunk_index, start, min(start + chunk_size, counts[table] + 1))
+                for chunk_index, start in enumerate(range(1, counts[table] + 1, chunk_size))
+            ]
+            chunks = iter_chunks(executor, tasks, workers * 2) if executor else (generate_chunk(*task) for task in tasks)
+            statement = (
+                f'INSERT INTO "{table}" ({", ".join(columns[table])}) '
+                f'VALUES ({", ".join("?" * len(columns[table]))})'
+            )
+            for chunk_rows in chunks:
+                connection.executemany(statement, chunk_rows)
+            connection.commit()
+
+            elapsed = time.perf_counter() - started
+            stats.append((table, counts[table], elapsed))
+            print(f"  {table}: {counts[table]:,} rows in {elapsed:.2f}s ({counts[table] / max(elapsed, 1e-9):,.0f} rows/s)")
+    finally:
+        connection.close()
+        if executor:
+            executor.shutdown()
+
+    started = time.perf_counter()
+    with engine.begin() as engine_connection:
+        for index in deferred:
+            index.create(engine_connection)
+    print(f"  {len(deferred)} indexes created in {time.perf_counter() - started:.2f}s")
+
+    if counts.get("s001_manifest") and "bill_of_lading" in columns.get("s001_manifest", ()):
+        print(f"  {advance_bill_of_lading_sequences(engine)} bill of lading sequences moved past the generated numbers")
+    return stats
+
+def parse_rows(values):
+    """Parse --rows table=count arguments."""
+    rows = {}
+    for value in values:
+        table, _, count = value.partition("=")
+        if not count.isdigit():
+            raise argparse.ArgumentTypeError(f"Expected table=count, got {value!r}")
+        rows[table.lower()] = int(count)
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("database", help="SQLite database file to (re)create")
+    parser.add_argument("--json", default=JSON_FILE, help="JSON schema (default: the shipping schema)")
+    parser.add_argument("--scale", type=int, default=1,
+                        help=f"multiply the {DEFAULT_ROWS} default rows of every table that is not a reference table")
+    parser.add_argument("--rows", nargs="+", default=[], metavar="TABLE=COUNT", help="rows for particular tables")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+    try:
+        rows = parse_rows(args.rows)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
+    started = time.perf_counter()
+    stats = generate_data(args.json, args.database, args.scale, rows, args.seed, args.workers, args.chunk_size)
+    total_rows = sum(count for _, count, _ in stats)
+    elapsed = time.perf_counter() - started
+    print(f"Generated {total_rows:,} rows in {elapsed:.2f}s ({total_rows / max(elapsed, 1e-9):,.0f} rows/s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import argparse
+import csv
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Add the project root directory to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from app import create_app
+from app.utils.container_numbers import IMPORT_CHUNK_SIZE, import_containers
+
+def container_rows(f):
+    """S005_Container rows from a CSV file with number, port_id and updated columns."""
+    for record in csv.DictReader(f):
+        yield {
+            "number": record["number"].strip().upper(),
+            "port_id": int(record["port_id"]) if record.get("port_id") else None,
+            "updated": datetime.fromisoformat(record["updated"]) if record.get("updated") else None
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import containers, skipping numbers with a wrong check digit")
+    parser.add_argument("csv_file", help="CSV file with number, port_id and updated columns")
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE, help="rows validated and inserted per call")
+    args = parser.parse_args()
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+
+    app = create_app()
+    with app.app_context(), open(args.csv_file, newline="") as f:
+        result = import_containers(container_rows(f), args.chunk_size)
+
+    print(f"Imported {result.inserted:,} containers, rejected {len(result.rejected):,}")
+    for rejected in result.rejected[:20]:
+        # Line 1 is the header
+        print(f"  line {rejected.position + 2}: {rejected.number!r}")
+    if len(result.rejected) > 20:
+        print(f"  ... and {len(result.rejected) - 20:,} more")
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,10 @@
-import os
+import argparse
 import sys
 import random
+import time
+from collections import namedtuple
 from datetime import datetime, timedelta
+from itertools import islice
 from pathlib import Path
 
 # Add the project root directory to Python path
@@ -9,66 +12,218 @@ project_root = Path(__file__).parent.parent.parent
 sys.path.append(str(project_root))
 
 # Import Flask app and models
+from sqlalchemy import insert
 from app import create_app, db
+from app.utils.container_numbers import MAX_SERIAL, generate_container_number, sequential_owner_code
+from app.utils.sequences import SequenceAllocator, bill_of_lading_prefix
 from app.models.shipping import (
-    S001_Manifest, S002_LineItem, S003_Commodity, S004_PackType, 
-    S005_Container, S006_ContainerHistory, S007_ContainerStatus, 
-    S008_ShippingCompany, S009_Vessel, S010_Voyage, S011_Leg, 
-    S012_Port, S013_PortPair, S014_Country, S015_Client, S016_User, 
+    S001_Manifest, S002_LineItem, S003_Commodity, S004_PackType,
+    S005_Container, S006_ContainerHistory, S007_ContainerStatus,
+    S008_ShippingCompany, S009_Vessel, S010_Voyage, S011_Leg,
+    S012_Port, S013_PortPair, S014_Country, S015_Client, S016_User,
     S017_Rate
 )
 
-def generate_container_number(owner_code, equipment_type, serial_number):
+# Rows inserted per executemany call
+DEFAULT_CHUNK_SIZE = 10000
+
+# Row counts at scale 1; --scale multiplies them
+CLIENTS = 300
+VOYAGES = 100
+CONTAINERS = 1000
+HISTORIES_PER_CONTAINER = 5
+MANIFESTS = 200
+RATES = 300
+
+COUNTRIES = ["USA", "Netherlands", "China", "India", "Germany", "UK", "Japan", "Australia", "Singapore", "Brazil"]
+PORTS = [
+    ("Port of Los Angeles", "USLAX"),
+    ("Port of Rotterdam", "NLRTM"),
+    ("Shanghai Port", "CNSHA"),
+    ("Port of Mumbai", "INBOM"),
+    ("Hamburg Port", "DEHAM"),
+    ("London Gateway", "GBLGP"),
+    ("Yokohama Port", "JPYOK"),
+    ("Sydney Harbor", "AUSYD"),
+    ("Port of Singapore", "SGSIN"),
+    ("Santos Port", "BRSTS")
+]
+COMPANIES = ["Maersk Line", "CMA CGM", "MSC"]
+PACK_TYPES = ["20ft Container", "40ft Container", "Refrigerated Container", "Flat Rack Container"]
+STATUSES = ["In Transit", "At Port", "Loaded", "Damaged"]
+COMMODITIES = ["Electronics", "Machinery", "Textiles", "Furniture", "Automobiles"]
+USERS = ["Operations Manager", "Harbor Master", "Shipping Clerk", "Cargo Inspector", "Logistics Coordinator"]
+VESSELS = ["MV Atlantic Star", "SS Oceanic", "HMS Victory", "Evergreen"]
+VOYAGE_NAMES = [
+    "Asia Express Line",
+    "Trans Pacific Service",
+    "Europe Direct Route",
+    "Mediterranean Link",
+    "Atlantic Connection",
+    "Americas Service",
+    "Far East Loop",
+    "Indian Ocean Circuit",
+    "Global Express",
+    "Pacific Rim Route"
+]
+
+# Company name components for generating realistic business names
+COMPANY_PREFIXES = ["Global", "Inter", "Trans", "Pacific", "Atlantic", "Euro", "Asian", "United", "International", "Premier"]
+COMPANY_TYPES = ["Logistics", "Trading", "Imports", "Exports", "Freight", "Supply Chain", "Distribution", "Shipping", "Cargo", "Transport"]
+COMPANY_SUFFIXES = ["Corp", "Ltd", "Inc", "Group", "Holdings", "Solutions", "Services", "International", "Enterprises", "Partners"]
+
+# Street names for realistic addresses
+STREET_TYPES = ["Street", "Avenue", "Boulevard", "Road", "Lane", "Drive", "Way", "Plaza", "Court", "Park"]
+STREET_NAMES = ["Commerce", "Industry", "Trade", "Harbor", "Port", "Maritime", "Shipping", "Business", "Enterprise", "Corporate"]
+
+# First and last names for contact persons
+FIRST_NAMES = ["James", "John", "Robert", "Michael", "William", "David", "Richard", "Joseph", "Thomas", "Christopher",
+               "Mary", "Patricia", "Jennifer", "Linda", "Elizabeth", "Barbara", "Susan", "Jessica", "Sarah", "Karen"]
+LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez",
+              "Anderson", "Taylor", "Thomas", "Moore", "Jackson", "Martin", "Lee", "Thompson", "White", "Harris"]
+
+# Cities with their corresponding country IDs
+CITY_COUNTRY_MAPPING = [
+    ("Los Angeles", 1), ("San Francisco", 1), ("New York", 1),  # USA
+    ("Rotterdam", 2), ("Amsterdam", 2), ("Antwerp", 2),  # Netherlands
+    ("Shanghai", 3), ("Shenzhen", 3), ("Guangzhou", 3),  # China
+    ("Mumbai", 4), ("Chennai", 4), ("Kolkata", 4),  # India
+    ("Hamburg", 5), ("Bremen", 5), ("Düsseldorf", 5),  # Germany
+]
+COUNTRY_CODES = {1: "1", 2: "31", 3: "86", 4: "91", 5: "49"}  # USA, Netherlands, China, India, Germany
+
+# The fields bill_of_lading_prefix reads, kept in memory instead of querying for them
+Voyage = namedtuple("Voyage", "id name rotation_number")
+Port = namedtuple("Port", "id prefix")
+
+def bulk_insert(model, rows, chunk_size, stats):
     """
-    Generate an ISO 6346-compliant container number.
-    Args:
-        owner_code (str): The 4-letter owner code (e.g., MAEU, CSQU).
-        equipment_type (str): The 3-character equipment identifier (e.g., 22G, 45R).
-        serial_number (int): The 6-digit unique serial number.
-    Returns:
-        str: A valid container number with a check digit.
+    Insert rows, an iterable of column dicts, into the table of model with
+    Core executemany, chunk_size rows per call, committing once at the end.
+    Rows are generated as they are consumed, so memory stays flat however
+    many there are. Records (table, rows, seconds) in stats.
     """
-    container_base = f"{owner_code}{equipment_type}{serial_number:06d}"
-    
-    # Calculate the check digit
-    char_weights = {str(i): i for i in range(10)}
-    char_weights.update({chr(i): i - 55 for i in range(65, 91)})  # A=10, B=11, ..., Z=35
-    total = sum(char_weights[char] * (2 ** idx) for idx, char in enumerate(container_base))
-    check_digit = total % 11
-    check_digit = 0 if check_digit == 10 else check_digit
+    table = model.__table__
+    statement = insert(table)
+    rows = iter(rows)
+    count = 0
+    started = time.perf_counter()
+    while chunk := list(islice(rows, chunk_size)):
+        db.session.execute(statement, chunk)
+        count += len(chunk)
+    db.session.commit()
+    elapsed = time.perf_counter() - started
+
+    stats.append((table.name, count, elapsed))
+    print(f"  {table.name}: {count:,} rows in {elapsed:.2f}s ({count / max(elapsed, 1e-9):,.0f} rows/s)")
+    return count
 
-    return f"{container_base}{check_digit}"
+def client_rows(count):
+    """Clients with realistic company names, addresses and contact details."""
+    for _ in range(count):
+        company_name = f"{random.choice(COMPANY_PREFIXES)} {random.choice(COMPANY_TYPES)} {random.choice(COMPANY_SUFFIXES)}"
+        street = f"{random.choice(STREET_NAMES)} {random.choice(STREET_TYPES)}"
+        city, country_id = random.choice(CITY_COUNTRY_MAPPING)
+        contact_first = random.choice(FIRST_NAMES)
+        contact_last = random.choice(LAST_NAMES)
+        email_domain = company_name.lower().split()[0] + ".com"
+        yield {
+            "name": company_name,
+            "address": f"{random.randint(1, 999)} {street}",
+            "town": city,
+            "country_id": country_id,
+            "contact_person": f"{contact_first} {contact_last}",
+            "email": f"{contact_first.lower()}.{contact_last.lower()}@{email_domain}",
+            "phone": f"+{COUNTRY_CODES[country_id]} {random.randint(100, 999)} {random.randint(1000000, 9999999)}"
+        }
 
-def generate_bill_of_lading(voyage, pol, pod, sequence_counters):
+def leg_rows(voyage_ports, now):
+    """The legs of every voyage, calling at its ports in order."""
+    for voyage_id, port_ids in voyage_ports.items():
+        base_date = now - timedelta(days=random.randint(0, 30))
+        for leg_num, port_id in enumerate(port_ids):
+            arrival_date = base_date + timedelta(days=leg_num * 3)
+            yield {
+                "voyage_id": voyage_id,
+                "leg_number": leg_num + 1,
+                "port_id": port_id,
+                "eta": arrival_date,
+                "etd": arrival_date + timedelta(days=1)
+            }
+
+def container_history_rows(containers, per_container, clients, now):
+    """per_container status changes for every container."""
+    for container_id in range(1, containers + 1):
+        for _ in range(per_container):
+            yield {
+                "container_id": container_id,
+                "port_id": random.randint(1, len(PORTS)),
+                "client_id": random.randint(1, clients),
+                "container_status_id": random.randint(1, len(STATUSES)),
+                "damage": random.choice(["None", "Minor", "Major"]),
+                "updated": now - timedelta(days=random.randint(1, 365))
+            }
+
+def manifest_rows(count, voyages, voyage_ports, ports, clients, bills_of_lading, now, sequences):
     """
-    Generate a bill of lading number in the format: VOYAGE-ROT-POL-POD-SEQ
+    Manifests between consecutive ports of a random voyage. Their bill of
+    lading numbers are appended to bills_of_lading, in id order. Sequence
+    numbers come from sequences, a SequenceAllocator, so manifests created
+    later by the app carry on from them.
     """
-    # Get voyage abbreviation (first letter of each word, max 4 letters)
-    voyage_name = ''.join(word[0].upper() for word in voyage.name.split())[:4]
-    
-    # Get port codes
-    pol_code = pol.prefix[-3:]  # Last 3 chars of port prefix
-    pod_code = pod.prefix[-3:]  # Last 3 chars of port prefix
-    
-    # Create the combination key for sequence tracking
-    # Include voyage ID to ensure uniqueness across voyages
-    combo_key = f"{voyage_name}-{voyage.rotation_number:03d}-{pol_code}-{pod_code}-{voyage.id}"
-    
-    # Get and increment sequence number
-    if combo_key not in sequence_counters:
-        sequence_counters[combo_key] = 1
-    else:
-        sequence_counters[combo_key] += 1
-    
-    # Format the bill of lading number (without including voyage.id in the final number)
-    return f"{voyage_name}-{voyage.rotation_number:03d}-{pol_code}-{pod_code}-{sequence_counters[combo_key]:05d}"
+    for _ in range(count):
+        voyage = random.choice(voyages)
+        port_ids = voyage_ports[voyage.id]
+        leg_idx = random.randint(0, len(port_ids) - 2)
+        pol, pod = ports[port_ids[leg_idx]], ports[port_ids[leg_idx + 1]]
+        prefix = bill_of_lading_prefix(voyage, pol, pod)
+        # Reserved in the session's transaction, which writes the manifests
+        bill_of_lading = f"{prefix}-{sequences.next(prefix, db.session.connection()):05d}"
+        bills_of_lading.append(bill_of_lading)
+        yield {
+            "bill_of_lading": bill_of_lading,
+            "shipper_id": random.randint(1, clients),
+            "consignee_id": random.randint(1, clients),
+            "vessel_id": random.randint(1, len(VESSELS)),
+            "voyage_id": voyage.id,
+            "port_of_loading_id": pol.id,
+            "port_of_discharge_id": pod.id,
+            "place_of_delivery": random.choice(["Warehouse A", "Terminal B", "Distribution Center C"]),
+            "place_of_receipt": random.choice(["Factory X", "Supplier Y", "Warehouse Z"]),
+            "clauses": "Standard shipping terms apply",
+            "date_of_receipt": now
+        }
+
+def line_item_rows(bills_of_lading, containers):
+    """One to five line items for every manifest."""
+    for manifest_id, bill_of_lading in enumerate(bills_of_lading, start=1):
+        for _ in range(random.randint(1, 5)):
+            yield {
+                "manifest_id": manifest_id,
+                "description": f"Cargo item for {bill_of_lading}",
+                "quantity": random.randint(1, 100),
+                "weight": random.randint(100, 5000),
+                "volume": random.randint(1, 100),
+                "pack_type_id": random.randint(1, len(PACK_TYPES)),
+                "commodity_id": random.randint(1, len(COMMODITIES)),
+                "container_id": random.randint(1, containers)
+            }
 
-def populate_data():
+def populate_data(scale=1, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Recreate every table and fill it with test data. scale multiplies the
+    transactional tables: scale 1 makes 200 manifests and 5000 container
+    history rows, scale 1000 makes 200k and 5M. Tables are filled in
+    dependency order from freshly created tables, so the ids of each are
+    1..N and foreign keys are drawn from those ranges without querying.
+    """
     try:
-        print("Starting to populate data...")
-        
-        # Dictionary to track sequence numbers
-        sequence_counters = {}
+        print(f"Starting to populate data at scale {scale}...")
+        now = datetime.now()
+        stats = []
+        clients = CLIENTS * scale
+        voyage_count = VOYAGES * scale
+        containers = CONTAINERS * scale
 
         # Drop all tables and recreate them
         print("Dropping existing tables...")
@@ -78,331 +233,127 @@ def populate_data():
         print("Tables created successfully")
 
         # Populate Level 1: Static Context
-        print("Creating countries...")
-        countries = [
-            S014_Country(name=country)
-            for country in ["USA", "Netherlands", "China", "India", "Germany", "UK", "Japan", "Australia", "Singapore", "Brazil"]
-        ]
-        db.session.add_all(countries)
-        db.session.commit()
-
-        print("Creating ports...")
-        ports = [
-            S012_Port(name=name, country_id=random.randint(1, len(countries)), prefix=prefix)
-            for i, (name, prefix) in enumerate([
-                ("Port of Los Angeles", "USLAX"),
-                ("Port of Rotterdam", "NLRTM"),
-                ("Shanghai Port", "CNSHA"),
-                ("Port of Mumbai", "INBOM"),
-                ("Hamburg Port", "DEHAM"),
-                ("London Gateway", "GBLGP"),
-                ("Yokohama Port", "JPYOK"),
-                ("Sydney Harbor", "AUSYD"),
-                ("Port of Singapore", "SGSIN"),
-                ("Santos Port", "BRSTS")
-            ], start=1)
-        ]
-        db.session.add_all(ports)
-        db.session.commit()
-
-        print("Creating shipping companies...")
-        companies = [
-            S008_ShippingCompany(name=name)
-            for name in ["Maersk Line", "CMA CGM", "MSC"]
-        ]
-        db.session.add_all(companies)
-        db.session.commit()
-
-        print("Creating pack types...")
-        packtypes = [
-            S004_PackType(name=type_name, description=f"{type_name} Description")
-            for type_name in ["20ft Container", "40ft Container", "Refrigerated Container", "Flat Rack Container"]
-        ]
-        db.session.add_all(packtypes)
-        db.session.commit()
-
-        print("Creating container statuses...")
-        statuses = [
-            S007_ContainerStatus(name=status, description=f"Container is {status.lower()}")
-            for status in ["In Transit", "At Port", "Loaded", "Damaged"]
-        ]
-        db.session.add_all(statuses)
-        db.session.commit()
-
-        # Company name components for generating realistic business names
-        company_prefixes = ["Global", "Inter", "Trans", "Pacific", "Atlantic", "Euro", "Asian", "United", "International", "Premier"]
-        company_types = ["Logistics", "Trading", "Imports", "Exports", "Freight", "Supply Chain", "Distribution", "Shipping", "Cargo", "Transport"]
-        company_suffixes = ["Corp", "Ltd", "Inc", "Group", "Holdings", "Solutions", "Services", "International", "Enterprises", "Partners"]
-        
-        # Street names for realistic addresses
-        street_types = ["Street", "Avenue", "Boulevard", "Road", "Lane", "Drive", "Way", "Plaza", "Court", "Park"]
-        street_names = ["Commerce", "Industry", "Trade", "Harbor", "Port", "Maritime", "Shipping", "Business", "Enterprise", "Corporate"]
-        
-        # First and last names for contact persons
-        first_names = ["James", "John", "Robert", "Michael", "William", "David", "Richard", "Joseph", "Thomas", "Christopher",
-                      "Mary", "Patricia", "Jennifer", "Linda", "Elizabeth", "Barbara", "Susan", "Jessica", "Sarah", "Karen"]
-        last_names = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez",
-                     "Anderson", "Taylor", "Thomas", "Moore", "Jackson", "Martin", "Lee", "Thompson", "White", "Harris"]
-
-        # Cities with their corresponding country IDs
-        city_country_mapping = [
-            ("Los Angeles", 1), ("San Francisco", 1), ("New York", 1),  # USA
-            ("Rotterdam", 2), ("Amsterdam", 2), ("Antwerp", 2),  # Netherlands
-            ("Shanghai", 3), ("Shenzhen", 3), ("Guangzhou", 3),  # China
-            ("Mumbai", 4), ("Chennai", 4), ("Kolkata", 4),  # India
-            ("Hamburg", 5), ("Bremen", 5), ("Düsseldorf", 5),  # Germany
-        ]
+        print("Creating reference data...")
+        bulk_insert(S014_Country, ({"name": name} for name in COUNTRIES), chunk_size, stats)
+        bulk_insert(S012_Port, (
+            {"name": name, "country_id": random.randint(1, len(COUNTRIES)), "prefix": prefix}
+            for name, prefix in PORTS
+        ), chunk_size, stats)
+        bulk_insert(S008_ShippingCompany, ({"name": name} for name in COMPANIES), chunk_size, stats)
+        bulk_insert(S004_PackType, (
+            {"name": name, "description": f"{name} Description"} for name in PACK_TYPES
+        ), chunk_size, stats)
+        bulk_insert(S007_ContainerStatus, (
+            {"name": status, "description": f"Container is {status.lower()}"} for status in STATUSES
+        ), chunk_size, stats)
+        bulk_insert(S003_Commodity, (
+            {"name": name, "description": f"Shipments of {name.lower()}"} for name in COMMODITIES
+        ), chunk_size, stats)
+        bulk_insert(S016_User, (
+            {"name": role, "email": f"{role.lower().replace(' ', '_')}@harbor.com", "password_hash": "hashed_password"}
+            for role in USERS
+        ), chunk_size, stats)
+        bulk_insert(S009_Vessel, (
+            {"name": name, "shipping_company_id": random.randint(1, len(COMPANIES))} for name in VESSELS
+        ), chunk_size, stats)
+        bulk_insert(S013_PortPair, (
+            {
+                "pol_id": random.randint(1, len(PORTS)), "pod_id": random.randint(1, len(PORTS)),
+                "distance": random.randint(500, 2000), "distance_rate_code": f"RATE_{i:03d}"
+            }
+            for i in range(50)
+        ), chunk_size, stats)
 
         print("Creating clients...")
-        clients = []
-        for i in range(300):
-            # Generate company name
-            company_name = f"{random.choice(company_prefixes)} {random.choice(company_types)} {random.choice(company_suffixes)}"
-            
-            # Generate address
-            street_number = random.randint(1, 999)
-            street = f"{random.choice(street_names)} {random.choice(street_types)}"
-            
-            # Select city and corresponding country
-            city, country_id = random.choice(city_country_mapping)
-            
-            # Generate contact person
-            contact_first = random.choice(first_names)
-            contact_last = random.choice(last_names)
-            contact_person = f"{contact_first} {contact_last}"
-            
-            # Generate business email
-            email_domain = company_name.lower().split()[0] + ".com"
-            email = f"{contact_first.lower()}.{contact_last.lower()}@{email_domain}"
-            
-            # Generate international phone number based on country
-            country_codes = {1: "1", 2: "31", 3: "86", 4: "91", 5: "49"}  # USA, Netherlands, China, India, Germany
-            area_code = random.randint(100, 999)
-            local_number = random.randint(1000000, 9999999)
-            phone = f"+{country_codes[country_id]} {area_code} {local_number}"
-            
-            client = S015_Client(
-                name=company_name,
-                address=f"{street_number} {street}",
-                town=city,
-                country_id=country_id,
-                contact_person=contact_person,
-                email=email,
-                phone=phone
-            )
-            clients.append(client)
-        
-        db.session.add_all(clients)
-        db.session.commit()
-
-        print("Creating commodities...")
-        commodities = [
-            S003_Commodity(name=name, description=f"Shipments of {name.lower()}")
-            for name in ["Electronics", "Machinery", "Textiles", "Furniture", "Automobiles"]
-        ]
-        db.session.add_all(commodities)
-        db.session.commit()
-
-        print("Creating users...")
-        users = [
-            S016_User(name=role, email=f"{role.lower().replace(' ', '_')}@harbor.com", password_hash="hashed_password")
-            for role in ["Operations Manager", "Harbor Master", "Shipping Clerk", "Cargo Inspector", "Logistics Coordinator"]
-        ]
-        db.session.add_all(users)
-        db.session.commit()
-
-        print("Creating vessels...")
-        vessels = [
-            S009_Vessel(name=name, shipping_company_id=random.randint(1, len(companies)))
-            for name in ["MV Atlantic Star", "SS Oceanic", "HMS Victory", "Evergreen"]
-        ]
-        db.session.add_all(vessels)
-        db.session.commit()
-
-        print("Creating port pairs...")
-        port_pairs = [
-            S013_PortPair(
-                pol_id=random.randint(1, len(ports)), pod_id=random.randint(1, len(ports)),
-                distance=random.randint(500, 2000), distance_rate_code=f"RATE_{i:03d}"
-            )
-            for i in range(50)
-        ]
-        db.session.add_all(port_pairs)
-        db.session.commit()
+        bulk_insert(S015_Client, client_rows(clients), chunk_size, stats)
 
-        print("Creating voyages...")
+        # Voyages and the ports their legs call at stay in memory for the manifests
+        print("Creating voyages and legs...")
+        ports = {port_id: Port(port_id, prefix) for port_id, (_, prefix) in enumerate(PORTS, start=1)}
         voyages = [
-            S010_Voyage(
-                name=random.choice([
-                    "Asia Express Line",
-                    "Trans Pacific Service",
-                    "Europe Direct Route",
-                    "Mediterranean Link",
-                    "Atlantic Connection",
-                    "Americas Service",
-                    "Far East Loop",
-                    "Indian Ocean Circuit",
-                    "Global Express",
-                    "Pacific Rim Route"
-                ]),
-                vessel_id=random.randint(1, len(vessels)),
-                rotation_number=random.randint(1, 10)
-            )
-            for _ in range(100)
+            Voyage(voyage_id, random.choice(VOYAGE_NAMES), random.randint(1, 10))
+            for voyage_id in range(1, voyage_count + 1)
         ]
-        db.session.add_all(voyages)
-        db.session.commit()
-
-        print("Creating legs...")
-        legs = []
-        for voyage in voyages:
-            num_legs = random.randint(3, 7)
-            voyage_ports = random.sample(ports, num_legs + 1)
-            
-            for leg_num in range(num_legs):
-                base_date = datetime.now() - timedelta(days=random.randint(0, 30))
-                arrival_date = base_date + timedelta(days=leg_num * 3)
-                departure_date = arrival_date + timedelta(days=1)
-                
-                legs.append(
-                    S011_Leg(
-                        voyage_id=voyage.id,
-                        leg_number=leg_num + 1,
-                        port_id=voyage_ports[leg_num].id,
-                        eta=arrival_date.strftime("%Y-%m-%d %H:%M:%S"),
-                        etd=departure_date.strftime("%Y-%m-%d %H:%M:%S")
-                    )
-                )
-        db.session.add_all(legs)
-        db.session.commit()
+        voyage_ports = {
+            voyage.id: random.sample(list(ports), random.randint(3, 7))
+            for voyage in voyages
+        }
+        bulk_insert(S010_Voyage, (
+            {"name": voyage.name, "vessel_id": random.randint(1, len(VESSELS)), "rotation_number": voyage.rotation_number}
+            for voyage in voyages
+        ), chunk_size, stats)
+        bulk_insert(S011_Leg, leg_rows(voyage_ports, now), chunk_size, stats)
 
         print("Creating containers...")
-        containers = [
-            S005_Container(
-                number=generate_container_number(
-                    owner_code=random.choice(["MAEU", "CMAU", "CSQU"]),
+        bulk_insert(S005_Container, (
+            {
+                "number": generate_container_number(
+                    owner_code=sequential_owner_code(i // (MAX_SERIAL + 1)),
                     equipment_type=random.choice(["22G", "45R", "20T", "40H"]),
-                    serial_number=i
+                    serial_number=i % (MAX_SERIAL + 1)
                 ),
-                port_id=random.randint(1, len(ports)),
-                updated=datetime.now()
-            )
-            for i in range(1, 1001)
-        ]
-        db.session.add_all(containers)
-        db.session.commit()
-
-        print("Creating container histories...")
-        for container_id in range(1, 1001):
-            histories = [
-                S006_ContainerHistory(
-                    container_id=container_id,
-                    port_id=random.randint(1, len(ports)),
-                    client_id=random.randint(1, len(clients)),
-                    container_status_id=random.randint(1, len(statuses)),
-                    damage=random.choice(["None", "Minor", "Major"]),
-                    updated=datetime.now() - timedelta(days=random.randint(1, 365))
-                )
-                for _ in range(5)
-            ]
-            db.session.add_all(histories)
-            db.session.commit()
+                "port_id": random.randint(1, len(PORTS)),
+                "updated": now
+            }
+            for i in range(1, containers + 1)
+        ), chunk_size, stats)
+        bulk_insert(
+            S006_ContainerHistory,
+            container_history_rows(containers, HISTORIES_PER_CONTAINER, clients, now),
+            chunk_size, stats
+        )
 
-        print("Creating manifests...")
-        manifest_count = 0
-        retry_count = 0
-        max_retries = 3
-
-        while manifest_count < 200 and retry_count < max_retries:
-            try:
-                voyage_id = random.randint(1, len(voyages))
-                voyage = db.session.get(S010_Voyage, voyage_id)
-                voyage_legs = db.session.query(S011_Leg).filter_by(voyage_id=voyage.id).order_by(S011_Leg.leg_number).all()
-                
-                if len(voyage_legs) < 2:
-                    continue
-                
-                leg_idx = random.randint(0, len(voyage_legs) - 2)
-                loading_leg = voyage_legs[leg_idx]
-                discharge_leg = voyage_legs[leg_idx + 1]
-                
-                pol = db.session.get(S012_Port, loading_leg.port_id)
-                pod = db.session.get(S012_Port, discharge_leg.port_id)
-                
-                bl_number = generate_bill_of_lading(voyage, pol, pod, sequence_counters)
-                
-                manifest = S001_Manifest(
-                    bill_of_lading=bl_number,
-                    shipper_id=random.randint(1, len(clients)),
-                    consignee_id=random.randint(1, len(clients)),
-                    vessel_id=random.randint(1, len(vessels)),
-                    voyage_id=voyage.id,
-                    port_of_loading_id=pol.id,
-                    port_of_discharge_id=pod.id,
-                    place_of_delivery=random.choice(["Warehouse A", "Terminal B", "Distribution Center C"]),
-                    place_of_receipt=random.choice(["Factory X", "Supplier Y", "Warehouse Z"]),
-                    clauses="Standard shipping terms apply",
-                    date_of_receipt=datetime.now().strftime("%Y-%m-%d")
-                )
-                
-                db.session.add(manifest)
-                db.session.commit()
-                manifest_count += 1
-                print(f"Created manifest {manifest_count}/200")
-                
-            except Exception as e:
-                print(f"Error creating manifest: {str(e)}")
-                db.session.rollback()
-                retry_count += 1
-                if retry_count >= max_retries:
-                    print(f"Failed to create manifest after {max_retries} retries")
-                    break
-                continue
-
-        print("Creating line items...")
-        manifests = db.session.query(S001_Manifest).all()
-        for manifest in manifests:
-            line_items = []
-            num_items = random.randint(1, 5)
-            for _ in range(num_items):
-                line_items.append(
-                    S002_LineItem(
-                        manifest_id=manifest.id,
-                        description=f"Cargo item for {manifest.bill_of_lading}",
-                        quantity=random.randint(1, 100),
-                        weight=random.randint(100, 5000),
-                        volume=random.randint(1, 100),
-                        pack_type_id=random.randint(1, len(packtypes)),
-                        commodity_id=random.randint(1, len(commodities)),
-                        container_id=random.randint(1, len(containers))
-                    )
-                )
-            db.session.add_all(line_items)
-            db.session.commit()
-            print(f"Created {len(line_items)} line items for manifest {manifest.bill_of_lading}")
+        print("Creating manifests and line items...")
+        bills_of_lading = []
+        bulk_insert(
+            S001_Manifest,
+            manifest_rows(
+                MANIFESTS * scale, voyages, voyage_ports, ports, clients, bills_of_lading, now, SequenceAllocator()
+            ),
+            chunk_size, stats
+        )
+        bulk_insert(S002_LineItem, line_item_rows(bills_of_lading, containers), chunk_size, stats)
 
         print("Creating rates...")
-        rates = [
-            S017_Rate(
-                distance_rate_code=random.randint(100, 999),
-                commodity_id=random.randint(1, len(commodities)),
-                pack_type_id=random.randint(1, len(packtypes)),
-                client_id=random.randint(1, len(clients)),
-                rate=str(random.randint(15, 200)),
-                effective=datetime.now().strftime("%Y-%m-%d")
-            )
-            for _ in range(300)
-        ]
-        db.session.add_all(rates)
-        db.session.commit()
+        bulk_insert(S017_Rate, (
+            {
+                "distance_rate_code": random.randint(100, 999),
+                "commodity_id": random.randint(1, len(COMMODITIES)),
+                "pack_type_id": random.randint(1, len(PACK_TYPES)),
+                "client_id": random.randint(1, clients),
+                "rate": random.randint(15, 200),
+                "effective": now
+            }
+            for _ in range(RATES * scale)
+        ), chunk_size, stats)
 
-        print("Data populated successfully.")
+        # The rows went in while drop_all had removed the search triggers
+        print("Rebuilding search indexes...")
+        from app.models.model_setup import create_search_indexes
+        create_search_indexes(rebuild=True)
+
+        total_rows = sum(count for _, count, _ in stats)
+        total_seconds = sum(seconds for _, _, seconds in stats)
+        print(f"Data populated successfully: {total_rows:,} rows in {total_seconds:.2f}s "
+              f"({total_rows / max(total_seconds, 1e-9):,.0f} rows/s).")
+        return stats
     except Exception as e:
         print(f"Error during data population: {str(e)}")
         db.session.rollback()
         raise
 
-if __name__ == "__main__":
+def main():
+    parser = argparse.ArgumentParser(description="Recreate the shipping database with generated test data")
+    parser.add_argument("--scale", type=int, default=1,
+                        help="multiply the generated rows, e.g. 1000 for 200k manifests and 5M container history rows")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="rows inserted per executemany call")
+    args = parser.parse_args()
+    if args.scale < 1 or args.chunk_size < 1:
+        parser.error("--scale and --chunk-size must be at least 1")
+
     app = create_app()
     with app.app_context():
-        populate_data()
+        populate_data(args.scale, args.chunk_size)
+
+if __name__ == "__main__":
+    main()
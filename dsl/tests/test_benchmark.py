@@ -0,0 +1,24 @@
+from importlib import import_module
+
+import pytest
+
+from app.routes.crud import routes as generated_routes
+from app.utils import search
+from dsl.scripts import benchmark
+
+@pytest.mark.parametrize("run", [
+    lambda: benchmark.bench_forms(20, 5),
+    lambda: benchmark.bench_batch(20, [10]),
+    lambda: benchmark.bench_pagination(100, [1, 2], 20, repeat=1),
+    lambda: benchmark.bench_search(100, ["wonka", "0000042"], repeat=1),
+    lambda: benchmark.bench_engine(100, ["wonka"], repeat=1),
+], ids=["forms", "batch", "pagination", "search", "engine"])
+def test_app_benchmarks_run(run, capsys, monkeypatch):
+    """Smoke test the benchmarks that drive the app, so changes to it cannot leave them broken"""
+    # Import the generated route modules first, as the runtime engine's search
+    # engines replace theirs in the process-wide registry until the test ends
+    for table_name in generated_routes.routes:
+        import_module(generated_routes.module_name(table_name))
+    monkeypatch.setattr(search, "_engines", dict(search._engines))
+    run()
+    assert capsys.readouterr().out
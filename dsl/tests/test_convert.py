@@ -12,7 +12,9 @@ from scripts.convert import (
     get_table_name,
     get_constraint_str,
     generate_relationships,
-    get_config
+    get_config,
+    add_schema_fingerprint,
+    read_schema_fingerprint
 )
 
 class TestConversion(unittest.TestCase):
@@ -119,6 +121,18 @@ class TestConversion(unittest.TestCase):
         self.assertIn("lazy='dynamic'", children_rel)
         self.assertIn("backref='s001_test_children'", children_rel)
 
+    def test_relationship_lazy_strategy(self):
+        """Test that lazy: strategies from the JSON replace the default loading"""
+        self.sample_json["Models"]["S001_Test"]["Fields"]["parent_id"]["relationship"]["lazy"] = "joined"
+        self.sample_json["Models"]["S001_Test"]["Relationships"][0]["lazy"] = "selectin"
+        rel_strings = generate_relationships(self.sample_json)['S001_Test']
+        
+        parent_rel = next(r for r in rel_strings if 'parent =' in r)
+        self.assertIn("lazy='joined'", parent_rel)
+        children_rel = next(r for r in rel_strings if 'children =' in r)
+        self.assertIn("lazy='selectin'", children_rel)
+        self.assertNotIn("lazy='dynamic'", children_rel)
+
     def test_invalid_field_type(self):
         """Test handling of invalid field type"""
         type_mapping = get_field_type_mapping()
@@ -164,5 +178,20 @@ class TestConversion(unittest.TestCase):
         self.assertTrue(any("backref='s001_test_created_by'" in r for r in rel_strings))
         self.assertTrue(any("backref='s001_test_updated_by'" in r for r in rel_strings))
 
+    def test_schema_fingerprint(self):
+        """Test that the fingerprint covers the models and that the app's models declare theirs"""
+        content = "class S001_Test(db.Model):\n    id = db.Column(db.Integer)\n\n\n"
+        declared, actual = read_schema_fingerprint(add_schema_fingerprint(content))
+        self.assertEqual(declared, actual)
+
+        changed = add_schema_fingerprint(content).replace("db.Integer", "db.String(40)", 1)
+        declared, actual = read_schema_fingerprint(changed)
+        self.assertNotEqual(declared, actual)
+
+        # Models edited by hand must update their fingerprint, or the app skips creating new tables
+        app_models = Path(__file__).parent.parent.parent / "app" / "models" / "shipping.py"
+        declared, actual = read_schema_fingerprint(app_models.read_text())
+        self.assertEqual(declared, actual)
+
 if __name__ == '__main__':
     unittest.main()
@@ -167,5 +167,40 @@ class TestConversionIntegration(unittest.TestCase):
                 self.assertIn('db.Time', content)
                 self.assertIn('db.Boolean', content)
 
+    def test_incremental_noop_leaves_outputs_untouched(self):
+        """Test that an incremental rerun on an unchanged schema writes nothing"""
+        config = self.get_mock_config(self.dsl_file)
+        config['incremental'] = {'enabled': True, 'cache_file': str(self.json_dir / 'test.json.cache')}
+        output_files = [self.json_dir / 'test.json', self.models_dir / 'test.py', self.flask_models_dir / 'test.py']
+
+        with patch('scripts.convert.get_config') as mock_config:
+            mock_config.return_value = config
+            main()
+            mtimes = [path.stat().st_mtime_ns for path in output_files]
+
+            main()
+            self.assertEqual([path.stat().st_mtime_ns for path in output_files], mtimes)
+
+            # Editing a generated file forces regeneration on the next run
+            with open(output_files[1], 'w') as f:
+                f.write('')
+            main()
+            self.assertIn('class S001_TestModel(db.Model):', output_files[1].read_text())
+
+    def test_incremental_matches_full_conversion(self):
+        """Test that incremental runs produce the same files as a full conversion"""
+        config = self.get_mock_config(self.dsl_file)
+        output_files = [self.json_dir / 'test.json', self.models_dir / 'test.py']
+
+        with patch('scripts.convert.get_config') as mock_config:
+            mock_config.return_value = config
+            main()
+            expected = [path.read_text() for path in output_files]
+
+            config['incremental'] = {'enabled': True, 'cache_file': str(self.json_dir / 'test.json.cache')}
+            main()
+            main(force_full=True)
+            self.assertEqual([path.read_text() for path in output_files], expected)
+
 if __name__ == '__main__':
     unittest.main()
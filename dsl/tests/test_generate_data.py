@@ -0,0 +1,88 @@
+import random
+import sqlite3
+
+import pytest
+
+from app.utils.container_numbers import MAX_SERIAL
+from dsl.scripts.generate_data import JSON_FILE, container_numbers, generate_data, table_order
+
+def dump(database):
+    """Every row of every table, for comparing two databases."""
+    with sqlite3.connect(database) as connection:
+        tables = [name for (name,) in connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 's0%' ORDER BY name"
+        )]
+        return {table: connection.execute(f'SELECT * FROM "{table}" ORDER BY id').fetchall() for table in tables}
+
+def test_table_order_puts_referenced_tables_first():
+    """Test that tables come after the tables their foreign keys reference"""
+    models = {
+        "Child": {"Fields": {"id": {"type": "Integer"}, "parent_id": {"type": "Integer", "foreign_key": "parent.id"}}},
+        "Parent": {"Fields": {"id": {"type": "Integer"}, "parent_id": {"type": "Integer", "foreign_key": "parent.id"}}},
+        "Other": {"Fields": {"id": {"type": "Integer"}}},
+    }
+    assert table_order(models) == ["parent", "other", "child"]
+
+def test_table_order_rejects_cycles():
+    """Test that foreign keys between two tables in both directions are reported"""
+    models = {
+        "A": {"Fields": {"b_id": {"type": "Integer", "foreign_key": "b.id"}}},
+        "B": {"Fields": {"a_id": {"type": "Integer", "foreign_key": "a.id"}}},
+    }
+    with pytest.raises(ValueError, match="a, b"):
+        table_order(models)
+
+def test_output_does_not_depend_on_worker_count(tmp_path):
+    """Test that the same seed generates the same rows in and out of a process pool"""
+    rows = {"s001_manifest": 500, "s011_leg": 400}
+    generate_data(JSON_FILE, tmp_path / "serial.db", rows=rows, seed=7, workers=1, chunk_size=64)
+    generate_data(JSON_FILE, tmp_path / "pool.db", rows=rows, seed=7, workers=2, chunk_size=64)
+
+    serial = dump(tmp_path / "serial.db")
+    assert serial == dump(tmp_path / "pool.db")
+    assert len(serial["s001_manifest"]) == 500
+
+    generate_data(JSON_FILE, tmp_path / "other.db", rows=rows, seed=8, workers=1)
+    assert serial != dump(tmp_path / "other.db")
+
+def test_generated_rows_satisfy_the_schema(tmp_path):
+    """Test that unique columns, composite unique indexes and foreign keys hold"""
+    database = tmp_path / "shipping.db"
+    generate_data(JSON_FILE, database, rows={"s001_manifest": 3000, "s011_leg": 2500}, workers=1, chunk_size=1000)
+
+    with sqlite3.connect(database) as connection:
+        bills, distinct_bills = connection.execute(
+            "SELECT count(bill_of_lading), count(DISTINCT bill_of_lading) FROM s001_manifest"
+        ).fetchone()
+        legs, distinct_legs = connection.execute(
+            "SELECT count(*), count(DISTINCT voyage_id || '-' || leg_number) FROM s011_leg"
+        ).fetchone()
+        containers = connection.execute("SELECT number FROM s005_container LIMIT 5").fetchall()
+        indexes = {name for (name,) in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert connection.execute("PRAGMA foreign_key_check").fetchall() == []
+
+    assert bills == distinct_bills == 3000
+    assert legs == distinct_legs == 2500
+    assert all(len(number) == 14 for (number,) in containers)
+    assert "ix_s006_containerhistory_container_id_updated" in indexes
+
+def test_container_numbers_do_not_repeat_past_a_million_rows():
+    """Test that each run of serial numbers gets its own owner code, so rows a million apart differ"""
+    row_ids = [1, MAX_SERIAL, MAX_SERIAL + 1, MAX_SERIAL + 2, 2 * (MAX_SERIAL + 1) + 1]
+    numbers = container_numbers(random.Random(0), row_ids, None, None)
+    # Owner code and serial, leaving out the equipment type, which is drawn at random
+    identities = [number[:4] + number[7:13] for number in numbers]
+    assert identities == ["AAAU000001", "AAAU999999", "AABU000000", "AABU000001", "AACU000001"]
+
+def test_bill_of_lading_sequences_carry_on_from_the_generated_numbers(tmp_path):
+    """Test that the sequence_counter table is moved past every generated bill of lading number"""
+    database = tmp_path / "shipping.db"
+    generate_data(JSON_FILE, database, rows={"s001_manifest": 500}, workers=1, chunk_size=64)
+
+    with sqlite3.connect(database) as connection:
+        last_values = {}
+        for (bill_of_lading,) in connection.execute("SELECT bill_of_lading FROM s001_manifest"):
+            prefix, _, sequence = bill_of_lading.rpartition("-")
+            last_values[prefix] = max(int(sequence), last_values.get(prefix, 0))
+        counters = dict(connection.execute("SELECT name, next_value FROM sequence_counter"))
+    assert counters == {prefix: value + 1 for prefix, value in last_values.items()}
@@ -0,0 +1,81 @@
+import pytest
+from pathlib import Path
+
+from dsl.converter.dsl import convert_dsl_to_json
+from dsl.converter.incremental import split_table_blocks, convert_dsl_to_json_incremental
+
+DSL_DIR = Path(__file__).parent.parent
+
+SAMPLE_DSL = """# Ports and the legs that call at them
+table Port {
+  id Int [pk, increment]
+  name String
+}
+
+table Leg {
+  id Int [pk, increment]
+  port_id Int [ref: > Port.id]
+}
+
+table Vessel {
+  id Int [pk, increment]
+  name String
+}
+"""
+
+def test_split_table_blocks():
+    """Test that each table block is split out with its first line number"""
+    blocks = list(split_table_blocks(SAMPLE_DSL.splitlines(True)))
+
+    assert [first_line for first_line, _ in blocks] == [2, 7, 12]
+    assert blocks[1][1][0] == "table Leg {\n"
+    assert blocks[1][1][-1] == "}\n"
+
+def test_incremental_output_matches_full_conversion(tmp_path):
+    """Test that the incremental converter writes the same JSON as a full conversion"""
+    schema_file = DSL_DIR / "schemas" / "shipping" / "current" / "schema.dsl"
+    full_file = tmp_path / "full.json"
+    incremental_file = tmp_path / "incremental.json"
+
+    expected = convert_dsl_to_json(schema_file, full_file)
+    dsl_json, changed_models, cache = convert_dsl_to_json_incremental(schema_file, incremental_file)
+
+    assert incremental_file.read_text() == full_file.read_text()
+    assert dsl_json == expected
+    assert changed_models == set(expected["Models"])
+
+    # A second run with the cache rebuilds nothing and writes the same output
+    _, changed_models, _ = convert_dsl_to_json_incremental(schema_file, incremental_file, cache)
+    assert changed_models == set()
+    assert incremental_file.read_text() == full_file.read_text()
+
+def test_changed_table_rebuilds_referencing_tables(tmp_path):
+    """Test that changing a table rebuilds it and the tables that reference it"""
+    schema_file = tmp_path / "schema.dsl"
+    json_file = tmp_path / "schema.json"
+    schema_file.write_text(SAMPLE_DSL)
+    _, _, cache = convert_dsl_to_json_incremental(schema_file, json_file)
+
+    schema_file.write_text(SAMPLE_DSL.replace("  name String\n", "  name String [unique]\n", 1))
+    dsl_json, changed_models, cache = convert_dsl_to_json_incremental(schema_file, json_file, cache)
+
+    assert changed_models == {"S001_Port", "S002_Leg"}
+    assert dsl_json["Models"]["S001_Port"]["Fields"]["name"]["unique"] is True
+
+    convert_dsl_to_json(schema_file, tmp_path / "full.json")
+    assert json_file.read_text() == (tmp_path / "full.json").read_text()
+
+def test_moved_table_keeps_line_numbers(tmp_path):
+    """Test that cached tables shifted by an edit above them report their new lines"""
+    schema_file = tmp_path / "schema.dsl"
+    schema_file.write_text(SAMPLE_DSL)
+    _, _, cache = convert_dsl_to_json_incremental(schema_file, tmp_path / "schema.json")
+
+    schema_file.write_text("\n\n" + SAMPLE_DSL)
+    _, changed_models, cache = convert_dsl_to_json_incremental(schema_file, tmp_path / "schema.json", cache)
+
+    assert changed_models == set()
+    vessel_line, vessel = cache["tables"][next(reversed(cache["tables"]))]
+    assert vessel_line == 14
+    assert vessel[0]["line"] == 14
+    assert vessel[0]["fields"][1]["line"] == 16
@@ -1,8 +1,16 @@
 import pytest
-from sqlalchemy import inspect
+from sqlalchemy import Index, inspect
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.schema import CreateIndex
 from pathlib import Path
 import json
+import sys
+import types
 import importlib.util
+from unittest.mock import patch
+from flask_sqlalchemy import SQLAlchemy
+
+from dsl.converter.dsl import index_column_names, table_index_name
 
 def load_json_schema():
     """Load the shipping.json schema file"""
@@ -15,7 +23,12 @@ def load_models():
     models_path = Path(__file__).parent.parent / 'output' / 'models' / 'shipping.py'
     spec = importlib.util.spec_from_file_location("shipping_models", models_path)
     module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
+    # Its `from app import db` gets a db of its own, so the generated classes
+    # do not collide with the app's models, which share their table names
+    app_module = types.ModuleType("app")
+    app_module.db = SQLAlchemy()
+    with patch.dict(sys.modules, {"app": app_module}):
+        spec.loader.exec_module(module)
     return module
 
 def test_indices_match_schema():
@@ -25,7 +38,7 @@ def test_indices_match_schema():
     
     for model_name, model_data in schema['Models'].items():
         # Skip if model has no indices defined
-        if 'Indices' not in model_data:
+        if not model_data.get('Indices'):
             continue
             
         # Get the model class
@@ -35,29 +48,30 @@ def test_indices_match_schema():
         table_args = getattr(model_class, '__table_args__', None)
         assert table_args is not None, f"Model {model_name} should have __table_args__ defined"
         
-        # Convert table_args to list if it's not already
-        indices = [arg for arg in table_args if isinstance(arg, inspect(model_class).db.Index)]
+        indices = {arg.name: arg for arg in table_args if isinstance(arg, Index)}
         
         # Check that all schema indices are present in the model
-        for index_name, columns in model_data['Indices'].items():
+        for index_name, definition in model_data['Indices'].items():
             # Find matching index in model
-            model_index = next((idx for idx in indices if idx.name == index_name), None)
+            model_index = indices.get(table_index_name(model_class.__tablename__, index_name))
             assert model_index is not None, f"Index {index_name} not found in model {model_name}"
             
-            # Check columns match
-            index_columns = [col.name for col in model_index.columns]
-            assert sorted(index_columns) == sorted(columns), \
+            # Check columns match, in order; descending columns are declared as expressions
+            ddl = str(CreateIndex(model_index).compile(dialect=sqlite.dialect()))
+            columns = ddl[ddl.index("(") + 1:ddl.rindex(")")].split(", ")
+            assert [column.split()[0] for column in columns] == index_column_names(definition), \
                 f"Columns don't match for index {index_name} in {model_name}"
+            assert model_index.unique == (isinstance(definition, dict) and definition.get("unique", False))
 
 def test_index_names_are_unique():
     """Test that index names are unique across all models"""
     schema = load_json_schema()
+    models = load_models()
     
     # Collect all index names
     index_names = []
-    for model_data in schema['Models'].values():
-        if 'Indices' in model_data:
-            index_names.extend(model_data['Indices'].keys())
+    for model_name in schema['Models']:
+        index_names.extend(index.name for index in getattr(models, model_name).__table__.indexes)
     
     # Check for duplicates
     assert len(index_names) == len(set(index_names)), \
@@ -77,8 +91,8 @@ def test_foreign_key_indices():
         # Get all indexed fields
         indexed_fields = []
         if 'Indices' in model_data:
-            for columns in model_data['Indices'].values():
-                indexed_fields.extend(columns)
+            for definition in model_data['Indices'].values():
+                indexed_fields.extend(index_column_names(definition))
         
         # Check that each foreign key has an index
         for fk_field in fk_fields:
@@ -97,7 +111,7 @@ def test_index_column_references():
         model_class = getattr(models, model_name)
         model_columns = {col.name: col for col in inspect(model_class).columns}
         
-        for index_name, columns in model_data['Indices'].items():
-            for col_name in columns:
+        for index_name, definition in model_data['Indices'].items():
+            for col_name in index_column_names(definition):
                 assert col_name in model_columns, \
                     f"Index {index_name} references non-existent column {col_name} in {model_name}"
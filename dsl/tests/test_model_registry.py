@@ -0,0 +1,80 @@
+import os
+import pickle
+import pytest
+from pathlib import Path
+from sqlalchemy import create_engine
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import Session, declarative_base
+
+from dsl.converter.sqlalchemy import ModelRegistry, load_json_to_models
+
+JSON_FILE = Path(__file__).parent.parent / "output" / "json" / "shipping.json"
+
+def test_model_name_lookup():
+    """Test that model and table names resolve to model names ignoring case"""
+    registry = ModelRegistry.from_json(JSON_FILE)
+
+    assert registry.model_name("s012_port") == "S012_Port"
+    assert registry.model_name("S012_PORT") == "S012_Port"
+    assert registry.model_name("s999_missing") is None
+
+def test_registry_pickles():
+    """Test that a registry survives pickling for worker processes"""
+    registry = pickle.loads(pickle.dumps(ModelRegistry.from_json(JSON_FILE)))
+
+    assert registry.model_name("s014_country") == "S014_Country"
+    assert list(registry.models) == list(ModelRegistry.from_json(JSON_FILE).models)
+
+def test_load_reuses_cache_until_json_changes(tmp_path):
+    """Test that the disk cache is used until the JSON file changes"""
+    json_file = tmp_path / "shipping.json"
+    cache_file = tmp_path / "shipping.registry"
+    json_file.write_text(JSON_FILE.read_text())
+
+    registry = ModelRegistry.load(json_file, cache_file)
+    assert cache_file.exists()
+
+    # Mark the cached copy so a reload from cache can be told apart
+    registry.models["S012_Port"]["cached"] = True
+    registry.save(cache_file, (str(json_file), json_file.stat().st_size, json_file.stat().st_mtime_ns))
+    assert ModelRegistry.load(json_file, cache_file).models["S012_Port"]["cached"] is True
+
+    stat = json_file.stat()
+    os.utime(json_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert "cached" not in ModelRegistry.load(json_file, cache_file).models["S012_Port"]
+
+def test_load_json_to_models_with_cache(tmp_path):
+    """Test that models are created the same way with and without the cache"""
+    cache_file = tmp_path / "shipping.registry"
+
+    models = load_json_to_models(JSON_FILE, declarative_base())
+    cached_models = load_json_to_models(JSON_FILE, declarative_base(), cache_file=cache_file)
+
+    assert list(cached_models) == list(models)
+    assert cached_models["S012_Port"].__tablename__ == "s012_port"
+    assert hasattr(cached_models["S012_Port"], "country_id_rel")
+
+def test_lazy_raise_flags_lazy_loads():
+    """Test that a ref declared with lazy: "raise" refuses to load its relationship on access"""
+    registry = ModelRegistry({"Models": {
+        "S001_Voyage": {"Fields": {"id": {"type": "Integer", "primary_key": True}}},
+        "S002_Leg": {"Fields": {
+            "id": {"type": "Integer", "primary_key": True},
+            "voyage_id": {
+                "type": "Integer",
+                "foreign_key": "s001_voyage.id",
+                "relationship": {"field_name": "voyage", "target_model": "S001_Voyage", "lazy": "raise"}
+            }
+        }}
+    }})
+    Base = declarative_base()
+    models = registry.create_models(Base)
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        session.add_all([models["S001_Voyage"](id=1), models["S002_Leg"](id=1, voyage_id=1)])
+        session.commit()
+        leg = session.get(models["S002_Leg"], 1)
+        with pytest.raises(InvalidRequestError, match="lazy='raise'"):
+            leg.voyage_id_rel
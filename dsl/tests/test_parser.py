@@ -0,0 +1,288 @@
+import json
+import pytest
+from pathlib import Path
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import declarative_base
+
+from dsl.converter.dsl import (
+    tokenize_dsl,
+    parse_dsl,
+    parse_attributes,
+    parse_type,
+    create_model_map,
+    build_models,
+    convert_dsl_to_json,
+    stream_dsl_to_json,
+)
+from dsl.converter.sqlalchemy import create_model
+from dsl.schemas.validation.schema import DSLValidation
+from dsl.schemas.validation.sqlalchemy_validation import validate_sqlalchemy_schema
+
+DSL_DIR = Path(__file__).parent.parent
+
+INDEXED_DSL = """
+table Voyage {
+  id Int [pk, increment]
+}
+
+table Leg {
+  id Int [pk, increment]
+  voyage_id Int [ref: > Voyage.id]
+  leg_number Int
+  eta DateTime
+  code String
+  indexes {
+    (voyage_id, leg_number) [unique]  # one row per leg of a voyage
+    (eta desc, voyage_id) [where: "eta IS NOT NULL"]
+    `lower(code)` [name: "idx_leg_code"]
+  }
+}
+"""
+
+LAZY_DSL = """
+table Voyage {
+  id Int [pk, increment]
+  legs Leg[] [relationship: "one-to-many", back_populates: "voyage", lazy: "selectin"]
+}
+
+table Leg {
+  id Int [pk, increment]
+  voyage_id Int [ref: > Voyage.id, lazy: joined]
+}
+"""
+
+SAMPLE_DSL = """
+table Parent {
+  id Int [pk, increment]
+  child_id Int [ref: > Child.id]  # forward reference
+  children Child[] [relationship: "one-to-many", back_populates: "parent"]
+}
+
+# Comments and blank lines are skipped
+table Child {
+  id Int [pk, increment]
+  parent_id Int [ref: > Parent.id]
+}
+"""
+
+def test_tokenize_dsl():
+    """Test that the lexer yields table, field and end tokens with line numbers"""
+    tokens = list(tokenize_dsl(SAMPLE_DSL.splitlines()))
+
+    assert tokens[0] == ("table", 2, "Parent")
+    assert tokens[1] == ("field", 3, ("id", "Int", "[pk, increment]"))
+    assert tokens[4] == ("end", 6, None)
+    assert [kind for kind, _, _ in tokens].count("table") == 2
+
+def test_parse_attributes_types_values():
+    """Test that the attribute grammar returns flags and typed option values"""
+    attributes = parse_attributes(
+        '[pk, increment, ref: > Port.id, default: `now()`, back_populates: "a, b", size: 12]'
+    )
+
+    assert attributes["flags"] == {"pk", "increment"}
+    assert attributes["options"] == {
+        "ref": ("Port", "id"),
+        "default": "now()",
+        "back_populates": "a, b",
+        "size": 12,
+    }
+
+def test_attribute_words_outside_flags_are_ignored():
+    """Test that words in references and trailing comments are not read as flags"""
+    tables = parse_dsl([
+        "table Port {",
+        "  id Int [pk, increment]",
+        "  unique_code String",
+        "}",
+        "table Leg {",
+        "  id Int [pk, increment]",
+        "  port_id Int [ref: > Port.unique_code]  # unique increment per voyage",
+        "}",
+    ])
+    result = build_models(tables, create_model_map(tables))
+
+    port_id = result["Models"]["S002_Leg"]["Fields"]["port_id"]
+    assert port_id["foreign_key"] == "s001_port.unique_code"
+    assert "unique" not in port_id
+    assert "auto_increment" not in port_id
+
+def test_reference_table_attribute():
+    """Test that table attributes are parsed and [reference] is recorded on the model"""
+    lines = [
+        "table Country [reference] {",
+        "  id Int [pk, increment]",
+        "  name String [unique]",
+        "}",
+        "table Port {",
+        "  id Int [pk, increment]",
+        "  country_id Int [ref: > Country.id]",
+        "}",
+    ]
+    tokens = list(tokenize_dsl(lines))
+    assert tokens[:2] == [("table", 1, "Country"), ("table_attributes", 1, "[reference]")]
+
+    tables = parse_dsl(lines)
+    result = build_models(tables, create_model_map(tables))
+
+    assert [table["name"] for table in tables] == ["Country", "Port"]
+    assert result["Models"]["S001_Country"]["Reference"] is True
+    assert "Reference" not in result["Models"]["S002_Port"]
+    assert result["Models"]["S002_Port"]["Fields"]["country_id"]["foreign_key"] == "s001_country.id"
+
+def test_index_declarations():
+    """Test that an indexes block is parsed into composite, unique, partial and expression indexes"""
+    tables = parse_dsl(INDEXED_DSL.splitlines())
+    result = build_models(tables, create_model_map(tables))
+
+    assert [index["line"] for index in tables[1]["indexes"]] == [13, 14, 15]
+    assert result["Models"]["S002_Leg"]["Indices"] == {
+        "idx_voyage_id_leg_number": {"columns": ["voyage_id", "leg_number"], "unique": True},
+        "idx_eta_voyage_id": {
+            "columns": [{"column": "eta", "desc": True}, "voyage_id"],
+            "where": "eta IS NOT NULL",
+        },
+        "idx_leg_code": {"columns": [{"expression": "lower(code)"}]},
+    }
+
+def test_declared_index_replaces_foreign_key_index():
+    """Test that a foreign key gets no index of its own when a declared index leads with it"""
+    tables = parse_dsl(INDEXED_DSL.replace("(voyage_id, leg_number) [unique]", "").splitlines())
+    indices = build_models(tables, create_model_map(tables))["Models"]["S002_Leg"]["Indices"]
+
+    # A partial index does not cover every row, so it does not count
+    assert indices["idx_voyage_id"] == ["voyage_id"]
+
+    tables = parse_dsl(INDEXED_DSL.splitlines())
+    indices = build_models(tables, create_model_map(tables))["Models"]["S002_Leg"]["Indices"]
+    assert "idx_voyage_id" not in indices
+
+def test_declared_indexes_create_ddl():
+    """Test that create_model turns declared indexes into the matching CREATE INDEX statements"""
+    tables = parse_dsl(INDEXED_DSL.splitlines())
+    result = build_models(tables, create_model_map(tables))
+    assert validate_sqlalchemy_schema(DSLValidation(**result)) == []
+
+    Base = declarative_base()
+    for model_name, model_data in result["Models"].items():
+        create_model(model_name, model_data, Base)
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with engine.connect() as connection:
+        ddl = dict(connection.execute(text("SELECT name, sql FROM sqlite_master WHERE type = 'index'")).all())
+
+    assert ddl["ix_s002_leg_voyage_id_leg_number"] == (
+        "CREATE UNIQUE INDEX ix_s002_leg_voyage_id_leg_number ON s002_leg (voyage_id, leg_number)"
+    )
+    assert ddl["ix_s002_leg_eta_voyage_id"] == (
+        "CREATE INDEX ix_s002_leg_eta_voyage_id ON s002_leg (eta DESC, voyage_id) WHERE eta IS NOT NULL"
+    )
+    assert ddl["ix_s002_leg_leg_code"] == "CREATE INDEX ix_s002_leg_leg_code ON s002_leg (lower(code))"
+
+def test_index_on_unknown_column_is_reported():
+    """Test that validation reports a declared index over a column the table does not have"""
+    tables = parse_dsl(INDEXED_DSL.replace("(eta desc, voyage_id)", "(arrival, voyage_id)").splitlines())
+    result = build_models(tables, create_model_map(tables))
+
+    assert validate_sqlalchemy_schema(DSLValidation(**result)) == [
+        "Invalid index 'idx_arrival_voyage_id' in S002_Leg: Referenced column 'arrival' does not exist"
+    ]
+
+def test_lazy_loader_strategies():
+    """Test that lazy: is recorded on relationships and on the relationship of a ref"""
+    tables = parse_dsl(LAZY_DSL.splitlines())
+    result = build_models(tables, create_model_map(tables))
+
+    assert result["Models"]["S001_Voyage"]["Relationships"][0]["lazy"] == "selectin"
+    assert result["Models"]["S002_Leg"]["Fields"]["voyage_id"]["relationship"]["lazy"] == "joined"
+    assert validate_sqlalchemy_schema(DSLValidation(**result)) == []
+
+    tables = parse_dsl(SAMPLE_DSL.splitlines())
+    result = build_models(tables, create_model_map(tables))
+    assert "lazy" not in result["Models"]["S001_Parent"]["Relationships"][0]
+
+def test_invalid_lazy_strategy():
+    """Test that unknown strategies are rejected and collection-only ones are reported on refs"""
+    with pytest.raises(ValueError, match="Invalid lazy strategy 'eager'"):
+        parse_dsl(LAZY_DSL.replace('lazy: "selectin"', 'lazy: "eager"').splitlines())
+
+    tables = parse_dsl(LAZY_DSL.replace("lazy: joined", "lazy: dynamic").splitlines())
+    result = build_models(tables, create_model_map(tables))
+    assert validate_sqlalchemy_schema(DSLValidation(**result)) == [
+        "Invalid relationship S002_Leg.voyage: Lazy strategy 'dynamic' only applies to one-to-many relationships"
+    ]
+
+def test_parse_type_parameters():
+    """Test that type parameters use the same grammar"""
+    assert parse_type("String[length: 100]") == {"type": "String", "max_length": 100}
+    assert parse_type("Decimal[precision:12,scale:3]") == {"type": "Decimal", "precision": 12, "scale": 3}
+    assert parse_type("Int") == {"type": "Integer"}
+
+def test_parse_dsl_builds_ast():
+    """Test that the parser captures refs and relationships per field"""
+    tables = parse_dsl(SAMPLE_DSL.splitlines())
+
+    assert [table["name"] for table in tables] == ["Parent", "Child"]
+    parent_fields = {field["name"]: field for field in tables[0]["fields"]}
+    assert parent_fields["child_id"]["ref"] == ("Child", "id")
+    assert parent_fields["children"]["relationship"]["target_model"] == "Child"
+
+def test_forward_references_are_resolved():
+    """Test that references to tables defined later get prefixed names"""
+    tables = parse_dsl(SAMPLE_DSL.splitlines())
+    model_map = create_model_map(tables)
+    result = build_models(tables, model_map)
+
+    parent = result["Models"]["S001_Parent"]
+    assert parent["Fields"]["child_id"]["foreign_key"] == "s002_child.id"
+    assert parent["Relationships"][0]["target_model"] == "S002_Child"
+    assert parent["Indices"] == {"idx_child_id": ["child_id"]}
+
+def test_shipping_schema_output_unchanged(tmp_path):
+    """Test that converting the shipping schema reproduces the committed JSON byte for byte"""
+    schema_file = DSL_DIR / "schemas" / "shipping" / "current" / "schema.dsl"
+    json_file = tmp_path / "shipping.json"
+
+    convert_dsl_to_json(schema_file, json_file)
+
+    expected = (DSL_DIR / "output" / "json" / "shipping.json").read_text()
+    assert json_file.read_text() == expected
+
+def test_streamed_output_matches_full_conversion(tmp_path):
+    """Test that the streaming writer produces the same JSON as json.dump"""
+    schema_file = DSL_DIR / "schemas" / "shipping" / "current" / "schema.dsl"
+    streamed_file = tmp_path / "streamed.json"
+
+    model_map = stream_dsl_to_json(schema_file, streamed_file)
+
+    expected = (DSL_DIR / "output" / "json" / "shipping.json").read_text()
+    assert streamed_file.read_text() == expected
+    assert model_map["Port"] == "S012_Port"
+
+def test_streamed_compact_output_validates(tmp_path):
+    """Test that compact streamed output is unindented and accepted by DSLValidation"""
+    schema_file = DSL_DIR / "schemas" / "shipping" / "current" / "schema.dsl"
+    compact_file = tmp_path / "compact.json"
+
+    stream_dsl_to_json(schema_file, compact_file, compact=True)
+
+    text = compact_file.read_text()
+    data = json.loads(text)
+    assert "\n" not in text
+    assert text == json.dumps(data, separators=(",", ":"))
+    assert data == json.loads((DSL_DIR / "output" / "json" / "shipping.json").read_text())
+    DSLValidation(**data)
+
+def test_streamed_empty_schema(tmp_path):
+    """Test that a schema without tables still streams a valid document"""
+    schema_file = tmp_path / "empty.dsl"
+    schema_file.write_text("# no tables yet\n")
+
+    for compact in (False, True):
+        stream_dsl_to_json(schema_file, tmp_path / "empty.json", compact=compact)
+        convert_dsl_to_json(schema_file, tmp_path / "expected.json")
+        if compact:
+            assert json.loads((tmp_path / "empty.json").read_text()) == json.loads((tmp_path / "expected.json").read_text())
+        else:
+            assert (tmp_path / "empty.json").read_text() == (tmp_path / "expected.json").read_text()
+    assert (tmp_path / "empty.json").read_text() == '{"version":"1.0","Models":{},"Menus":{"Main":[],"Context":{},"Statistics":{}}}'
@@ -0,0 +1,51 @@
+import pytest
+from sqlalchemy import func, select
+
+from app import create_app, db
+from app.models.sequences import SequenceCounter
+from app.models.shipping import S001_Manifest, S002_LineItem, S006_ContainerHistory, S011_Leg
+from app.utils.reference import reference_cache
+from dsl.scripts.generate_data import generate_bill_of_lading
+from dsl.scripts.populate_db import populate_data, Voyage, Port
+
+@pytest.fixture
+def app():
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite://"})
+    with app.app_context():
+        reference_cache.clear()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def test_populate_scales_and_reports_rates(app):
+    """Test that scale multiplies the generated rows, in chunks, with one stats entry per table"""
+    stats = populate_data(scale=2, chunk_size=7)
+    counts = {table: rows for table, rows, _ in stats}
+
+    assert counts["s001_manifest"] == 400
+    assert counts["s006_containerhistory"] == 10000
+    assert db.session.scalar(select(func.count()).select_from(S006_ContainerHistory)) == 10000
+    assert db.session.scalar(select(func.count(func.distinct(S001_Manifest.bill_of_lading)))) == 400
+    assert db.session.scalar(select(func.count()).select_from(S002_LineItem)) == counts["s002_lineitem"]
+
+    # Every bill of lading prefix has a sequence that manifests created later carry on from
+    prefixes = {number.rsplit("-", 1)[0] for number in db.session.scalars(select(S001_Manifest.bill_of_lading))}
+    assert set(db.session.scalars(select(SequenceCounter.name))) == prefixes
+
+    # Manifests load and discharge at consecutive legs of their voyage
+    manifest = db.session.get(S001_Manifest, 1)
+    legs = db.session.scalars(
+        select(S011_Leg.port_id).where(S011_Leg.voyage_id == manifest.voyage_id).order_by(S011_Leg.leg_number)
+    ).all()
+    pol = legs.index(manifest.port_of_loading_id)
+    assert legs[pol + 1] == manifest.port_of_discharge_id
+
+def test_bill_of_lading_sequences_are_shared_by_voyages_with_the_same_prefix():
+    """Test that two voyages with the same name and rotation never get the same bill of lading"""
+    counters = {}
+    pol, pod = Port(1, "USLAX"), Port(2, "NLRTM")
+    first = generate_bill_of_lading(Voyage(1, "Global Express", 3), pol, pod, counters)
+    second = generate_bill_of_lading(Voyage(2, "Global Express", 3), pol, pod, counters)
+
+    assert first == "GE-003-LAX-RTM-00001"
+    assert second == "GE-003-LAX-RTM-00002"
@@ -0,0 +1,71 @@
+import pytest
+from pathlib import Path
+
+from dsl.converter.relationships import RelationshipIndex
+from dsl.converter.generate_models import generate_models, find_relationship_back_populates
+
+MODELS = {
+    "S001_Client": {
+        "Relationships": [
+            {"type": "one-to-many", "target_model": "S002_Manifest", "field_name": "manifests",
+             "back_populates": "shipper"},
+            {"type": "one-to-many", "target_model": "S002_Manifest", "field_name": "consigned_manifests",
+             "back_populates": "consignee"},
+        ]
+    },
+    "S002_Manifest": {"Relationships": []},
+}
+
+def test_index_returns_first_declared_match():
+    """Test that lookups return the first matching relationship, like the linear scans did"""
+    index = RelationshipIndex(MODELS)
+
+    assert index.first("S001_Client", "S002_Manifest")["field_name"] == "manifests"
+    assert index.get("S001_Client", "S002_Manifest", "consigned_manifests")["back_populates"] == "consignee"
+    assert index.find_by_field("S002_Manifest", "consigned_manifests")[0] == "S001_Client"
+    assert index.find_by_back_populates("S002_Manifest", "consignee")[1]["field_name"] == "consigned_manifests"
+
+def test_index_misses():
+    """Test that missing relationships return None"""
+    index = RelationshipIndex(MODELS)
+
+    assert index.first("S002_Manifest", "S001_Client") is None
+    assert index.get("S001_Client", "S002_Manifest", "unknown") is None
+    assert index.find_by_field("S001_Client", "manifests") == (None, None)
+
+def test_model_name_is_case_insensitive():
+    """Test that model names resolve from lowercase table names"""
+    index = RelationshipIndex(MODELS)
+
+    assert index.model_name("s002_manifest") == "S002_Manifest"
+    assert index.model_name("s999_missing") is None
+
+def test_back_populates_uses_index():
+    """Test that back_populates resolution finds the target model's relationship"""
+    data = {"Models": MODELS}
+    index = RelationshipIndex(MODELS)
+
+    assert find_relationship_back_populates("S002_Manifest", "client", "S001_Client", data, index) == "manifests"
+
+def test_generate_models_for_shipping_schema(tmp_path):
+    """Test that models generate for the shipping schema, including ports with plain foreign keys"""
+    json_file = Path(__file__).parent.parent / "output" / "json" / "shipping.json"
+    output_file = tmp_path / "models.py"
+
+    assert generate_models(json_file, output_file) is True
+
+    content = output_file.read_text()
+    compile(content, str(output_file), "exec")
+    assert "class S012_Port(db.Model):" in content
+    assert "    country = db.relationship('S014_Country'" in content
+
+def test_generate_models_skips_unchanged_output(tmp_path):
+    """Test that regenerating identical models leaves the file untouched"""
+    json_file = Path(__file__).parent.parent / "output" / "json" / "shipping.json"
+    output_file = tmp_path / "models.py"
+
+    generate_models(json_file, output_file)
+    mtime = output_file.stat().st_mtime_ns
+
+    assert generate_models(json_file, output_file) is False
+    assert output_file.stat().st_mtime_ns == mtime
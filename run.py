@@ -10,7 +10,5 @@ def make_shell_context():
     }
 
 if __name__ == '__main__':
-    with app.app_context():
-        # Create tables if they don't exist
-        db.create_all()
+    # create_app has already created any missing tables
     app.run(debug=True)